@@ -11,6 +11,9 @@ from datetime import datetime
 from pathlib import Path
 import statistics
 
+from latency_histograms import histogram_from_samples, parse_histograms, percentile
+from sample_cleaning import clean, parse_samples, summarize, trim_warmup
+
 def parse_cycle_counts(filepath):
     """Extract cycle counts from test_speed output file"""
     results = {}
@@ -34,10 +37,13 @@ def parse_cycle_counts(filepath):
     try:
         with open(filepath, 'r') as f:
             content = f.read()
+        histograms = parse_histograms(content)
+        samples = parse_samples(content)
             
         for op in operations:
             # Look for pattern: operation_name: ... median: XXX, average: YYY
-            pattern = rf"{op}[:\s]+.*?median:\s*(\d+).*?average:\s*(\d+)"
+            # optionally followed by a "perf: name=value ..." counter line
+            pattern = rf"{op}[:\s]+.*?median:\s*(\d+).*?average:\s*(\d+)[^\n]*\n?(?:perf:([^\n]*))?"
             match = re.search(pattern, content, re.DOTALL | re.IGNORECASE)
             
             if match:
@@ -45,11 +51,49 @@ def parse_cycle_counts(filepath):
                     'median': int(match.group(1)),
                     'average': int(match.group(2))
                 }
+                if match.group(3):
+                    results[op]['perf'] = parse_perf_line(match.group(3))
+                if samples.get(op):
+                    # Statistics of the steady-state series; keep test_speed's raw figures
+                    cleaned, report = clean(samples[op])
+                    summary = summarize(cleaned)
+                    results[op]['raw_median'] = results[op]['median']
+                    results[op]['raw_average'] = results[op]['average']
+                    results[op]['median'] = summary['median']
+                    results[op]['average'] = summary['average']
+                    results[op]['cleaning'] = report
+                    if op in histograms:
+                        # Tail percentiles: warm-up trimmed only, the outliers are the tail
+                        histograms[op] = histogram_from_samples(trim_warmup(samples[op]),
+                                                                histograms[op]['subbits'])
+                if op in histograms:
+                    results[op]['percentiles'] = {
+                        f"p{p:g}": percentile(histograms[op], p) for p in [90, 99, 99.9]
+                    }
     except Exception as e:
         print(f"Error parsing {filepath}: {e}")
     
     return results
 
+def parse_perf_line(line):
+    """Per-operation hardware counter averages from a test_speed 'perf:' line"""
+    counters = {}
+    for item in line.split():
+        if '=' in item:
+            name, value = item.split('=', 1)
+            counters[name] = float(value)
+    return counters
+
+def counter_columns(perf):
+    """IPC and misses per operation derived from the raw counters"""
+    columns = {}
+    if perf.get('cycles') and 'instructions' in perf:
+        columns['ipc'] = perf['instructions'] / perf['cycles']
+    for name in ['cache_misses', 'branch_misses', 'l1d_read_misses']:
+        if name in perf:
+            columns[name] = perf[name]
+    return columns
+
 def analyze_run_directory(run_dir):
     """Analyze all results in a benchmark run directory"""
     run_data = {
@@ -234,6 +278,64 @@ def generate_comparison_tables(run_data):
                 
                 print(f"Kyber{variant:<11} {eta_config:<20} {eta1:<10} {eta2:<10} {keygen:<10} {enc:<10}")
 
+def generate_counter_table(run_data):
+    """Hardware counters per operation: instructions, IPC and misses per op"""
+    print("\n" + "="*80)
+    print("Hardware counters per operation (perf_event_open)")
+    print("="*80)
+    
+    key_ops = ['poly_compress', 'polyvec_compress', 'poly_getnoise_eta1',
+               'indcpa_keypair', 'indcpa_enc', 'indcpa_dec']
+    found = False
+    for test_name, test_data in run_data['tests'].items():
+        for variant in ['kyber512', 'kyber768', 'kyber1024']:
+            results = test_data['results'].get(variant, {})
+            rows = [(op, results[op]) for op in key_ops if op in results and 'perf' in results[op]]
+            if not rows:
+                continue
+            if not found:
+                print(f"{'Test':<28} {'Variant':<10} {'Operation':<20} {'Median':>9} {'Instr/op':>10} "
+                      f"{'IPC':>6} {'LLC miss/op':>12} {'Br miss/op':>11} {'L1D miss/op':>12}")
+                print("-"*124)
+                found = True
+            for op, data in rows:
+                perf = data['perf']
+                cols = counter_columns(perf)
+                fmt = lambda key, spec: format(cols[key], spec) if key in cols else '--'
+                instr = format(perf['instructions'], '.0f') if 'instructions' in perf else '--'
+                print(f"{test_name:<28} {variant:<10} {op:<20} {data['median']:>9} {instr:>10} "
+                      f"{fmt('ipc', '.2f'):>6} {fmt('cache_misses', '.2f'):>12} "
+                      f"{fmt('branch_misses', '.2f'):>11} {fmt('l1d_read_misses', '.2f'):>12}")
+    
+    if not found:
+        print("No counter data in this run (perf_event_open unavailable or KYBER_PERF=0)")
+
+def generate_cleaning_table(run_data):
+    """Samples dropped by sample_cleaning.py per key operation (only runs with raw samples)"""
+    key_ops = ['poly_compress', 'polyvec_compress', 'indcpa_keypair', 'indcpa_enc', 'indcpa_dec',
+               'crypto_kem_keypair', 'crypto_kem_enc', 'crypto_kem_dec']
+    rows = []
+    for test_name, test_data in run_data['tests'].items():
+        for variant in ['kyber512', 'kyber768', 'kyber1024']:
+            results = test_data['results'].get(variant, {})
+            rows += [(test_name, variant, op, results[op]) for op in key_ops
+                     if op in results and 'cleaning' in results[op]]
+    if not rows:
+        return
+    
+    print("\n" + "="*80)
+    print("Sample cleaning (warm-up trimming, MAD outlier rejection)")
+    print("="*80)
+    print(f"{'Test':<28} {'Variant':<10} {'Operation':<20} {'Raw med':>9} {'Clean med':>10} "
+          f"{'Warm-up':>8} {'Outliers':>9} {'Kept':>6} {'Stationary':>11}")
+    print("-"*120)
+    for test_name, variant, op, data in rows:
+        r = data['cleaning']
+        outliers = r['outliers_low_dropped'] + r['outliers_high_dropped']
+        print(f"{test_name:<28} {variant:<10} {op:<20} {data['raw_median']:>9} {data['median']:>10} "
+              f"{r['warmup_dropped']:>8} {outliers:>9} {r['n_clean']:>6} "
+              f"{'yes' if r['stationary'] else 'NO':>11}")
+
 def generate_performance_summary(run_data):
     """Generate performance summary comparing to baseline"""
     print("\n" + "="*80)
@@ -267,7 +369,16 @@ def generate_performance_summary(run_data):
                         test_val = test_data['results'][variant][op]['median']
                         change = ((test_val - baseline_val) / baseline_val) * 100
                         
-                        print(f"    {op:<20}: {test_val:>7} cycles ({change:+.1f}% vs baseline)")
+                        counters = ""
+                        cols = counter_columns(test_data['results'][variant][op].get('perf', {}))
+                        if 'ipc' in cols:
+                            counters += f", IPC {cols['ipc']:.2f}"
+                        if 'cache_misses' in cols:
+                            counters += f", {cols['cache_misses']:.2f} LLC misses/op"
+                        tail = test_data['results'][variant][op].get('percentiles', {})
+                        if 'p99' in tail:
+                            counters += f", p99 {tail['p99']:.0f}"
+                        print(f"    {op:<20}: {test_val:>7} cycles ({change:+.1f}% vs baseline){counters}")
 
 def main():
     """Main entry point"""
@@ -302,6 +413,8 @@ def main():
     
     # Generate outputs
     generate_comparison_tables(run_data)
+    generate_counter_table(run_data)
+    generate_cleaning_table(run_data)
     generate_performance_summary(run_data)
     
     # Save analysis to file
@@ -313,6 +426,8 @@ def main():
     with open(output_file, 'w') as f:
         sys.stdout = f
         generate_comparison_tables(run_data)
+        generate_counter_table(run_data)
+        generate_cleaning_table(run_data)
         generate_performance_summary(run_data)
     sys.stdout = original_stdout
     
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Definitions shared by the Python benchmark drivers
+
+The parameter configurations they run (those of run_cycle_counts.sh) and
+the parsing of the "params: k=.. eta1=.. ..." line every harness prints.
+"""
+
+import re
+
+import build_cache
+
+# Test name -> (params_*.h in kyber/ref/configs, description), as in run_cycle_counts.sh
+CONFIGS = {
+    "baseline_standard": ("params_baseline_standard.h", "Standard Kyber parameters (reference)"),
+    "test1_compression_du10_dv4": ("params_test1_du10_dv4.h", "Compression parameters: du=10, dv=4"),
+    "test2_compression_du11_dv3": ("params_test2_du11_dv3.h", "Compression parameters: du=11, dv=3"),
+    "test3_compression_du9_dv5": ("params_test3_du9_dv5.h", "Compression parameters: du=9, dv=5"),
+    "test4_eta_variations": ("params_test4_eta_variations.h", "Modified eta values for noise distribution"),
+    "kyber1024_special_du11_dv5": ("params_kyber1024_du11_dv5.h", "Kyber1024 with du=11, dv=5"),
+    "kyber1024_special_du10_dv6": ("params_kyber1024_du10_dv6.h", "Kyber1024 with du=10, dv=6"),
+    "kyber1024_special_du12_dv4": ("params_kyber1024_du12_dv4.h", "Kyber1024 with du=12, dv=4"),
+}
+BASELINE = "baseline_standard"
+
+# The baseline and the test1-test4 variations, without the Kyber1024 specials
+TEST_CONFIGS = [name for name in CONFIGS if not name.startswith("kyber1024_special")]
+
+PARAMS_PATTERN = re.compile(r"^\s*params: (.*)$", re.MULTILINE)
+
+
+def config_path(test_name):
+    """params_*.h of a configuration"""
+    return build_cache.KYBER_DIR / "configs" / CONFIGS[test_name][0]
+
+
+def parse_params(text):
+    """{"k", "eta1", "eta2", "du", "dv", ...} from the first params line of a harness output, else {}"""
+    match = PARAMS_PATTERN.search(text)
+    if not match:
+        return {}
+    return {k: int(v) for k, v in (item.split("=") for item in match.group(1).split())}
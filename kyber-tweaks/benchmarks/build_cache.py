@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Content-hash build cache for Kyber benchmark binaries
+
+Binaries are keyed on a hash of the reference sources the targets' Makefile
+rules compile (and the headers they include), the params header,
+the compiler version and the compiler flags, so re-running the benchmark
+suite only compiles configurations whose inputs actually changed.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+KYBER_DIR = (BENCHMARK_DIR / ".." / "kyber" / "ref").resolve()
+CACHE_DIR = Path(os.environ.get("KYBER_BUILD_CACHE", BENCHMARK_DIR / ".build_cache"))
+MAX_ENTRIES = int(os.environ.get("KYBER_BUILD_CACHE_SIZE", "32"))
+
+SPEED_TARGETS = ["test_speed512", "test_speed768", "test_speed1024"]
+
+INCLUDE_RE = re.compile(r'^\s*#\s*include\s+"([^"]+)"', re.MULTILINE)
+VARIABLE_RE = re.compile(r"^([A-Za-z_][A-Za-z0-9_]*)\s*([?:+]?=)\s*(.*)$")
+REFERENCE_RE = re.compile(r"\$\(([A-Za-z_][A-Za-z0-9_]*)\)")
+
+
+def makefile_rules(makefile):
+    """
+    {target: prerequisites} of the explicit rules in a Makefile, with
+    $(VARIABLE) references expanded (the subset of make syntax kyber/ref uses)
+    """
+    text = Path(makefile).read_text().replace("\\\n", " ")
+    variables, rules = {}, {}
+
+    def expand(value, depth=0):
+        if depth > 16:
+            return value
+        return REFERENCE_RE.sub(lambda m: expand(variables.get(m.group(1), ""), depth + 1), value)
+
+    for line in text.splitlines():
+        if not line.strip() or line.startswith(("\t", "#")):
+            continue
+        match = VARIABLE_RE.match(line)
+        if match:
+            name, op, value = match.groups()
+            if op == "+=":
+                variables[name] = f"{variables.get(name, '')} {value}"
+            elif op != "?=" or name not in variables:
+                variables[name] = value
+        elif ":" in line:
+            targets, prerequisites = line.split(":", 1)
+            for target in expand(targets).split():
+                rules[target] = expand(prerequisites).split()
+    return rules
+
+
+def source_files(targets=SPEED_TARGETS, kyber_dir=KYBER_DIR):
+    """
+    Files in kyber/ref that take part in building `targets`: the Makefile,
+    the prerequisites of the targets' rules and the local headers they
+    include (params.h is supplied per config)
+    """
+    rules = makefile_rules(kyber_dir / "Makefile")
+    pending = []
+    for target in targets:
+        if target not in rules:
+            raise ValueError(f"No rule for {target} in {kyber_dir / 'Makefile'}")
+        pending += rules[target]
+
+    names = {"Makefile"}
+    while pending:
+        name = pending.pop()
+        path = kyber_dir / name
+        if name in names or name == "params.h" or not path.is_file():
+            continue
+        names.add(name)
+        if path.suffix in (".c", ".h"):
+            pending += INCLUDE_RE.findall(path.read_text(errors="replace"))
+    return [kyber_dir / name for name in sorted(names)]
+
+
+def compiler_version(cc):
+    """Full version banner of the compiler, part of the cache key"""
+    try:
+        result = subprocess.run([cc, "--version"], capture_output=True, text=True, check=True)
+        return result.stdout
+    except (OSError, subprocess.CalledProcessError):
+        return f"unknown:{cc}"
+
+
+def default_cc():
+    return os.environ.get("CC", "cc")
+
+
+def default_cflags():
+    return os.environ.get("CFLAGS", "")
+
+
+def cache_key(config, targets=SPEED_TARGETS, cc=None, cflags=None, kyber_dir=KYBER_DIR,
+              replace_cflags=False):
+    """SHA-256 over the targets' sources, params header, compiler version, flags and targets"""
+    cc = cc or default_cc()
+    cflags = default_cflags() if cflags is None else cflags
+
+    h = hashlib.sha256()
+    for path in source_files(targets, kyber_dir):
+        h.update(path.name.encode())
+        h.update(b"\0")
+        h.update(path.read_bytes())
+        h.update(b"\0")
+    h.update(b"params.h\0")
+    h.update(Path(config).read_bytes())
+    h.update(b"\0")
+    h.update(compiler_version(cc).encode())
+    h.update(b"\0")
+    h.update(cflags.encode())
+    h.update(b"\0")
+    if replace_cflags:
+        h.update(b"replace_cflags\0")
+    h.update(" ".join(targets).encode())
+    return h.hexdigest()
+
+
+def touch(entry):
+    """Mark a cache entry as most recently used"""
+    now = time.time()
+    os.utime(entry / "manifest.json", (now, now))
+
+
+def evict(cache_dir=CACHE_DIR, max_entries=MAX_ENTRIES, keep=None):
+    """Remove least recently used entries until at most max_entries remain"""
+    entries = [e for e in cache_dir.iterdir()
+               if e != keep and (e / "manifest.json").exists()]
+    entries.sort(key=lambda e: (e / "manifest.json").stat().st_mtime)
+    limit = max_entries - (1 if keep is not None else 0)
+    evicted = []
+    while entries and len(entries) > limit:
+        entry = entries.pop(0)
+        shutil.rmtree(entry, ignore_errors=True)
+        evicted.append(entry.name)
+    return evicted
+
+
+def build(config, targets=SPEED_TARGETS, cc=None, cflags=None,
+          cache_dir=CACHE_DIR, max_entries=MAX_ENTRIES, kyber_dir=KYBER_DIR,
+          replace_cflags=False):
+    """
+    Return (directory, hit) for the binaries of `config`, compiling only on a miss.
+
+    The build runs in a scratch copy of kyber/ref, so the params.h in the
+    source tree is never overwritten. `cflags` are added in front of the
+    Makefile's own flags, or replace them entirely with replace_cflags=True
+    (e.g. to build with -O2 instead of the Makefile's -O3).
+    """
+    cc = cc or default_cc()
+    cflags = default_cflags() if cflags is None else cflags
+    config = Path(config).resolve()
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+
+    key = cache_key(config, targets, cc, cflags, kyber_dir, replace_cflags)
+    entry = cache_dir / key
+
+    if all((entry / t).exists() for t in targets) and (entry / "manifest.json").exists():
+        touch(entry)
+        return entry, True
+
+    scratch = Path(tempfile.mkdtemp(prefix="kyber_build_", dir=cache_dir))
+    try:
+        src = scratch / "src"
+        src.mkdir()
+        for path in source_files(targets, kyber_dir):
+            shutil.copy2(path, src / path.name)
+        shutil.copy2(config, src / "params.h")
+
+        env = dict(os.environ, CFLAGS=cflags)
+        make_args = [f"CC={cc}"] + ([f"CFLAGS={cflags}"] if replace_cflags else [])
+        result = subprocess.run(["make"] + make_args + list(targets), cwd=src, env=env,
+                                capture_output=True, text=True)
+
+        out = scratch / "out"
+        out.mkdir()
+        (out / "build_log.txt").write_text(result.stdout + result.stderr)
+        if result.returncode != 0:
+            raise RuntimeError(f"Build failed for {config.name}:\n{result.stdout}{result.stderr}")
+
+        for t in targets:
+            shutil.move(str(src / t), out / t)
+        manifest = {
+            "config": str(config),
+            "cc": cc,
+            "cflags": cflags,
+            "replace_cflags": replace_cflags,
+            "targets": list(targets),
+            "compiler": (compiler_version(cc).splitlines() or [""])[0],
+            "built": time.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        (out / "manifest.json").write_text(json.dumps(manifest, indent=2))
+
+        # Another driver may have filled the same entry meanwhile; keep theirs
+        try:
+            out.rename(entry)
+        except OSError:
+            if not entry.exists():
+                raise
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    touch(entry)
+    evict(cache_dir, max_entries, keep=entry)
+    return entry, False
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Build (or reuse) Kyber benchmark binaries for a params_*.h configuration"
+    )
+    parser.add_argument("config", help="Path to configs/params_*.h")
+    parser.add_argument("--targets", nargs="+", default=SPEED_TARGETS,
+                        help="Makefile targets to build (default: test_speed512/768/1024)")
+    parser.add_argument("--cc", default=None, help="Compiler (default: $CC or cc)")
+    parser.add_argument("--cflags", default=None, help="Extra CFLAGS (default: $CFLAGS)")
+    parser.add_argument("--replace-cflags", action="store_true",
+                        help="Use --cflags instead of the Makefile's flags, not in addition to them")
+    parser.add_argument("--cache-dir", default=str(CACHE_DIR), help="Cache directory")
+    parser.add_argument("--max-entries", type=int, default=MAX_ENTRIES,
+                        help="Number of cached builds kept (least recently used are evicted)")
+
+    args = parser.parse_args()
+
+    try:
+        entry, hit = build(args.config, args.targets, args.cc, args.cflags,
+                           Path(args.cache_dir), args.max_entries, replace_cflags=args.replace_cflags)
+    except RuntimeError as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
+
+    print(f"{'cache hit' if hit else 'built'}: {Path(args.config).name} -> {entry.name[:12]}",
+          file=sys.stderr)
+    # stdout carries only the directory so shell drivers can capture it
+    print(entry)
+
+
+if __name__ == "__main__":
+    main()
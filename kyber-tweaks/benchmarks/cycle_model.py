@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+"""
+Predictive cycle-count model for unmeasured (du, dv, η1, η2) configurations
+
+Fits one Bayesian linear model per variant and operation on every
+benchmark run measured so far (results/run_*), with the compression and
+noise parameters as features:
+
+    cycles ≈ b0 + b1·(du - du_std) + b2·(dv - dv_std) + b3·(η1 - η1_std) + b4·(η2 - η2_std)
+
+The slopes get a zero-mean Gaussian prior (PRIOR_SLOPE of the mean cycles
+per unit step), so operations that do not depend on a parameter stay flat
+and configurations far from the measured ones get wide predictive
+intervals. Noise is the larger of the replicate scatter and the residual
+scatter; intervals are then widened by the factor that makes the
+leave-one-configuration-out prediction errors consistent with them
+("calib"), so they stay honest where the cost is not linear in the
+parameters. Predictions are in cycles and in microseconds (cycle counter
+rate from the tsc_hz trailer of test_speed, or --tsc-hz).
+
+The configuration of a run comes from the "params:" trailer of test_speed
+or, for older runs, from the params_*.h named in metadata.txt. Medians are
+taken from the cleaned sample series (sample_cleaning.py) when present.
+
+Usage:
+    python3 cycle_model.py fit [RUN_DIR ...]            # all results/run_* by default
+    python3 cycle_model.py predict --variant 512 --du 11 --dv 3 --eta1 3 --eta2 2
+    python3 cycle_model.py predict --model results/model_X/cycle_model.json --variant 768 --du 10 --dv 5
+
+From Python (vectorized, for parameter-search tools):
+    models = cycle_model.load_model(path)["models"]
+    mean, std = cycle_model.predict_many(models, "kyber512", "kyber_encaps", du, dv, eta1, eta2)
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+import bench_common
+import build_cache
+from sample_cleaning import clean, parse_samples
+from toolchain_matrix import parse_speed_output
+
+FEATURES = ["du", "dv", "eta1", "eta2"]
+
+# Standard parameters per variant, the centre of the feature space
+STANDARD = {
+    "kyber512": {"du": 10, "dv": 4, "eta1": 3, "eta2": 2},
+    "kyber768": {"du": 10, "dv": 4, "eta1": 2, "eta2": 2},
+    "kyber1024": {"du": 11, "dv": 5, "eta1": 2, "eta2": 2},
+}
+VARIANT_K = {"kyber512": 2, "kyber768": 3, "kyber1024": 4}
+
+PRIOR_SLOPE = 0.25      # prior std of a slope, fraction of the mean cycles per unit step
+PRIOR_INTERCEPT = 10.0  # prior std of the intercept, fraction of the mean cycles
+NOISE_FLOOR = 0.005     # minimum noise std, fraction of the mean cycles
+
+KEY_OPS = ["poly_compress", "poly_decompress", "polyvec_compress", "polyvec_decompress",
+           "poly_getnoise_eta1", "poly_getnoise_eta2", "indcpa_keypair", "indcpa_enc",
+           "indcpa_dec", "kyber_keypair", "kyber_encaps", "kyber_decaps"]
+
+TSC_PATTERN = re.compile(r"^tsc_hz: (\d+)$", re.MULTILINE)
+
+
+def header_params(config_file, k):
+    """(du, dv, η1, η2) of a params_*.h for KYBER_K=k, evaluated by the C preprocessor"""
+    probe = (f'#include "{config_file}"\n'
+             "du = KYBER_POLYVECCOMPRESSEDBYTES*8/(KYBER_K*KYBER_N)\n"
+             "dv = KYBER_POLYCOMPRESSEDBYTES*8/KYBER_N\n"
+             "eta1 = KYBER_ETA1\n"
+             "eta2 = KYBER_ETA2\n")
+    output = subprocess.run(["gcc", "-E", "-P", f"-DKYBER_K={k}", "-x", "c", "-"], input=probe,
+                            capture_output=True, text=True, check=True).stdout
+    params = {}
+    for line in output.splitlines():
+        name, _, expr = line.partition("=")
+        if name.strip() in FEATURES:
+            if not re.fullmatch(r"[\d\s()*/+-]+", expr):
+                raise ValueError(f"{config_file}: cannot evaluate {name.strip()} = {expr}")
+            params[name.strip()] = eval(expr.replace("/", "//"))
+    return params
+
+
+def read_metadata(test_dir):
+    metadata = {}
+    path = test_dir / "metadata.txt"
+    if path.exists():
+        for line in path.read_text().splitlines():
+            if ":" in line:
+                key, value = line.split(":", 1)
+                metadata[key.strip()] = value.strip()
+    return metadata
+
+
+def load_observations(run_dirs):
+    """One record per run, configuration, variant and operation"""
+    observations = []
+    header_cache = {}
+    for run_dir in run_dirs:
+        for test_dir in sorted(Path(run_dir).iterdir()):
+            if not test_dir.is_dir():
+                continue
+            metadata = read_metadata(test_dir)
+            for variant, k in VARIANT_K.items():
+                result_file = test_dir / f"{variant}.txt"
+                if not result_file.exists():
+                    continue
+                text = result_file.read_text()
+                ops = parse_speed_output(text)
+                if not ops:
+                    continue
+
+                params = bench_common.parse_params(text)
+                if not params:
+                    config = metadata.get("Config File")
+                    if not config:
+                        continue
+                    if (config, k) not in header_cache:
+                        header = build_cache.KYBER_DIR / "configs" / config
+                        header_cache[(config, k)] = header_params(header, k) if header.exists() else None
+                    params = header_cache[(config, k)]
+                    if params is None:
+                        continue
+
+                tsc = TSC_PATTERN.search(text)
+                samples = parse_samples(text)
+                for op, (median, _) in ops.items():
+                    if samples.get(op):
+                        median = float(np.median(clean(samples[op])[0]))
+                    observations.append({
+                        "run": str(run_dir), "test": test_dir.name, "variant": variant, "op": op,
+                        **{f: params[f] for f in FEATURES},
+                        "cycles": float(median), "tsc_hz": int(tsc.group(1)) if tsc else None,
+                    })
+    return observations
+
+
+def design(variant, du, dv, eta1, eta2):
+    std = STANDARD[variant]
+    du, dv, eta1, eta2 = np.broadcast_arrays(*(np.atleast_1d(np.asarray(a, dtype=float))
+                                               for a in (du, dv, eta1, eta2)))
+    return np.column_stack([np.ones_like(du), du - std["du"], dv - std["dv"],
+                            eta1 - std["eta1"], eta2 - std["eta2"]])
+
+
+def fit_one(variant, rows):
+    """Posterior of one (variant, operation) model from its observations"""
+    X = design(variant, *([r[f] for r in rows] for f in FEATURES))
+    y = np.array([r["cycles"] for r in rows])
+    scale = float(np.mean(y))
+
+    # Noise: scatter of repeated measurements of the same configuration
+    groups = {}
+    for r in rows:
+        groups.setdefault(tuple(r[f] for f in FEATURES), []).append(r["cycles"])
+    replicate_ss = sum(float(np.sum((np.array(g) - np.mean(g)) ** 2)) for g in groups.values())
+    replicate_df = sum(len(g) - 1 for g in groups.values())
+    noise_var = (NOISE_FLOOR * scale) ** 2
+    if replicate_df > 0:
+        noise_var = max(noise_var, replicate_ss / replicate_df)
+
+    prior_var = np.array([PRIOR_INTERCEPT] + [PRIOR_SLOPE] * len(FEATURES)) ** 2 * scale ** 2
+    prior_mean = np.array([scale] + [0.0] * len(FEATURES))
+
+    def posterior(noise):
+        precision = X.T @ X / noise + np.diag(1 / prior_var)
+        cov = np.linalg.inv(precision)
+        mean = cov @ (X.T @ y / noise + prior_mean / prior_var)
+        return mean, cov
+
+    mean, cov = posterior(noise_var)
+    # Configurations the features cannot explain: widen the noise to the residual scatter
+    residual = y - X @ mean
+    if len(groups) > 1:
+        residual_var = float(np.sum(residual ** 2)) / max(len(y) - min(len(groups), X.shape[1]), 1)
+        if residual_var > noise_var:
+            noise_var = residual_var
+            mean, cov = posterior(noise_var)
+
+    return {
+        "coef": mean.tolist(), "cov": cov.tolist(), "noise_var": noise_var,
+        "n": len(y), "configs": len(groups), "replicate_dof": replicate_df,
+        "measured": sorted([list(g) + [float(np.mean(v))] for g, v in groups.items()]),
+    }
+
+
+def cross_validate(variant, rows):
+    """
+    Leave one configuration out: refit without it and predict it. Returns
+    the mean relative error, the raw 2σ coverage and the variance of the
+    factor by which the predictive variance must grow so that the
+    standardized errors have unit variance (at least 1).
+    """
+    configs = sorted({tuple(r[f] for f in FEATURES) for r in rows})
+    if len(configs) < 3:
+        return None
+    errors, covered, z2 = [], 0, []
+    for config in configs:
+        train = [r for r in rows if tuple(r[f] for f in FEATURES) != config]
+        actual = float(np.mean([r["cycles"] for r in rows if tuple(r[f] for f in FEATURES) == config]))
+        mean, std = predict_many({variant: {"op": fit_one(variant, train)}}, variant, "op",
+                                 *([c] for c in config))
+        errors.append(abs(mean[0] - actual) / actual * 100)
+        covered += abs(mean[0] - actual) <= 2 * std[0]
+        z2.append(((mean[0] - actual) / std[0]) ** 2)
+    return {"mae_pct": float(np.mean(errors)), "coverage": covered / len(configs),
+            "calibration": max(float(np.mean(z2)), 1.0), "configs": len(configs)}
+
+
+def fit_models(observations):
+    """
+    {variant: {op: model}}; the predictive variance is scaled by the
+    cross-validated calibration factor, so code paths the linear features
+    cannot explain (e.g. the per-d special cases of poly_compress) widen
+    the intervals
+    """
+    by_key = {}
+    for r in observations:
+        by_key.setdefault((r["variant"], r["op"]), []).append(r)
+    models = {}
+    for (variant, op), rows in sorted(by_key.items()):
+        model = fit_one(variant, rows)
+        model["validation"] = cross_validate(variant, rows)
+        if model["validation"]:
+            model["calibration"] = model["validation"]["calibration"]
+        models.setdefault(variant, {})[op] = model
+    return models
+
+
+def predict_many(models, variant, op, du, dv, eta1, eta2):
+    """Predictive mean and std (cycles) for arrays of configurations"""
+    model = models[variant][op]
+    X = design(variant, du, dv, eta1, eta2)
+    coef, cov = np.array(model["coef"]), np.array(model["cov"])
+    mean = X @ coef
+    var = (np.einsum("ij,jk,ik->i", X, cov, X) + model["noise_var"]) * model.get("calibration", 1.0)
+    return mean, np.sqrt(var)
+
+
+def predict(models, variant, du, dv, eta1, eta2, ops=None, tsc_hz=None):
+    """{op: {"cycles", "std", "us", "us_std"}} for one configuration"""
+    result = {}
+    for op in ops or models[variant]:
+        if op not in models[variant]:
+            continue
+        mean, std = predict_many(models, variant, op, du, dv, eta1, eta2)
+        row = {"cycles": float(mean[0]), "std": float(std[0])}
+        if tsc_hz:
+            row["us"] = row["cycles"] / tsc_hz * 1e6
+            row["us_std"] = row["std"] / tsc_hz * 1e6
+        result[op] = row
+    return result
+
+
+def cycle_rate(observations):
+    rates = [r["tsc_hz"] for r in observations if r["tsc_hz"]]
+    return int(np.median(rates)) if rates else None
+
+
+def default_run_dirs():
+    if not os.path.isdir("results"):
+        return []
+    return [os.path.join("results", d) for d in sorted(os.listdir("results")) if d.startswith("run_")]
+
+
+def print_fit_summary(models):
+    print(f"\n{'Variant':<10} {'Operation':<32} {'n':>4} {'cfgs':>5} {'b0':>10} {'/du':>9} {'/dv':>9} "
+          f"{'/η1':>9} {'/η2':>9} {'noise':>8} {'LOO err':>8} {'2σ cov':>7} {'calib':>6}")
+    print("-" * 130)
+    for variant, ops in models.items():
+        for op in KEY_OPS:
+            if op not in ops:
+                continue
+            m = ops[op]
+            s = m["validation"]
+            loo = f"{s['mae_pct']:.1f}%" if s else "--"
+            cov = f"{s['coverage'] * 100:.0f}%" if s else "--"
+            calib = f"{s['calibration'] ** 0.5:.1f}x" if s else "--"
+            b = m["coef"]
+            print(f"{variant:<10} {op:<32} {m['n']:>4} {m['configs']:>5} {b[0]:>10.0f} {b[1]:>9.1f} "
+                  f"{b[2]:>9.1f} {b[3]:>9.1f} {b[4]:>9.1f} {m['noise_var'] ** 0.5:>8.0f} {loo:>8} {cov:>7} "
+                  f"{calib:>6}")
+
+
+def print_prediction(variant, params, result):
+    label = ", ".join(f"{f}={params[f]}" for f in FEATURES)
+    print(f"\n{variant.upper()} ({label}): predicted cycles (±2σ)")
+    print("-" * 80)
+    for op, row in result.items():
+        line = f"{op:<32} {row['cycles']:>12.0f} ± {2 * row['std']:<10.0f}"
+        if "us" in row:
+            line += f" {row['us']:>10.2f} ± {2 * row['us_std']:.2f} µs"
+        print(line)
+
+
+def latest_model():
+    models = sorted(d for d in os.listdir("results") if d.startswith("model_")) if os.path.isdir("results") else []
+    return os.path.join("results", models[-1], "cycle_model.json") if models else None
+
+
+def load_model(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cycle-count model over (du, dv, η1, η2)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    fit_parser = sub.add_parser("fit", help="Fit the model on measured runs")
+    fit_parser.add_argument("run_dirs", nargs="*", help="results/run_* directories (default: all)")
+
+    predict_parser = sub.add_parser("predict", help="Predict an unmeasured configuration")
+    predict_parser.add_argument("--model", help="cycle_model.json (default: latest results/model_*)")
+    predict_parser.add_argument("--variant", type=int, choices=[512, 768, 1024], required=True)
+    for f in FEATURES:
+        predict_parser.add_argument(f"--{f}", type=int, help="Default: the standard value of the variant")
+    predict_parser.add_argument("--ops", nargs="+", default=KEY_OPS)
+    predict_parser.add_argument("--tsc-hz", type=float, help="Cycle counter rate for µs (default: from the model)")
+
+    args = parser.parse_args()
+
+    if args.command == "fit":
+        run_dirs = args.run_dirs or default_run_dirs()
+        if not run_dirs:
+            print("Error: No benchmark runs found!")
+            sys.exit(1)
+        observations = load_observations(run_dirs)
+        if not observations:
+            print("Error: no measurements with a known configuration in the given runs")
+            sys.exit(1)
+        print(f"Fitting on {len(observations)} measurements from {len(run_dirs)} runs")
+        models = fit_models(observations)
+        print_fit_summary(models)
+
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        out_dir = Path("results") / f"model_{timestamp}"
+        out_dir.mkdir(parents=True, exist_ok=True)
+        with open(out_dir / "cycle_model.json", "w") as f:
+            json.dump({"timestamp": timestamp, "runs": run_dirs, "features": FEATURES,
+                       "standard": STANDARD, "tsc_hz": cycle_rate(observations),
+                       "models": models}, f, indent=2)
+        print(f"\nModel saved to: {out_dir / 'cycle_model.json'}")
+        return
+
+    path = args.model or latest_model()
+    if not path:
+        print("Error: no fitted model found, run 'cycle_model.py fit' first")
+        sys.exit(1)
+    data = load_model(path)
+    variant = f"kyber{args.variant}"
+    if variant not in data["models"]:
+        print(f"Error: the model has no measurements of {variant}")
+        sys.exit(1)
+    params = {f: getattr(args, f) if getattr(args, f) is not None else STANDARD[variant][f] for f in FEATURES}
+    tsc_hz = args.tsc_hz or data.get("tsc_hz")
+    if not tsc_hz:
+        print("No cycle counter rate in the model (runs without tsc_hz), use --tsc-hz for µs", file=sys.stderr)
+    result = predict(data["models"], variant, *(params[f] for f in FEATURES), ops=args.ops, tsc_hz=tsc_hz)
+    print_prediction(variant, params, result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+"""
+Deterministic instruction-count benchmarks for Kyber parameter configurations
+
+Cycle counts on shared hosts move by several percent between runs, more
+than the effect of a du/dv tweak. This backend runs test_icount{512,768,1024}
+(the test_speed operations, deterministic randombytes) under callgrind and
+records exact per-operation instruction and memory-access counts, which
+are identical on every run of the same binary. Without valgrind it falls
+back to counting-only perf_event_open counters (user-space instructions,
+near-exact).
+
+Results use the run_cycle_counts.sh layout:
+results/icount_YYYYMMDD_HHMMSS/<test>/{metadata.txt,kyber512.txt,...}
+
+Usage:
+    python3 icount_bench.py run [--backend callgrind|perf] [--tests ...]
+    python3 icount_bench.py analyze [RUN_DIR]
+    python3 icount_bench.py compare BASE_RUN NEW_RUN [--threshold PCT]
+
+Parser checks: python3 -m doctest icount_bench.py
+"""
+
+import argparse
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import bench_common
+import build_cache
+
+ICOUNT_TARGETS = ["test_icount512", "test_icount768", "test_icount1024"]
+
+BASELINE = bench_common.BASELINE
+
+# Primary regression metric first
+METRICS = ["instructions", "data_reads", "data_writes", "d1_misses", "ll_misses", "branches"]
+
+# callgrind events (--cache-sim=yes) summed into each metric
+CALLGRIND_METRICS = {
+    "instructions": ["Ir"],
+    "data_reads": ["Dr"],
+    "data_writes": ["Dw"],
+    "d1_misses": ["D1mr", "D1mw"],
+    "ll_misses": ["DLmr", "DLmw"],
+}
+
+# perf counter names (perfcounters.c) per metric
+PERF_METRICS = {
+    "instructions": "instructions",
+    "branches": "branches",
+    "d1_misses": "l1d_read_misses",
+    "ll_misses": "cache_misses",
+}
+
+OP_PATTERN = re.compile(r"^(\w+):\s*$")
+VALUE_PATTERN = re.compile(r"^(\w+): ([\d.]+)$")
+PERF_PATTERN = re.compile(r"^perf:(.*)$")
+
+
+def parse_harness_output(text):
+    """Operation order, call counts and perf averages printed by test_icount"""
+    ops = {}
+    current = None
+    for line in text.splitlines():
+        line = line.strip()
+        match = OP_PATTERN.match(line)
+        if match:
+            current = match.group(1)
+            ops[current] = {"calls": 0, "perf": {}}
+            continue
+        match = VALUE_PATTERN.match(line)
+        if match and current and match.group(1) == "calls":
+            ops[current]["calls"] = int(match.group(2))
+            continue
+        match = PERF_PATTERN.match(line)
+        if match and current:
+            for item in match.group(1).split():
+                name, value = item.split("=", 1)
+                ops[current]["perf"][name] = float(value)
+    return ops
+
+
+def parse_callgrind(path, prefix="icount_"):
+    """Inclusive event totals of every function whose name starts with `prefix` in a callgrind.out file"""
+    with open(path) as f:
+        return parse_callgrind_lines(f, prefix)
+
+
+def parse_callgrind_lines(lines, prefix="icount_"):
+    """
+    Inclusive event totals of every function whose name starts with `prefix`,
+    keyed by the name without the prefix.
+
+    In a callgrind profile each fn= block lists the function's own cost
+    lines and, after every calls= line, the inclusive cost of that call,
+    so the inclusive cost of a function is the sum of all cost lines in
+    its blocks.
+
+    >>> profile = '''
+    ... events: Ir Dr
+    ... fl=(1) test_icount.c
+    ... fn=(1) icount_NTT
+    ... 16 100 20
+    ... cfl=(2) ntt.c
+    ... cfn=(2) poly_ntt
+    ... calls=1000 16
+    ... 17 5000 700
+    ... fn=(2)
+    ... 3 5000 700
+    ... fn=(3) icount_kyber_encaps
+    ... +2 10 2
+    ... fn=(1)
+    ... *1 1
+    ... totals: 5111 722
+    ... '''
+    >>> parse_callgrind_lines(profile.splitlines())
+    {'NTT': {'Ir': 5101, 'Dr': 720}, 'kyber_encaps': {'Ir': 10, 'Dr': 2}}
+    """
+    events = []
+    names = {}
+    totals = {}
+    current = None
+    for line in lines:
+        line = line.rstrip("\n")
+        if not line:
+            continue
+        if line.startswith("events:"):
+            events = line.split()[1:]
+        elif line.startswith("fn="):
+            name = line[3:].strip()
+            # --compress-strings=yes writes "(id) name" once, then "(id)"
+            match = re.match(r"^\((\d+)\)\s*(.*)$", name)
+            if match:
+                if match.group(2):
+                    names[match.group(1)] = match.group(2)
+                name = names.get(match.group(1), name)
+            current = name if name.startswith(prefix) else None
+        elif current and (line[0].isdigit() or line[0] in "+-*"):
+            costs = line.split()[1:]
+            total = totals.setdefault(current[len(prefix):], dict.fromkeys(events, 0))
+            for event, cost in zip(events, costs):
+                total[event] += int(cost)
+    return totals
+
+
+def run_callgrind(binary, out_dir, variant):
+    """Run one test_icount binary under callgrind, return {op: {metric: per-call count}}"""
+    out_file = out_dir / f"callgrind.out.kyber{variant}"
+    result = subprocess.run(
+        ["valgrind", "--tool=callgrind", "--cache-sim=yes",
+         "--compress-strings=no", "--compress-pos=no",
+         f"--callgrind-out-file={out_file}", str(binary)],
+        capture_output=True, text=True, check=True)
+    harness = parse_harness_output(result.stdout)
+    totals = parse_callgrind(out_file)
+
+    counts = {}
+    for op, info in harness.items():
+        if op not in totals or not info["calls"]:
+            continue
+        counts[op] = {metric: sum(totals[op].get(e, 0) for e in events) / info["calls"]
+                      for metric, events in CALLGRIND_METRICS.items()}
+        counts[op]["instructions_total"] = totals[op].get("Ir", 0)
+        counts[op]["calls"] = info["calls"]
+    return counts
+
+
+def run_perf(binary):
+    """Run one test_icount binary natively, return {op: {metric: per-call count}}"""
+    result = subprocess.run([str(binary)], capture_output=True, text=True, check=True,
+                            env=dict(os.environ, KYBER_PERF="1"))
+    harness = parse_harness_output(result.stdout)
+    counts = {}
+    for op, info in harness.items():
+        if "instructions" not in info["perf"]:
+            continue
+        counts[op] = {metric: info["perf"][name]
+                      for metric, name in PERF_METRICS.items() if name in info["perf"]}
+        counts[op]["calls"] = info["calls"]
+    if not counts:
+        raise RuntimeError("perf_event_open instruction counter unavailable on this host")
+    return counts
+
+
+def format_counts(counts):
+    """kyberN.txt content, in the shape of test_speed output"""
+    lines = []
+    for op, values in counts.items():
+        lines.append(f"{op}: ")
+        for metric in METRICS:
+            if metric in values:
+                lines.append(f"{metric}: {values[metric]:.2f}")
+        lines.append("")
+    return "\n".join(lines) + "\n"
+
+
+def parse_counts_file(path):
+    """Read a kyberN.txt written by format_counts"""
+    counts = {}
+    current = None
+    for line in Path(path).read_text().splitlines():
+        line = line.strip()
+        match = OP_PATTERN.match(line)
+        if match:
+            current = match.group(1)
+            counts[current] = {}
+            continue
+        match = VALUE_PATTERN.match(line)
+        if match and current:
+            counts[current][match.group(1)] = float(match.group(2))
+    return counts
+
+
+def load_run(run_dir):
+    """{test: {kyberN: counts}} for a results/icount_* directory"""
+    run = {}
+    for test_dir in sorted(Path(run_dir).iterdir()):
+        if not test_dir.is_dir():
+            continue
+        variants = {}
+        for variant in ["512", "768", "1024"]:
+            path = test_dir / f"kyber{variant}.txt"
+            if path.exists():
+                variants[f"kyber{variant}"] = parse_counts_file(path)
+        if variants:
+            run[test_dir.name] = variants
+    return run
+
+
+def latest_run(results_dir="results"):
+    runs = sorted(d for d in os.listdir(results_dir) if d.startswith("icount_"))
+    if not runs:
+        print("Error: No instruction-count runs found!")
+        sys.exit(1)
+    return os.path.join(results_dir, runs[-1])
+
+
+def cmd_run(args):
+    backend = args.backend
+    if backend == "auto":
+        backend = "callgrind" if shutil.which("valgrind") else "perf"
+    if backend == "callgrind" and not shutil.which("valgrind"):
+        print("Error: valgrind not found (install it or use --backend perf)")
+        sys.exit(1)
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    run_dir = Path("results") / f"icount_{timestamp}"
+    run_dir.mkdir(parents=True, exist_ok=True)
+    print(f"Results directory: {run_dir}")
+    print(f"Backend: {backend}")
+
+    data = {"timestamp": timestamp, "backend": backend, "tests": {}}
+    for test_name in args.tests:
+        config_file, description = bench_common.CONFIGS[test_name]
+        config = bench_common.config_path(test_name)
+        test_dir = run_dir / test_name
+        test_dir.mkdir(parents=True, exist_ok=True)
+        try:
+            entry, hit = build_cache.build(config, ICOUNT_TARGETS)
+        except RuntimeError as e:
+            print(f"  {test_name}: build failed: {e}", file=sys.stderr)
+            continue
+        print(f"  {test_name}: {'cached build' if hit else 'built'} {entry.name[:12]}")
+        (test_dir / "metadata.txt").write_text(
+            f"Test Name: {test_name}\nConfig File: {config_file}\nDescription: {description}\n"
+            f"Timestamp: {datetime.now()}\nBackend: {backend}\nBuild Cache: {entry.name}\n")
+
+        data["tests"][test_name] = {}
+        for variant in args.variants:
+            binary = entry / f"test_icount{variant}"
+            try:
+                if backend == "callgrind":
+                    counts = run_callgrind(binary, test_dir, variant)
+                else:
+                    counts = run_perf(binary)
+            except (RuntimeError, subprocess.CalledProcessError) as e:
+                print(f"    Kyber{variant} failed: {e}", file=sys.stderr)
+                continue
+            (test_dir / f"kyber{variant}.txt").write_text(format_counts(counts))
+            data["tests"][test_name][f"kyber{variant}"] = counts
+            print(f"    Kyber{variant}: {len(counts)} operations")
+
+    with open(run_dir / "icount_data.json", "w") as f:
+        json.dump(data, f, indent=2)
+    print(f"\nJSON data saved to: {run_dir / 'icount_data.json'}")
+
+
+def pct(new, old):
+    return (new - old) / old * 100 if old else 0.0
+
+
+def cmd_analyze(args):
+    """Instruction counts of every configuration relative to the baseline configuration"""
+    run_dir = args.run_dir or latest_run()
+    run = load_run(run_dir)
+    print(f"Analyzing instruction counts from: {run_dir}")
+    if BASELINE not in run:
+        print("Baseline not found!")
+        return
+
+    for variant in ["kyber512", "kyber768", "kyber1024"]:
+        base = run[BASELINE].get(variant)
+        if not base:
+            continue
+        tests = [t for t in run if t != BASELINE and variant in run[t]]
+        print("\n" + "=" * 100)
+        print(f"{variant.upper()}: instructions per operation (change vs {BASELINE})")
+        print("=" * 100)
+        print(f"{'Operation':<32} {'baseline':>12} " + " ".join(f"{t[:22]:>22}" for t in tests))
+        print("-" * 100)
+        for op, values in base.items():
+            row = f"{op:<32} {values.get('instructions', 0):>12.0f} "
+            for t in tests:
+                other = run[t][variant].get(op, {})
+                if "instructions" in other:
+                    row += f"{other['instructions']:>12.0f} ({pct(other['instructions'], values['instructions']):+6.2f}%) "
+                else:
+                    row += f"{'--':>22} "
+            print(row)
+
+
+def cmd_compare(args):
+    """Regression check between two runs; exit status 1 when a count grew beyond the threshold"""
+    base, new = load_run(args.base), load_run(args.new)
+    regressions = 0
+    changes = 0
+    print(f"{'Test':<28} {'Variant':<10} {'Operation':<32} {'Metric':<13} {'base':>12} {'new':>12} {'change':>9}")
+    print("-" * 120)
+    for test, variants in new.items():
+        for variant, ops in variants.items():
+            for op, values in ops.items():
+                old = base.get(test, {}).get(variant, {}).get(op)
+                if not old:
+                    continue
+                for metric in args.metrics:
+                    if metric not in values or metric not in old or values[metric] == old[metric]:
+                        continue
+                    change = pct(values[metric], old[metric])
+                    changes += 1
+                    flag = ""
+                    if metric == args.metrics[0] and change > args.threshold:
+                        regressions += 1
+                        flag = "  REGRESSION"
+                    print(f"{test:<28} {variant:<10} {op:<32} {metric:<13} {old[metric]:>12.0f} "
+                          f"{values[metric]:>12.0f} {change:>+8.2f}%{flag}")
+    print(f"\n{changes} changed counts, {regressions} regressions above {args.threshold}% "
+          f"in {args.metrics[0]}")
+    sys.exit(1 if regressions else 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Deterministic instruction-count benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("run", help="Collect counts for the configurations")
+    p.add_argument("--backend", choices=["auto", "callgrind", "perf"], default="auto",
+                   help="callgrind (exact) or counting-only perf (default: callgrind if installed)")
+    p.add_argument("--tests", nargs="+", choices=list(bench_common.CONFIGS), default=list(bench_common.CONFIGS))
+    p.add_argument("--variants", nargs="+", type=int, default=[512, 768, 1024],
+                   choices=[512, 768, 1024])
+    p.set_defaults(func=cmd_run)
+
+    p = sub.add_parser("analyze", help="Compare configurations within one run")
+    p.add_argument("run_dir", nargs="?", help="results/icount_* directory (default: latest)")
+    p.set_defaults(func=cmd_analyze)
+
+    p = sub.add_parser("compare", help="Regression check of one run against another")
+    p.add_argument("base", help="Reference results/icount_* directory")
+    p.add_argument("new", help="results/icount_* directory to check")
+    p.add_argument("--threshold", type=float, default=0.0,
+                   help="Allowed increase of the primary metric in percent (default: 0)")
+    p.add_argument("--metrics", nargs="+", choices=METRICS, default=["instructions", "data_reads", "data_writes"],
+                   help="Metrics to report, the first one is the regression metric")
+    p.set_defaults(func=cmd_compare)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
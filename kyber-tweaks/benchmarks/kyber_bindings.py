@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+In-process Python bindings to the Kyber reference implementation
+
+Every configs/params_*.h variant is compiled (through the build cache) into
+libkyber{512,768,1024}_bindings.so with its own symbol prefix
+(KYBER_CONFIG_NAMESPACE), so any number of configurations can be loaded
+into one process and called through ctypes without spawning test binaries.
+
+All buffers are NumPy arrays passed by pointer: uint8 for byte strings,
+int16 of shape (256,) for a poly and (k, 256) for a polyvec. Every function
+accepts an optional `out=` array so callers can reuse buffers.
+"""
+
+import argparse
+import ctypes
+import re
+import sys
+from pathlib import Path
+
+import numpy as np
+
+import build_cache
+
+VARIANTS = {512: 2, 768: 3, 1024: 4}
+
+BINDING_TARGETS = ["libkyber512_bindings.so", "libkyber768_bindings.so", "libkyber1024_bindings.so"]
+
+PARAM_NAMES = [
+    "k", "n", "q", "eta1", "eta2", "du", "dv",
+    "polycompressedbytes", "polyveccompressedbytes",
+    "indcpa_publickeybytes", "indcpa_secretkeybytes",
+    "publickeybytes", "secretkeybytes", "ciphertextbytes", "bytes",
+]
+
+_u8 = ctypes.POINTER(ctypes.c_uint8)
+_i16 = ctypes.POINTER(ctypes.c_int16)
+
+# name -> (restype, argtypes)
+FUNCTIONS = {
+    "keypair": (ctypes.c_int, [_u8, _u8]),
+    "enc": (ctypes.c_int, [_u8, _u8, _u8]),
+    "dec": (ctypes.c_int, [_u8, _u8, _u8]),
+    "enc_batch": (ctypes.c_int, [_u8, _u8, _u8, ctypes.c_size_t]),
+    "dec_batch": (ctypes.c_int, [_u8, _u8, _u8, ctypes.c_size_t]),
+    "gen_matrix": (None, [_i16, _u8, ctypes.c_int]),
+    "indcpa_keypair": (None, [_u8, _u8]),
+    "indcpa_enc": (None, [_u8, _u8, _u8, _u8]),
+    "indcpa_dec": (None, [_u8, _u8, _u8]),
+    "poly_compress": (None, [_u8, _i16]),
+    "poly_decompress": (None, [_i16, _u8]),
+    "poly_tomsg": (None, [_u8, _i16]),
+    "poly_frommsg": (None, [_i16, _u8]),
+    "poly_getnoise_eta1": (None, [_i16, _u8, ctypes.c_uint8]),
+    "poly_getnoise_eta2": (None, [_i16, _u8, ctypes.c_uint8]),
+    "poly_ntt": (None, [_i16]),
+    "poly_invntt_tomont": (None, [_i16]),
+    "polyvec_compress": (None, [_u8, _i16]),
+    "polyvec_decompress": (None, [_i16, _u8]),
+}
+
+
+def config_namespace(config):
+    """C identifier used as symbol prefix for a params_*.h file"""
+    stem = Path(config).stem
+    if stem.startswith("params_"):
+        stem = stem[len("params_"):]
+    return "kyber_" + re.sub(r"[^0-9A-Za-z_]", "_", stem)
+
+
+def _ptr(arr, ctype):
+    return arr.ctypes.data_as(ctype)
+
+
+def _buffer(out, shape, dtype):
+    """Return `out` if it fits, otherwise a new array of the right shape"""
+    if out is None:
+        return np.empty(shape, dtype=dtype)
+    if out.shape != tuple(np.atleast_1d(shape)) or out.dtype != dtype or not out.flags.c_contiguous:
+        raise ValueError(f"out must be a C-contiguous {np.dtype(dtype).name} array of shape {shape}")
+    return out
+
+
+def _input(arr, size, dtype):
+    """View any bytes-like or array input as a contiguous array without copying when possible"""
+    if isinstance(arr, (bytes, bytearray, memoryview)):
+        arr = np.frombuffer(arr, dtype=dtype)
+    arr = np.ascontiguousarray(arr, dtype=dtype)
+    if arr.size != size:
+        raise ValueError(f"expected {size} elements, got {arr.size}")
+    return arr
+
+
+class KyberLibrary:
+    """One Kyber variant of one params configuration, loaded through ctypes"""
+
+    def __init__(self, path, namespace, k):
+        self.path = Path(path)
+        self.namespace = namespace
+        self.prefix = f"{namespace}_k{k}_"
+        self.lib = ctypes.CDLL(str(self.path))
+
+        self.params = {name: ctypes.c_uint32.in_dll(self.lib, self.prefix + "param_" + name).value
+                       for name in PARAM_NAMES}
+        self.k = self.params["k"]
+        self.n = self.params["n"]
+
+        self._fn = {}
+        for name, (restype, argtypes) in FUNCTIONS.items():
+            fn = getattr(self.lib, self.prefix + name)
+            fn.restype = restype
+            fn.argtypes = argtypes
+            self._fn[name] = fn
+
+    def __repr__(self):
+        p = self.params
+        return (f"KyberLibrary({self.namespace}, Kyber{self.k * 256}, du={p['du']}, dv={p['dv']}, "
+                f"eta1={p['eta1']}, eta2={p['eta2']})")
+
+    # KEM
+
+    def keypair(self, pk=None, sk=None):
+        pk = _buffer(pk, self.params["publickeybytes"], np.uint8)
+        sk = _buffer(sk, self.params["secretkeybytes"], np.uint8)
+        self._fn["keypair"](_ptr(pk, _u8), _ptr(sk, _u8))
+        return pk, sk
+
+    def enc(self, pk, ct=None, ss=None):
+        pk = _input(pk, self.params["publickeybytes"], np.uint8)
+        ct = _buffer(ct, self.params["ciphertextbytes"], np.uint8)
+        ss = _buffer(ss, self.params["bytes"], np.uint8)
+        self._fn["enc"](_ptr(ct, _u8), _ptr(ss, _u8), _ptr(pk, _u8))
+        return ct, ss
+
+    def dec(self, ct, sk, ss=None):
+        ct = _input(ct, self.params["ciphertextbytes"], np.uint8)
+        sk = _input(sk, self.params["secretkeybytes"], np.uint8)
+        ss = _buffer(ss, self.params["bytes"], np.uint8)
+        self._fn["dec"](_ptr(ss, _u8), _ptr(ct, _u8), _ptr(sk, _u8))
+        return ss
+
+    def enc_batch(self, pk, n, ct=None, ss=None):
+        """n encapsulations under one public key; returns (n, ct bytes) and (n, 32) arrays"""
+        pk = _input(pk, self.params["publickeybytes"], np.uint8)
+        ct = _buffer(ct, (n, self.params["ciphertextbytes"]), np.uint8)
+        ss = _buffer(ss, (n, self.params["bytes"]), np.uint8)
+        self._fn["enc_batch"](_ptr(ct, _u8), _ptr(ss, _u8), _ptr(pk, _u8), n)
+        return ct, ss
+
+    def dec_batch(self, ct, sk, ss=None):
+        """Decapsulate every row of a (n, ct bytes) array under one secret key"""
+        n = len(ct)
+        ct = _input(ct, n * self.params["ciphertextbytes"], np.uint8)
+        sk = _input(sk, self.params["secretkeybytes"], np.uint8)
+        ss = _buffer(ss, (n, self.params["bytes"]), np.uint8)
+        self._fn["dec_batch"](_ptr(ss, _u8), _ptr(ct, _u8), _ptr(sk, _u8), n)
+        return ss
+
+    # IND-CPA
+
+    def gen_matrix(self, seed, transposed=False, out=None):
+        seed = _input(seed, 32, np.uint8)
+        out = _buffer(out, (self.k, self.k, self.n), np.int16)
+        self._fn["gen_matrix"](_ptr(out, _i16), _ptr(seed, _u8), int(transposed))
+        return out
+
+    def indcpa_keypair(self, pk=None, sk=None):
+        pk = _buffer(pk, self.params["indcpa_publickeybytes"], np.uint8)
+        sk = _buffer(sk, self.params["indcpa_secretkeybytes"], np.uint8)
+        self._fn["indcpa_keypair"](_ptr(pk, _u8), _ptr(sk, _u8))
+        return pk, sk
+
+    def indcpa_enc(self, m, pk, coins, out=None):
+        m = _input(m, 32, np.uint8)
+        pk = _input(pk, self.params["indcpa_publickeybytes"], np.uint8)
+        coins = _input(coins, 32, np.uint8)
+        out = _buffer(out, self.params["ciphertextbytes"], np.uint8)
+        self._fn["indcpa_enc"](_ptr(out, _u8), _ptr(m, _u8), _ptr(pk, _u8), _ptr(coins, _u8))
+        return out
+
+    def indcpa_dec(self, c, sk, out=None):
+        c = _input(c, self.params["ciphertextbytes"], np.uint8)
+        sk = _input(sk, self.params["indcpa_secretkeybytes"], np.uint8)
+        out = _buffer(out, 32, np.uint8)
+        self._fn["indcpa_dec"](_ptr(out, _u8), _ptr(c, _u8), _ptr(sk, _u8))
+        return out
+
+    # Polynomials
+
+    def poly_compress(self, a, out=None):
+        a = _input(a, self.n, np.int16)
+        out = _buffer(out, self.params["polycompressedbytes"], np.uint8)
+        self._fn["poly_compress"](_ptr(out, _u8), _ptr(a, _i16))
+        return out
+
+    def poly_decompress(self, a, out=None):
+        a = _input(a, self.params["polycompressedbytes"], np.uint8)
+        out = _buffer(out, self.n, np.int16)
+        self._fn["poly_decompress"](_ptr(out, _i16), _ptr(a, _u8))
+        return out
+
+    def poly_tomsg(self, a, out=None):
+        a = _input(a, self.n, np.int16)
+        out = _buffer(out, 32, np.uint8)
+        self._fn["poly_tomsg"](_ptr(out, _u8), _ptr(a, _i16))
+        return out
+
+    def poly_frommsg(self, msg, out=None):
+        msg = _input(msg, 32, np.uint8)
+        out = _buffer(out, self.n, np.int16)
+        self._fn["poly_frommsg"](_ptr(out, _i16), _ptr(msg, _u8))
+        return out
+
+    def poly_getnoise_eta1(self, seed, nonce, out=None):
+        seed = _input(seed, 32, np.uint8)
+        out = _buffer(out, self.n, np.int16)
+        self._fn["poly_getnoise_eta1"](_ptr(out, _i16), _ptr(seed, _u8), nonce)
+        return out
+
+    def poly_getnoise_eta2(self, seed, nonce, out=None):
+        seed = _input(seed, 32, np.uint8)
+        out = _buffer(out, self.n, np.int16)
+        self._fn["poly_getnoise_eta2"](_ptr(out, _i16), _ptr(seed, _u8), nonce)
+        return out
+
+    def poly_ntt(self, a):
+        """In place, like the C function; `a` must be a contiguous int16 array"""
+        a = _buffer(a, self.n, np.int16)
+        self._fn["poly_ntt"](_ptr(a, _i16))
+        return a
+
+    def poly_invntt_tomont(self, a):
+        """In place, like the C function; `a` must be a contiguous int16 array"""
+        a = _buffer(a, self.n, np.int16)
+        self._fn["poly_invntt_tomont"](_ptr(a, _i16))
+        return a
+
+    def polyvec_compress(self, a, out=None):
+        a = _input(a, self.k * self.n, np.int16)
+        out = _buffer(out, self.params["polyveccompressedbytes"], np.uint8)
+        self._fn["polyvec_compress"](_ptr(out, _u8), _ptr(a, _i16))
+        return out
+
+    def polyvec_decompress(self, a, out=None):
+        a = _input(a, self.params["polyveccompressedbytes"], np.uint8)
+        out = _buffer(out, (self.k, self.n), np.int16)
+        self._fn["polyvec_decompress"](_ptr(out, _i16), _ptr(a, _u8))
+        return out
+
+
+def build_bindings(config, cc=None, cflags=None):
+    """Compile (or fetch from the build cache) the three shared libraries of a config"""
+    namespace = config_namespace(config)
+    cflags = build_cache.default_cflags() if cflags is None else cflags
+    cflags = f"{cflags} -DKYBER_CONFIG_NAMESPACE={namespace}".strip()
+    entry, _ = build_cache.build(config, BINDING_TARGETS, cc=cc, cflags=cflags)
+    return entry, namespace
+
+
+def load(config, variant, cc=None, cflags=None):
+    """Load one Kyber variant (512/768/1024) of a params_*.h configuration"""
+    entry, namespace = build_bindings(config, cc, cflags)
+    return KyberLibrary(entry / f"libkyber{variant}_bindings.so", namespace, VARIANTS[variant])
+
+
+def load_all(configs=None, variants=(512, 768, 1024)):
+    """Load every variant of every configuration, keyed by (config name, variant)"""
+    if configs is None:
+        configs = sorted((build_cache.KYBER_DIR / "configs").glob("params_*.h"))
+    libs = {}
+    for config in configs:
+        for variant in variants:
+            libs[(Path(config).stem, variant)] = load(config, variant)
+    return libs
+
+
+def self_test(lib, iterations=100):
+    """KEM round trip plus compress/decompress consistency for one library"""
+    for _ in range(iterations):
+        pk, sk = lib.keypair()
+        ct, ss = lib.enc(pk)
+        if not np.array_equal(lib.dec(ct, sk), ss):
+            return False
+
+    pk, sk = lib.keypair()
+    ct, ss = lib.enc_batch(pk, 16)
+    if not np.array_equal(lib.dec_batch(ct, sk), ss):
+        return False
+
+    # Decompression must be a right inverse of compression on its own output
+    seed = np.arange(32, dtype=np.uint8)
+    for nonce in range(iterations):
+        a = lib.poly_getnoise_eta1(seed, nonce % 256)
+        c = lib.poly_compress(a)
+        if not np.array_equal(lib.poly_compress(lib.poly_decompress(c)), c):
+            return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build, load and self-test Kyber bindings")
+    parser.add_argument("configs", nargs="*", help="params_*.h files (default: all in kyber/ref/configs)")
+    parser.add_argument("--iterations", type=int, default=100, help="Round trips per library")
+
+    args = parser.parse_args()
+
+    libs = load_all(args.configs or None)
+    failed = 0
+    for (name, variant), lib in libs.items():
+        ok = self_test(lib, args.iterations)
+        failed += not ok
+        print(f"{'✓' if ok else '✗'} {name:<32} {lib}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
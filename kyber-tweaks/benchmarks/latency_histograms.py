@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Tail latency analysis from the HDR-style histograms of test_speed
+
+speed_print.c writes one "hist: s=<subbits> <index>:<count> ..." line per
+operation (log-bucketed, at most 1.6% bucket width). This script merges
+the histograms of one or more benchmark runs per configuration, variant
+and operation, prints p50/p90/p99/p99.9 tables and plots CDFs per
+du/dv/η configuration. Where test_speed also printed the raw samples, the
+histograms are rebuilt in the same bucket layout from the series with its
+warm-up trimmed (sample_cleaning.trim_warmup); outlier rejection is left
+out, as it would cut the tail being measured.
+
+Usage:
+    python3 latency_histograms.py                      # latest results/run_*
+    python3 latency_histograms.py results/run_A results/run_B --ops kyber_decaps
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+from pathlib import Path
+
+from sample_cleaning import parse_samples, trim_warmup
+
+PERCENTILES = [50, 90, 99, 99.9]
+DEFAULT_OPS = ["kyber_keypair", "kyber_encaps", "kyber_decaps", "indcpa_enc", "indcpa_dec"]
+
+HIST_PATTERN = re.compile(r"^(\w+):\s*\n(?:[^\n]*\n)*?hist: s=(\d+)((?: \d+:\d+)*)$", re.MULTILINE)
+
+
+def bucket_bounds(index, subbits):
+    """[low, high) of a histogram bucket, inverse of hist_index() in speed_print.c"""
+    sub = 1 << subbits
+    if index < sub:
+        return index, index + 1
+    e = (index - sub) // sub + subbits
+    m = (index - sub) % sub
+    width = 1 << (e - subbits)
+    low = (sub + m) << (e - subbits)
+    return low, low + width
+
+
+def bucket_index(value, subbits):
+    """Histogram bucket of a cycle count, same as hist_index() in speed_print.c"""
+    sub = 1 << subbits
+    if value < sub:
+        return value
+    e = value.bit_length() - 1
+    return sub + (e - subbits) * sub + ((value >> (e - subbits)) & (sub - 1))
+
+
+def histogram_from_samples(samples, subbits=6):
+    counts = {}
+    for v in samples:
+        index = bucket_index(v, subbits)
+        counts[index] = counts.get(index, 0) + 1
+    return {"subbits": subbits, "counts": counts}
+
+
+def parse_histograms(text):
+    """{operation: {"subbits": s, "counts": {index: count}}} from test_speed output"""
+    result = {}
+    for match in HIST_PATTERN.finditer(text):
+        counts = {}
+        for item in match.group(3).split():
+            index, count = item.split(":")
+            counts[int(index)] = int(count)
+        result[match.group(1)] = {"subbits": int(match.group(2)), "counts": counts}
+    return result
+
+
+def merge(histograms):
+    """Sum histograms of the same operation (all must share the bucket layout)"""
+    merged = None
+    for h in histograms:
+        if merged is None:
+            merged = {"subbits": h["subbits"], "counts": dict(h["counts"])}
+            continue
+        if h["subbits"] != merged["subbits"]:
+            raise ValueError("cannot merge histograms with different bucket layouts")
+        for index, count in h["counts"].items():
+            merged["counts"][index] = merged["counts"].get(index, 0) + count
+    return merged
+
+
+def total(hist):
+    return sum(hist["counts"].values())
+
+
+def percentile(hist, p):
+    """Value at percentile p (0-100), the midpoint of the bucket that reaches it"""
+    n = total(hist)
+    if n == 0:
+        return None
+    rank = p / 100 * n
+    seen = 0
+    for index in sorted(hist["counts"]):
+        seen += hist["counts"][index]
+        if seen >= rank:
+            low, high = bucket_bounds(index, hist["subbits"])
+            return (low + high - 1) / 2
+    low, high = bucket_bounds(max(hist["counts"]), hist["subbits"])
+    return (low + high - 1) / 2
+
+
+def cdf_points(hist):
+    """(value, cumulative fraction) at the upper edge of every populated bucket"""
+    n = total(hist)
+    points, seen = [], 0
+    for index in sorted(hist["counts"]):
+        seen += hist["counts"][index]
+        points.append((bucket_bounds(index, hist["subbits"])[1], seen / n))
+    return points
+
+
+def read_description(test_dir):
+    metadata = test_dir / "metadata.txt"
+    if metadata.exists():
+        for line in metadata.read_text().splitlines():
+            if line.startswith("Description:"):
+                return line.split(":", 1)[1].strip()
+    return ""
+
+
+def collect(run_dirs):
+    """
+    {test: {"description", "variants": {kyberN: {op: merged histogram}}}}
+    merged over all given runs
+    """
+    collected = {}
+    for run_dir in run_dirs:
+        for test_dir in sorted(Path(run_dir).iterdir()):
+            if not test_dir.is_dir():
+                continue
+            for variant in ["512", "768", "1024"]:
+                result_file = test_dir / f"kyber{variant}.txt"
+                if not result_file.exists():
+                    continue
+                text = result_file.read_text()
+                hists = parse_histograms(text)
+                if not hists:
+                    continue
+                for op, samples in parse_samples(text).items():
+                    if samples and op in hists:
+                        hists[op] = histogram_from_samples(trim_warmup(samples), hists[op]["subbits"])
+                test = collected.setdefault(test_dir.name, {"description": read_description(test_dir),
+                                                            "runs": 0, "variants": {}})
+                ops = test["variants"].setdefault(f"kyber{variant}", {})
+                for op, h in hists.items():
+                    ops.setdefault(op, []).append(h)
+    for test in collected.values():
+        for ops in test["variants"].values():
+            for op in ops:
+                ops[op] = merge(ops[op])
+    return collected
+
+
+def percentile_table(collected, ops):
+    """{test: {variant: {op: {"n", "p50", ..., "max"}}}}"""
+    table = {}
+    for test_name, test in collected.items():
+        for variant, hists in test["variants"].items():
+            for op in ops:
+                if op not in hists:
+                    continue
+                h = hists[op]
+                row = {"n": total(h)}
+                for p in PERCENTILES:
+                    row[f"p{p:g}"] = percentile(h, p)
+                row["max"] = bucket_bounds(max(h["counts"]), h["subbits"])[1] - 1
+                table.setdefault(test_name, {}).setdefault(variant, {})[op] = row
+    return table
+
+
+def print_percentile_table(table, ops):
+    columns = [f"p{p:g}" for p in PERCENTILES] + ["max"]
+    for variant in ["kyber512", "kyber768", "kyber1024"]:
+        for op in ops:
+            rows = [(t, v[variant][op]) for t, v in table.items() if op in v.get(variant, {})]
+            if not rows:
+                continue
+            print("\n" + "=" * 100)
+            print(f"{variant.upper()} {op}: latency percentiles (cycles)")
+            print("=" * 100)
+            print(f"{'Test':<30} {'samples':>8} " + " ".join(f"{c:>10}" for c in columns))
+            print("-" * 100)
+            for test_name, row in rows:
+                print(f"{test_name:<30} {row['n']:>8} " + " ".join(f"{row[c]:>10.0f}" for c in columns))
+
+
+def plot_cdfs(collected, ops, output_dir):
+    """One CDF chart per variant and operation, one line per configuration"""
+    import matplotlib.pyplot as plt
+
+    for variant in ["kyber512", "kyber768", "kyber1024"]:
+        for op in ops:
+            curves = [(t, d["description"], d["variants"][variant][op]) for t, d in collected.items()
+                      if op in d["variants"].get(variant, {})]
+            if not curves:
+                continue
+            fig, (ax, ax_tail) = plt.subplots(1, 2, figsize=(14, 5))
+            fig.suptitle(f"{variant.upper()} {op}: latency CDF", fontsize=14)
+            for test_name, description, h in curves:
+                points = cdf_points(h)
+                label = f"{test_name} ({description})" if description else test_name
+                xs = [x for x, _ in points]
+                ax.step(xs, [y for _, y in points], where="post", label=label)
+                # Tail view: 1 - CDF on a log scale makes p99/p99.9 readable
+                ax_tail.step(xs, [max(1 - y, 1e-6) for _, y in points], where="post", label=label)
+            ax.set_xlabel("Cycles")
+            ax.set_ylabel("Fraction of operations")
+            ax.grid(True, alpha=0.3)
+            ax_tail.set_xlabel("Cycles")
+            ax_tail.set_ylabel("1 - CDF")
+            ax_tail.set_yscale("log")
+            for p in PERCENTILES[1:]:
+                ax_tail.axhline(1 - p / 100, color="gray", linestyle=":", linewidth=0.8)
+            ax_tail.grid(True, alpha=0.3)
+            ax_tail.legend(fontsize=7, loc="best")
+            plt.tight_layout()
+            output_file = os.path.join(output_dir, f"cdf_{variant}_{op}.png")
+            plt.savefig(output_file, dpi=150, bbox_inches="tight")
+            print(f"Saved chart to: {output_file}")
+            plt.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tail latency percentiles and CDFs from test_speed histograms")
+    parser.add_argument("run_dirs", nargs="*", help="results/run_* directories to merge (default: latest)")
+    parser.add_argument("--ops", nargs="+", default=DEFAULT_OPS, help="Operations to report")
+    parser.add_argument("--output", help="Output directory (default: the last run directory)")
+    parser.add_argument("--no-plot", action="store_true", help="Skip CDF charts")
+
+    args = parser.parse_args()
+
+    run_dirs = args.run_dirs
+    if not run_dirs:
+        runs = sorted(d for d in os.listdir("results") if d.startswith("run_")) if os.path.isdir("results") else []
+        if not runs:
+            print("Error: No benchmark runs found!")
+            sys.exit(1)
+        run_dirs = [os.path.join("results", runs[-1])]
+    print(f"Merging histograms from: {', '.join(run_dirs)}")
+
+    collected = collect(run_dirs)
+    if not collected:
+        print("No histograms found (results from before test_speed recorded them?)")
+        sys.exit(1)
+
+    table = percentile_table(collected, args.ops)
+    print_percentile_table(table, args.ops)
+
+    output_dir = args.output or run_dirs[-1]
+    os.makedirs(output_dir, exist_ok=True)
+    with open(os.path.join(output_dir, "latency_percentiles.json"), "w") as f:
+        json.dump({"runs": run_dirs, "percentiles": table}, f, indent=2)
+    if not args.no_plot:
+        plot_cdfs(collected, args.ops, output_dir)
+    print(f"\nJSON data saved to: {os.path.join(output_dir, 'latency_percentiles.json')}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Per-region cycle breakdown of crypto_kem_keypair/enc/dec
+
+Builds test_profile{512,768,1024} (the reference code compiled with
+-DKYBER_PROFILE, see kyber/ref/profile.h) for each params_*.h config and
+turns the per-path cycle table they dump at exit into:
+
+- a breakdown per configuration: self cycles per call of every region
+  (gen_matrix, noise, ntt, compress, hash, ...) and its share of the
+  keypair/enc/dec call it belongs to
+- a diff of each configuration against the baseline, region by region
+- folded stacks (one "a;b;c <cycles>" line per path) for flamegraph.pl
+  or speedscope
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import bench_common
+import build_cache
+
+PROFILE_TARGETS = ["test_profile512", "test_profile768", "test_profile1024"]
+
+BASELINE = bench_common.BASELINE
+
+PATH_PATTERN = re.compile(r"^thread (\d+) (\S+) calls: (\d+) cycles: (\d+)$")
+
+
+def parse_profile_output(text):
+    """
+    Parse a profile dump into params and {path: {"calls", "cycles"}},
+    summing the tables of all threads. Cycles are inclusive.
+    """
+    result = {"params": bench_common.parse_params(text), "paths": {}}
+    for line in text.splitlines():
+        line = line.strip()
+        match = PATH_PATTERN.match(line)
+        if match:
+            entry = result["paths"].setdefault(match.group(2), {"calls": 0, "cycles": 0})
+            entry["calls"] += int(match.group(3))
+            entry["cycles"] += int(match.group(4))
+    return result
+
+
+def self_cycles(paths):
+    """Inclusive cycles minus the inclusive cycles of the direct children"""
+    result = {path: dict(entry) for path, entry in paths.items()}
+    for path, entry in paths.items():
+        parent = path.rpartition(";")[0]
+        if parent in result:
+            result[parent]["cycles"] -= entry["cycles"]
+    return result
+
+
+def breakdown(profile):
+    """
+    {top-level op: {"calls", "cycles_per_call", "regions": {region: {...}}}}
+
+    Regions are aggregated by name below each top-level call (e.g. all
+    "ntt" paths under kem_enc), using self cycles per top-level call.
+    """
+    selfs = self_cycles(profile["paths"])
+    ops = {}
+    for path, entry in profile["paths"].items():
+        if ";" not in path:
+            ops[path] = {"calls": entry["calls"],
+                         "cycles_per_call": entry["cycles"] / entry["calls"] if entry["calls"] else 0,
+                         "regions": {}}
+    for path, entry in selfs.items():
+        top, _, _ = path.partition(";")
+        region = path.rpartition(";")[2] if ";" in path else "(self)"
+        op = ops[top]
+        per_call = entry["cycles"] / op["calls"] if op["calls"] else 0
+        r = op["regions"].setdefault(region, {"cycles_per_call": 0.0, "share": 0.0})
+        r["cycles_per_call"] += per_call
+    for op in ops.values():
+        for r in op["regions"].values():
+            r["share"] = r["cycles_per_call"] / op["cycles_per_call"] if op["cycles_per_call"] else 0
+    return ops
+
+
+def folded_stacks(profile):
+    """Folded stack lines (path with self cycles), flamegraph.pl input format"""
+    return [f"{path} {entry['cycles']}"
+            for path, entry in sorted(self_cycles(profile["paths"]).items())
+            if entry["cycles"] > 0]
+
+
+def diff(ops, base_ops):
+    """Per-region change in cycles per call against the baseline breakdown"""
+    result = {}
+    for op, data in ops.items():
+        base = base_ops.get(op)
+        if not base:
+            continue
+        regions = {}
+        for region in sorted(set(data["regions"]) | set(base["regions"])):
+            new = data["regions"].get(region, {}).get("cycles_per_call", 0)
+            old = base["regions"].get(region, {}).get("cycles_per_call", 0)
+            regions[region] = {"baseline": old, "cycles_per_call": new, "delta": new - old,
+                               "change_pct": (new - old) / old * 100 if old else None}
+        result[op] = {"baseline": base["cycles_per_call"], "cycles_per_call": data["cycles_per_call"],
+                      "regions": regions}
+    return result
+
+
+def run_config(test_name, run_dir, variants, ntests):
+    """Build (cached) and run the profiling binaries of one configuration"""
+    entry, hit = build_cache.build(bench_common.config_path(test_name), PROFILE_TARGETS)
+    print(f"  {test_name}: {'cached build' if hit else 'built'} {entry.name[:12]}")
+
+    test_dir = run_dir / test_name
+    test_dir.mkdir(parents=True, exist_ok=True)
+
+    results = {}
+    for variant in variants:
+        out_file = test_dir / f"profile{variant}.txt"
+        out_file.unlink(missing_ok=True)
+        env = dict(os.environ, KYBER_PROFILE_OUT=str(out_file.resolve()))
+        subprocess.run([str(entry / f"test_profile{variant}"), str(ntests)], env=env, check=True)
+
+        profile = parse_profile_output(out_file.read_text())
+        (test_dir / f"profile{variant}.folded").write_text("\n".join(folded_stacks(profile)) + "\n")
+        results[f"kyber{variant}"] = {"params": profile["params"], "paths": profile["paths"],
+                                      "breakdown": breakdown(profile)}
+        print(f"    Kyber{variant}: {len(profile['paths'])} paths")
+    return results
+
+
+def print_breakdown(data):
+    print("\n" + "=" * 80)
+    print("CYCLE BREAKDOWN (self cycles per call)")
+    print("=" * 80)
+    for test_name, variants in data["tests"].items():
+        for variant, result in variants.items():
+            print(f"\n{test_name} {variant}")
+            for op, op_data in result["breakdown"].items():
+                print(f"  {op:<20} {op_data['cycles_per_call']:>12.0f} cycles")
+                regions = sorted(op_data["regions"].items(), key=lambda r: -r[1]["cycles_per_call"])
+                for region, r in regions:
+                    print(f"    {region:<18} {r['cycles_per_call']:>12.0f} {r['share'] * 100:>7.1f}%")
+
+
+def print_diff(diffs):
+    print("\n" + "=" * 80)
+    print(f"DIFF AGAINST {BASELINE} (cycles per call)")
+    print("=" * 80)
+    for test_name, variants in diffs.items():
+        for variant, ops in variants.items():
+            print(f"\n{test_name} {variant}")
+            for op, op_diff in ops.items():
+                total = op_diff["cycles_per_call"] - op_diff["baseline"]
+                print(f"  {op:<20} {op_diff['baseline']:>12.0f} -> {op_diff['cycles_per_call']:>12.0f} "
+                      f"({total:+.0f})")
+                for region, r in op_diff["regions"].items():
+                    if abs(r["delta"]) < 1:
+                        continue
+                    pct = f"{r['change_pct']:+.1f}%" if r["change_pct"] is not None else "new"
+                    print(f"    {region:<18} {r['baseline']:>12.0f} -> {r['cycles_per_call']:>12.0f} {pct:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-region cycle breakdown of the Kyber KEM")
+    parser.add_argument("--tests", nargs="+", choices=bench_common.TEST_CONFIGS,
+                        default=bench_common.TEST_CONFIGS, help="Configurations to run")
+    parser.add_argument("--variants", nargs="+", type=int, default=[512, 768, 1024],
+                        choices=[512, 768, 1024])
+    parser.add_argument("--ntests", type=int, default=1000,
+                        help="keypair/enc/dec calls per binary")
+
+    args = parser.parse_args()
+    tests = list(args.tests)
+    if BASELINE not in tests:
+        tests.insert(0, BASELINE)  # needed for the diff
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    run_dir = Path("results") / f"profile_{timestamp}"
+    run_dir.mkdir(parents=True, exist_ok=True)
+    print(f"Results directory: {run_dir}")
+
+    data = {"timestamp": timestamp, "tests": {}}
+    for test_name in tests:
+        try:
+            data["tests"][test_name] = run_config(test_name, run_dir, args.variants, args.ntests)
+        except (RuntimeError, subprocess.CalledProcessError) as e:
+            print(f"  {test_name} failed: {e}", file=sys.stderr)
+
+    diffs = {}
+    base = data["tests"].get(BASELINE, {})
+    for test_name, variants in data["tests"].items():
+        if test_name == BASELINE:
+            continue
+        diffs[test_name] = {variant: diff(result["breakdown"], base[variant]["breakdown"])
+                            for variant, result in variants.items() if variant in base}
+    data["diff"] = diffs
+
+    with open(run_dir / "profile_data.json", "w") as f:
+        json.dump(data, f, indent=2)
+
+    print_breakdown(data)
+    print_diff(diffs)
+    print(f"\nFolded stacks: {run_dir}/*/profile*.folded")
+    print(f"JSON data saved to: {run_dir / 'profile_data.json'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -53,27 +53,20 @@ Timestamp: $(date)
 Type: Quick Benchmark
 EOF
     
-    # Change to Kyber directory
-    cd "${KYBER_DIR}"
-    
-    # Apply configuration
-    if [ -f "configs/${config_file}" ]; then
-        cp "configs/${config_file}" params.h
-    else
+    # Check configuration
+    if [ ! -f "${KYBER_DIR}/configs/${config_file}" ]; then
         echo -e "${RED}Error: Config file not found${NC}"
-        cd "${BENCHMARK_DIR}"
         return 1
     fi
     
-    # Build
+    # Build, or reuse cached binaries for this config and flags
     echo -n "  Building... "
-    make clean > /dev/null 2>&1
-    
-    # Instead of creating new test file, modify the Makefile temporarily
-    # to use fewer iterations by defining NTESTS
-    export CFLAGS="-Wall -Wextra -O3 -fomit-frame-pointer -march=native -fPIC -DNTESTS=1000"
-    make speed > /dev/null 2>&1
-    unset CFLAGS
+    local BIN_DIR
+    BIN_DIR=$(python3 "${BENCHMARK_DIR}/build_cache.py" "${KYBER_DIR}/configs/${config_file}" \
+        --cflags "-Wall -Wextra -O3 -fomit-frame-pointer -march=native -fPIC -DNTESTS=1000" 2> /dev/null) || {
+        echo -e "${RED}Build failed${NC}"
+        return 1
+    }
     
     echo -e "${GREEN}✓${NC}"
     
@@ -86,16 +79,15 @@ EOF
     
     # Run tests
     for variant in $variants; do
-        if [ -x "./test_speed${variant}" ]; then
+        if [ -x "${BIN_DIR}/test_speed${variant}" ]; then
             echo "  Testing Kyber${variant}..."
             # Run with timeout to prevent hanging
-            timeout 30 ./test_speed${variant} > "${BENCHMARK_DIR}/${QUICK_RUN}/${test_name}/kyber${variant}.txt" 2>&1 || {
+            timeout 30 "${BIN_DIR}/test_speed${variant}" > "${BENCHMARK_DIR}/${QUICK_RUN}/${test_name}/kyber${variant}.txt" 2>&1 || {
                 echo -e "  ${RED}Timeout or error for Kyber${variant}${NC}"
             }
         fi
     done
     
-    cd "${BENCHMARK_DIR}"
     echo -e "${GREEN}  ✓ Completed${NC}"
     echo
 }
@@ -112,17 +104,12 @@ run_quick_sampling() {
     local BENCHMARK_DIR=$(pwd)
     mkdir -p "${BENCHMARK_DIR}/${QUICK_RUN}/${test_name}"
     
-    cd "${KYBER_DIR}"
-    
-    # Apply configuration
-    if [ -f "configs/${config_file}" ]; then
-        cp "configs/${config_file}" params.h
-        make clean > /dev/null 2>&1
-        make speed > /dev/null 2>&1
-        
-        if [ -x "./test_speed${variant}" ]; then
+    # Apply configuration (cached build, the source tree is left untouched)
+    local BIN_DIR
+    if BIN_DIR=$(python3 "${BENCHMARK_DIR}/build_cache.py" "${KYBER_DIR}/configs/${config_file}" 2> /dev/null); then
+        if [ -x "${BIN_DIR}/test_speed${variant}" ]; then
             # Run the test but kill it after getting initial results
-            timeout 5 ./test_speed${variant} > "${BENCHMARK_DIR}/${QUICK_RUN}/${test_name}/kyber${variant}_sample.txt" 2>&1 || true
+            timeout 5 "${BIN_DIR}/test_speed${variant}" > "${BENCHMARK_DIR}/${QUICK_RUN}/${test_name}/kyber${variant}_sample.txt" 2>&1 || true
             
             # Extract just the first occurrence of each operation
             grep -m1 "poly_compress:" "${BENCHMARK_DIR}/${QUICK_RUN}/${test_name}/kyber${variant}_sample.txt" > "${BENCHMARK_DIR}/${QUICK_RUN}/${test_name}/kyber${variant}.txt" || true
@@ -133,8 +120,6 @@ run_quick_sampling() {
             rm -f "${BENCHMARK_DIR}/${QUICK_RUN}/${test_name}/kyber${variant}_sample.txt"
         fi
     fi
-    
-    cd "${BENCHMARK_DIR}"
 }
 
 # Main execution
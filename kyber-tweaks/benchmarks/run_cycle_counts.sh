@@ -49,40 +49,33 @@ Description: ${description}
 Timestamp: $(date)
 EOF
     
-    # Change to Kyber directory
-    cd "${KYBER_DIR}"
-    
-    # Apply configuration
-    if [ -f "configs/${config_file}" ]; then
-        cp "configs/${config_file}" params.h
-    else
+    # Check configuration
+    if [ ! -f "${KYBER_DIR}/configs/${config_file}" ]; then
         echo -e "${RED}Error: Config file not found: configs/${config_file}${NC}"
-        cd "${BENCHMARK_DIR}"
         return 1
     fi
     
-    # Clean and build
+    # Build, or reuse binaries from the build cache when nothing changed
     echo "  Building..."
-    make clean > /dev/null 2>&1
-    make speed > "${BENCHMARK_DIR}/${CURRENT_RUN}/${test_name}/build_log.txt" 2>&1
-    
-    if [ $? -ne 0 ]; then
+    local BIN_DIR
+    BIN_DIR=$(python3 "${BENCHMARK_DIR}/build_cache.py" "${KYBER_DIR}/configs/${config_file}" \
+        2> "${BENCHMARK_DIR}/${CURRENT_RUN}/${test_name}/build_log.txt") || {
         echo -e "${RED}  Build failed! Check ${CURRENT_RUN}/${test_name}/build_log.txt${NC}"
-        cd "${BENCHMARK_DIR}"
         return 1
-    fi
+    }
+    cat "${BIN_DIR}/build_log.txt" >> "${BENCHMARK_DIR}/${CURRENT_RUN}/${test_name}/build_log.txt"
+    echo "Build Cache: $(basename "${BIN_DIR}")" >> "${BENCHMARK_DIR}/${CURRENT_RUN}/${test_name}/metadata.txt"
     
     # Run tests for each variant
     for variant in 512 768 1024; do
-        if [ -x "./test_speed${variant}" ]; then
+        if [ -x "${BIN_DIR}/test_speed${variant}" ]; then
             echo "  Testing Kyber${variant}..."
-            ./test_speed${variant} > "${BENCHMARK_DIR}/${CURRENT_RUN}/${test_name}/kyber${variant}.txt" 2>&1
+            "${BIN_DIR}/test_speed${variant}" > "${BENCHMARK_DIR}/${CURRENT_RUN}/${test_name}/kyber${variant}.txt" 2>&1
         else
             echo -e "${RED}  test_speed${variant} not found!${NC}"
         fi
     done
     
-    cd "${BENCHMARK_DIR}"
     echo -e "${GREEN}  ✓ Completed${NC}"
     echo
 }
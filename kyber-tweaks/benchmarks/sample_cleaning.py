@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Preprocessing of raw cycle samples before any statistics are computed
+
+test_speed prints every sample of an operation in measurement order
+("samples: ..." line). The first iterations of each loop run with cold
+caches, page faults and frequency ramp-up, and interrupts produce extreme
+outliers. clean() turns a raw series into a steady-state series:
+
+1. warm-up trimming: the single changepoint in the mean within the first
+   10% of the series (least squares, BIC-style penalty) where the prefix
+   is slower than the rest; the prefix is dropped
+2. outlier rejection: modified z-score on the median absolute deviation
+   (|0.6745 (x - median) / MAD| > 3.5) or Tukey fences (1.5 IQR)
+3. stationarity check on what is left: rank correlation of value against
+   position (trend z-score) and drift of block medians; reported, not dropped
+
+Every step records how many samples it dropped. analyze_results.py and
+statistical_analysis.py compute their mean/median statistics from the
+cleaned series whenever samples are present. Tail percentiles must not see
+step 2 (it cuts the very tail they measure): latency_histograms.py and the
+p90/p99/p99.9 of analyze_results.py use trim_warmup() only.
+
+Usage:
+    python3 sample_cleaning.py [RUN_DIR] [--method mad|tukey] [--threshold X]
+"""
+
+import argparse
+import json
+import math
+import os
+import re
+import statistics
+import sys
+from pathlib import Path
+
+DEFAULT_THRESHOLDS = {"mad": 3.5, "tukey": 1.5}
+TREND_Z_LIMIT = 3.0
+BLOCK_DRIFT_LIMIT = 0.05
+
+SAMPLES_PATTERN = re.compile(r"^(\w+):\s*\n(?:[^\n]*\n)*?samples:((?: \d+)*)$", re.MULTILINE)
+
+
+def parse_samples(text):
+    """{operation: [samples in measurement order]} from test_speed output"""
+    return {m.group(1): [int(x) for x in m.group(2).split()] for m in SAMPLES_PATTERN.finditer(text)}
+
+
+def mad(x, center=None):
+    center = statistics.median(x) if center is None else center
+    return statistics.median(abs(v - center) for v in x)
+
+
+def quartiles(x):
+    q = statistics.quantiles(x, n=4, method="inclusive")
+    return q[0], q[2]
+
+
+def detect_warmup(x, max_fraction=0.1):
+    """
+    Number of leading samples that belong to a slower warm-up phase (0 if
+    none). Outliers are winsorized first so single interrupts cannot act
+    as a changepoint.
+    """
+    n = len(x)
+    if n < 8:
+        return 0
+    med = statistics.median(x)
+    spread = 1.4826 * mad(x, med)
+    if spread == 0:
+        spread = statistics.pstdev(x)
+    if spread == 0:
+        return 0
+    lo, hi = med - 3.5 * spread, med + 3.5 * spread
+    y = [min(max(v, lo), hi) for v in x]
+
+    s, s2 = [0.0], [0.0]
+    for v in y:
+        s.append(s[-1] + v)
+        s2.append(s2[-1] + v * v)
+
+    def sse(a, b):
+        m = b - a
+        return s2[b] - s2[a] - (s[b] - s[a]) ** 2 / m
+
+    total = sse(0, n)
+    best_k, best_cost = 0, total
+    for k in range(2, int(n * max_fraction) + 1):
+        cost = sse(0, k) + sse(k, n)
+        if cost < best_cost:
+            best_k, best_cost = k, cost
+
+    if best_k == 0:
+        return 0
+    prefix_mean = s[best_k] / best_k
+    rest_mean = (s[n] - s[best_k]) / (n - best_k)
+    # One extra mean parameter must pay for itself (BIC, variance from MAD)
+    if (total - best_cost) / spread ** 2 < 2 * math.log(n) or prefix_mean <= rest_mean:
+        return 0
+    return best_k
+
+
+def reject_outliers(x, method="mad", threshold=None):
+    """(kept, dropped_low, dropped_high)"""
+    threshold = DEFAULT_THRESHOLDS[method] if threshold is None else threshold
+    if len(x) < 4:
+        return list(x), 0, 0
+    if method == "mad":
+        med = statistics.median(x)
+        m = mad(x, med)
+        if m == 0:
+            return list(x), 0, 0
+        lo = med - threshold * m / 0.6745
+        hi = med + threshold * m / 0.6745
+    elif method == "tukey":
+        q1, q3 = quartiles(x)
+        iqr = q3 - q1
+        lo, hi = q1 - threshold * iqr, q3 + threshold * iqr
+    else:
+        raise ValueError(f"unknown outlier method: {method}")
+    kept = [v for v in x if lo <= v <= hi]
+    low = sum(1 for v in x if v < lo)
+    return kept, low, len(x) - len(kept) - low
+
+
+def ranks(x):
+    """Average ranks (ties share their mean rank)"""
+    order = sorted(range(len(x)), key=x.__getitem__)
+    r = [0.0] * len(x)
+    i = 0
+    while i < len(order):
+        j = i
+        while j + 1 < len(order) and x[order[j + 1]] == x[order[i]]:
+            j += 1
+        for k in range(i, j + 1):
+            r[order[k]] = (i + j) / 2 + 1
+        i = j + 1
+    return r
+
+
+def stationarity(x, blocks=10):
+    """Trend z-score (Spearman rank correlation with position) and block-median drift"""
+    n = len(x)
+    if n < 2 * blocks:
+        return {"trend_z": 0.0, "block_drift": 0.0, "stationary": True}
+    rx = ranks(x)
+    mean_rank = (n + 1) / 2
+    cov = sum((rx[i] - mean_rank) * (i + 1 - mean_rank) for i in range(n))
+    var = sum((r - mean_rank) ** 2 for r in rx)
+    var_pos = (n ** 3 - n) / 12
+    rho = cov / math.sqrt(var * var_pos) if var > 0 else 0.0
+    trend_z = rho * math.sqrt(n - 1)
+
+    size = n // blocks
+    medians = [statistics.median(x[b * size:(b + 1) * size]) for b in range(blocks)]
+    overall = statistics.median(x)
+    drift = (max(medians) - min(medians)) / overall if overall else 0.0
+    return {
+        "trend_z": trend_z,
+        "block_drift": drift,
+        "stationary": abs(trend_z) < TREND_Z_LIMIT and drift < BLOCK_DRIFT_LIMIT,
+    }
+
+
+def trim_warmup(samples):
+    """The series without its warm-up prefix, outliers kept (for tail percentiles)"""
+    return samples[detect_warmup(samples):]
+
+
+def clean(samples, method="mad", threshold=None):
+    """(cleaned series, report of what was dropped and why)"""
+    n_raw = len(samples)
+    steady = trim_warmup(samples)
+    warmup = n_raw - len(steady)
+    kept, low, high = reject_outliers(steady, method, threshold)
+    report = {
+        "n_raw": n_raw,
+        "warmup_dropped": warmup,
+        "outliers_low_dropped": low,
+        "outliers_high_dropped": high,
+        "outlier_method": method,
+        "outlier_threshold": DEFAULT_THRESHOLDS[method] if threshold is None else threshold,
+        "n_clean": len(kept),
+    }
+    report.update(stationarity(kept))
+    return kept, report
+
+
+def summarize(x):
+    """median, average, stddev and n of a (cleaned) series, integer cycles like test_speed"""
+    return {
+        "median": int(statistics.median(x)),
+        "average": int(statistics.fmean(x)),
+        "stddev": statistics.stdev(x) if len(x) > 1 else 0.0,
+        "n": len(x),
+    }
+
+
+def clean_file(filepath, method="mad", threshold=None):
+    """{operation: (cleaned series, report)} for one kyberN.txt"""
+    with open(filepath) as f:
+        return {op: clean(x, method, threshold) for op, x in parse_samples(f.read()).items() if x}
+
+
+def print_report(reports):
+    print(f"{'Test':<28} {'Variant':<10} {'Operation':<32} {'raw':>6} {'warmup':>7} "
+          f"{'low':>5} {'high':>5} {'clean':>6} {'trend z':>8} {'drift':>7}")
+    print("-" * 120)
+    for test_name, variants in reports.items():
+        for variant, ops in variants.items():
+            for op, r in ops.items():
+                flag = "" if r["stationary"] else "  NOT STATIONARY"
+                print(f"{test_name:<28} {variant:<10} {op:<32} {r['n_raw']:>6} {r['warmup_dropped']:>7} "
+                      f"{r['outliers_low_dropped']:>5} {r['outliers_high_dropped']:>5} {r['n_clean']:>6} "
+                      f"{r['trend_z']:>8.2f} {r['block_drift'] * 100:>6.1f}%{flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Warm-up trimming and outlier filtering of raw cycle samples")
+    parser.add_argument("run_dir", nargs="?", help="results/run_* directory (default: latest)")
+    parser.add_argument("--method", choices=sorted(DEFAULT_THRESHOLDS), default="mad",
+                        help="Outlier rejection: modified z-score on MAD, or Tukey fences")
+    parser.add_argument("--threshold", type=float, default=None,
+                        help="MAD z-score limit (default 3.5) or Tukey IQR factor (default 1.5)")
+
+    args = parser.parse_args()
+
+    run_dir = args.run_dir
+    if not run_dir:
+        runs = sorted(d for d in os.listdir("results") if d.startswith("run_")) if os.path.isdir("results") else []
+        if not runs:
+            print("Error: No benchmark runs found!")
+            sys.exit(1)
+        run_dir = os.path.join("results", runs[-1])
+    print(f"Cleaning samples from: {run_dir}\n")
+
+    reports = {}
+    for test_dir in sorted(Path(run_dir).iterdir()):
+        if not test_dir.is_dir():
+            continue
+        for variant in ["512", "768", "1024"]:
+            result_file = test_dir / f"kyber{variant}.txt"
+            if result_file.exists():
+                cleaned = clean_file(result_file, args.method, args.threshold)
+                if cleaned:
+                    reports.setdefault(test_dir.name, {})[f"kyber{variant}"] = \
+                        {op: report for op, (_, report) in cleaned.items()}
+
+    if not reports:
+        print("No raw samples found (results from before test_speed printed them?)")
+        sys.exit(1)
+
+    print_report(reports)
+    output_file = os.path.join(run_dir, "cleaning_report.json")
+    with open(output_file, "w") as f:
+        json.dump(reports, f, indent=2)
+    print(f"\nCleaning report saved to: {output_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Multi-core scaling benchmark for Kyber and Dilithium operations
+
+Starts 1..N copies of a benchmark binary at once, each pinned to its own
+core, and records every worker's cycle samples and throughput. Kyber runs
+test_scaling{512,768,1024} (keypair/encaps/decaps) for each params_*.h
+config; Dilithium runs the benchmark_{baseline,option1,option2} binaries of
+dilithium-tweaks/benchmarks (keypair/sign/verify).
+
+Scaling efficiency of an operation at N workers is the aggregate
+throughput divided by N times the single-worker throughput: 100% means
+the cores do not slow each other down through shared caches or memory
+bandwidth.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import bench_common
+import build_cache
+
+SCALING_TARGETS = ["test_scaling512", "test_scaling768", "test_scaling1024"]
+
+DILITHIUM_DIR = (build_cache.BENCHMARK_DIR / ".." / ".." / "dilithium-tweaks" / "benchmarks").resolve()
+DILITHIUM_BINARIES = ["benchmark_baseline", "benchmark_option1", "benchmark_option2"]
+
+SAMPLES_PATTERN = re.compile(r"^(\w+) samples:((?: \d+)*)$")
+SUMMARY_PATTERN = re.compile(
+    r"^(\w+) median: (\d+) cycles average: (\d+) cycles throughput: (\d+) ops/s$"
+)
+TSC_PATTERN = re.compile(r"^tsc_hz: (\d+)$")
+DILITHIUM_PATTERN = re.compile(r"^(Keypair|Sign|Verify)\s+(\d+)\s+(\d+)\s*$")
+
+
+def available_cpus():
+    """Cores this process may run on, in the order workers are pinned to them"""
+    try:
+        return sorted(os.sched_getaffinity(0))
+    except AttributeError:
+        return list(range(os.cpu_count() or 1))
+
+
+def default_worker_counts(max_workers):
+    """1, 2, 4, ... up to max_workers, always including max_workers itself"""
+    counts = []
+    n = 1
+    while n < max_workers:
+        counts.append(n)
+        n *= 2
+    counts.append(max_workers)
+    return counts
+
+
+def parse_kyber_output(text):
+    """Parse test_scaling output into params, tsc_hz and per-operation results"""
+    result = {"params": bench_common.parse_params(text), "tsc_hz": None, "operations": {}}
+    for line in text.splitlines():
+        line = line.strip()
+        match = SAMPLES_PATTERN.match(line)
+        if match:
+            op = result["operations"].setdefault(match.group(1), {})
+            op["samples"] = [int(x) for x in match.group(2).split()]
+            continue
+        match = SUMMARY_PATTERN.match(line)
+        if match:
+            op = result["operations"].setdefault(match.group(1), {})
+            op["median"] = int(match.group(2))
+            op["average"] = int(match.group(3))
+            op["ops_per_sec"] = int(match.group(4))
+            continue
+        match = TSC_PATTERN.match(line)
+        if match:
+            result["tsc_hz"] = int(match.group(1))
+    return result
+
+
+def parse_dilithium_output(text, tsc_hz):
+    """
+    Parse the results table of benchmark_comprehensive.c. The binary only
+    prints median and average cycles, not its samples, so "samples" is None.
+    ops/s is derived from the average and the cycle counter rate measured
+    by the Kyber workers on the same machine; None if none ran.
+    """
+    result = {"operations": {}}
+    for line in text.splitlines():
+        match = DILITHIUM_PATTERN.match(line.strip())
+        if match:
+            median, average = int(match.group(2)), int(match.group(3))
+            result["operations"][f"dilithium_{match.group(1).lower()}"] = {
+                "samples": None,
+                "median": median,
+                "average": average,
+                "ops_per_sec": round(tsc_hz / average) if tsc_hz and average else None,
+            }
+    return result
+
+
+def run_workers(command, n_workers, cpus, cwd_per_worker=False):
+    """
+    Start n_workers copies of `command` at once, worker i pinned to
+    cpus[i % len(cpus)], and return (outputs, wall-clock seconds).
+    """
+    procs, outputs = [], []
+    with contextlib.ExitStack() as stack:
+        start = time.perf_counter()
+        try:
+            for i in range(n_workers):
+                cpu = cpus[i % len(cpus)]
+                cwd = None
+                if cwd_per_worker:
+                    # benchmark_comprehensive.c writes its results file into the cwd
+                    cwd = stack.enter_context(tempfile.TemporaryDirectory(prefix="scaling_worker_"))
+                procs.append(subprocess.Popen(command, cwd=cwd, stdout=subprocess.PIPE,
+                                              stderr=subprocess.DEVNULL, text=True,
+                                              preexec_fn=lambda cpu=cpu: os.sched_setaffinity(0, {cpu})))
+            for proc in procs:
+                out, _ = proc.communicate()
+                if proc.returncode != 0:
+                    raise subprocess.CalledProcessError(proc.returncode, command, out)
+                outputs.append(out)
+            elapsed = time.perf_counter() - start
+        finally:
+            # Do not leave workers running (or writing into their directories) on errors
+            for proc in procs:
+                if proc.poll() is None:
+                    proc.kill()
+                    proc.wait()
+    return outputs, elapsed
+
+
+def aggregate(workers):
+    """Per-operation aggregate over the workers of one run"""
+    ops = {}
+    for worker in workers:
+        for op, r in worker["operations"].items():
+            ops.setdefault(op, []).append(r)
+    summary = {}
+    for op, results in ops.items():
+        medians = sorted(r["median"] for r in results)
+        rates = [r["ops_per_sec"] for r in results]
+        summary[op] = {
+            "median_of_medians": medians[len(medians) // 2],
+            "worst_median": medians[-1],
+            "aggregate_ops_per_sec": None if None in rates else sum(rates),
+        }
+    return summary
+
+
+def add_efficiency(runs):
+    """Scaling efficiency of each run relative to the single-worker run"""
+    single = runs.get("1")
+    if not single:
+        return
+    for n, run in runs.items():
+        for op, s in run["aggregate"].items():
+            base = single["aggregate"].get(op, {}).get("aggregate_ops_per_sec")
+            rate = s["aggregate_ops_per_sec"]
+            s["efficiency"] = rate / (int(n) * base) if base and rate is not None else None
+
+
+def run_kyber_config(test_name, run_dir, variants, worker_counts, cpus, ntests):
+    """Build (cached) and run the scaling workers of one configuration"""
+    entry, hit = build_cache.build(bench_common.config_path(test_name), SCALING_TARGETS)
+    print(f"  {test_name}: {'cached build' if hit else 'built'} {entry.name[:12]}")
+
+    test_dir = run_dir / test_name
+    test_dir.mkdir(parents=True, exist_ok=True)
+
+    results = {}
+    for variant in variants:
+        runs = {}
+        for n in worker_counts:
+            outputs, elapsed = run_workers([str(entry / f"test_scaling{variant}"), str(ntests)],
+                                           n, cpus)
+            for i, out in enumerate(outputs):
+                (test_dir / f"scaling{variant}_n{n}_w{i}.txt").write_text(out)
+            workers = [parse_kyber_output(out) for out in outputs]
+            runs[str(n)] = {"wall_seconds": elapsed, "workers": workers,
+                            "aggregate": aggregate(workers)}
+            print(f"    Kyber{variant} workers={n}: {elapsed:.2f}s")
+        add_efficiency(runs)
+        results[f"kyber{variant}"] = {"params": runs[str(worker_counts[0])]["workers"][0]["params"],
+                                      "runs": runs}
+    return results
+
+
+def run_dilithium(run_dir, worker_counts, cpus, tsc_hz):
+    """Run the prebuilt Dilithium benchmark binaries on 1..N workers"""
+    results = {}
+    test_dir = run_dir / "dilithium"
+    test_dir.mkdir(parents=True, exist_ok=True)
+    for binary in DILITHIUM_BINARIES:
+        path = DILITHIUM_DIR / binary
+        if not os.access(path, os.X_OK):
+            print(f"  {binary}: not built, skipping", file=sys.stderr)
+            continue
+        runs = {}
+        for n in worker_counts:
+            outputs, elapsed = run_workers([str(path)], n, cpus, cwd_per_worker=True)
+            for i, out in enumerate(outputs):
+                (test_dir / f"{binary}_n{n}_w{i}.txt").write_text(out)
+            workers = [parse_dilithium_output(out, tsc_hz) for out in outputs]
+            runs[str(n)] = {"wall_seconds": elapsed, "workers": workers,
+                            "aggregate": aggregate(workers)}
+            print(f"    {binary} workers={n}: {elapsed:.2f}s")
+        add_efficiency(runs)
+        results[binary.replace("benchmark_", "")] = {"runs": runs}
+    return results
+
+
+def print_summary(data):
+    """Aggregate throughput and efficiency per configuration, operation and worker count"""
+    print("\n" + "=" * 96)
+    print("SCALING SUMMARY")
+    print("=" * 96)
+    print(f"{'Test':<30} {'Variant':<10} {'Operation':<20} {'Workers':>7} "
+          f"{'median':>10} {'ops/s':>10} {'efficiency':>11}")
+    print("-" * 96)
+    for test_name, variants in data["tests"].items():
+        for variant, result in variants.items():
+            for n, run in result["runs"].items():
+                for op, s in run["aggregate"].items():
+                    eff = s.get("efficiency")
+                    eff = f"{eff * 100:.1f}%" if eff is not None else "-"
+                    rate = s["aggregate_ops_per_sec"]
+                    rate = rate if rate is not None else "-"
+                    print(f"{test_name:<30} {variant:<10} {op:<20} {n:>7} "
+                          f"{s['median_of_medians']:>10} {rate:>10} {eff:>11}")
+
+
+def main():
+    cpus = available_cpus()
+
+    parser = argparse.ArgumentParser(description="Multi-core scaling benchmark")
+    parser.add_argument("--tests", nargs="+", choices=bench_common.TEST_CONFIGS,
+                        default=bench_common.TEST_CONFIGS, help="Kyber configurations to run")
+    parser.add_argument("--variants", nargs="+", type=int, default=[512, 768, 1024],
+                        choices=[512, 768, 1024])
+    parser.add_argument("--workers", nargs="+", type=int, default=None,
+                        help=f"Worker counts (default: powers of two up to {len(cpus)})")
+    parser.add_argument("--ntests", type=int, default=1000,
+                        help="Kyber operations per worker and operation")
+    parser.add_argument("--no-dilithium", action="store_true", help="Skip the Dilithium binaries")
+
+    args = parser.parse_args()
+    worker_counts = sorted(set(args.workers or default_worker_counts(len(cpus))))
+    if worker_counts[0] != 1:
+        worker_counts.insert(0, 1)  # efficiency needs the single-worker baseline
+    if worker_counts[-1] > len(cpus):
+        print(f"Note: {worker_counts[-1]} workers on {len(cpus)} cores, "
+              "some workers share a core", file=sys.stderr)
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    run_dir = Path("results") / f"scaling_{timestamp}"
+    run_dir.mkdir(parents=True, exist_ok=True)
+    print(f"Results directory: {run_dir}")
+    print(f"Cores: {cpus}, worker counts: {worker_counts}")
+
+    data = {"timestamp": timestamp, "cpus": cpus, "worker_counts": worker_counts, "tests": {}}
+    for test_name in args.tests:
+        try:
+            data["tests"][test_name] = run_kyber_config(test_name, run_dir, args.variants, worker_counts,
+                                                        cpus, args.ntests)
+        except (RuntimeError, subprocess.CalledProcessError) as e:
+            print(f"  {test_name} failed: {e}", file=sys.stderr)
+
+    tsc_hz = next((w["tsc_hz"] for t in data["tests"].values() for v in t.values()
+                   for w in v["runs"]["1"]["workers"] if w.get("tsc_hz")), None)
+    data["tsc_hz"] = tsc_hz
+    if not args.no_dilithium:
+        print("  dilithium:")
+        if not tsc_hz:
+            print("  No Kyber worker measured the cycle counter rate: "
+                  "Dilithium ops/s and efficiency are unavailable", file=sys.stderr)
+        try:
+            data["tests"]["dilithium"] = run_dilithium(run_dir, worker_counts, cpus, tsc_hz)
+        except subprocess.CalledProcessError as e:
+            print(f"  dilithium failed: {e}", file=sys.stderr)
+
+    with open(run_dir / "scaling_data.json", "w") as f:
+        json.dump(data, f, indent=2)
+
+    print_summary(data)
+    print(f"\nJSON data saved to: {run_dir / 'scaling_data.json'}")
+
+
+if __name__ == "__main__":
+    main()
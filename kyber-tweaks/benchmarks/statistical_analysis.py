@@ -11,6 +11,8 @@ import sys
 import os
 from pathlib import Path
 
+from sample_cleaning import clean, parse_samples, summarize
+
 def load_raw_data(test_dir):
     """Load raw cycle counts from multiple runs"""
     raw_data = {}
@@ -36,8 +38,16 @@ def parse_raw_cycles(filepath):
     try:
         with open(filepath, 'r') as f:
             content = f.read()
+        samples = parse_samples(content)
             
         for op in operations:
+            if samples.get(op):
+                # Raw samples available: real stddev and n of the cleaned series
+                cleaned, report = clean(samples[op])
+                operations_data[op] = summarize(cleaned)
+                operations_data[op]['cleaning'] = report
+                continue
+
             # Look for the operation and extract all values
             import re
             
@@ -79,8 +89,8 @@ def calculate_confidence_interval(data, confidence=0.95):
         stddev = data['stddev']
         
         # Using t-distribution for small sample sizes
-        # Assuming n=10000 iterations as mentioned in thesis
-        n = 10000
+        # Without raw samples assume n=10000 iterations as mentioned in thesis
+        n = data.get('n', 10000)
         df = n - 1
         
         # Calculate standard error
@@ -111,11 +121,11 @@ def perform_significance_test(baseline_data, test_data):
     # Extract statistics
     mean1 = baseline_data.get('average', 0)
     std1 = baseline_data.get('stddev', 1)
-    n1 = 10000  # Number of iterations
+    n1 = baseline_data.get('n', 10000)  # Number of iterations
     
     mean2 = test_data.get('average', 0)
     std2 = test_data.get('stddev', 1)
-    n2 = 10000
+    n2 = test_data.get('n', 10000)
     
     # Welch's t-test (for potentially unequal variances)
     # Calculate t-statistic
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Batched KEM throughput benchmark for Kyber parameter configurations
+
+Runs test_throughput{512,768,1024} (batch sizes 1..1024, single-op loop
+versus crypto_kem_enc_batch/dec_batch) for each params_*.h config, saves
+the parsed points as JSON and plots latency and throughput curves per
+(du, dv, η) configuration.
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import bench_common
+import build_cache
+
+THROUGHPUT_TARGETS = ["test_throughput512", "test_throughput768", "test_throughput1024"]
+
+POINT_PATTERN = re.compile(
+    r"^(\w+) batch=(\d+) median: (\d+) cycles/op average: (\d+) cycles/op throughput: (\d+) ops/s$"
+)
+
+
+def parse_throughput_output(text):
+    """Parse test_throughput output into params and a list of points"""
+    result = {"params": bench_common.parse_params(text), "points": []}
+    for line in text.splitlines():
+        line = line.strip()
+        match = POINT_PATTERN.match(line)
+        if match:
+            result["points"].append({
+                "operation": match.group(1),
+                "batch": int(match.group(2)),
+                "median": int(match.group(3)),
+                "average": int(match.group(4)),
+                "ops_per_sec": int(match.group(5)),
+            })
+    return result
+
+
+def config_label(params):
+    return f"(du={params['du']}, dv={params['dv']}, η1={params['eta1']}, η2={params['eta2']})"
+
+
+def run_config(test_name, run_dir, variants):
+    """Build (cached) and run the throughput binaries of one configuration"""
+    entry, hit = build_cache.build(bench_common.config_path(test_name), THROUGHPUT_TARGETS)
+    print(f"  {test_name}: {'cached build' if hit else 'built'} {entry.name[:12]}")
+
+    test_dir = run_dir / test_name
+    test_dir.mkdir(parents=True, exist_ok=True)
+
+    results = {}
+    for variant in variants:
+        output = subprocess.run([str(entry / f"test_throughput{variant}")],
+                                capture_output=True, text=True, check=True).stdout
+        (test_dir / f"throughput{variant}.txt").write_text(output)
+        results[f"kyber{variant}"] = parse_throughput_output(output)
+        print(f"    Kyber{variant}: {len(results[f'kyber{variant}']['points'])} points")
+    return results
+
+
+def print_summary(data):
+    """Throughput at batch size 1 and at the largest batch, single-op vs batched"""
+    print("\n" + "=" * 80)
+    print("THROUGHPUT SUMMARY (ops/s)")
+    print("=" * 80)
+    print(f"{'Test':<30} {'Variant':<10} {'Operation':<20} {'batch=1':>10} {'max batch':>10} {'gain':>8}")
+    print("-" * 80)
+    for test_name, variants in data["tests"].items():
+        for variant, result in variants.items():
+            by_op = {}
+            for p in result["points"]:
+                by_op.setdefault(p["operation"], []).append(p)
+            for op, points in by_op.items():
+                points.sort(key=lambda p: p["batch"])
+                first, last = points[0]["ops_per_sec"], points[-1]["ops_per_sec"]
+                gain = (last - first) / first * 100 if first else 0
+                print(f"{test_name:<30} {variant:<10} {op:<20} {first:>10} {last:>10} {gain:>+7.1f}%")
+
+
+def plot_curves(data, output_dir):
+    """Latency (cycles/op) and throughput (ops/s) versus batch size"""
+    import matplotlib.pyplot as plt
+
+    variants = sorted({v for tests in data["tests"].values() for v in tests},
+                      key=lambda v: int(v.replace("kyber", "")))
+    for metric, ylabel, filename in [("median", "Cycles per operation (median)", "batch_latency.png"),
+                                     ("ops_per_sec", "Operations per second", "batch_throughput.png")]:
+        fig, axes = plt.subplots(2, len(variants), figsize=(5 * len(variants), 8), squeeze=False)
+        fig.suptitle(f"Kyber batched KEM: {ylabel.lower()}", fontsize=16)
+
+        for col, variant in enumerate(variants):
+            for row, kind in enumerate(["encaps", "decaps"]):
+                ax = axes[row][col]
+                ax.set_title(f"{variant.upper()} {kind}")
+                for test_name, tests in data["tests"].items():
+                    if variant not in tests:
+                        continue
+                    label = config_label(tests[variant]["params"])
+                    for op, style in [(f"kyber_{kind}", "--"), (f"kyber_{kind}_batch", "-")]:
+                        points = sorted((p for p in tests[variant]["points"] if p["operation"] == op),
+                                        key=lambda p: p["batch"])
+                        if points:
+                            ax.plot([p["batch"] for p in points], [p[metric] for p in points], style,
+                                    marker="o", markersize=3,
+                                    label=f"{label}{' batch' if op.endswith('_batch') else ''}")
+                ax.set_xscale("log", base=2)
+                ax.set_xlabel("Batch size")
+                ax.set_ylabel(ylabel)
+                ax.grid(True, alpha=0.3)
+        axes[0][-1].legend(fontsize=7, loc="best")
+
+        plt.tight_layout()
+        output_file = os.path.join(output_dir, filename)
+        plt.savefig(output_file, dpi=150, bbox_inches="tight")
+        print(f"Saved chart to: {output_file}")
+        plt.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batched KEM throughput benchmark")
+    parser.add_argument("--tests", nargs="+", choices=bench_common.TEST_CONFIGS,
+                        default=bench_common.TEST_CONFIGS, help="Configurations to run")
+    parser.add_argument("--variants", nargs="+", type=int, default=[512, 768, 1024],
+                        choices=[512, 768, 1024])
+    parser.add_argument("--no-plot", action="store_true", help="Skip chart generation")
+
+    args = parser.parse_args()
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    run_dir = Path("results") / f"throughput_{timestamp}"
+    run_dir.mkdir(parents=True, exist_ok=True)
+    print(f"Results directory: {run_dir}")
+
+    data = {"timestamp": timestamp, "tests": {}}
+    for test_name in args.tests:
+        try:
+            data["tests"][test_name] = run_config(test_name, run_dir, args.variants)
+        except (RuntimeError, subprocess.CalledProcessError) as e:
+            print(f"  {test_name} failed: {e}", file=sys.stderr)
+
+    with open(run_dir / "throughput_data.json", "w") as f:
+        json.dump(data, f, indent=2)
+
+    print_summary(data)
+    if not args.no_plot:
+        plot_curves(data, run_dir)
+
+    print(f"\nJSON data saved to: {run_dir / 'throughput_data.json'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Compiler / flag matrix benchmark for every Kyber parameter configuration
+
+Builds test_speed{512,768,1024} of every params_*.h config with every
+declared toolchain (compiler + CFLAGS, replacing the Makefile's fixed
+-O3 -fomit-frame-pointer) in parallel through the build cache, runs each
+build --repeats times under the same harness and prints, per variant and
+operation, a cross table of median cycles with a 95% confidence interval
+for each configuration x toolchain, marking the fastest toolchain.
+
+The declared matrix can be replaced with --matrix FILE.json:
+    {"gcc-O2": {"cc": "gcc", "cflags": "-O2"}, ...}
+Toolchains whose compiler is not installed are skipped.
+"""
+
+import argparse
+import json
+import math
+import re
+import shutil
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import bench_common
+import build_cache
+
+# Warnings as in the Makefile, so every toolchain sees the same diagnostics
+WARNINGS = ("-Wall -Wextra -Wpedantic -Wmissing-prototypes -Wredundant-decls "
+            "-Wshadow -Wpointer-arith")
+
+DEFAULT_MATRIX = {
+    "gcc-O2": {"cc": "gcc", "cflags": "-O2"},
+    "gcc-O3": {"cc": "gcc", "cflags": "-O3 -fomit-frame-pointer"},
+    "gcc-O3-native": {"cc": "gcc", "cflags": "-O3 -fomit-frame-pointer -march=native"},
+    "gcc-O3-native-lto": {"cc": "gcc", "cflags": "-O3 -fomit-frame-pointer -march=native -flto"},
+    "clang-O2": {"cc": "clang", "cflags": "-O2"},
+    "clang-O3": {"cc": "clang", "cflags": "-O3 -fomit-frame-pointer"},
+    "clang-O3-native": {"cc": "clang", "cflags": "-O3 -fomit-frame-pointer -march=native"},
+}
+
+# Operations shown in the cross tables
+KEY_OPS = ["poly_compress", "polyvec_compress", "poly_getnoise_eta1", "NTT",
+           "indcpa_keypair", "indcpa_enc", "indcpa_dec",
+           "kyber_keypair", "kyber_encaps", "kyber_decaps"]
+
+SPEED_PATTERN = re.compile(r"^(\w+):\s*\nmedian:\s*(\d+)[^\n]*\naverage:\s*(\d+)", re.MULTILINE)
+
+
+def parse_speed_output(text):
+    """{operation: (median, average)} from test_speed output"""
+    return {m.group(1): (int(m.group(2)), int(m.group(3))) for m in SPEED_PATTERN.finditer(text)}
+
+
+def median_ci(values, confidence=0.95):
+    """
+    Median of the per-run medians and a distribution-free confidence interval
+    from order statistics (binomial), widened to the full range when there
+    are too few runs for the requested confidence.
+    """
+    x = sorted(values)
+    n = len(x)
+    if n == 0:
+        return None, None, None
+    med = x[n // 2] if n % 2 else (x[n // 2 - 1] + x[n // 2]) / 2
+    lo, hi = 0, n - 1
+    # Narrow symmetrically while the coverage P(x_lo <= median <= x_hi) stays high enough:
+    # [x_k, x_(n-1-k)] holds the median iff k+1 <= #(x_i < median) <= n-k-1, a Binomial(n, 1/2)
+    while lo + 1 < hi - 1:
+        k = lo + 1
+        coverage = sum(math.comb(n, i) for i in range(k + 1, n - k)) / 2 ** n
+        if coverage < confidence:
+            break
+        lo, hi = k, n - 1 - k
+    return med, x[lo], x[hi]
+
+
+def load_matrix(path):
+    if not path:
+        return dict(DEFAULT_MATRIX)
+    with open(path) as f:
+        return json.load(f)
+
+
+def available_toolchains(matrix):
+    available, missing = {}, []
+    for name, tc in matrix.items():
+        if shutil.which(tc["cc"]):
+            available[name] = tc
+        else:
+            missing.append(name)
+    return available, missing
+
+
+def build_all(configs, toolchains, jobs):
+    """Build every (config, toolchain) pair in parallel, return {(test, toolchain): entry}"""
+    # Every build is measured after all are done, so none of them may be
+    # evicted by the others: the cache keeps at least the whole matrix
+    max_entries = max(build_cache.MAX_ENTRIES, len(configs) * len(toolchains))
+
+    def build_one(test_name, tc_name):
+        tc = toolchains[tc_name]
+        entry, hit = build_cache.build(bench_common.config_path(test_name), build_cache.SPEED_TARGETS,
+                                       cc=tc["cc"], cflags=f"{WARNINGS} {tc['cflags']}",
+                                       max_entries=max_entries, replace_cflags=True)
+        return entry, hit
+
+    entries = {}
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = {pool.submit(build_one, t, tc): (t, tc) for t in configs for tc in toolchains}
+        for future, (test_name, tc_name) in futures.items():
+            try:
+                entry, hit = future.result()
+            except RuntimeError as e:
+                print(f"  {test_name} / {tc_name}: build failed: {str(e).splitlines()[0]}",
+                      file=sys.stderr)
+                continue
+            entries[(test_name, tc_name)] = entry
+            print(f"  {test_name} / {tc_name}: {'cached build' if hit else 'built'} {entry.name[:12]}")
+    return entries
+
+
+def measure(entries, variants, repeats, run_dir):
+    """
+    Run every build `repeats` times, interleaving the toolchains of a
+    configuration so slow drifts of the machine hit all of them alike.
+    Returns {test: {toolchain: {variant: {op: [medians]}}}}.
+    """
+    data = {}
+    failed = set()
+    for r in range(repeats):
+        print(f"  Repetition {r + 1}/{repeats}")
+        for (test_name, tc_name), entry in sorted(entries.items()):
+            for variant in variants:
+                if (test_name, tc_name, variant) in failed:
+                    continue
+                binary = entry / f"test_speed{variant}"
+                try:
+                    output = subprocess.run([str(binary)], capture_output=True, text=True,
+                                            check=True).stdout
+                except (OSError, subprocess.CalledProcessError) as e:
+                    # e.g. the build was evicted from the cache by another driver meanwhile
+                    print(f"  {test_name} / {tc_name} / kyber{variant}: cannot run {binary}: {e}",
+                          file=sys.stderr)
+                    failed.add((test_name, tc_name, variant))
+                    continue
+                out_dir = run_dir / tc_name / test_name
+                out_dir.mkdir(parents=True, exist_ok=True)
+                (out_dir / f"kyber{variant}_r{r}.txt").write_text(output)
+                ops = data.setdefault(test_name, {}).setdefault(tc_name, {}) \
+                          .setdefault(f"kyber{variant}", {})
+                for op, (med, _) in parse_speed_output(output).items():
+                    ops.setdefault(op, []).append(med)
+    return data
+
+
+def summarize(data):
+    """{test: {toolchain: {variant: {op: {median, ci_low, ci_high, runs}}}}}"""
+    summary = {}
+    for test_name, tcs in data.items():
+        for tc_name, variants in tcs.items():
+            for variant, ops in variants.items():
+                for op, values in ops.items():
+                    med, lo, hi = median_ci(values)
+                    summary.setdefault(test_name, {}).setdefault(tc_name, {}) \
+                           .setdefault(variant, {})[op] = {
+                               "median": med, "ci_low": lo, "ci_high": hi, "runs": values}
+    return summary
+
+
+def best_toolchains(summary):
+    """{test: {variant: {op: toolchain with the lowest median}}}"""
+    best = {}
+    for test_name, tcs in summary.items():
+        for tc_name, variants in tcs.items():
+            for variant, ops in variants.items():
+                for op, s in ops.items():
+                    slot = best.setdefault(test_name, {}).setdefault(variant, {})
+                    if op not in slot or s["median"] < tcs[slot[op]][variant][op]["median"]:
+                        slot[op] = tc_name
+    return best
+
+
+def print_cross_tables(summary, best, toolchains, variants):
+    col = 26
+    for variant in [f"kyber{v}" for v in variants]:
+        for op in KEY_OPS:
+            rows = [(t, tcs) for t, tcs in summary.items()
+                    if any(op in tcs[tc].get(variant, {}) for tc in tcs)]
+            if not rows:
+                continue
+            print("\n" + "=" * (30 + col * len(toolchains)))
+            print(f"{variant.upper()} {op}: median cycles [95% CI], * = best toolchain")
+            print("=" * (30 + col * len(toolchains)))
+            print(f"{'Configuration':<30}" + "".join(f"{tc:>{col}}" for tc in toolchains))
+            print("-" * (30 + col * len(toolchains)))
+            for test_name, tcs in rows:
+                line = f"{test_name:<30}"
+                for tc in toolchains:
+                    s = tcs.get(tc, {}).get(variant, {}).get(op)
+                    if not s:
+                        line += f"{'--':>{col}}"
+                        continue
+                    mark = "*" if best[test_name][variant].get(op) == tc else " "
+                    cell = f"{s['median']:.0f} [{s['ci_low']:.0f},{s['ci_high']:.0f}]{mark}"
+                    line += f"{cell:>{col}}"
+                print(line)
+
+
+def print_best_summary(best, variants):
+    print("\n" + "=" * 80)
+    print("BEST TOOLCHAIN PER CONFIGURATION")
+    print("=" * 80)
+    for test_name, by_variant in best.items():
+        for variant in [f"kyber{v}" for v in variants]:
+            ops = by_variant.get(variant)
+            if not ops:
+                continue
+            counts = {}
+            for op in KEY_OPS:
+                if op in ops:
+                    counts[ops[op]] = counts.get(ops[op], 0) + 1
+            overall = max(counts, key=counts.get) if counts else "--"
+            print(f"{test_name:<30} {variant:<10} {overall:<20} "
+                  f"(fastest in {counts.get(overall, 0)}/{sum(counts.values())} key operations)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compiler / flag matrix benchmark")
+    parser.add_argument("--matrix", help="JSON file declaring {name: {cc, cflags}} toolchains")
+    parser.add_argument("--toolchains", nargs="+", help="Subset of the matrix to run")
+    parser.add_argument("--tests", nargs="+", choices=list(bench_common.CONFIGS),
+                        default=list(bench_common.CONFIGS), help="Configurations to run")
+    parser.add_argument("--variants", nargs="+", type=int, default=[512, 768, 1024],
+                        choices=[512, 768, 1024])
+    parser.add_argument("--repeats", type=int, default=5,
+                        help="Runs per build; the CI is over the per-run medians")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="Parallel builds (default: number of CPUs)")
+
+    args = parser.parse_args()
+
+    matrix = load_matrix(args.matrix)
+    if args.toolchains:
+        matrix = {name: matrix[name] for name in args.toolchains}
+    toolchains, missing = available_toolchains(matrix)
+    for name in missing:
+        print(f"Skipping {name}: {matrix[name]['cc']} not found", file=sys.stderr)
+    if not toolchains:
+        print("Error: no toolchain of the matrix is installed")
+        sys.exit(1)
+
+    configs = list(args.tests)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    run_dir = Path("results") / f"matrix_{timestamp}"
+    run_dir.mkdir(parents=True, exist_ok=True)
+    print(f"Results directory: {run_dir}")
+
+    print(f"Building {len(configs)} configurations x {len(toolchains)} toolchains...")
+    entries = build_all(configs, toolchains, args.jobs)
+
+    print("Measuring...")
+    summary = summarize(measure(entries, args.variants, args.repeats, run_dir))
+    best = best_toolchains(summary)
+
+    with open(run_dir / "matrix_data.json", "w") as f:
+        json.dump({"timestamp": timestamp, "toolchains": toolchains, "repeats": args.repeats,
+                   "results": summary, "best": best}, f, indent=2)
+
+    print_cross_tables(summary, best, list(toolchains), args.variants)
+    print_best_summary(best, args.variants)
+    print(f"\nJSON data saved to: {run_dir / 'matrix_data.json'}")
+
+
+if __name__ == "__main__":
+    main()
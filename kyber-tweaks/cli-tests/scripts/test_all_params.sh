@@ -84,6 +84,20 @@ test_config() {
     echo "Secret key: $(ls -l test.sec | awk '{print $5}') bytes" >> sizes.txt
     echo "Ciphertext: $(ls -l ct.bin | awk '{print $5}') bytes" >> sizes.txt
     
+    # Check sizes against the params.h formulas (du dv pk sk ct)
+    echo -n "Checking sizes... "
+    local expected=($(python3 "$CLI_TEST_DIR/../kyber-dynamic-security-analysis/scripts/kyber_sizes.py" \
+        --header "$KYBER_DIR/configs/$config_file"))
+    local pk_size=$(ls -l test.pub | awk '{print $5}')
+    local sk_size=$(ls -l test.sec | awk '{print $5}')
+    local ct_size=$(ls -l ct.bin | awk '{print $5}')
+    if [ "$pk_size $sk_size $ct_size" == "${expected[2]} ${expected[3]} ${expected[4]}" ]; then
+        echo -e "${GREEN}✓ Match the size formulas${NC}"
+    else
+        echo -e "${RED}✗ Expected pk/sk/ct ${expected[2]}/${expected[3]}/${expected[4]} bytes${NC}"
+        echo "FAILED" > result.txt
+    fi
+    
     # Run demo in quick mode
     "$CLI_TEST_DIR/kyber_demo" -q > demo.log 2>&1
     
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+Interned (flyweight) immutable parameter objects.
+
+Noise distributions and LWE parameters are created over and over while estimating, e.g. by
+``LWEParameters.updated()`` in the search loops, and are keys of the ``cached_function`` caches.
+Constructing an object that is equal to one that is still alive returns the existing object, so
+equal parameters share one object, compare by identity first and hash once.
+"""
+
+from dataclasses import fields
+from weakref import WeakValueDictionary
+
+
+class InternedType(type):
+    """
+    Metaclass keeping one instance per value and class while it is alive.
+    """
+
+    def __init__(cls, name, bases, namespace):
+        super().__init__(name, bases, namespace)
+        cls._interned = WeakValueDictionary()
+
+    def __call__(cls, *args, **kwds):
+        return cls.intern(super().__call__(*args, **kwds))
+
+    def intern(cls, obj):
+        """
+        Return the live instance equal to ``obj`` if there is one, else register ``obj``.
+
+        :param obj: a freshly created instance, e.g. a copy.
+        """
+        key = obj._intern_key()
+        interned = type(obj)._interned
+        try:
+            return interned[key]
+        except KeyError:
+            interned[key] = obj
+            return obj
+
+
+class Interned(metaclass=InternedType):
+    """
+    Base class of interned objects: instances must not change after construction.
+
+    Subclasses provide ``_hash_key()``; attributes listed in ``_transient`` are caches that are
+    neither part of the value nor pickled.
+
+    EXAMPLE::
+
+        >>> from estimator import *
+        >>> ND.CenteredBinomial(3) is ND.CenteredBinomial(3)
+        True
+        >>> schemes.Kyber512.updated(m=1337) is schemes.Kyber512.updated(m=1337)
+        True
+
+    """
+
+    _transient = ("_hash", "_resized")
+
+    def _hash_key(self):
+        raise NotImplementedError("_hash_key")
+
+    def _intern_key(self):
+        # dataclass fields in declaration order, then attributes set outside them (e.g. SparseTernary's p
+        # and m) by name, so the key does not depend on the order in which attributes were assigned
+        names = [f.name for f in fields(self)]
+        extra = sorted(k for k in self.__dict__ if k not in names and k not in self._transient)
+        return (type(self), *(self.__dict__[k] for k in names), *((k, self.__dict__[k]) for k in extra))
+
+    def __hash__(self):
+        try:
+            return self._hash
+        except AttributeError:
+            object.__setattr__(self, "_hash", hash(self._hash_key()))
+            return self._hash
+
+    def __getstate__(self):
+        # hashes of strings differ between processes
+        return {k: v for k, v in self.__dict__.items() if k not in self._transient}
@@ -4,22 +4,100 @@ High-level LWE interface
 """
 
 from functools import partial
-from sage.all import oo
-
-from .lwe_primal import primal_usvp, primal_bdd, primal_hybrid
-from .lwe_bkw import coded_bkw
-from .lwe_guess import exhaustive_search, mitm, distinguish, guess_composition  # noqa
-from .lwe_dual import dual
-from .lwe_dual import matzov as dual_hybrid
-from .gb import arora_gb  # noqa
+from sage.all import oo, log
+
 from .lwe_parameters import LWEParameters as Parameters  # noqa
 from .conf import (
     red_cost_model as red_cost_model_default,
     red_shape_model as red_shape_model_default,
 )
-from .util import batch_estimate, f_name
+from .util import batch_estimate, f_name, _batch_estimatef
 from .reduction import RC
 from .io import Logging
+from .trace import Trace
+
+# Attacks are imported on first access (PEP 562), so that ``LWE.primal_usvp`` does not load e.g. BKW or
+# Gröbner basis code.
+_attacks = {
+    "primal_usvp": ("lwe_primal", "primal_usvp"),
+    "primal_bdd": ("lwe_primal", "primal_bdd"),
+    "primal_hybrid": ("lwe_primal", "primal_hybrid"),
+    "coded_bkw": ("lwe_bkw", "coded_bkw"),
+    "exhaustive_search": ("lwe_guess", "exhaustive_search"),
+    "mitm": ("lwe_guess", "mitm"),
+    "distinguish": ("lwe_guess", "distinguish"),
+    "guess_composition": ("lwe_guess", "guess_composition"),
+    "dual": ("lwe_dual", "dual"),
+    "dual_hybrid": ("lwe_dual", "matzov"),
+    "arora_gb": ("gb", "arora_gb"),
+}
+
+
+def __getattr__(name):
+    try:
+        module, attr = _attacks[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    value = getattr(__import__(module, globals(), level=1, fromlist=[attr]), attr)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_attacks))
+
+
+def cost_model_label(red_cost_model):
+    """
+    Name of a lattice reduction cost model, followed by its mode unless classical, e.g. ``ADPS16-quantum``.
+
+    :param red_cost_model: How to cost lattice reduction.
+    """
+    label = f_name(red_cost_model)
+    for attr, default in (("mode", "classical"), ("nn", "list_decoding-classical")):
+        value = getattr(red_cost_model, attr, default)
+        if value != default:
+            label += f"-{value}"
+    return label
+
+
+class _CostModels:
+    """
+    Run one attack under several cost models for lattice reduction, in turn and in the same process, so that
+    what the attack caches independently of the cost model carries over from one cost model to the next.
+    """
+
+    def __init__(self, name, attack, red_cost_models, uses_model=True, catch_exceptions=True):
+        """
+        :param name: Name of the attack.
+        :param attack: A function of the LWE parameters, taking ``red_cost_model`` if ``uses_model``.
+        :param red_cost_models: Cost models by label.
+        :param uses_model: If ``False`` the attack runs once, its cost holds for every cost model.
+        :param catch_exceptions: When an estimate under one cost model fails, just print a warning.
+        """
+        self.__name__ = name
+        self.attack = attack
+        self.red_cost_models = red_cost_models
+        self.uses_model = uses_model
+        self.catch_exceptions = catch_exceptions
+
+    def __call__(self, params):
+        if not self.uses_model:
+            cost = self.attack(params)
+            return {label: cost.copy() for label in self.red_cost_models}
+
+        res = {}
+        for label, red_cost_model in self.red_cost_models.items():
+            cost = _batch_estimatef(
+                partial(self.attack, red_cost_model=red_cost_model),
+                params,
+                log_level=2,
+                f_repr=f"{self.__name__} ({label})",
+                catch_exceptions=self.catch_exceptions,
+            )
+            if cost is not None:
+                res[label] = cost
+        return res
 
 
 class Estimate:
@@ -42,6 +120,8 @@ class Estimate:
         - Arora-GB only applies to bounded noise with at least `n^2` samples.
         - BKW is not competitive.
 
+        To screen many parameter sets at once, see :func:`estimator.lwe_rough.core_svp`.
+
         :param params: LWE parameters.
         :param jobs: Use multiple threads in parallel.
         :param catch_exceptions: When an estimate fails, just print a warning.
@@ -58,21 +138,12 @@ class Estimate:
 
         """
         params = params.normalize()
+        algorithms = self._rough_algorithms(params)
 
-        algorithms = {}
-
-        algorithms["usvp"] = partial(primal_usvp, red_cost_model=RC.ADPS16, red_shape_model="gsa")
-        algorithms["dual_hybrid"] = partial(dual_hybrid, red_cost_model=RC.ADPS16)
-
-        if params.m > params.n**2 and params.Xe.is_bounded:
-            if params.Xs.is_sparse:
-                algorithms["arora-gb"] = guess_composition(arora_gb.cost_bounded)
-            else:
-                algorithms["arora-gb"] = arora_gb.cost_bounded
-
-        res_raw = batch_estimate(
-            params, algorithms.values(), log_level=1, jobs=jobs, catch_exceptions=catch_exceptions
-        )
+        with Trace.span("LWE.estimate.rough", "estimate", params=params):
+            res_raw = batch_estimate(
+                params, algorithms.values(), log_level=1, jobs=jobs, catch_exceptions=catch_exceptions
+            )
         res_raw = res_raw[params]
         res = {
             algorithm: v
@@ -90,6 +161,60 @@ class Estimate:
 
         return res
 
+    @staticmethod
+    def _rough_algorithms(params):
+        """
+        The algorithms run by :meth:`rough` on normalized ``params``, by name.
+        """
+        from .lwe_primal import primal_usvp
+        from .lwe_dual import matzov as dual_hybrid
+        from .lwe_guess import guess_composition
+        from .gb import arora_gb
+
+        algorithms = {}
+
+        algorithms["usvp"] = partial(primal_usvp, red_cost_model=RC.ADPS16, red_shape_model="gsa")
+        algorithms["dual_hybrid"] = partial(dual_hybrid, red_cost_model=RC.ADPS16)
+
+        if params.m > params.n**2 and params.Xe.is_bounded:
+            if params.Xs.is_sparse:
+                algorithms["arora-gb"] = guess_composition(arora_gb.cost_bounded)
+            else:
+                algorithms["arora-gb"] = arora_gb.cost_bounded
+        return algorithms
+
+    @staticmethod
+    def _algorithms(red_shape_model=red_shape_model_default):
+        """
+        The algorithms run by default as ``(function, cost model dependent)`` by name; the functions of the
+        latter still take ``red_cost_model``.
+        """
+        from .lwe_primal import primal_usvp, primal_bdd, primal_hybrid
+        from .lwe_bkw import coded_bkw
+        from .lwe_dual import dual, matzov as dual_hybrid
+        from .lwe_guess import guess_composition
+        from .gb import arora_gb
+
+        algorithms = {}
+
+        algorithms["arora-gb"] = (guess_composition(arora_gb), False)
+        algorithms["bkw"] = (coded_bkw, False)
+
+        algorithms["usvp"] = (partial(primal_usvp, red_shape_model=red_shape_model), True)
+        algorithms["bdd"] = (partial(primal_bdd, red_shape_model=red_shape_model), True)
+        algorithms["bdd_hybrid"] = (
+            partial(primal_hybrid, mitm=False, babai=False, red_shape_model=red_shape_model),
+            True,
+        )
+        # we ignore the case of mitm=True babai=False for now, due to it being overly-optimistic
+        algorithms["bdd_mitm_hybrid"] = (
+            partial(primal_hybrid, mitm=True, babai=True, red_shape_model=red_shape_model),
+            True,
+        )
+        algorithms["dual"] = (dual, True)
+        algorithms["dual_hybrid"] = (dual_hybrid, True)
+        return algorithms
+
     def __call__(
         self,
         params,
@@ -128,41 +253,17 @@ class Estimate:
         """
         params = params.normalize()
 
-        algorithms = {}
-
-        algorithms["arora-gb"] = guess_composition(arora_gb)
-        algorithms["bkw"] = coded_bkw
-
-        algorithms["usvp"] = partial(
-            primal_usvp, red_cost_model=red_cost_model, red_shape_model=red_shape_model
-        )
-        algorithms["bdd"] = partial(
-            primal_bdd, red_cost_model=red_cost_model, red_shape_model=red_shape_model
-        )
-        algorithms["bdd_hybrid"] = partial(
-            primal_hybrid,
-            mitm=False,
-            babai=False,
-            red_cost_model=red_cost_model,
-            red_shape_model=red_shape_model,
-        )
-        # we ignore the case of mitm=True babai=False for now, due to it being overly-optimistic
-        algorithms["bdd_mitm_hybrid"] = partial(
-            primal_hybrid,
-            mitm=True,
-            babai=True,
-            red_cost_model=red_cost_model,
-            red_shape_model=red_shape_model,
-        )
-        algorithms["dual"] = partial(dual, red_cost_model=red_cost_model)
-        algorithms["dual_hybrid"] = partial(dual_hybrid, red_cost_model=red_cost_model)
-
-        algorithms = {k: v for k, v in algorithms.items() if k not in deny_list}
+        algorithms = {
+            name: partial(attack, red_cost_model=red_cost_model) if uses_model else attack
+            for name, (attack, uses_model) in self._algorithms(red_shape_model).items()
+            if name not in deny_list
+        }
         algorithms.update(add_list)
 
-        res_raw = batch_estimate(
-            params, algorithms.values(), log_level=1, jobs=jobs, catch_exceptions=catch_exceptions
-        )
+        with Trace.span("LWE.estimate", "estimate", params=params):
+            res_raw = batch_estimate(
+                params, algorithms.values(), log_level=1, jobs=jobs, catch_exceptions=catch_exceptions
+            )
         res_raw = res_raw[params]
         res = {
             algorithm: v
@@ -187,5 +288,89 @@ class Estimate:
 
         return res
 
+    def models(
+        self,
+        params,
+        red_cost_models=(RC.MATZOV, RC.BDGL16, RC.ADPS16),
+        red_shape_model=red_shape_model_default,
+        deny_list=tuple(),
+        add_list=tuple(),
+        jobs=1,
+        catch_exceptions=True,
+        quiet=False,
+    ):
+        """
+        Run all estimates under several cost models for lattice reduction in one pass.
+
+        Each attack runs under all cost models in turn and in the same process (one per attack when ``jobs > 1``).
+        What does not depend on the cost model, e.g. lattice dimensions, simulated basis profiles, success
+        conditions and reduced instances, is cached by the attacks and so computed once, only the cost of
+        reduction is evaluated per cost model. Attacks without lattice reduction run once.
+
+        :param params: LWE parameters.
+        :param red_cost_models: How to cost lattice reduction, a list of cost models or a ``{label: cost model}``
+            dictionary; cost models in a list are labelled by :func:`cost_model_label`.
+        :param red_shape_model: How to model the shape of a reduced basis (applies to primal attacks)
+        :param deny_list: skip these algorithms
+        :param add_list: add these ``(name, function)`` pairs to the list of algorithms to estimate, the
+            functions take ``red_cost_model``.
+        :param jobs: Use multiple threads in parallel.
+        :param catch_exceptions: When an estimate fails, just print a warning.
+        :param quiet: suppress printing
+        :return: ``{algorithm: {label: cost}}``
+
+        EXAMPLE ::
+
+            >>> from estimator import *
+            >>> deny_list = ("arora-gb", "bkw", "bdd", "bdd_hybrid", "bdd_mitm_hybrid", "dual")
+            >>> r = LWE.estimate.models(schemes.Kyber512, (RC.MATZOV, RC.ADPS16), deny_list=deny_list)
+            algorithm               MATZOV    ADPS16
+            usvp                  ≈2^143.8  ≈2^118.6
+            dual_hybrid           ≈2^139.7  ≈2^115.5
+            >>> r["usvp"]["ADPS16"]
+            rop: ≈2^118.6, red: ≈2^118.6, δ: 1.003941, β: 406, d: 998, tag: usvp
+
+        """
+        params = params.normalize()
+
+        if not isinstance(red_cost_models, dict):
+            labels = [cost_model_label(model) for model in red_cost_models]
+            if len(set(labels)) < len(labels):
+                raise ValueError(f"Cost model labels {labels} are not distinct, pass a dictionary of labels.")
+            red_cost_models = dict(zip(labels, red_cost_models))
+
+        algorithms = {
+            name: _CostModels(name, attack, red_cost_models, uses_model, catch_exceptions)
+            for name, (attack, uses_model) in self._algorithms(red_shape_model).items()
+            if name not in deny_list
+        }
+        algorithms.update(
+            (name, _CostModels(name, attack, red_cost_models, True, catch_exceptions)) for name, attack in add_list
+        )
+
+        with Trace.span("LWE.estimate.models", "estimate", params=params, models=", ".join(red_cost_models)):
+            res_raw = batch_estimate(
+                params, algorithms.values(), log_level=1, jobs=jobs, catch_exceptions=catch_exceptions
+            )
+        res_raw = res_raw[params]
+        res = {algorithm: res_raw[algorithm] for algorithm in algorithms if algorithm in res_raw}
+
+        def cell(cost):
+            if cost is None or cost["rop"] == oo:
+                return "-"
+            return f"≈2^{float(log(cost['rop'], 2)):.1f}"
+
+        width = max([10] + [len(label) + 2 for label in red_cost_models])
+        Logging.print(
+            "estimator", int(quiet), f"{'algorithm':20s}" + "".join(f"{label:>{width}s}" for label in red_cost_models)
+        )
+        for algorithm, costs in res.items():
+            cells = [cell(costs.get(label)) for label in red_cost_models]
+            if all(c == "-" for c in cells):
+                continue
+            Logging.print("estimator", int(quiet), f"{algorithm:20s}" + "".join(f"{c:>{width}s}" for c in cells))
+
+        return res
+
 
 estimate = Estimate()
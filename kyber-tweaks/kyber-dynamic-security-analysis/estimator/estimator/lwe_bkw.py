@@ -2,7 +2,10 @@
 """
 See :ref:`Coded-BKW for LWE` for what is available.
 """
-from sage.all import ZZ, ceil, log, floor, sqrt, find_root, erf, oo, cached_function, RR
+import math
+
+import numpy as np
+from sage.all import ZZ, ceil, log, floor, sqrt, find_root, erf, oo, RR
 
 from .lwe_parameters import LWEParameters
 from .util import local_minimum
@@ -11,6 +14,7 @@ from .errors import InsufficientSamplesError
 from .prob import amplify_sigma
 from .nd import sigmaf
 from .io import Logging
+from .trace import cached_function
 
 cfft = 1  # convolutions mod q
 
@@ -26,6 +30,37 @@ class CodedBKW:
         """
         return floor(b / (1 - log(12 * sigma_set**2 / 2**i, q) / 2))
 
+    @staticmethod
+    def Ns(ntest, i, b, q):
+        """
+        Return `N_i` for the `σ_{set}` of ``ntest`` and `ℓ = b - 1`, broadcast over arrays.
+
+        Since `12 σ_{set}^2 = q^{2(1 - ℓ/ntest)}` we have `N_i = ⌊b / (ℓ/ntest + i log_q(2)/2)⌋`,
+        which is evaluated over the integers if `q` is a power of two.
+
+        :param ntest: (array of) number of coordinates to hypothesis test
+        :param i: (array of) indices
+        :param b: table size
+        :param q: modulus
+
+        EXAMPLE::
+
+            >>> import numpy as np
+            >>> from estimator.lwe_bkw import CodedBKW
+            >>> from sage.all import sqrt
+            >>> sigma_set = sqrt(3329 ** (2 * (1 - 13 / 64)) / 12)
+            >>> [CodedBKW.N(i, sigma_set, 14, 3329) for i in range(1, 5)]
+            [56, 48, 42, 37]
+            >>> CodedBKW.Ns(64, np.arange(1, 5), 14, 3329)
+            array([56., 48., 42., 37.])
+
+        """
+        k = log(q, 2)
+        if k in ZZ:
+            k = int(k)
+            return (2 * k * b * ntest) // (2 * k * (b - 1) + i * ntest)
+        return np.floor(b / ((b - 1) / ntest + i / (2 * float(k))))
+
     @staticmethod
     @cached_function
     def ntest(n, ell, t1, t2, b, q):
@@ -82,6 +117,20 @@ class CodedBKW:
             t1 = params.n // b
         return t1
 
+    @staticmethod
+    def zeta(params: LWEParameters):
+        """
+        Base of the table size: the number of values of a secret coordinate, at most `6σ + 1` for
+        centred Gaussian-like secrets.
+        """
+        secret_bounds = params.Xs.bounds
+        if params.Xs.is_Gaussian_like and params.Xs.mean == 0:
+            secret_bounds = (
+                max(secret_bounds[0], -3 * params.Xs.stddev),
+                min(secret_bounds[1], 3 * params.Xs.stddev),
+            )
+        return secret_bounds[1] - secret_bounds[0] + 1
+
     @staticmethod
     def cost(
         t2: int,
@@ -110,15 +159,7 @@ class CodedBKW:
         ell = b - 1
         cost["ell"] = ell
 
-        secret_bounds = params.Xs.bounds
-        if params.Xs.is_Gaussian_like and params.Xs.mean == 0:
-            secret_bounds = (
-                max(secret_bounds[0], -3 * params.Xs.stddev),
-                min(secret_bounds[1], 3 * params.Xs.stddev),
-            )
-
-        # base of the table size.
-        zeta = secret_bounds[1] - secret_bounds[0] + 1
+        zeta = CodedBKW.zeta(params)
 
         t1 = CodedBKW.t1(params, ell, t2, b, ntest)
         t2 -= t1
@@ -213,6 +254,142 @@ class CodedBKW:
 
         return cost
 
+    @classmethod
+    def cost_surface(cls, b: int, params: LWEParameters, ntest=None, success_probability=0.99):
+        """
+        ``rop`` and ``m`` of :meth:`cost` for table size ``b`` and all ``2 ≤ t2 < max(3, n // b)`` at once.
+
+        The `N_i` of all steps are computed in closed form (see :meth:`Ns`), ``#cod`` are their
+        prefix sums and ``ntest`` is solved for by bisection, since ``#top`` strictly decreases in it.
+
+        :param b: Table size (≥ 2).
+        :param params: LWE parameters.
+        :param ntest: Number of coordinates to hypothesis test.
+        :param success_probability: Targeted success probability < 1.
+        :return: arrays ``rop`` and ``m`` indexed by ``t2``.
+
+        EXAMPLE::
+
+            >>> import numpy as np
+            >>> from estimator import *
+            >>> from estimator.lwe_bkw import CodedBKW
+            >>> rop, m = CodedBKW.cost_surface(14, schemes.Kyber512)
+            >>> print(f"rop: ≈2^{np.log2(rop[16]):.1f}, m: ≈2^{np.log2(m[16]):.1f}")
+            rop: ≈2^178.8, m: ≈2^166.8
+            >>> CodedBKW.cost(t2=16, b=14, ntest=None, params=schemes.Kyber512)
+            rop: ≈2^178.8, m: ≈2^166.8, mem: ≈2^167.8, b: 14, t1: 0, t2: 16, ℓ: 13, #cod: 448, ...
+
+        """
+        b, n, q = int(b), int(params.n), params.q
+        t2_max = max(3, n // b)
+        rop = np.full(t2_max, np.nan)
+        m = np.full(t2_max, np.nan)
+
+        with np.errstate(over="ignore"):
+            qb = np.float64(q) ** b
+        if not np.isfinite(qb):
+            # the tables alone exceed 2^1024 samples and operations
+            rop[2:], m[2:] = np.inf, np.inf
+            return rop, m
+
+        i = np.arange(1, t2_max)
+        Q = (qb - 1) / 2
+        zeta = float(cls.zeta(params))
+        stddev_s, stddev_e = float(params.Xs.stddev), float(params.Xe.stddev)
+        erf_ = math.erf(zeta / math.sqrt(2 * stddev_e))
+        prec_min = max(53, *(2 * math.ceil(abs(math.log2(p))) for p in (success_probability, 1 - success_probability)))
+
+        def prefix(ntest):
+            # N_i and #cod for t2 = 0, 1, …, t2_max - 1, one row per ntest
+            N = cls.Ns(ntest[:, None], i, b, q)
+            return N, np.concatenate([np.zeros((len(ntest), 1)), np.cumsum(N, axis=1)], axis=1)
+
+        def solve_ntest(t1, t2):
+            # CodedBKW.ntest: the first minimum of |#top| over 1 ≤ ntest ≤ n - t1·b
+            top = n - t1 * b
+
+            def ntop(ntest):
+                return top - np.take_along_axis(prefix(ntest)[1], t2[:, None], axis=1)[:, 0] - ntest
+
+            # the smallest ntest with #top ≤ 0, n - t1·b + 1 if there is none
+            lo, hi = np.ones_like(top), np.maximum(top + 1, 1)
+            while (lo < hi).any():
+                mid = (lo + hi) // 2
+                below = ntop(mid) <= 0
+                lo, hi = np.where((lo < hi) & ~below, mid + 1, lo), np.where((lo < hi) & below, mid, hi)
+            left, right = np.clip(lo - 1, 1, np.maximum(top, 1)), np.clip(lo, 1, np.maximum(top, 1))
+            ntest = np.where(np.abs(ntop(left)) <= np.abs(ntop(right)), left, right)
+            return np.where(top > 0, ntest, 0)
+
+        # rows of t2 values, bounding the working memory for large n
+        rows = max(1, 2**22 // len(i))
+        for start in range(2, t2_max, rows):
+            t2_ = np.arange(start, min(start + rows, t2_max))
+
+            # CodedBKW.t1
+            ntest_ = solve_ntest(np.zeros_like(t2_), t2_) if ntest is None else np.full_like(t2_, int(ntest))
+            t1 = ((cls.Ns(ntest_[:, None], i, b, q) <= b) & (i <= t2_[:, None])).sum(axis=1)
+            t1 = np.where(b * t1 > n, n // b, t1)
+            t2 = t2_ - t1
+
+            if ntest is None:
+                ntest_ = solve_ntest(t1, t2)
+            # there is no σ_set without hypothesis testing, CodedBKW.cost does not cover this case
+            undefined = ntest_ == 0
+            ntest_ = np.where(undefined, 1, ntest_)
+
+            with np.errstate(over="ignore", divide="ignore", invalid="ignore"):
+                N, P = prefix(ntest_)
+                steps = i <= t2[:, None]
+                ncod = np.take_along_axis(P, t2[:, None], axis=1)[:, 0]
+                ntop = np.maximum(n - ncod - ntest_ - t1 * b, 0)
+                sigma_set2 = np.float64(q) ** (2 * (1 - (b - 1) / ntest_)) / 12
+
+                # Theorem 1: quantization noise + addition noise
+                coding_variance = stddev_s**2 * sigma_set2 * (ncod + ntest_)
+                sigma_final = np.sqrt(2.0 ** (t1 + t2) * stddev_e**2 + coding_variance)
+
+                # amplify_sigma: amplify computes 1 - advantage^2 with 2·log(1/advantage) bits, which
+                # keeps about two bits of advantage^2, so we round it the same way
+                sigma = math.sqrt(2 * math.pi) * sigma_final
+                advantage = np.exp(-math.pi * (sigma / float(q)) ** 2)
+                prec = 2 * np.ceil(np.maximum(np.abs(np.log2(advantage)), np.abs(np.log2(1 - advantage))))
+                prec = np.clip(prec, prec_min, 2048)
+                rounded = -np.rint(np.exp2(2 * np.log2(advantage) + prec)) * np.exp2(-prec)
+                log_ = np.where(prec > 53, rounded, np.log(1 - advantage**2))
+                M = np.ceil(2 * math.log(2 - 2 * success_probability) / log_)
+                M = np.where(success_probability < advantage, 1, M)
+                M = np.where((sigma > 16 * float(q)) | (advantage == 0), np.inf, M)
+                m_ = (t1 + t2) * Q + M
+
+                if not params.Xs <= params.Xe:
+                    # Equation (7)
+                    n_ = n - t1 * b
+                    C0 = (m_ - n_) * (n + 1) * np.ceil(n_ / (b - 1))
+                else:
+                    C0 = 0
+
+                # Equation (8)
+                C1 = np.where(i <= t1[:, None], (n + 1 - i * b) * (m_[:, None] - i * Q), 0).sum(axis=1)
+
+                # Equation (9)
+                C2 = np.where(steps, 4 * (M[:, None] + i * Q) * N, 0).sum(axis=1)
+                C2 += np.where(steps, ((ntop + ntest_)[:, None] + P[:, 1:]) * (M[:, None] + (i - 1) * Q), 0).sum(axis=1)
+
+                # Equation (10)
+                C3 = M * ntop * (2 * zeta + 1) ** ntop
+
+                # Equation (11)
+                C4 = 4 * M * ntest_ + (2 * zeta + 1) ** ntop * (cfft * qb * b * math.log2(q) + qb)
+
+                C = (C0 + C1 + C2 + C3 + C4) / erf_**ntop
+
+            infinite = undefined | ~np.isfinite(m_)
+            rop[t2_] = np.where(infinite | np.isnan(C), np.inf, C)
+            m[t2_] = np.where(infinite, np.inf, m_)
+
+        return rop, m
+
     @classmethod
     def b(
         cls,
@@ -227,14 +404,14 @@ class CodedBKW:
         b_max = 3 * ceil(log(params.q, 2))
         with local_minimum(2, b_max, smallerf=sf) as it_b:
             for b in it_b:
-                # the inner search is over t2, the number of coded steps
+                # the inner search is over t2, the number of coded steps, on the cost surface for b
+                rop, m = cls.cost_surface(b, params, ntest=ntest)
                 t2_max = max(3, params.n // b)
                 with local_minimum(2, t2_max, smallerf=sf) as it_t2:
                     for t2 in it_t2:
-                        y = cls.cost(b=b, t2=t2, ntest=ntest, params=params)
-                        it_t2.update(y)
+                        it_t2.update({"rop": float(rop[t2]), "m": float(m[t2]), "t2": t2})
                     it_b.update(it_t2.y)
-            best = it_b.y
+            best = cls.cost(b=it_b.x, t2=it_b.y["t2"], ntest=ntest, params=params)
 
         # the search cannot fail. It just outputs some X with X["oracle"]>m.
         if best["m"] > params.m:
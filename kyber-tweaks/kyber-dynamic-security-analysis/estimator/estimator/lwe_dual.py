@@ -8,7 +8,7 @@ See :ref:`LWE Dual Attacks` for an introduction what is available.
 
 from functools import partial
 
-from sage.all import oo, ceil, sqrt, log, cached_function, RR, exp, pi, e, coth, tanh
+from sage.all import oo, ceil, sqrt, log, RR, exp, pi, e, coth, tanh
 
 from .reduction import delta as deltaf
 from .util import local_minimum, early_abort_range
@@ -16,6 +16,7 @@ from .cost import Cost
 from .lwe_parameters import LWEParameters
 from .prob import drop as prob_drop, amplify as prob_amplify
 from .io import Logging
+from .trace import cached_function
 from .conf import red_cost_model as red_cost_model_default, mitm_opt as mitm_opt_default
 from .errors import OutOfBoundsError, InsufficientSamplesError
 from .nd import DiscreteGaussian, SparseTernary
@@ -150,10 +151,7 @@ class DualHybrid:
         )
         Logging.log("dual", log_level + 1, f"red LWE instance: {repr(params_slv)}")
 
-        if t:
-            cost = DualHybrid.fft_solver(params_slv, success_probability, t)
-        else:
-            cost = solver(params_slv, success_probability)
+        cost = DualHybrid.solve(solver, params_slv, success_probability, t).copy()
         cost["beta"] = beta
 
         if cost["rop"] == oo or cost["m"] == oo:
@@ -187,6 +185,27 @@ class DualHybrid:
         # just guess different components of the secret
         return cost.repeat(times=rep, select={"m": False})
 
+    @staticmethod
+    @cached_function
+    def solve(solver, params: LWEParameters, success_probability: float = 0.99, t: int = 0):
+        """
+        Cost of solving the reduced instance.
+
+        The reduced instance depends on the cost model only through the scaling factor `ρ`, so
+        estimates under cost models sharing `ρ` share this cost.
+
+        :param solver: Algorithm for solving the reduced instance
+        :param params: Reduced LWE parameters
+        :param success_probability: The success probability to target
+        :param t: Number of secret coordinates to guess mod 2, if non-zero the FFT distinguisher is used
+
+        .. note :: The returned cost is shared, copy it before changing it.
+
+        """
+        if t:
+            return DualHybrid.fft_solver(params, success_probability, t)
+        return solver(params, success_probability)
+
     @staticmethod
     def fft_solver(params, success_probability, t=0):
         """
@@ -521,6 +540,31 @@ class MATZOV:
         return 4 * cls.C_add * D  # Theorem 7.6, p.39
 
     @classmethod
+    @cached_function
+    def T_guessf(cls, params, N, k_enum, k_fft, p):
+        """
+        Time complexity of guessing `k_enum` coordinates and distinguishing the rest with the FFT.
+
+        :param params: LWE parameters
+        :param N: Number of short vectors
+        :param k_enum: Guessing dimension
+        :param k_fft: FFT dimension
+        :param p: FFT modulus
+
+        """
+        H = cls.Hf(params.Xs)
+
+        coeff = 1 / (1 - exp(-1 / 2 / params.Xs.stddev**2))
+        tmp_alpha = pi**2 * params.Xs.stddev**2
+        tmp_a = exp(8 * tmp_alpha * exp(-2 * tmp_alpha) * tanh(tmp_alpha)).n(30)
+        return coeff * (
+            ((2 * tmp_a / sqrt(e)) ** k_enum)
+            * (2 ** (k_enum * H))
+            * (cls.T_fftf(k_fft, p) + cls.T_tablef(N))
+        )
+
+    @classmethod
+    @cached_function
     def Nf(cls, params, m, beta_bkz, beta_sieve, k_enum, k_fft, p):
         """
         Required number of samples to distinguish with advantage.
@@ -598,16 +642,7 @@ class MATZOV:
             beta, N=N, d=k_lat + m, sieve_dim=beta_sieve
         )
 
-        H = cls.Hf(params.Xs)
-
-        coeff = 1 / (1 - exp(-1 / 2 / params.Xs.stddev**2))
-        tmp_alpha = pi**2 * params.Xs.stddev**2
-        tmp_a = exp(8 * tmp_alpha * exp(-2 * tmp_alpha) * tanh(tmp_alpha)).n(30)
-        T_guess = coeff * (
-            ((2 * tmp_a / sqrt(e)) ** k_enum)
-            * (2 ** (k_enum * H))
-            * (cls.T_fftf(k_fft, p) + cls.T_tablef(N))
-        )
+        T_guess = cls.T_guessf(params, N, k_enum, k_fft, p)
 
         cost = Cost(rop=T_sample + T_guess, problem=params)
         cost["red"] = T_sample
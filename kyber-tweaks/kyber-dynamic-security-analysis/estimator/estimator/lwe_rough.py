@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+"""
+Rough estimates for many LWE parameter sets at once.
+
+This evaluates the primal uSVP attack and the plain dual attack under the assumptions of
+:meth:`LWE.estimate.rough <estimator.lwe.Estimate.rough>` (the GSA and the Core-SVP cost model
+``RC.ADPS16``) on NumPy arrays of parameters, one row per parameter set. The block sizes are
+found for all rows simultaneously, by bisection for uSVP (the smallest β that succeeds) and by
+ternary search for the dual attack (cost is unimodal in β), so a million rows take seconds.
+
+The formulas are those of ``PrimalUSVP.cost_gsa`` and of ``DualHybrid.cost`` with the distinguisher
+and ``ζ = 0``, so that costs agree with ``LWE.primal_usvp(params, red_cost_model=RC.ADPS16,
+red_shape_model="gsa")`` and ``LWE.dual(params, red_cost_model=RC.ADPS16)`` up to the search
+tolerances of those functions. Only the standard deviations of the secret and the error
+distributions enter, i.e. sparse secrets are treated like dense secrets of the same standard
+deviation.
+
+EXAMPLE::
+
+    >>> import numpy as np
+    >>> from estimator import *
+    >>> from estimator.lwe_rough import core_svp
+    >>> r = core_svp(n=[512, 768, 1024], q=3329, stddev_s=[1.22, 1, 1], stddev_e=[1.22, 1, 1], m=[512, 768, 1024])
+    >>> r["usvp_beta"], np.round(r["usvp"], 1)
+    (array([406, 624, 874]), array([118.6, 182.2, 255.2]))
+    >>> LWE.estimate.rough(schemes.Kyber768, quiet=True)["usvp"]["beta"]
+    624
+
+"""
+
+import numpy as np
+
+CORE_SVP = 0.292  # log₂ cost of sieving in dimension β per β, RC.ADPS16
+SIEVE_OUTPUT = 0.2075  # log₂ number of short vectors a sieve outputs per β
+
+# δ for β ≤ 40 as in ``ReductionCost._delta``
+_SMALL_DELTA = ((2, 1.02190), (5, 1.01862), (10, 1.01616), (15, 1.01485), (20, 1.01420), (25, 1.01342),
+                (28, 1.01331), (40, 1.01295))
+
+
+def log_delta(beta):
+    """
+    Natural logarithm of the root-Hermite factor δ of BKZ-β, for arrays of block sizes.
+
+    :param beta: Block sizes.
+
+    EXAMPLE::
+
+        >>> from estimator.lwe_rough import log_delta
+        >>> from estimator.reduction import delta
+        >>> import math
+        >>> [abs(math.exp(log_delta(b)) - delta(b)) < 1e-12 for b in (40, 100, 500)]
+        [True, True, True]
+
+    """
+    beta = np.asarray(beta, dtype=float)
+    large = np.maximum(beta, 41)
+    ld = np.log(large / (2 * np.pi * np.e) * (np.pi * large) ** (1 / large)) / (2 * (large - 1))
+    for b, delta in reversed(_SMALL_DELTA):
+        ld = np.where(beta <= b, np.log(delta), ld)
+    return ld
+
+
+def _as_arrays(*params):
+    """The parameters as float arrays broadcast to a common shape."""
+    return np.broadcast_arrays(*(np.asarray(x, dtype=float) for x in params))
+
+
+def normalize(n, q, stddev_s, stddev_e, m):
+    """
+    The normal form transformation of ``LWEParameters.normalize`` on arrays.
+
+    :return: ``(n, q, stddev_s, stddev_e, m)`` broadcast to a common shape.
+    """
+    n, q, stddev_s, stddev_e, m = _as_arrays(n, q, stddev_s, stddev_e, m)
+    if np.any(m < 1):
+        raise ValueError("m < 1")
+    smaller_e = stddev_e < stddev_s
+    normal_form = smaller_e & (m >= 2 * n)
+    swap = smaller_e & (m == n) & ~normal_form
+    return (
+        n,
+        q,
+        np.where(normal_form | swap, stddev_e, stddev_s),
+        np.where(swap, stddev_s, stddev_e),
+        np.where(normal_form, m - n, m),
+    )
+
+
+def _usvp_shape(beta, n, q, stddev_s, stddev_e, m):
+    """
+    Lattice dimension and success condition of ``PrimalUSVP._shape_gsa`` for arrays.
+    """
+    ld = log_delta(beta)
+    log_xi = np.where(stddev_s < stddev_e, np.log(stddev_e / stddev_s), 0.0)
+    tau = stddev_e
+    m = np.minimum(np.ceil(np.sqrt(n * np.log(q) / ld)), m)
+
+    # smallest d ∈ [n, m] with a·d² + b·d + c ≥ 0, a < 0
+    a = -ld
+    C = np.log(stddev_e**2 * (beta - 1) + tau**2) / 2
+    c = np.log(tau) + n * log_xi - (n + 1) * np.log(q)
+    b = ld * (2 * beta - 1) + np.log(q) - C
+    disc = b * b - 4 * a * c
+    with np.errstate(invalid="ignore"):
+        d1 = (-b + np.sqrt(disc)) / (2 * a)
+    d = np.where(disc < 0, m, np.where(n <= d1, np.minimum(m, np.ceil(d1)), m))
+    d = np.where(a * n * n + b * n + c >= 0, n, d)
+
+    d = np.maximum(d, beta)
+    d = np.where((d == beta) & (d < m), d + 1, d)
+
+    lhs = np.log(np.sqrt(stddev_e**2 * (beta - 1) + tau**2))
+    rhs = ld * (2 * beta - d - 1) + (np.log(tau) + log_xi * n + np.log(q) * (d - n - 1)) / d
+    return d, lhs <= rhs
+
+
+def primal_usvp(n, q, stddev_s, stddev_e, m=np.inf):
+    """
+    Core-SVP cost of the primal uSVP attack under the GSA.
+
+    :param n: LWE dimensions.
+    :param q: Moduli.
+    :param stddev_s: Standard deviations of the secret.
+    :param stddev_e: Standard deviations of the error.
+    :param m: Numbers of samples.
+    :return: ``{"rop": log₂ cost, "beta": β, "d": d}``; the cost is ``inf`` where no β in the search range
+        of ``LWE.primal_usvp`` succeeds.
+
+    .. note :: The parameters are expected in normal form, see :func:`normalize`.
+
+    """
+    n, q, stddev_s, stddev_e, m = _as_arrays(n, q, stddev_s, stddev_e, m)
+    # Bai and Galbraith
+    m = np.where(stddev_s <= stddev_e, m + n, m)
+
+    # β ∈ [40, max(min(2n, m), 41)), success is monotone in β
+    hi = np.maximum(np.minimum(2 * n, m), 41) - 1
+    found = _usvp_shape(hi, n, q, stddev_s, stddev_e, m)[1]
+    lo = np.full(hi.shape, 39.0)
+    while np.any(hi - lo > 1):
+        active = hi - lo > 1
+        mid = np.floor((lo + hi) / 2)
+        ok = _usvp_shape(mid, n, q, stddev_s, stddev_e, m)[1]
+        hi = np.where(active & ok, mid, hi)
+        lo = np.where(active & ~ok, mid, lo)
+
+    d = _usvp_shape(hi, n, q, stddev_s, stddev_e, m)[0]
+    return {
+        "rop": np.where(found, CORE_SVP * hi, np.inf),
+        "beta": hi.astype(int),
+        "d": d.astype(int),
+    }
+
+
+def _dual_cost(beta, n, q, stddev_s, stddev_e, m, success_probability=0.99):
+    """
+    log₂ cost of ``DualHybrid.cost`` for the distinguisher with ζ = 0 under ``RC.ADPS16``, and ``d``.
+    """
+    ld = log_delta(beta)
+    log_c = np.log(stddev_s * q / stddev_e)
+
+    # dual_reduce: optimal number of samples [INDOCRYPT:EspJouKha20]
+    m_ = np.minimum(m, np.maximum(1, np.ceil(np.sqrt(n * log_c / ld)) - n))
+    d = m_ + n
+    rho = np.sqrt(4 / 3.0)  # sieving outputs vectors √(4/3) longer than the shortest one
+    log_sigma = np.log(rho * stddev_s) + d * ld - m_ / d * log_c
+    # distinguishing advantage exp(-π (σ/q)²) with Gaussian width σ = √(2π) q ⋅ σ'
+    log_adv = -2 * np.pi**2 * np.exp(2 * log_sigma)
+
+    # samples to distinguish, prob.amplify(·, adv, majority=True) ≈ 2 ln(1/(2 - 2p)) / -ln(1 - adv²)
+    with np.errstate(divide="ignore", over="ignore", invalid="ignore"):
+        log_x = np.where(2 * log_adv < -30, 2 * log_adv, np.log(-np.log1p(-np.exp(2 * log_adv))))
+        log_samples = np.log(2 * np.log(1 / (2 - 2 * success_probability))) - log_x
+        samples = np.ceil(np.exp(np.minimum(log_samples, 700)))
+        log2_samples = np.where(log_samples < 700, np.log2(samples), log_samples / np.log(2))
+    log2_samples = np.where(np.exp(log_adv) > success_probability, 0.0, log2_samples)
+    infeasible = (log_sigma + np.log(np.sqrt(2 * np.pi)) > np.log(16)) | (log_adv < -745)
+
+    # a sieve outputs 2^(0.2075 β) short vectors, repeat it as often as needed
+    log2_repeat = log2_samples - SIEVE_OUTPUT * beta
+    with np.errstate(over="ignore"):
+        repeat = np.where(log2_repeat < 52, np.log2(np.ceil(np.exp2(np.minimum(log2_repeat, 52)))), log2_repeat)
+    infeasible |= log2_repeat > 1000
+    rop = np.logaddexp2(log2_samples, repeat + CORE_SVP * beta)
+    return np.where(infeasible, np.inf, rop), d
+
+
+def dual(n, q, stddev_s, stddev_e, m=np.inf, success_probability=0.99):
+    """
+    Core-SVP cost of the plain dual attack [PQCBook:MicReg09]_ under the GSA.
+
+    :param n: LWE dimensions.
+    :param q: Moduli.
+    :param stddev_s: Standard deviations of the secret.
+    :param stddev_e: Standard deviations of the error.
+    :param m: Numbers of samples.
+    :param success_probability: The success probability to target.
+    :return: ``{"rop": log₂ cost, "beta": β, "d": d}``
+
+    .. note :: The parameters are expected in normal form, see :func:`normalize`.
+
+    """
+    n, q, stddev_s, stddev_e, m = _as_arrays(n, q, stddev_s, stddev_e, m)
+
+    def f(beta):
+        return _dual_cost(beta, n, q, stddev_s, stddev_e, m, success_probability)[0]
+
+    # the cost is infinite for small β (no distinguishing advantage), then unimodal
+    lo = np.full(n.shape, 40.0)
+    hi = 2 * np.maximum(n, 40)
+    while np.any(hi - lo > 2):
+        third = np.floor((hi - lo) / 3)
+        m1, m2 = lo + third, hi - third
+        f1, f2 = f(m1), f(m2)
+        active = hi - lo > 2
+        right = (f1 > f2) | np.isinf(f1)
+        lo = np.where(active & right, m1 + 1, lo)
+        hi = np.where(active & ~right, m2 - 1, hi)
+
+    candidates = np.stack([lo, np.minimum(lo + 1, hi), hi])
+    costs = np.stack([f(beta) for beta in candidates])
+    beta = np.take_along_axis(candidates, np.argmin(costs, axis=0)[None], axis=0)[0]
+    rop, d = _dual_cost(beta, n, q, stddev_s, stddev_e, m, success_probability)
+    return {"rop": rop, "beta": beta.astype(int), "d": d.astype(int)}
+
+
+def core_svp(n, q, stddev_s, stddev_e, m=np.inf):
+    """
+    Core-SVP bit security of LWE parameter sets against the primal uSVP and the plain dual attack.
+
+    :param n: LWE dimensions.
+    :param q: Moduli.
+    :param stddev_s: Standard deviations of the secret.
+    :param stddev_e: Standard deviations of the error.
+    :param m: Numbers of samples.
+    :return: ``{"usvp", "usvp_beta", "usvp_d", "dual", "dual_beta", "dual_d", "rop"}``, costs as log₂ of the
+        number of operations, ``rop`` the smaller of the two.
+
+    All parameters are arrays (or scalars) broadcast against each other, each row a parameter set.
+
+    EXAMPLE::
+
+        >>> import numpy as np
+        >>> from estimator.lwe_rough import core_svp
+        >>> n = np.repeat([512, 768, 1024], 3)
+        >>> r = core_svp(n, 3329, np.tile([1.0, 1.22, 1.58], 3), 1.22, m=n)
+        >>> np.round(r["rop"], 1)
+        array([114.8, 118.6, 123.2, 187.2, 192.7, 199.7, 261.6, 269.2, 278.3])
+        >>> r["usvp_beta"]
+        array([393, 406, 422, 641, 660, 684, 896, 922, 953])
+
+    """
+    params = normalize(n, q, stddev_s, stddev_e, m)
+    usvp = primal_usvp(*params)
+    dual_ = dual(*params)
+    return {
+        "usvp": usvp["rop"],
+        "usvp_beta": usvp["beta"],
+        "usvp_d": usvp["d"],
+        "dual": dual_["rop"],
+        "dual_beta": dual_["beta"],
+        "dual_d": dual_["d"],
+        "rop": np.minimum(usvp["rop"], dual_["rop"]),
+    }
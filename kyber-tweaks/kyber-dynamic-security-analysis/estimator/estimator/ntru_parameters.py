@@ -1,12 +1,12 @@
 # -*- coding: utf-8 -*-
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
 
 from .conf import ntru_fatigue_lb
 from .errors import InsufficientSamplesError
 from .lwe_parameters import LWEParameters
 
 
-@dataclass
+@dataclass(frozen=True)
 class NTRUParameters(LWEParameters):
     """The parameters for an NTRU problem instance. The estimator treats regular NTRU parameters as similar
     to LWE, but requires different estimation methodology for overstrethed parameters.
@@ -23,7 +23,7 @@ class NTRUParameters(LWEParameters):
     def __post_init__(self, **kwds):
         super().__post_init__()
         # set m = n
-        self.m = self.n
+        object.__setattr__(self, "m", self.n)
 
     @property
     def possibly_overstretched(self):
@@ -80,7 +80,7 @@ class NTRUParameters(LWEParameters):
             >>> schemes.NTRUHPS2048509Enc.updated(q=16536).possibly_overstretched
             True
         """
-        d = dict(self.__dict__)
+        d = {f.name: getattr(self, f.name) for f in fields(self)}
         d.update(kwds)
         return NTRUParameters(**d)
 
@@ -101,5 +101,7 @@ class NTRUParameters(LWEParameters):
         """
         raise NotImplementedError("Modulus Switching for NTRU not supported yet.")
 
-    def __hash__(self):
-        return hash((self.n, self.q, self.Xs, self.Xe, self.m, self.tag, self.ntru_type))
+    __hash__ = LWEParameters.__hash__
+
+    def _hash_key(self):
+        return (self.n, self.q, self.Xs, self.Xe, self.m, self.tag, self.ntru_type)
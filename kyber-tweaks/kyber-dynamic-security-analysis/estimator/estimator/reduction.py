@@ -7,6 +7,7 @@ from sage.all import ZZ, RR, pi, e, find_root, ceil, floor, log, oo, round, sqrt
 from scipy.optimize import newton
 
 from .cost import Cost
+from .trace import Trace
 
 
 class ReductionCost:
@@ -990,7 +991,12 @@ def cost(cost_model, beta, d, B=None, predicate=True, **kwds):
     if isinstance(cost_model, type):
         cost_model = cost_model()
 
-    cost = cost_model(beta, d, B)
+    if Trace.enabled:
+        Trace.counters["β probes"] += 1
+        with Trace.span(getattr(cost_model, "__name__", repr(cost_model)), "cost", beta=beta, d=d):
+            cost = cost_model(beta, d, B)
+    else:
+        cost = cost_model(beta, d, B)
     delta_ = ReductionCost.delta(beta)
     cost = Cost(rop=cost, red=cost, delta=delta_, beta=beta, d=d, **kwds)
     cost.register_impermanent(rop=True, red=True, delta=False, beta=False, d=False)
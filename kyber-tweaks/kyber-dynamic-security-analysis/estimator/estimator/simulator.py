@@ -17,9 +17,11 @@ where
 The last row is optional.
 """
 
-from sage.all import RR, log, line, cached_function, pi, exp
+from sage.all import RR, log, line, pi, exp
 from functools import partial
 
+from .trace import cached_function
+
 
 def qary_simulator(f, d, n, q, beta, xi=1, tau=1, dual=False, ignore_qary=False):
     """
@@ -0,0 +1,326 @@
+# -*- coding: utf-8 -*-
+"""
+Opt-in tracing of estimator runs.
+
+While tracing is enabled the estimator records spans
+
+- per attack (``attack``, one per algorithm run by ``batch_estimate``),
+- per search loop (``search``, one per ``local_minimum`` context, with the number of points probed) and
+- per cost-function evaluation (``cost``, one per call of a lattice reduction cost model in
+  ``reduction.cost``),
+
+and counts the β probes (cost model evaluations) as well as the hits and misses of the
+``cached_function`` caches.  Traces export to the Chrome trace event format, which Perfetto and
+``chrome://tracing`` load, and to a summary table.
+
+When tracing is disabled, which is the default, a span is a shared no-op object, a counter a
+single attribute lookup and a cached function Sage's own, without a counting wrapper.
+
+EXAMPLE::
+
+    >>> from estimator import *
+    >>> with Trace.recording():
+    ...     _ = LWE.estimate(schemes.Kyber512, deny_list=("arora-gb", "bkw"), quiet=True)
+    >>> Trace.counters["β probes"] > 0
+    True
+    >>> print(Trace.summary())  # doctest: +SKIP
+    category  name                         calls    total [s]     self [s]     max [ms]
+    estimate  LWE.estimate                     1        4.375        0.001     4375.112
+    attack    dual_hybrid                      1        2.804        0.103     2804.410
+    ...
+    >>> Trace.write("kyber512-trace.json")  # doctest: +SKIP
+
+.. note :: Only the calling process is traced, run estimates with ``jobs=1`` to see all spans.
+
+"""
+
+import json
+import math
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from functools import wraps
+
+from sage.all import cached_function as sage_cached_function
+
+
+class _Span:
+    __slots__ = ("name", "cat", "args", "start")
+
+    def __init__(self, name, cat, args):
+        self.name = name
+        self.cat = cat
+        self.args = args
+
+    def set(self, **args):
+        """Attach ``args`` to the span, e.g. results only known at its end."""
+        self.args.update(args)
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, type, value, traceback):
+        end = time.perf_counter_ns()
+        Trace.events.append(
+            {
+                "name": self.name,
+                "cat": self.cat,
+                "ph": "X",
+                "ts": (self.start - Trace.origin) / 1000,
+                "dur": (end - self.start) / 1000,
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+                "args": self.args,
+            }
+        )
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def set(self, **args):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def _jsonable(value):
+    if value is None or isinstance(value, (bool, int, str)):
+        return value
+    try:
+        number = float(value)
+    except (TypeError, ValueError, ArithmeticError):
+        return repr(value)
+    if not math.isfinite(number):
+        return repr(value)
+    return int(number) if number.is_integer() else number
+
+
+class Trace:
+    """
+    Record spans and counters of estimator runs.
+
+    Events are kept in the Chrome trace event format (complete events, timestamps in μs since the
+    import of this module, so that traces of forked worker processes line up).
+    """
+
+    enabled = False
+    events = []
+    counters = Counter()
+    origin = time.perf_counter_ns()
+
+    @classmethod
+    def enable(cls, reset=True):
+        """
+        Start recording.
+
+        :param reset: discard previously recorded events and counters.
+        """
+        if reset:
+            cls.reset()
+        cls._set_enabled(True)
+
+    @classmethod
+    def disable(cls):
+        """Stop recording, the recorded events and counters are kept."""
+        cls._set_enabled(False)
+
+    @classmethod
+    def _set_enabled(cls, enabled):
+        if enabled != cls.enabled:
+            cls.enabled = enabled
+            _bind_cached_functions(counting=enabled)
+
+    @classmethod
+    def reset(cls):
+        cls.events = []
+        cls.counters = Counter()
+
+    @classmethod
+    @contextmanager
+    def recording(cls, reset=True):
+        """
+        Record for the duration of a ``with`` block.
+
+        :param reset: discard previously recorded events and counters.
+        """
+        enabled = cls.enabled
+        cls.enable(reset)
+        try:
+            yield cls
+        finally:
+            cls._set_enabled(enabled)
+
+    @classmethod
+    def span(cls, name, cat="estimator", **args):
+        """
+        A context manager timing its block as one span.
+
+        :param name: span name, e.g. the attack.
+        :param cat: span category, the summary groups by it.
+        :param args: values attached to the span.
+        """
+        if not cls.enabled:
+            return _NULL_SPAN
+        return _Span(name, cat, args)
+
+    @classmethod
+    def count(cls, name, n=1):
+        """Add ``n`` to the counter ``name``."""
+        if cls.enabled:
+            cls.counters[name] += n
+
+    @classmethod
+    def dump(cls):
+        """
+        The trace as a Chrome trace event dictionary; counters become one counter event.
+        """
+        events = [
+            {**event, "args": {k: _jsonable(v) for k, v in event["args"].items()}} for event in cls.events
+        ]
+        if cls.counters:
+            end = max((event["ts"] + event["dur"] for event in events), default=0)
+            events.append(
+                {"name": "counters", "ph": "C", "ts": end, "pid": os.getpid(), "args": dict(cls.counters)}
+            )
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    @classmethod
+    def load(cls, trace):
+        """
+        Merge a trace produced by :meth:`dump`, e.g. in a worker process, into this one.
+
+        :param trace: a dictionary as returned by :meth:`dump`.
+        """
+        for event in trace["traceEvents"]:
+            if event["ph"] == "C":
+                cls.counters.update(event["args"])
+            else:
+                cls.events.append(event)
+
+    @classmethod
+    def write(cls, path):
+        """
+        Write the trace as Chrome trace JSON, to be opened in Perfetto (https://ui.perfetto.dev).
+
+        :param path: output file.
+        """
+        with open(path, "w") as f:
+            json.dump(cls.dump(), f)
+
+    @classmethod
+    def summary(cls):
+        """
+        A table of calls, total time, self time (without nested spans) and maximum time per
+        span category and name, followed by the cache statistics and the other counters.
+        """
+        # self time: subtract the direct children, which nest in time within a thread
+        by_thread = {}
+        for event in cls.events:
+            by_thread.setdefault((event["pid"], event["tid"]), []).append(event)
+        stats = {}
+        for events in by_thread.values():
+            stack = []
+            for event in sorted(events, key=lambda e: (e["ts"], -e["dur"])):
+                while stack and stack[-1]["ts"] + stack[-1]["dur"] <= event["ts"]:
+                    stack.pop()
+                s = stats.setdefault((event["cat"], event["name"]), {"calls": 0, "total": 0, "self": 0, "max": 0})
+                s["calls"] += 1
+                s["total"] += event["dur"]
+                s["self"] += event["dur"]
+                s["max"] = max(s["max"], event["dur"])
+                if stack:
+                    stats[(stack[-1]["cat"], stack[-1]["name"])]["self"] -= event["dur"]
+                stack.append(event)
+
+        lines = [f"{'category':9s} {'name':28s} {'calls':>6s} {'total [s]':>12s} {'self [s]':>12s} {'max [ms]':>12s}"]
+        for (cat, name), s in sorted(stats.items(), key=lambda item: -item[1]["total"]):
+            lines.append(
+                f"{cat:9s} {str(name)[:28]:28s} {s['calls']:6d} {s['total'] / 1e6:12.3f} "
+                f"{s['self'] / 1e6:12.3f} {s['max'] / 1e3:12.3f}"
+            )
+
+        caches = {}
+        others = {}
+        for name, value in cls.counters.items():
+            if name.startswith("cache:"):
+                function, result = name[len("cache:"):].rsplit(":", 1)
+                caches.setdefault(function, {"hit": 0, "miss": 0})[result] += value
+            else:
+                others[name] = value
+
+        if caches:
+            lines.append("")
+            lines.append(f"{'cached function':38s} {'hits':>10s} {'misses':>10s} {'hit rate':>9s}")
+            for function, c in sorted(caches.items(), key=lambda item: -sum(item[1].values())):
+                rate = c["hit"] / (c["hit"] + c["miss"])
+                lines.append(f"{function[:38]:38s} {c['hit']:10d} {c['miss']:10d} {rate:9.1%}")
+        if others:
+            lines.append("")
+            for name, value in sorted(others.items()):
+                lines.append(f"{name:38s} {value:10d}")
+        return "\n".join(lines)
+
+
+# (function, Sage cached function, counting wrapper) of every ``cached_function``
+_cached_functions = []
+
+
+def _binding(f):
+    """The (module or class, name) through which ``f`` is called, None while it is not bound yet."""
+    *path, name = f.__qualname__.split(".")
+    namespace = sys.modules[f.__module__]
+    for part in path:
+        namespace = getattr(namespace, part, None)
+    return (namespace, name) if namespace is not None else None
+
+
+def _bind_cached_functions(counting):
+    """Bind the counting wrappers (or Sage's cached functions again) under the functions' names."""
+    for f, cached, wrapper in _cached_functions:
+        binding = _binding(f)
+        if binding is None:
+            continue
+        namespace, name = binding
+        current = vars(namespace).get(name)
+        static = isinstance(current, staticmethod)
+        if (current.__func__ if static else current) not in (cached, wrapper):
+            continue
+        target = wrapper if counting else cached
+        setattr(namespace, name, staticmethod(target) if static else target)
+
+
+def cached_function(f):
+    """
+    Sage's ``cached_function``, counting cache hits and misses while tracing is enabled.
+
+    Only while tracing is enabled are calls routed through a counting wrapper (``Trace.enable``
+    rebinds the module and class attributes), so that disabled tracing costs no extra Python frame
+    per call.  The wrapper exposes the Sage cache as ``.cached``.
+    """
+    cached = sage_cached_function(f)
+    name = f.__qualname__
+
+    @wraps(f)
+    def wrapper(*args, **kwds):
+        hit = cached.is_in_cache(*args, **kwds)
+        Trace.counters[f"cache:{name}:{'hit' if hit else 'miss'}"] += 1
+        return cached(*args, **kwds)
+
+    wrapper.cached = cached
+    wrapper.clear_cache = cached.clear_cache
+    if "<locals>" not in name:
+        _cached_functions.append((f, cached, wrapper))
+    # Functions defined while tracing (lazily imported modules, functions local to a call) count at once
+    return wrapper if Trace.enabled else cached
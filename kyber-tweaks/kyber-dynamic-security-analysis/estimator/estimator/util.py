@@ -4,9 +4,10 @@ from functools import partial
 from dataclasses import dataclass, field
 from typing import Any, Callable, NamedTuple
 
-from sage.all import ceil, floor, log, oo, RR, cached_function, zeta
+from sage.all import ceil, floor, log, oo, RR, zeta
 
 from .io import Logging
+from .trace import Trace, cached_function
 from .lwe_parameters import LWEParameters
 from .sis_parameters import SISParameters
 from .conf import max_n_cache
@@ -109,14 +110,17 @@ class local_minimum_base:
         self._next_x = self._stop
         self._best = Bounds(None, None)
         self._all_x = set()
+        self._span = Trace.span("local_minimum", "search", start=start, stop=stop)
 
     def __enter__(self):
         """ """
+        self._span.__enter__()
         return self
 
     def __exit__(self, type, value, traceback):
         """ """
-        pass
+        self._span.set(probes=len(self._all_x), x=None if self._best.low is None else self.x)
+        self._span.__exit__(type, value, traceback)
 
     def __iter__(self):
         """ """
@@ -254,6 +258,7 @@ class local_minimum(local_minimum_base):
         start = ceil(start / precision)
         stop = floor(stop / precision)
         local_minimum_base.__init__(self, start, stop, smallerf, suppress_bounds_warning, log_level)
+        self._span.set(start=self._orig_bounds[0], stop=self._orig_bounds[1], precision=precision)
 
     def __next__(self):
         x = local_minimum_base.__next__(self)
@@ -384,7 +389,8 @@ def binary_search(
 
 def _batch_estimatef(f, x, log_level=0, f_repr=None, catch_exceptions=True):
     try:
-        y = f(x)
+        with Trace.span(f_repr, "attack", params=x):
+            y = f(x)
     except Exception as e:
         if catch_exceptions:
             print(f"Algorithm {f_repr} on {x} failed with {e}")
@@ -457,7 +463,16 @@ def batch_estimate(params, algorithm, jobs=1, log_level=0, catch_exceptions=True
         Task(partial(f, **kwds), x, log_level, f_name(f), catch_exceptions)
         for f, x in it.product(algorithm, params)
     ]
+    return run_tasks(tasks, jobs=jobs)
 
+
+def run_tasks(tasks, jobs=1):
+    """
+    Run estimation tasks, e.g. different algorithms on different parameters.
+
+    :param tasks: List of :class:`Task`.
+    :param jobs: Use multiple threads in parallel.
+    """
     if jobs == 1:
         results = [_batch_estimatef(*task) for task in tasks]
     else:
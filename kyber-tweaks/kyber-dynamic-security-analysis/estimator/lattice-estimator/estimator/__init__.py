@@ -1,12 +1,78 @@
 # -*- coding: utf-8 -*-
+"""
+Security estimates for lattice problems.
+
+Only :class:`Logging` is imported with the package, the other names are loaded on first access (PEP 562). A
+caller that needs e.g. ``LWE.primal_usvp`` does not pay for NTRU, SIS, the scheme catalogue or the remaining
+attacks, which matters when every estimate runs in a fresh Sage process.
+
+TESTS:
+
+``-X importtime`` reports every module a process imports, with its own import time in μs. Sage is imported
+first, as Sage scripts do::
+
+    >>> import subprocess, sys
+    >>> def import_times(code):
+    ...     cmd = [sys.executable, "-X", "importtime", "-c", "import sage.all; " + code]
+    ...     stderr = subprocess.run(cmd, capture_output=True, text=True).stderr
+    ...     times = {}
+    ...     for line in stderr.splitlines():
+    ...         if not line.startswith("import time:"):  # e.g. warnings of sage.all
+    ...             continue
+    ...         self_us, _, name = line[len("import time:"):].split("|")
+    ...         if self_us.strip().isdigit() and name.strip().startswith("estimator"):
+    ...             times[name.strip()] = int(self_us)
+    ...     return times
+
+    >>> sorted(import_times("import estimator"))
+    ['estimator', 'estimator.io']
+
+A primal-only estimate loads the modules of the primal attacks and the cost models, and none of BKW, the
+Gröbner basis code, the guessing and dual attacks, NTRU, SIS or the scheme catalogue::
+
+    >>> primal = import_times("from estimator import LWE; LWE.primal_usvp")
+    >>> sorted(primal)  # doctest: +NORMALIZE_WHITESPACE
+    ['estimator', 'estimator.conf', 'estimator.cost', 'estimator.errors', 'estimator.intern', 'estimator.io',
+     'estimator.lwe', 'estimator.lwe_parameters', 'estimator.lwe_primal', 'estimator.nd', 'estimator.prob',
+     'estimator.reduction', 'estimator.simulator', 'estimator.sis_parameters', 'estimator.trace',
+     'estimator.util']
+    >>> full = import_times("from estimator import *; schemes.Kyber512")
+    >>> sorted(set(full) - set(primal))  # doctest: +NORMALIZE_WHITESPACE
+    ['estimator.gb', 'estimator.lwe_bkw', 'estimator.lwe_dual', 'estimator.lwe_guess', 'estimator.ntru',
+     'estimator.ntru_parameters', 'estimator.ntru_primal', 'estimator.schemes', 'estimator.sis',
+     'estimator.sis_lattice']
+
+"""
+
+__all__ = ['ND', 'Logging', 'Trace', 'RC', 'Simulator', 'LWE', 'NTRU', 'SIS', 'schemes']
 
-__all__ = ['ND', 'Logging', 'RC', 'Simulator', 'LWE', 'NTRU', 'SIS', 'schemes']
 
 from .io import Logging
-from .reduction import RC
-from . import simulator as Simulator
-from . import lwe as LWE
-from . import ntru as NTRU
-from . import nd as ND
-from . import sis as SIS
-from . import schemes
+
+_lazy = {
+    "ND": ("nd", None),
+    "Trace": ("trace", "Trace"),
+    "RC": ("reduction", "RC"),
+    "Simulator": ("simulator", None),
+    "LWE": ("lwe", None),
+    "NTRU": ("ntru", None),
+    "SIS": ("sis", None),
+    "schemes": ("schemes", None),
+}
+
+
+def __getattr__(name):
+    try:
+        module, attr = _lazy[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    # __import__ rather than importlib.import_module, so that ``-X importtime`` reports it
+    value = __import__(module, globals(), level=1, fromlist=["*"])
+    if attr is not None:
+        value = getattr(value, attr)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_lazy))
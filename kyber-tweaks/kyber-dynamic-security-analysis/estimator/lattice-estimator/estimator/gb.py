@@ -5,6 +5,9 @@ Estimate cost of solving LWE using Gröbner bases.
 See :ref:`Arora-GB` for an overview.
 
 """
+from functools import reduce
+from itertools import count
+
 from sage.all import (
     binomial,
     ceil,
@@ -13,9 +16,6 @@ from sage.all import (
     log,
     oo,
     pi,
-    PowerSeriesRing,
-    prod,
-    QQ,
     RR,
     RealField,
     sqrt,
@@ -25,10 +25,68 @@ from .lwe_parameters import LWEParameters
 from .io import Logging
 
 
+def _mul(f, g):
+    # product of sparse polynomials given as {degree: coefficient}
+    h = {}
+    for i, a in f.items():
+        for j, b in g.items():
+            h[i + j] = h.get(i + j, 0) + a * b
+    return {k: c for k, c in h.items() if c}
+
+
+def hilbert_series(n, D):
+    """
+    Generate the coefficients of `∏_{(d,m) ∈ D} (1-z^d)^m / (1-z)^n` with integer arithmetic.
+
+    The series `S` satisfies `Q·S' = A·S` for `Q = (1-z) ∏_d (1-z^d)`, the product over the
+    distinct degrees, and `A = n ∏_d (1-z^d) - (1-z) ∑_d m_d d z^{d-1} ∏_{d' ≠ d} (1-z^{d'})`.
+    Comparing coefficients gives a recurrence with a handful of terms, so each coefficient costs
+    a constant number of integer operations.
+
+    :param n: Number of variables n > 0.
+    :param D: Tuple of `(d,m)` pairs where `m` is number polynomials and `d` is a degree.
+
+    EXAMPLE::
+
+        >>> from itertools import islice
+        >>> from estimator.gb import hilbert_series
+        >>> list(islice(hilbert_series(4, [(2, 6)]), 6))
+        [1, 4, 4, -4, -10, -4]
+
+    """
+    n = int(n)
+    degrees = {}
+    for d, m in D:
+        degrees[int(d)] = degrees.get(int(d), 0) + int(m)
+
+    factors = {d: {0: 1, d: -1} for d in degrees}
+    P = reduce(_mul, factors.values(), {0: 1})
+    Q = _mul({0: 1, 1: -1}, P)
+    A = {i: n * c for i, c in P.items()}
+    for d, m in degrees.items():
+        others = reduce(_mul, (f for e, f in factors.items() if e != d), {0: 1})
+        for i, c in _mul({d - 1: -m * d, d: m * d}, others).items():
+            A[i] = A.get(i, 0) + c
+    A = sorted((i, c) for i, c in A.items() if c)
+    Q = sorted((i, c) for i, c in Q.items() if i > 0)
+
+    s = [1]
+    yield 1
+    for k in count():
+        # (k+1) s_{k+1} = ∑_i a_i s_{k-i} - ∑_{i ≥ 1} q_i (k-i+1) s_{k-i+1}
+        t = sum(c * s[k - i] for i, c in A if i <= k)
+        t -= sum(c * (k - i + 1) * s[k - i + 1] for i, c in Q if i <= k)
+        s.append(t // (k + 1))
+        yield s[-1]
+
+
 def gb_cost(n, D, omega=2, prec=None):
     """
     Estimate the complexity of computing a Gröbner basis.
 
+    The degree of regularity is the index of the first negative coefficient of the Hilbert series,
+    which is generated one coefficient at a time by :func:`hilbert_series` until it is found.
+
     :param n: Number of variables n > 0.
     :param D: Tuple of `(d,m)` pairs where `m` is number polynomials and `d` is a degree.
     :param omega: Linear algebra exponent, i.e. matrix-multiplication costs `O(n^ω)` operations.
@@ -43,19 +101,11 @@ def gb_cost(n, D, omega=2, prec=None):
     """
     prec = 2 * n if prec is None else prec
 
-    R = PowerSeriesRing(QQ, "z", prec)
-    z = R.gen()
-    z = z.add_bigoh(prec)
-    s = R(1)
-    s = s.add_bigoh(prec)
-
-    s = prod(((1 - z**d)**m for d, m in D), s) / (1 - z) ** n
-
     retval = Cost(rop=oo, dreg=oo)
     retval.register_impermanent({"rop": True, "dreg": False, "mem": False})
 
-    for dreg in range(prec):
-        if s[dreg] < 0:
+    for dreg, coefficient in zip(range(prec), hilbert_series(n, D)):
+        if coefficient < 0:
             retval["dreg"] = dreg
             retval["rop"] = binomial(n + dreg, dreg) ** omega
             retval["mem"] = binomial(n + dreg, dreg) ** 2
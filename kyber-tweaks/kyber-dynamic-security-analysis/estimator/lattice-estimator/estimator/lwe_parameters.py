@@ -1,15 +1,21 @@
 # -*- coding: utf-8 -*-
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
 
 from sage.all import oo, binomial, log, sqrt, ceil
 
 from .nd import NoiseDistribution, DiscreteGaussian
 from .errors import InsufficientSamplesError
+from .intern import Interned
 
 
-@dataclass
-class LWEParameters:
-    """The parameters for a Learning With Errors problem instance."""
+@dataclass(frozen=True)
+class LWEParameters(Interned):
+    """
+    The parameters for a Learning With Errors problem instance.
+
+    Parameters are immutable and interned: equal parameters are the same object, use :meth:`updated` to change
+    them.
+    """
 
     n: int  #: the dimension of the LWE sample vector (Z/qZ)^n.
     q: int  #: the modulus of the space Z/qZ of integers the LWE samples are in.
@@ -23,9 +29,9 @@ class LWEParameters:
     tag: str = None  #: a name for the patameter set
 
     def __post_init__(self, **kwds):
-        self.Xs = self.Xs.resize(self.n)
+        object.__setattr__(self, "Xs", self.Xs.resize(self.n))
         if self.m < oo:
-            self.Xe = self.Xe.resize(self.m)
+            object.__setattr__(self, "Xe", self.Xe.resize(self.m))
 
     @property
     def _homogeneous(self):
@@ -83,7 +89,7 @@ class LWEParameters:
             LWEParameters(n=512, q=3329, Xs=D(σ=1.22), Xe=D(σ=1.22), m=1337, tag='Kyber 512')
 
         """
-        d = dict(self.__dict__)
+        d = {f.name: getattr(self, f.name) for f in fields(self)}
         d.update(kwds)
         return LWEParameters(**d)
 
@@ -112,7 +118,7 @@ class LWEParameters:
             return self
         if self.m == oo:
             return self
-        d = dict(self.__dict__)
+        d = {f.name: getattr(self, f.name) for f in fields(self)}
 
         if self.Xe.mean != 0:
             raise NotImplementedError("Amplifying for μ≠0 not implemented.")
@@ -167,5 +173,7 @@ class LWEParameters:
             tag=f"{self.tag},scaled" if self.tag else None,
         )
 
-    def __hash__(self):
-        return hash((self.n, self.q, self.Xs, self.Xe, self.m, self.tag))
+    __hash__ = Interned.__hash__
+
+    def _hash_key(self):
+        return (self.n, self.q, self.Xs, self.Xe, self.m, self.tag)
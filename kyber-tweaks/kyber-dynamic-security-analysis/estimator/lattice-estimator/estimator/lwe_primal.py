@@ -7,7 +7,7 @@ See :ref:`LWE Primal Attacks` for an introduction what is available.
 """
 from functools import partial
 
-from sage.all import oo, ceil, sqrt, log, RR, ZZ, binomial, cached_function
+from sage.all import oo, ceil, sqrt, log, RR, ZZ, binomial
 from .reduction import delta as deltaf
 from .reduction import cost as costf
 from .util import local_minimum
@@ -19,6 +19,7 @@ from .prob import amplify as prob_amplify
 from .prob import babai as prob_babai
 from .prob import mitm_babai_probability
 from .io import Logging
+from .trace import cached_function
 from .conf import red_cost_model as red_cost_model_default
 from .conf import red_shape_model as red_shape_model_default
 
@@ -80,15 +81,20 @@ class PrimalUSVP:
 
     @staticmethod
     @cached_function
-    def cost_gsa(
+    def _shape_gsa(
         beta: int,
         params: LWEParameters,
         m: int = oo,
         tau=None,
         d=None,
-        red_cost_model=red_cost_model_default,
-        log_level=None,
     ):
+        """
+        Lattice dimension and uSVP success condition under the GSA.
+
+        These do not depend on the cost model, so estimates under several cost models share them.
+
+        :return: ``(d, predicate)``
+        """
         delta = deltaf(beta)
         xi = PrimalUSVP._xi_factor(params.Xs, params.Xe)
         m = min(ceil(sqrt(params.n * log(params.q) / log(delta))), m)
@@ -120,20 +126,37 @@ class PrimalUSVP:
                 + (log(tau) + log(xi) * params.n + log(params.q) * (d - params.n - 1)) / d
             )
 
-        return costf(red_cost_model, beta, d, predicate=lhs <= rhs)
+        return d, lhs <= rhs
 
     @staticmethod
     @cached_function
-    def cost_simulator(
+    def cost_gsa(
         beta: int,
         params: LWEParameters,
-        simulator,
         m: int = oo,
         tau=None,
         d=None,
         red_cost_model=red_cost_model_default,
         log_level=None,
     ):
+        d, predicate = PrimalUSVP._shape_gsa(beta, params, m, tau, d)
+        return costf(red_cost_model, beta, d, predicate=predicate)
+
+    @staticmethod
+    @cached_function
+    def _shape_simulator(
+        beta: int,
+        params: LWEParameters,
+        simulator,
+        m: int = oo,
+        tau=None,
+        d=None,
+    ):
+        """
+        Lattice dimension and uSVP success condition for the basis profile given by ``simulator``.
+
+        :return: ``(d, predicate)``
+        """
         delta = deltaf(beta)
         if d is None:
             d = min(ceil(sqrt(params.n * log(params.q) / log(delta))), m) + 1
@@ -152,8 +175,21 @@ class PrimalUSVP:
         else:
             lhs = params.Xe.stddev**2 * (beta - 1) + tau**2
 
-        predicate = r[d - beta] > lhs
+        return d, r[d - beta] > lhs
 
+    @staticmethod
+    @cached_function
+    def cost_simulator(
+        beta: int,
+        params: LWEParameters,
+        simulator,
+        m: int = oo,
+        tau=None,
+        d=None,
+        red_cost_model=red_cost_model_default,
+        log_level=None,
+    ):
+        d, predicate = PrimalUSVP._shape_simulator(beta, params, simulator, m, tau, d)
         return costf(red_cost_model, beta, d, predicate=predicate)
 
     def __call__(
@@ -400,6 +436,49 @@ class PrimalHybrid:
                     return ZZ(d - (i - 1) + 1)
             return ZZ(2)
 
+    @staticmethod
+    @cached_function
+    def _profile(beta: int, params: LWEParameters, zeta: int, d: int, red_shape_model=red_shape_model_default):
+        """
+        Simulated squared Gram-Schmidt norms after BKZ-β on the `d`-dimensional basis for `n - ζ`
+        secret coordinates.
+        """
+        simulator = simulator_normalize(red_shape_model)
+        xi = PrimalUSVP._xi_factor(params.Xs, params.Xe)
+        return simulator(d, params.n - zeta, params.q, beta, xi=xi, tau=False, dual=True)
+
+    @staticmethod
+    @cached_function
+    def _svp_dimension(beta: int, params: LWEParameters, zeta: int, d: int, red_shape_model=red_shape_model_default):
+        """
+        Required SVP dimension after BKZ-β on the `d`-dimensional basis for `n - ζ` secret
+        coordinates.
+        """
+        # we scaled the lattice so that χ_e is what we want
+        if red_shape_model == "gsa":
+            xi = PrimalUSVP._xi_factor(params.Xs, params.Xe)
+            log_vol = RR((d - (params.n - zeta)) * log(params.q) + (params.n - zeta) * log(xi))
+            log_delta = RR(log(deltaf(beta)))
+            return PrimalHybrid.svp_dimension_gsa(d, log_vol, log_delta, params.Xe, params._homogeneous)
+        r = PrimalHybrid._profile(beta, params, zeta, d, red_shape_model)
+        return PrimalHybrid.svp_dimension(r, params.Xe, is_homogeneous=params._homogeneous)
+
+    @staticmethod
+    @cached_function
+    def _babai_probability(
+        beta: int, params: LWEParameters, zeta: int, d: int, red_shape_model=red_shape_model_default
+    ):
+        r = PrimalHybrid._profile(beta, params, zeta, d, red_shape_model)
+        return RR(prob_babai(r, sqrt(d) * params.Xe.stddev))
+
+    @staticmethod
+    @cached_function
+    def _mitm_babai_probability(
+        beta: int, params: LWEParameters, zeta: int, d: int, red_shape_model=red_shape_model_default
+    ):
+        r = PrimalHybrid._profile(beta, params, zeta, d, red_shape_model)
+        return mitm_babai_probability(r, params.Xe.stddev)
+
     @staticmethod
     @cached_function
     def cost(
@@ -429,7 +508,6 @@ class PrimalHybrid:
            costs.
 
         """
-        simulator = simulator_normalize(red_shape_model)
         if d is None:
             delta = deltaf(beta)
             d = min(ceil(sqrt(params.n * log(params.q) / log(delta))), m)
@@ -439,14 +517,12 @@ class PrimalHybrid:
             # cannot BKZ-β on a basis of dimension < β
             return Cost(rop=oo)
 
-        xi = PrimalUSVP._xi_factor(params.Xs, params.Xe)
-
         # 1. Simulate BKZ-β
         # We simulate BKZ-β on the dxd basis B_BKZ:
         # [q I_m |  A_{n - zeta}  ]
         # [  0   | xi I_{n - zeta}]
-        # if we need to set it, r holds the simulated squared GSO norms after BKZ-β
-        r = None
+        # The simulated squared GSO norms and what follows from them do not depend on the cost model,
+        # they are cached by `PrimalHybrid._profile` and friends.
         bkz_cost = costf(red_cost_model, beta, d)
 
         # 2. Required SVP dimension η + 1
@@ -457,14 +533,7 @@ class PrimalHybrid:
             eta = 2
             svp_cost = PrimalHybrid.babai_cost(d)
         else:
-            # we scaled the lattice so that χ_e is what we want
-            if red_shape_model == "gsa":
-                log_vol = RR((d - (params.n - zeta)) * log(params.q) + (params.n - zeta) * log(xi))
-                log_delta = RR(log(deltaf(beta)))
-                svp_dim = PrimalHybrid.svp_dimension_gsa(d, log_vol, log_delta, params.Xe, params._homogeneous)
-            else:
-                r = simulator(d, params.n - zeta, params.q, beta, xi=xi, tau=False, dual=True)
-                svp_dim = PrimalHybrid.svp_dimension(r, params.Xe, is_homogeneous=params._homogeneous)
+            svp_dim = PrimalHybrid._svp_dimension(beta, params, zeta, d, red_shape_model)
             eta = svp_dim if params._homogeneous else svp_dim - 1
             if eta > d:
                 # Lattice reduction was not strong enough to "reveal" the LWE solution.
@@ -507,17 +576,13 @@ class PrimalHybrid:
 
         if mitm and zeta > 0:
             if babai:
-                if r is None:
-                    r = simulator(d, params.n - zeta, params.q, beta, xi=xi, tau=False, dual=True)
-                probability *= mitm_babai_probability(r, params.Xe.stddev)
+                probability *= PrimalHybrid._mitm_babai_probability(beta, params, zeta, d, red_shape_model)
             else:
                 # TODO: the probability in this case needs to be analysed
                 probability *= 1
 
         if eta <= 20 and d >= 0:  # NOTE: η: somewhat arbitrary bound, d: we may guess it all
-            if r is None:
-                r = simulator(d, params.n - zeta, params.q, beta, xi=xi, tau=False, dual=True)
-            probability *= RR(prob_babai(r, sqrt(d) * params.Xe.stddev))
+            probability *= PrimalHybrid._babai_probability(beta, params, zeta, d, red_shape_model)
 
         ret = Cost()
         ret["rop"] = bkz_cost["rop"] + svp_cost["rop"]
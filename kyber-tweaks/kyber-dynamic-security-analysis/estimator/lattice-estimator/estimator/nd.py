@@ -1,10 +1,13 @@
 # -*- coding: utf-8 -*-
 
 from copy import copy
+from weakref import WeakValueDictionary
 from dataclasses import dataclass
 
 from sage.all import binomial, ceil, exp, floor, log, oo, parent, pi, QQ, RealField, RR, sqrt
 
+from .intern import Interned
+
 
 def stddevf(sigma):
     """
@@ -65,8 +68,8 @@ def sigmaf(stddev):
     return RR(sqrt(2 * pi)) * stddev
 
 
-@dataclass
-class NoiseDistribution:
+@dataclass(frozen=True)
+class NoiseDistribution(Interned):
     """
     All noise distributions are instances of this class.
     It is recommended to pick one of the following available implementations below:
@@ -84,6 +87,8 @@ class NoiseDistribution:
     Generally, to generate an LWE parameter you call one of the above for the secret and error,
     **without** specifying the dimension `n` and `m` for secret/error respectively!
     These are initialized, when constructing the LWEParameters object.
+
+    Distributions are immutable and interned: equal distributions are the same object.
     """
     n: int = None  # dimension of noise
     mean: float = 0  # expectation value
@@ -152,7 +157,9 @@ class NoiseDistribution:
         else:
             return f"D(σ={float(self.stddev):.2f}, μ={float(self.mean):.2f})"
 
-    def __hash__(self):
+    __hash__ = Interned.__hash__
+
+    def _hash_key(self):
         """
         EXAMPLE::
 
@@ -161,7 +168,7 @@ class NoiseDistribution:
             True
 
         """
-        return hash((self.stddev, self.mean, self.n))
+        return (self.stddev, self.mean, self.n)
 
     def __len__(self):
         """
@@ -183,9 +190,29 @@ class NoiseDistribution:
         Return an altered distribution having a dimension `new_n`.
 
         :param int new_n: new dimension to change to
+
+        EXAMPLE::
+
+            >>> from estimator import *
+            >>> Xs = ND.CenteredBinomial(3)
+            >>> Xs.resize(512) is Xs.resize(512), Xs.resize(512).n, Xs.n is None
+            (True, 512, True)
+
         """
+        if new_n == self.n:
+            return self
+        try:
+            return self._resized[new_n]
+        except AttributeError:
+            # weak like the intern table, so the memo of a long-lived distribution does not keep every
+            # dimension it was ever resized to alive
+            object.__setattr__(self, "_resized", WeakValueDictionary())
+        except KeyError:
+            pass
         new_self = copy(self)
-        new_self.n = new_n
+        object.__setattr__(new_self, "n", new_n)
+        new_self = type(new_self).intern(new_self)
+        self._resized[new_n] = new_self
         return new_self
 
     @property
@@ -357,7 +384,7 @@ class Uniform(NoiseDistribution):
             _density=(1 - 1 / m if a <= 0 and b >= 0 else 1),
         )
 
-    def __hash__(self):
+    def _hash_key(self):
         """
         EXAMPLE::
 
@@ -365,7 +392,7 @@ class Uniform(NoiseDistribution):
             >>> hash(ND.Uniform(-10, 10)) == hash(("Uniform", (-10, 10), None))
             True
         """
-        return hash(("Uniform", self.bounds, self.n))
+        return ("Uniform", self.bounds, self.n)
 
     def support_size(self, fraction=1.0):
         """
@@ -429,7 +456,7 @@ class TUniform(NoiseDistribution):
             _density=(1 - 1 / 2**(b+1)),
         )
 
-    def __hash__(self):
+    def _hash_key(self):
         """
         EXAMPLE::
 
@@ -437,7 +464,7 @@ class TUniform(NoiseDistribution):
             >>> hash(ND.TUniform(2)) == hash(("TUniform", (-4, 4), None))
             True
         """
-        return hash(("TUniform", self.bounds, self.n))
+        return ("TUniform", self.bounds, self.n)
 
     def support_size(self, fraction=1.0):
         """
@@ -471,7 +498,8 @@ class SparseTernary(NoiseDistribution):
     """
     def __init__(self, p, m=None, n=None):
         p, m = int(p), int(p if m is None else m)
-        self.p, self.m = p, m
+        object.__setattr__(self, "p", p)
+        object.__setattr__(self, "m", m)
 
         # Yes, n=0 might happen when estimating the cost of the dual attack! Support size is 1
         if n is None:
@@ -489,7 +517,7 @@ class SparseTernary(NoiseDistribution):
             _density=density,
         )
 
-    def __hash__(self):
+    def _hash_key(self):
         """
         EXAMPLE::
 
@@ -497,13 +525,15 @@ class SparseTernary(NoiseDistribution):
             >>> hash(ND.SparseTernary(16, n=128)) == hash(("SparseTernary", 128, 16, 16))
             True
         """
-        return hash(("SparseTernary", self.n, self.p, self.m))
+        return ("SparseTernary", self.n, self.p, self.m)
 
     def resize(self, new_n):
         """
         Return an altered distribution having a dimension `new_n`.
         Assumes `p` and `m` stay the same.
         """
+        if new_n == self.n:
+            return self
         return SparseTernary(self.p, self.m, new_n)
 
     def split_balanced(self, new_n, new_hw=None):
@@ -5,7 +5,7 @@ Estimate cost of solving LWE using primal attacks.
 See :ref:`LWE Primal Attacks` for an introduction what is available.
 
 """
-from sage.all import oo, log, RR, cached_function, exp, pi, floor, euler_gamma
+from sage.all import oo, log, RR, exp, pi, floor, euler_gamma
 from math import lgamma
 from scipy.special import digamma
 from .reduction import cost as costf
@@ -15,6 +15,7 @@ from .ntru_parameters import NTRUParameters
 from .simulator import normalize as simulator_normalize
 from .prob import conditional_chi_squared, chisquared_table
 from .io import Logging
+from .trace import cached_function
 from .conf import red_cost_model as red_cost_model_default
 from .conf import red_shape_model as red_shape_model_default
 from .conf import max_n_cache
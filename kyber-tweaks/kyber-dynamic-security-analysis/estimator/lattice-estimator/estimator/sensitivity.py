@@ -0,0 +1,345 @@
+# -*- coding: utf-8 -*-
+"""
+Local sensitivity of security to the parameters.
+
+How many bits is one step in η, or a 1% change in σ, worth? :func:`sensitivity` estimates the security of the
+cheapest attack at the neighbours one step below and above a parameter set in each variable, and reports central
+finite differences in bits per step (one-sided where a neighbour does not exist, e.g. η = 0).
+
+The neighbours of all variables, and of all parameter sets passed together, are estimated in one batch of tasks,
+in parallel with ``jobs > 1``. Neighbours are normalized and deduplicated first, e.g. where the normal form makes
+two of them equal, and the security of every point is cached, so a second call for the same parameters or an
+overlapping set of variables does not estimate anything twice.
+"""
+
+from dataclasses import dataclass
+from functools import partial
+from typing import Callable
+
+from sage.all import log, oo
+
+from .conf import (
+    red_cost_model as red_cost_model_default,
+    red_shape_model as red_shape_model_default,
+)
+from .io import Logging
+from .lwe import cost_model_label
+from .lwe_parameters import LWEParameters
+from .ntru_parameters import NTRUParameters
+from .sis_parameters import SISParameters
+from .nd import CenteredBinomial, DiscreteGaussian
+from .trace import Trace
+from .util import Task, run_tasks
+
+
+@dataclass(frozen=True)
+class Variable:
+    """
+    A parameter to vary: ``get(params)`` is its value and ``set(params, value)`` the parameters with that value.
+
+    ``set`` raises ``ValueError`` for values outside the domain of the variable. Steps are absolute, or relative
+    to the value if ``relative``.
+    """
+
+    name: str
+    get: Callable
+    set: Callable
+    step: float = 1
+    relative: bool = False
+
+    def neighbours(self, params):
+        """
+        The step and the parameters one step below and above ``params``, ``None`` outside the domain.
+        """
+        value = self.get(params)
+        step = value * self.step if self.relative else self.step
+        res = []
+        for x in (value - step, value + step):
+            try:
+                res.append(self.set(params, x))
+            except ValueError:
+                res.append(None)
+        return step, res
+
+
+def field(name, step=1, relative=False):
+    """
+    Vary the parameter ``name`` of LWE or SIS parameters, e.g. ``n``, ``q`` or ``length_bound``.
+
+    :param name: Name of the parameter.
+    :param step: Step size.
+    :param relative: Steps are relative to the value.
+    """
+
+    def set_(params, value):
+        if value < 1:
+            raise ValueError(f"{name}={value} < 1")
+        return params.updated(**{name: value})
+
+    return Variable(name, lambda params: getattr(params, name), set_, step, relative)
+
+
+def eta(which):
+    """
+    Vary η of a centered binomial secret (``which="Xs"``) or error (``which="Xe"``) distribution.
+    """
+
+    def set_(params, value):
+        if value < 1:
+            raise ValueError(f"η={value} < 1")
+        return params.updated(**{which: CenteredBinomial(value)})
+
+    return Variable(f"eta_{which[1]}", lambda params: getattr(params, which).bounds[1], set_)
+
+
+def sigma(which, step=0.01):
+    """
+    Vary the standard deviation of the secret (``which="Xs"``) or error (``which="Xe"``) distribution.
+
+    Neighbours are discrete Gaussians of the same mean, so this is the sensitivity of a Gaussian of the same
+    standard deviation, whatever the distribution.
+
+    :param step: Relative step size.
+    """
+
+    def set_(params, value):
+        if value <= 0:
+            raise ValueError(f"σ={value} <= 0")
+        return params.updated(**{which: DiscreteGaussian(value, getattr(params, which).mean)})
+
+    return Variable(f"sigma_{which[1]}", lambda params: getattr(params, which).stddev, set_, step, True)
+
+
+def default_variables(params):
+    """
+    The variables varied by default: the dimensions and the modulus, η of centered binomial distributions and
+    the standard deviations of LWE parameters, the length bound (relative 1%) of SIS parameters.
+
+    :param params: LWE or SIS parameters.
+
+    EXAMPLE::
+
+        >>> from estimator import *
+        >>> from estimator.sensitivity import default_variables
+        >>> [v.name for v in default_variables(schemes.Kyber512)]
+        ['n', 'q', 'm', 'eta_s', 'sigma_s', 'eta_e', 'sigma_e']
+        >>> [v.name for v in default_variables(schemes.Dilithium2_MSIS_WkUnf)]
+        ['n', 'q', 'm', 'length_bound']
+
+    """
+    variables = [field("n"), field("q")]
+    if params.m < oo:
+        variables.append(field("m"))
+    if isinstance(params, LWEParameters):
+        for which in ("Xs", "Xe"):
+            if isinstance(getattr(params, which), CenteredBinomial):
+                variables.append(eta(which))
+            variables.append(sigma(which))
+    else:
+        variables.append(field("length_bound", 0.01, True))
+    return variables
+
+
+def _algorithms(params, rough, red_cost_model, red_shape_model, deny_list):
+    """
+    The algorithms ``{name: function}`` of ``LWE.estimate`` or ``SIS.estimate`` (``.rough``) for ``params``.
+    """
+    if isinstance(params, NTRUParameters):
+        raise NotImplementedError("Sensitivity of NTRU parameters is not supported.")
+    if isinstance(params, LWEParameters):
+        from .lwe import estimate
+
+        if rough:
+            algorithms = estimate._rough_algorithms(params)
+        else:
+            algorithms = {
+                name: partial(attack, red_cost_model=red_cost_model) if uses_model else attack
+                for name, (attack, uses_model) in estimate._algorithms(red_shape_model).items()
+            }
+    elif isinstance(params, SISParameters):
+        from .sis import estimate
+
+        if rough:
+            algorithms = estimate._rough_algorithms(params)
+        else:
+            algorithms = estimate._algorithms(red_cost_model, red_shape_model)
+    else:
+        raise NotImplementedError(f"Sensitivity of {type(params).__name__} is not supported.")
+    return {name: f for name, f in algorithms.items() if name not in deny_list}
+
+
+#: Security in bits by ``(normalized parameters, estimate configuration)``
+_security_cache = {}
+
+
+def security(params, rough=False, red_cost_model=red_cost_model_default, red_shape_model=red_shape_model_default,
+             deny_list=tuple(), jobs=1, catch_exceptions=True):
+    """
+    log₂ of the cost of the cheapest attack for each parameter set, estimated in one batch.
+
+    Equal parameter sets (after normalization) are estimated once and results are cached across calls.
+
+    :param params: List of LWE or SIS parameters.
+    :param rough: Run the algorithms of ``LWE.estimate.rough`` (``SIS.estimate.rough``), ignoring the cost and
+        shape models.
+    :param red_cost_model: How to cost lattice reduction.
+    :param red_shape_model: How to model the shape of a reduced basis.
+    :param deny_list: Skip these algorithms.
+    :param jobs: Use multiple threads in parallel.
+    :param catch_exceptions: When an estimate fails, just print a warning.
+    :return: A list of floats, ``inf`` if no algorithm succeeds.
+
+    EXAMPLE::
+
+        >>> from estimator import *
+        >>> from estimator.sensitivity import security
+        >>> [round(s, 1) for s in security([schemes.Kyber512, schemes.Kyber768], rough=True)]
+        [115.5, 174.3]
+
+    """
+    config = ("rough",) if rough else (cost_model_label(red_cost_model), red_shape_model)
+    config += tuple(sorted(deny_list))
+
+    keys = []
+    for p in params:
+        if isinstance(p, LWEParameters):
+            p = p.normalize()
+        keys.append((p, config))
+    todo = list(dict.fromkeys(key for key in keys if key not in _security_cache))
+    Trace.count("cache:sensitivity.security:hit", len(keys) - len(todo))
+    Trace.count("cache:sensitivity.security:miss", len(todo))
+
+    tasks = [
+        Task(f, p, 1, name, catch_exceptions)
+        for p, _ in todo
+        for name, f in _algorithms(p, rough, red_cost_model, red_shape_model, deny_list).items()
+    ]
+    with Trace.span("sensitivity.security", "estimate", points=len(todo), tasks=len(tasks)):
+        res_raw = run_tasks(tasks, jobs=jobs)
+
+    for key in todo:
+        costs = [cost["rop"] for cost in res_raw[key[0]].values()]
+        _security_cache[key] = min((float(log(rop, 2)) for rop in costs), default=float(oo))
+    return [_security_cache[key] for key in keys]
+
+
+def sensitivity(
+    params,
+    variables=None,
+    rough=False,
+    red_cost_model=red_cost_model_default,
+    red_shape_model=red_shape_model_default,
+    deny_list=tuple(),
+    jobs=1,
+    catch_exceptions=True,
+    quiet=False,
+):
+    """
+    Partial derivatives of security, in bits per step, with respect to the parameters.
+
+    All neighbouring parameter sets are estimated in one batch with :func:`security` and a table is printed per
+    parameter set.
+
+    :param params: LWE or SIS parameters, or a list of them.
+    :param variables: List of :class:`Variable`, by default :func:`default_variables`.
+    :param rough: Run the algorithms of ``LWE.estimate.rough`` (``SIS.estimate.rough``).
+    :param red_cost_model: How to cost lattice reduction.
+    :param red_shape_model: How to model the shape of a reduced basis.
+    :param deny_list: Skip these algorithms.
+    :param jobs: Use multiple threads in parallel.
+    :param catch_exceptions: When an estimate fails, just print a warning.
+    :param quiet: suppress printing
+    :return: ``{"security": bits, variable: {"value", "step", "lower", "upper", "slope"}}`` where ``lower`` and
+        ``upper`` are the security one step below and above (``None`` outside the domain) and ``slope`` is in
+        bits per step; a list of these for a list of parameters.
+
+    EXAMPLE::
+
+        >>> from estimator import *
+        >>> from estimator.sensitivity import sensitivity, eta, sigma
+        >>> r = sensitivity(schemes.Kyber512, [eta("Xs"), sigma("Xe")], rough=True)
+        Kyber 512                             115.5 bits
+        variable          value       step      lower      upper  bits/step
+        eta_s                 3          1      112.1      118.0       2.93
+        sigma_e           1.225      0.012      115.3      115.8       0.26
+        >>> round(r["eta_s"]["slope"], 2)
+        2.93
+
+    A table for each parameter set, all neighbours estimated in one batch::
+
+        >>> _ = sensitivity([schemes.Dilithium2_MSIS_WkUnf, schemes.Dilithium3_MSIS_WkUnf], rough=True, jobs=2)
+        Dilithium2_MSIS_WkUnf                 123.5 bits
+        variable          value       step      lower      upper  bits/step
+        n                  1024          1      123.2      123.8       0.29
+        q              8.38e+06          1      123.5      123.5       0.00
+        m                  2304          1      123.5      123.5       0.00
+        length_bound  3.502e+05    3.5e+03      123.8      123.2      -0.29
+        Dilithium3_MSIS_WkUnf                 186.3 bits
+        variable          value       step      lower      upper  bits/step
+        n                  1536          1      186.0      186.3       0.15
+        q              8.38e+06          1      186.3      186.3       0.00
+        m                  3072          1      186.3      186.3       0.00
+        length_bound  7.245e+05    7.2e+03      186.6      186.0      -0.29
+
+    """
+    single = isinstance(params, (LWEParameters, SISParameters))
+    if single:
+        params = [params]
+
+    plans = []
+    points = []
+    for p in params:
+        plan = []
+        for variable in variables if variables is not None else default_variables(p):
+            step, neighbours = variable.neighbours(p)
+            plan.append((variable, variable.get(p), step, neighbours))
+            points.extend(n for n in neighbours if n is not None)
+        plans.append(plan)
+        points.append(p)
+
+    bits = dict(zip(points, security(points, rough, red_cost_model, red_shape_model, deny_list, jobs,
+                                     catch_exceptions)))
+
+    def finite(x):
+        return x is not None and x < oo
+
+    results = []
+    for p, plan in zip(params, plans):
+        res = {"security": bits[p]}
+        for variable, value, step, (lower, upper) in plan:
+            lower = None if lower is None else bits[lower]
+            upper = None if upper is None else bits[upper]
+            # no slope between a finite security and "no attack succeeds"
+            if bits[p] == oo:
+                slope = None
+            elif finite(lower) and finite(upper):
+                slope = (upper - lower) / 2
+            elif finite(upper):
+                slope = upper - bits[p]
+            elif finite(lower):
+                slope = bits[p] - lower
+            else:
+                slope = None
+            res[variable.name] = {"value": value, "step": step, "lower": lower, "upper": upper, "slope": slope}
+        results.append(res)
+        _print_table(p, res, quiet)
+
+    return results[0] if single else results
+
+
+def _print_table(params, res, quiet):
+    def cell(x, fmt):
+        return "-" if x is None else format(float(x), fmt)
+
+    Logging.print("estimator", int(quiet), f"{str(params.tag):32s} {res['security']:10.1f} bits")
+    Logging.print(
+        "estimator",
+        int(quiet),
+        f"{'variable':12s}" + "".join(f"{c:>11s}" for c in ("value", "step", "lower", "upper", "bits/step")),
+    )
+    for name, r in res.items():
+        if name == "security":
+            continue
+        cells = [cell(r["value"], ".4g"), cell(r["step"], ".2g")]
+        cells += [cell(r[k], ".1f") for k in ("lower", "upper")] + [cell(r["slope"], ".2f")]
+        Logging.print("estimator", int(quiet), f"{name:12s}" + "".join(f"{c:>11s}" for c in cells))
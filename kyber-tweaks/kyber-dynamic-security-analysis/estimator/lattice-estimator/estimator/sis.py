@@ -46,10 +46,7 @@ class Estimate:
             >>> _ = SIS.estimate.rough(schemes.Dilithium2_MSIS_WkUnf, quiet=True)
 
         """
-        algorithms = {}
-
-        # Only lattice attacks are supported on SIS for now
-        algorithms["lattice"] = partial(lattice, red_cost_model=RC.ADPS16, red_shape_model="lgsa")
+        algorithms = self._rough_algorithms(params)
 
         res_raw = batch_estimate(
             params, algorithms.values(), log_level=1, jobs=jobs, catch_exceptions=catch_exceptions
@@ -71,6 +68,29 @@ class Estimate:
 
         return res
 
+    @staticmethod
+    def _rough_algorithms(params):
+        """
+        The algorithms run by :meth:`rough`, by name.
+        """
+        algorithms = {}
+
+        # Only lattice attacks are supported on SIS for now
+        algorithms["lattice"] = partial(lattice, red_cost_model=RC.ADPS16, red_shape_model="lgsa")
+        return algorithms
+
+    @staticmethod
+    def _algorithms(red_cost_model=red_cost_model_default, red_shape_model=red_shape_model_default):
+        """
+        The algorithms run by default, by name.
+        """
+        algorithms = {}
+
+        algorithms["lattice"] = partial(
+            lattice, red_cost_model=red_cost_model, red_shape_model=red_shape_model
+        )
+        return algorithms
+
     def __call__(
         self,
         params,
@@ -109,12 +129,7 @@ class Estimate:
 
         """
 
-        algorithms = {}
-
-        algorithms["lattice"] = partial(
-            lattice, red_cost_model=red_cost_model, red_shape_model=red_shape_model
-        )
-
+        algorithms = self._algorithms(red_cost_model, red_shape_model)
         algorithms = {k: v for k, v in algorithms.items() if k not in deny_list}
         algorithms.update(add_list)
 
@@ -7,7 +7,7 @@ See :ref:`SIS Lattice Attacks` for an introduction what is available.
 """
 from functools import partial
 
-from sage.all import oo, sqrt, log, RR, floor, cached_function
+from sage.all import oo, sqrt, log, RR, floor
 from .reduction import beta as betaf
 from .reduction import cost as costf
 from .util import local_minimum
@@ -17,6 +17,7 @@ from .simulator import normalize as simulator_normalize
 from .prob import gaussian_cdf
 from .prob import amplify as prob_amplify
 from .io import Logging
+from .trace import cached_function
 from .conf import red_cost_model as red_cost_model_default
 from .conf import red_shape_model as red_shape_model_default
 from .conf import red_simulator as red_simulator_default
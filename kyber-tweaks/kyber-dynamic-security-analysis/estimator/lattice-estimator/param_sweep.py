@@ -9,7 +9,6 @@ increment intervals, the more parameter combinations will be computed). For
 faster and rougher results, use the `LWE.estimate.rough` function.
 """
 
-import pickle
 import time
 import math
 import os
@@ -25,6 +24,11 @@ from matplotlib import pyplot as plt
 from estimator import ND, LWE
 from estimator.io import Logging
 
+# Columns of a saved sweep: one per parameter axis, in the order of the
+# `parameter_sweep` keys, then the outcome of each point.
+SWEEP_PARAMETERS = ("n", "q", "e", "s", "m")
+SWEEP_COLUMNS = SWEEP_PARAMETERS + ("tag", "security", "attack")
+
 
 class ParameterSweep:
     """
@@ -103,6 +107,36 @@ class ParameterSweep:
             >>> results[(900, 4294967296, 9.0, 2.0, 900, 'test')]
             89.442...
         """
+        columns = ParameterSweep.sweep_columns(
+            n, q, e, s, m, Xe, e_log, Xs, s_log, tag, f, num_proc, log_level
+        )
+        keys = zip(*(columns[p].tolist() for p in SWEEP_PARAMETERS + ("tag",)))
+        return dict(zip(keys, columns["security"].tolist()))
+
+    @staticmethod
+    def sweep_columns(
+        n: Union[int, Iterable],
+        q: Union[int, Iterable],
+        e: Union[float, Iterable],
+        s: Union[float, Iterable],
+        m: Optional[Union[int, Iterable]] = None,
+        Xe: Callable = ND.DiscreteGaussian,
+        e_log: bool = True,
+        Xs: Callable = ND.DiscreteGaussian,
+        s_log: bool = True,
+        tag: str = None,
+        f: Callable = LWE.estimate,
+        num_proc: int = 8,
+        log_level: int = 0,
+    ) -> dict[str, np.ndarray]:
+        """
+        Performs a sweep over the parameters specified, like `parameter_sweep`,
+        and returns the results as columns: one array per name in
+        `SWEEP_COLUMNS`, with one entry per parameter combination. The
+        "attack" column holds the name of the cheapest attack.
+
+        See `parameter_sweep` for the parameters.
+        """
         n, q, m, e, s = [
             param if hasattr(param, "__iter__") else [param] for param in (n, q, m, e, s)
         ]
@@ -136,14 +170,38 @@ class ParameterSweep:
             tag=tag,
             f=f,
             log_level=log_level,
+            with_attack=True,
         )
 
         if num_proc <= 1:
-            return {(*task, tag): fn(task) for task in tasks}
+            values = [fn(task) for task in tasks]
+        else:
+            # Parallel process the calculations
+            with Pool(processes=min(num_proc, len(tasks))) as pool:
+                values = pool.map(fn, tasks)
 
-        # Parallel process the calculations
-        with Pool(processes=min(num_proc, len(tasks))) as pool:
-            return {(*task, tag): value for task, value in zip(tasks, pool.map(fn, tasks))}
+        columns = {
+            p: ParameterSweep._column(column) for p, column in zip(SWEEP_PARAMETERS, zip(*tasks))
+        }
+        columns["tag"] = np.array([str(tag)] * len(tasks))
+        columns["security"] = np.array([security for security, _ in values], dtype=float)
+        columns["attack"] = np.array([attack for _, attack in values], dtype=str)
+        return columns
+
+    @staticmethod
+    def _column(values: Iterable) -> np.ndarray:
+        """
+        An array for a parameter column: int64 for integers (falling back to
+        float64 for moduli beyond 2^63), float64 otherwise, never objects, so
+        the column can be memory-mapped when loaded.
+        """
+        values = list(values)
+        if all(isinstance(v, int) for v in values):
+            try:
+                return np.array(values, dtype=np.int64)
+            except OverflowError:
+                pass
+        return np.array(values, dtype=float)
 
     @staticmethod
     def security_level(
@@ -155,7 +213,8 @@ class ParameterSweep:
         tag: str = None,
         f: Callable = LWE.estimate,
         log_level: int = 0,
-    ) -> float:
+        with_attack: bool = False,
+    ) -> Union[float, tuple[float, str]]:
         """
         Calls the lattice-estimator for a given set of input
         parameters, and appends the output to the `result_dict` dict.
@@ -171,6 +230,8 @@ class ParameterSweep:
         :param tag: a name for the patameter set
         :param f: the estimation function. Use `LWE.estimate.rough` for speed.
         :param log_level: the logging level.
+        :param with_attack: also return the name of the cheapest attack.
+        :returns: the bits of security, or (bits, attack) with `with_attack`.
         """
         n_ = int(input_params[0])
         q_ = int(input_params[1])
@@ -188,11 +249,71 @@ class ParameterSweep:
             tag=tag,
         )
         estimator_result = f(lwe_params)
-        security = min([math.log(res.get("rop", 0), 2) for res in estimator_result.values()])
+        attack = min(estimator_result, key=lambda name: estimator_result[name].get("rop", 0))
+        security = math.log(estimator_result[attack].get("rop", 0), 2)
         if not security:
             raise ValueError("ROP for a estimator result was 0, estimator failed")
         Logging.log("sweep", log_level, f"Parameters = {lwe_params}; security = {security}")
-        return security
+        return (security, attack) if with_attack else security
+
+    @staticmethod
+    def save_results(columns: dict[str, np.ndarray], path: str, append: bool = False) -> None:
+        """
+        Writes sweep columns (see `sweep_columns`) to the directory `path`,
+        one NumPy `.npy` file per column.
+
+        :param columns: a mapping from each name in `SWEEP_COLUMNS` to an array.
+        :param path: the directory to write to; created if missing.
+        :param append: add the rows after those already saved in `path`. A
+            saved row with the same parameters and tag as a new row is
+            replaced by it, so repeating a sweep does not duplicate its rows.
+
+        EXAMPLE ::
+
+            >>> import tempfile
+            >>> from param_sweep import ParameterSweep as PS
+            >>> def columns(tag, security):
+            ...     return {"n": np.array([600, 900]), "q": np.array([2**32] * 2), "e": np.array([7.0] * 2),
+            ...             "s": np.array([2.0] * 2), "m": np.array([600, 900]), "tag": np.array([tag] * 2),
+            ...             "security": np.array(security), "attack": np.array(["usvp"] * 2)}
+            >>> path = tempfile.mkdtemp()
+            >>> PS.save_results(columns("a", [69.0, 90.0]), path)
+            >>> PS.save_results(columns("b", [70.0, 91.0]), path, append=True)
+            >>> PS.save_results(columns("a", [69.5, 90.5]), path, append=True)
+            >>> results = PS.load_results(path)
+            >>> list(zip(results["tag"].tolist(), results["security"].tolist()))
+            [('b', 70.0), ('b', 91.0), ('a', 69.5), ('a', 90.5)]
+        """
+        os.makedirs(path, exist_ok=True)
+        if append and all(
+            os.path.exists(os.path.join(path, f"{name}.npy")) for name in SWEEP_COLUMNS
+        ):
+            saved = ParameterSweep.load_results(path, mmap=False)
+            key_names = SWEEP_PARAMETERS + ("tag",)
+            new_keys = set(zip(*(np.asarray(columns[name]).tolist() for name in key_names)))
+            keep = np.array(
+                [key not in new_keys for key in zip(*(saved[name].tolist() for name in key_names))],
+                dtype=bool,
+            )
+            columns = {
+                name: np.concatenate([saved[name][keep], np.asarray(columns[name])]) for name in SWEEP_COLUMNS
+            }
+        for name in SWEEP_COLUMNS:
+            np.save(os.path.join(path, f"{name}.npy"), np.asarray(columns[name]))
+
+    @staticmethod
+    def load_results(path: str, mmap: bool = True) -> dict[str, np.ndarray]:
+        """
+        Reads sweep columns written by `save_results`.
+
+        :param path: the directory the columns were saved to.
+        :param mmap: memory-map the columns (read-only) instead of reading them.
+        :returns: a mapping from each name in `SWEEP_COLUMNS` to an array.
+        """
+        return {
+            name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r" if mmap else None)
+            for name in SWEEP_COLUMNS
+        }
 
     @staticmethod
     def graph_parameter_sweep(
@@ -209,8 +330,9 @@ class ParameterSweep:
         f: Callable = LWE.estimate,
         num_proc: int = 8,
         log_level: int = 0,
-        make_pickle: bool = False,
-        load_pickle: bool = False,
+        make_file: bool = False,
+        load_file: bool = False,
+        append: bool = False,
         security_cutoff: int = None,
         directory: str = None,
         file_name: str = None,
@@ -233,8 +355,12 @@ class ParameterSweep:
         :param f: the estimation function. Use `LWE.estimate.rough` for speed.
         :param num_proc: the number of parallel processes for computation.
         :param log_level: the logging level.
-        :param make_pickle: whether to make a pickle file of the results dict.
-        :param load_pickle: whether to load a pickle file of the results dict.
+        :param make_file: whether to save the results columns (`save_results`)
+            to the directory `<file_name>.sweep`.
+        :param load_file: whether to load (memory-map) the saved results
+            instead of computing them.
+        :param append: with `make_file`, add the results to those already saved;
+            only the rows with this `tag` are graphed.
         :param security_cutoff: makes a separate graph with a security cutoff.
         :param directory: the directory to load files from and/or save files to.
         :param file_name: the file name to load files from and/or save files to.
@@ -257,7 +383,7 @@ class ParameterSweep:
                     f=LWE.estimate.rough,\
                     tag='test',\
                     directory='/tmp',\
-                    make_pickle=True,\
+                    make_file=True,\
                     security_cutoff=128,\
                     file_name=file_name,\
                     num_proc=1,\
@@ -271,21 +397,19 @@ class ParameterSweep:
             usvp                 :: rop: ≈2^90.5, red: ≈2^90.5, δ: 1.004738, β: 310, d: 1394, tag: usvp
             dual_hybrid          :: rop: ≈2^92.6, red: ≈2^92.6, guess: ≈2^82.3, β: 317, p: 3, ζ: 0, t: 0, β': 317, ...
 
-            >>> Path(f'/tmp/{file_name}.pickle').exists()
+            >>> Path(f'/tmp/{file_name}.sweep').is_dir()
             True
             >>> Path(f'/tmp/{file_name}_gradient.png').exists()
             True
             >>> Path(f'/tmp/{file_name}_cutoff.png').exists()
             True
-            >>> results = pickle.load(open(f'/tmp/{file_name}.pickle', 'rb'))
-            >>> results[(700, 4294967296, 9.0, 2.0, 700, 'test')]
-            78.83999999999999
-            >>> results[(700, 4294967296, 9.0, 4.0, 700, 'test')]
-            90.52000000000001
-            >>> results[(700, 4294967296, 7.0, 4.0, 700, 'test')]
-            78.83999999999999
-            >>> results[(700, 4294967296, 7.0, 2.0, 700, 'test')]
-            69.204
+            >>> results = PS.load_results(f'/tmp/{file_name}.sweep')
+            >>> list(zip(results["e"].tolist(), results["s"].tolist()))
+            [(7.0, 2.0), (7.0, 4.0), (9.0, 2.0), (9.0, 4.0)]
+            >>> results["security"].tolist()
+            [69.204, 78.83999999999999, 78.83999999999999, 90.52000000000001]
+            >>> results["attack"].tolist()
+            ['usvp', 'usvp', 'usvp', 'usvp']
         """
         if directory is None:
             directory = os.path.dirname(os.path.realpath(__file__))
@@ -294,23 +418,21 @@ class ParameterSweep:
         file_name = os.path.join(directory, file_name)
         assert num_proc >= 1, "need at least one process to execute"
 
-        pickle_filename = f"{file_name}.pickle"
-        if load_pickle is True:
-            with open(pickle_filename, "rb") as f:
-                result_dict = pickle.load(f)
+        sweep_path = f"{file_name}.sweep"
+        if load_file is True:
+            columns = ParameterSweep.load_results(sweep_path)
         else:
-            result_dict = ParameterSweep.parameter_sweep(
+            columns = ParameterSweep.sweep_columns(
                 n, q, e, s, m, Xe, e_log, Xs, s_log, tag, f, num_proc, log_level
             )
-            if make_pickle is True:
-                # Pickle the intermediate computation results
-                with open(pickle_filename, "wb") as f:
-                    pickle.dump(result_dict, f)
+            if make_file is True:
+                # Save the intermediate computation results
+                ParameterSweep.save_results(columns, sweep_path, append=append)
                 Logging.log(
                     "sweep",
                     log_level,
-                    "Pickled the intermediate computations to: %s",
-                    pickle_filename,
+                    "Saved the intermediate computations to: %s",
+                    sweep_path,
                 )
 
         Xe_string = "log_2(Xe)" if e_log else "Xe"
@@ -324,38 +446,43 @@ class ParameterSweep:
         }
 
         ParameterSweep.graph_results(
-            result_dict,
+            columns,
             params,
             file_name,
             security_cutoff,
             log_level,
             extension,
+            tag,
         )
 
     @staticmethod
     def graph_results(
-        result_dict: dict,
+        columns: dict[str, np.ndarray],
         params: dict[str, (list[Union[int, float]], int)],
         file_name: str,
         security_cutoff: int = None,
         log_level: int = 0,
         extension: str = ".png",
+        tag: str = None,
     ):
         """
-        Graph the security estimate results in `result_dict`, using the
-        parameters in `params` for labeling the plot axes and titles.
+        Graph the security estimate results in `columns`, using the
+        parameters in `params` for labeling the plot axes and titles. Only the
+        rows matching `params` and `tag` are graphed, so saved results may
+        hold more.
         - For 1 variable: creates a line plot.
         - For 2 variables: creates a heatmap plot, and an optional cutoff plot.
 
-        :param result_dict: a mapping from a set of parameters, to security.
-            Parameter ordering: (n: int, q: int, e: float, s: float, m: int).
+        :param columns: sweep results, as returned by `sweep_columns` or
+            `load_results`: one array per name in `SWEEP_COLUMNS`.
         :param params: a mapping from the string representation of a parameter,
-            to a tuple of the parameter and its associated order in the
-            `result_dict` key. Example: {'n': (600, 0), 'q'': (4294967296, 1)}
+            to a tuple of the parameter and its associated index in
+            `SWEEP_PARAMETERS`. Example: {'n': (600, 0), 'q'': (4294967296, 1)}
         :param file_name: the file name to write the output graphs to.
         :param security_cutoff: makes a separate graph with a security cutoff.
         :param log_level: the logging level
         :param extension: the extension of the graph(s). Ex: .png, .pdf, .svg.
+        :param tag: the tag the rows were swept with (see `sweep_columns`).
         """
 
         # Convert parameter iterators to lists.
@@ -372,15 +499,23 @@ class ParameterSweep:
                 params[p] = ([sec[0]], sec[1])
                 fixed_vars[p] = sec[0]
 
+        # The rows of this sweep (saved results may hold several)
+        rows = np.asarray(columns["tag"]) == str(tag)
+        for values, index in params.values():
+            if values != [None]:
+                rows &= np.isin(columns[SWEEP_PARAMETERS[index]], values)
+        security = np.asarray(columns["security"][rows])
+
         if len(axis_vars) == 0:
             raise ValueError(
                 "Cannot plot when there are no variables. Call the lattice estimator directly for security."
             )
         elif len(axis_vars) == 1:
             variable_param = list(axis_vars.keys())[0]  # a string like 'Xe'
-            x = sorted(params[variable_param][0])
-            y = sorted(result_dict.items(), key=lambda x: x[params[variable_param][1]])
-            y = list(zip(*y))[1]
+            column = np.asarray(columns[SWEEP_PARAMETERS[params[variable_param][1]]][rows])
+            order = np.argsort(column, kind="stable")
+            x = column[order]
+            y = security[order]
             fig, ax = plt.subplots(figsize=(20, 20), dpi=80)
 
             ax.plot(x, y)
@@ -394,20 +529,23 @@ class ParameterSweep:
         elif len(axis_vars) == 2:
             axis_vars = sorted(axis_vars.items(), key=lambda x: params[x[0]][1])
             x_param = axis_vars[0][0]
-            x = sorted(params[x_param][0])
+            x_column = columns[SWEEP_PARAMETERS[params[x_param][1]]][rows]
+            x = np.unique(x_column)
             y_param = axis_vars[1][0]
-            y = sorted(params[y_param][0])
+            y_column = columns[SWEEP_PARAMETERS[params[y_param][1]]][rows]
+            y = np.unique(y_column)
 
-            values = [v for _, v in sorted(result_dict.items(), key=lambda x: x[0])]
-            mat = np.flip(np.array(values).reshape((len(set(x)), len(set(y)))), axis=1).transpose()
+            # Rows of the matrix: y descending, columns: x ascending
+            mat = np.full((len(y), len(x)), np.nan)
+            mat[len(y) - 1 - np.searchsorted(y, y_column), np.searchsorted(x, x_column)] = security
 
             fig, ax = plt.subplots(figsize=(20, 20), dpi=80)
 
             ax.imshow(mat)
-            ax.set_xticks(np.arange(0, len(set(x)), 1))
-            ax.set_yticks(np.arange(0, len(set(y)), 1))
-            ax.set_xticklabels(sorted(set(x)))
-            ax.set_yticklabels(sorted(set(y), reverse=True))
+            ax.set_xticks(np.arange(0, len(x), 1))
+            ax.set_yticks(np.arange(0, len(y), 1))
+            ax.set_xticklabels(x.tolist())
+            ax.set_yticklabels(y[::-1].tolist())
 
             plt.title(f"Security with fixed parameters {fixed_vars}")
 
@@ -432,10 +570,10 @@ class ParameterSweep:
                 fig2, ax2 = plt.subplots(figsize=(20, 20), dpi=80)
                 binary_mat = mat >= security_cutoff
                 ax2.imshow(binary_mat)
-                ax2.set_xticks(np.arange(0, len(set(x)), 1))
-                ax2.set_yticks(np.arange(0, len(set(y)), 1))
-                ax2.set_xticklabels(sorted(set(x)))
-                ax2.set_yticklabels(sorted(set(y), reverse=True))
+                ax2.set_xticks(np.arange(0, len(x), 1))
+                ax2.set_yticks(np.arange(0, len(y), 1))
+                ax2.set_xticklabels(x.tolist())
+                ax2.set_yticklabels(y[::-1].tolist())
 
                 for (j, i), label in np.ndenumerate(mat):
                     ax2.text(
@@ -0,0 +1,417 @@
+#!/usr/bin/env python3
+"""
+Local estimator daemon
+
+Keeps Sage and the lattice estimator loaded in a pool of worker processes
+and answers estimate requests over a Unix socket, so that the analysis
+tools do not start (and warm up) Sage for every estimate. It must run
+under Sage's Python:
+
+    sage -python estimator_daemon.py [--socket PATH] [--jobs N] [--cache PATH]
+
+scripts/estimator_client.py talks to it and starts it when it is not
+running. A daemon holds an flock on <socket>.lock for its whole life, so
+only one serves a socket and only that one unlinks it; it binds the socket
+before loading Sage, and requests sent meanwhile wait in the backlog. The protocol is one JSON object per line in each direction:
+
+    {"op": "estimate", "problem": "kyber", "params": {...}}
+        params as the JSON input of kyber_estimator.sage, the result is
+        its output
+    {"op": "estimate", "problem": "lwe" | "ntru" | "sis", "params": {...},
+     "rough": false, "cost_model": "MATZOV", "deny_list": [...]}
+        LWE.estimate (NTRU, SIS; .rough if rough), the result is
+        {algorithm: {field: value}} of the estimator costs
+    {"op": "batch", "requests": [estimate requests]}
+        the estimates run concurrently, the answer is a list of responses
+    {"op": "metrics"}, {"op": "ping"}, {"op": "shutdown"}
+
+Responses are {"ok": true, "result": ..., "cached": bool} (Kyber
+estimates add "stderr", the estimator's log) or {"ok": false, "error": ...}.
+LWE/NTRU params are n, q, m ("oo" or absent for unlimited samples), Xs and
+Xe as [name, *args] of estimator.nd, e.g. ["CenteredBinomial", 3], and for
+NTRU ntru_type; SIS params are n, q, length_bound, m and norm (2 or "oo").
+
+Identical requests (equal JSON up to key order) run once while in flight,
+the others wait for the same result. Results are kept in a SQLite table
+shared by all clients and across restarts, keyed also by a content hash of
+kyber_estimator.sage.py, this daemon and the estimator package, so that
+results of edited code are not served; estimates with a timed-out,
+failed or cancelled attack, and Kyber requests that write a trace, are not
+cached. The timeout of Kyber requests applies per attack as in
+kyber_estimator.sage, other requests run to completion.
+
+The doctests need Sage: sage -python -m doctest estimator_daemon.py
+"""
+
+import argparse
+import asyncio
+import contextlib
+import fcntl
+import hashlib
+import importlib.util
+import io
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import sqlite3
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+DEFAULT_SOCKET = Path(os.environ.get("ESTIMATOR_SOCKET", SCRIPT_DIR.parent / "results" / "estimator.sock"))
+DEFAULT_CACHE = SCRIPT_DIR.parent / "results" / "estimator_cache.sqlite"
+
+PROBLEMS = ["kyber", "lwe", "ntru", "sis"]
+
+# Completed estimates the latency percentiles are taken over
+LATENCY_WINDOW = 1000
+
+kyber_estimator = None
+
+
+def load_estimator():
+    """Import Sage, the estimator and kyber_estimator.sage (preparsed) once, before the workers fork"""
+    global kyber_estimator
+    # kyber_estimator.sage adds the estimator path relative to sage-scripts/
+    os.chdir(SCRIPT_DIR)
+    sys.path.insert(0, str(SCRIPT_DIR.parent / "estimator" / "lattice-estimator"))
+    spec = importlib.util.spec_from_file_location("kyber_estimator", SCRIPT_DIR / "kyber_estimator.sage.py")
+    kyber_estimator = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(kyber_estimator)
+    from estimator import LWE, NTRU, SIS, ND, RC  # noqa: F401
+    for module in (LWE, NTRU, SIS):
+        dir(module)
+
+
+# Worker side
+
+def to_json(value):
+    """A cost field as JSON: numbers as int or float (±inf for ±oo), anything else as text"""
+    if isinstance(value, (bool, str)) or value is None:
+        return value
+    try:
+        x = float(value)
+    except (TypeError, ValueError):
+        return str(value)
+    return int(x) if x.is_integer() and abs(x) < 2 ** 53 else x
+
+
+def estimator_params(problem, params):
+    """estimator.{LWE,NTRU,SIS}.Parameters and the estimate of the module from JSON parameters"""
+    from sage.all import oo
+    from estimator import LWE, NTRU, SIS, ND
+
+    params = dict(params)
+    for key in ("m", "norm"):
+        if params.get(key) == "oo":
+            params[key] = oo
+    if problem == "sis":
+        return SIS.Parameters(**params), SIS.estimate
+    for key in ("Xs", "Xe"):
+        name, *args = params[key]
+        params[key] = getattr(ND, name)(*args)
+    module = LWE if problem == "lwe" else NTRU
+    return module.Parameters(**params), module.estimate
+
+
+def run_estimate(request):
+    """
+    Worker process: (result, stderr, complete) for an estimate request, where
+    complete is False if an attack did not finish
+
+    TESTS:
+
+    A pool worker serves request after request; the trace of each holds that
+    request's spans only::
+
+        >>> import tempfile
+        >>> load_estimator()
+        >>> params = {"k": 2, "eta1": 3, "eta2": 2, "du": 10, "dv": 4, "attacks": ["primal"], "jobs": 1}
+        >>> attack_spans = []
+        >>> with tempfile.TemporaryDirectory() as tmp, ProcessPoolExecutor(
+        ...         max_workers=1, mp_context=multiprocessing.get_context("fork")) as pool:
+        ...     for i in range(2):
+        ...         trace = os.path.join(tmp, f"trace{i}.json")
+        ...         _ = pool.submit(run_estimate, {"problem": "kyber", "params": {**params, "trace": trace}}).result()
+        ...         with open(trace) as f:
+        ...             events = json.load(f)["traceEvents"]
+        ...         attack_spans.append([e["name"] for e in events if e.get("cat") == "attack"])
+        >>> attack_spans
+        [['primal (BDGL16)'], ['primal (BDGL16)']]
+    """
+    stdout, stderr = io.StringIO(), io.StringIO()
+    with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+        if request["problem"] == "kyber":
+            result = kyber_estimator.estimate_kyber(request["params"])
+            complete = all(record.get("status") == "ok"
+                           for records in result["cost_models"].values() for record in records.values())
+        else:
+            from estimator import RC
+
+            params, estimate = estimator_params(request["problem"], request["params"])
+            if request.get("rough"):
+                costs = estimate.rough(params, quiet=True)
+            else:
+                options = {"deny_list": tuple(request.get("deny_list", ()))}
+                if request.get("cost_model"):
+                    options["red_cost_model"] = getattr(RC, request["cost_model"].split(".")[-1])
+                costs = estimate(params, quiet=True, **options)
+            result = {name: {key: to_json(value) for key, value in cost.items()} for name, cost in costs.items()}
+            # the estimator reports estimates that fail (and leaves them out) on stdout
+            complete = "failed with" not in stdout.getvalue()
+    return result, stderr.getvalue(), complete
+
+
+# Daemon side
+
+def code_version():
+    """
+    Content hash of the code results depend on: kyber_estimator.sage.py, this
+    daemon and the loaded estimator package (attacks and conf defaults such as
+    the cost model); call after load_estimator()
+    """
+    digest = hashlib.sha256()
+    package = Path(sys.modules["estimator"].__file__).resolve().parent
+    for path in [SCRIPT_DIR / "kyber_estimator.sage.py", Path(__file__).resolve(), *sorted(package.rglob("*.py"))]:
+        digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+class ResultCache:
+    """
+    Finished estimates by request key, in SQLite. Keys are prefixed with the
+    code version, so results of other code are never served (and other
+    daemons sharing the file keep theirs)
+    """
+
+    def __init__(self, path, version):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.version = version
+        self.db = sqlite3.connect(path)
+        self.db.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, response TEXT, seconds REAL, "
+                        "created REAL) WITHOUT ROWID")
+
+    def get(self, key):
+        row = self.db.execute("SELECT response FROM results WHERE key = ?", (f"{self.version}:{key}",)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, key, response, seconds):
+        with self.db:
+            self.db.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+                            (f"{self.version}:{key}", json.dumps(response), seconds, time.time()))
+
+    def __len__(self):
+        """Results of this code version"""
+        return self.db.execute("SELECT COUNT(*) FROM results WHERE substr(key, 1, ?) = ?",
+                               (len(self.version) + 1, f"{self.version}:")).fetchone()[0]
+
+
+def request_key(request):
+    """Identical requests have the same key"""
+    return json.dumps({k: v for k, v in request.items() if k not in ("op", "id")}, sort_keys=True)
+
+
+class EstimatorDaemon:
+    def __init__(self, pool, jobs, cache):
+        self.pool = pool
+        self.jobs = jobs
+        self.cache = cache
+        self.inflight = {}  # request key -> future of the response
+        self.queued = 0  # submitted to the pool and not finished
+        self.started = time.time()
+        self.counts = {"requests": 0, "cache_hits": 0, "deduplicated": 0, "computed": 0, "errors": 0}
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.stopped = asyncio.Event()
+
+    async def estimate(self, request):
+        self.counts["requests"] += 1
+        if request.get("problem") not in PROBLEMS:
+            self.counts["errors"] += 1
+            return {"ok": False, "error": f"unknown problem {request.get('problem')!r}, "
+                                          f"expected one of {', '.join(PROBLEMS)}"}
+        if not isinstance(request.get("params"), dict):
+            self.counts["errors"] += 1
+            return {"ok": False, "error": "params must be an object"}
+
+        key = request_key(request)
+        # a trace is written by the run, it must not be skipped
+        cacheable = not request["params"].get("trace")
+        if cacheable:
+            response = self.cache.get(key)
+            if response is not None:
+                self.counts["cache_hits"] += 1
+                return {**response, "cached": True}
+            if key in self.inflight:
+                self.counts["deduplicated"] += 1
+                return await asyncio.shield(self.inflight[key])
+
+        future = asyncio.get_running_loop().create_future()
+        if cacheable:
+            self.inflight[key] = future
+        start = time.monotonic()
+        self.queued += 1
+        try:
+            result, stderr, complete = await asyncio.get_running_loop().run_in_executor(
+                self.pool, run_estimate, request)
+            response = {"ok": True, "result": result, "cached": False}
+            if request["problem"] == "kyber":
+                response["stderr"] = stderr
+            seconds = time.monotonic() - start
+            self.counts["computed"] += 1
+            self.latencies.append(seconds)
+            if cacheable and complete:
+                self.cache.put(key, response, seconds)
+        except Exception as e:
+            self.counts["errors"] += 1
+            response = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+        finally:
+            self.queued -= 1
+            self.inflight.pop(key, None)
+        future.set_result(response)
+        return response
+
+    def metrics(self):
+        latencies = sorted(self.latencies)
+
+        def percentile(p):
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))], 3) if latencies else None
+
+        return {
+            "uptime": round(time.time() - self.started, 1),
+            "jobs": self.jobs,
+            "queue_depth": max(0, self.queued - self.jobs),
+            "running": min(self.queued, self.jobs),
+            "inflight": len(self.inflight),
+            **self.counts,
+            "cached_results": len(self.cache),
+            "code_version": self.cache.version,
+            "latency": {
+                "window": len(latencies),
+                "mean": round(sum(latencies) / len(latencies), 3) if latencies else None,
+                "p50": percentile(0.5),
+                "p95": percentile(0.95),
+                "max": round(latencies[-1], 3) if latencies else None,
+            },
+        }
+
+    async def handle(self, message):
+        op = message.get("op")
+        if op == "estimate":
+            return await self.estimate(message)
+        if op == "batch":
+            requests = message.get("requests")
+            if not isinstance(requests, list):
+                return {"ok": False, "error": "requests must be a list"}
+            return {"ok": True, "result": await asyncio.gather(*(self.estimate(r) for r in requests))}
+        if op == "metrics":
+            return {"ok": True, "result": self.metrics()}
+        if op == "ping":
+            return {"ok": True, "result": "pong"}
+        if op == "shutdown":
+            self.stopped.set()
+            return {"ok": True, "result": "shutting down"}
+        return {"ok": False, "error": f"unknown op {op!r}"}
+
+    async def serve_client(self, reader, writer):
+        """Requests of one connection in turn, one JSON object per line"""
+        try:
+            while line := await reader.readline():
+                message = None
+                try:
+                    message = json.loads(line)
+                    response = await self.handle(message) if isinstance(message, dict) else \
+                        {"ok": False, "error": "expected a JSON object"}
+                except json.JSONDecodeError as e:
+                    response = {"ok": False, "error": f"invalid JSON: {e}"}
+                if isinstance(message, dict) and "id" in message:
+                    response = {"id": message["id"], **response}
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            # the client went away, or the daemon stops
+            pass
+        finally:
+            writer.close()
+
+
+def socket_in_use(path):
+    """True if a daemon answers on path"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+        try:
+            s.connect(str(path))
+            return True
+        except OSError:
+            return False
+
+
+def close_fds(*fds):
+    """Worker initializer: the workers must not keep the listening socket or the lock alive"""
+    for fd in fds:
+        os.close(fd)
+
+
+async def serve(pool, jobs, cache, listener, path):
+    daemon = EstimatorDaemon(pool, jobs, cache)
+    server = await asyncio.start_unix_server(daemon.serve_client, sock=listener, limit=2 ** 24)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, daemon.stopped.set)
+    print(f"Estimator daemon on {path} with {daemon.jobs} workers", file=sys.stderr)
+    async with server:
+        await daemon.stopped.wait()
+    print("Estimator daemon stopping, running estimates are finished first", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local lattice estimator daemon (run with sage -python)")
+    parser.add_argument("--socket", default=str(DEFAULT_SOCKET), help=f"Unix socket (default: {DEFAULT_SOCKET})")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(), help="Worker processes (default: CPUs)")
+    parser.add_argument("--cache", default=str(DEFAULT_CACHE), help=f"Result cache (default: {DEFAULT_CACHE})")
+    args = parser.parse_args()
+
+    path = Path(args.socket).resolve()
+    cache_path = Path(args.cache).resolve()  # before load_estimator() changes the directory
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # The holder of <socket>.lock owns the socket path for its whole life:
+    # one daemon per socket, and no other daemon unlinks or replaces it
+    lock = open(path.with_name(path.name + ".lock"), "a")
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        sys.exit(f"An estimator daemon is already running on {path}")
+    if socket_in_use(path):
+        sys.exit(f"An estimator daemon is already running on {path}")
+    with contextlib.suppress(FileNotFoundError):
+        path.unlink()
+
+    # Bound before Sage is loaded: clients connect at once and their requests wait in the backlog
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(str(path))
+    listener.listen(128)
+    inode = path.stat().st_ino
+    try:
+        # The workers fork from a process that has loaded everything, and are all started before the event loop
+        load_estimator()
+        cache = ResultCache(cache_path, code_version())
+        pool = ProcessPoolExecutor(max_workers=args.jobs, mp_context=multiprocessing.get_context("fork"),
+                                   initializer=close_fds, initargs=(listener.fileno(), lock.fileno()))
+        try:
+            for future in [pool.submit(os.getpid) for _ in range(args.jobs)]:
+                future.result()
+            asyncio.run(serve(pool, args.jobs, cache, listener, path))
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+    finally:
+        # Only the socket this daemon bound
+        with contextlib.suppress(FileNotFoundError):
+            if path.stat().st_ino == inode:
+                path.unlink()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,27 +2,48 @@
 """
 Kyber security estimation using lattice-estimator
 This script must be run with SageMath
+
+Besides the Kyber parameters, the JSON input may contain
+    attacks       list of attacks, default ["primal", "dual"]
+    cost_models   list of reduction cost models, default ["BDGL16"]
+                  (any of BDGL16, MATZOV, ADPS16, with or without "RC.")
+    timeout       seconds per attack and cost model, default none
+    jobs          worker processes, default the number of CPUs
+    trace         path for a Chrome trace (Perfetto) of the run, default none;
+                  a summary table of the spans is printed to stderr
+Every (attack, cost model) pair runs in its own worker process, forked
+after the LWE parameters are set up; a pair that exceeds the timeout is
+terminated and reported with status "timeout", the others still return.
 """
 
 
 # This file was *autogenerated* from the file ../sage-scripts/kyber_estimator.sage
 from sage.all_cmdline import *   # import sage library
 
-_sage_const_0 = Integer(0); _sage_const_256 = Integer(256); _sage_const_1 = Integer(1); _sage_const_2 = Integer(2); _sage_const_0p5 = RealNumber('0.5'); _sage_const_3329 = Integer(3329)
+_sage_const_0 = Integer(0); _sage_const_256 = Integer(256); _sage_const_1 = Integer(1); _sage_const_2 = Integer(2); _sage_const_0p5 = RealNumber('0.5'); _sage_const_3 = Integer(3); _sage_const_3329 = Integer(3329)
 import sys
 import json
+import os
+import signal
+import time
+import multiprocessing
+from multiprocessing.connection import wait
 from sage.all import *
 
 # Add lattice estimator to path
 sys.path.insert(_sage_const_0 , "../estimator/lattice-estimator")
 
-from estimator import *
+# Only the modules needed: the estimator package loads the rest lazily
+from estimator.trace import Trace
 from estimator.lwe_parameters import LWEParameters
 from estimator.lwe_primal import primal_usvp
 from estimator.lwe_dual import dual_hybrid
 from estimator.nd import CenteredBinomial
 from estimator.reduction import RC
 
+ATTACKS = {"primal": primal_usvp, "dual": dual_hybrid}
+COST_MODELS = ["BDGL16", "MATZOV", "ADPS16"]
+
 def create_kyber_parameters(n, k, eta1, eta2, q, du, dv):
     """
     Create Kyber LWE parameters for security estimation
@@ -53,56 +74,130 @@ def create_kyber_parameters(n, k, eta1, eta2, q, du, dv):
     
     return params
 
-def estimate_security(params):
+def cost_model(name):
+    """RC.<name> for "BDGL16" or "RC.BDGL16" """
+    name = name.split(".")[-_sage_const_1 ]
+    if name not in COST_MODELS:
+        raise ValueError(f"unknown cost model {name}, expected one of {', '.join(COST_MODELS)}")
+    return getattr(RC, name)
+
+def summarize(result):
+    """JSON-serializable summary of an estimator cost"""
+    return {
+        'd': int(result.get('d', _sage_const_0 )),
+        'beta': int(result.get('beta', _sage_const_0 )),
+        'm': int(result.get('m', _sage_const_0 )),
+        'rop': float(result.get('rop', _sage_const_1 )),
+        'classical': int(log(result.get('rop', _sage_const_1 ), _sage_const_2 )),
+        'quantum': int(log(result.get('rop', _sage_const_1 ), _sage_const_2 ) * _sage_const_0p5 )
+    }
+
+def run_attack(conn, params, attack, model, trace=False):
     """
-    Estimate security using various attacks
-    
-    Returns dict with security estimates
+    Worker process: one attack under one cost model, (status, payload, trace)
+    sent through conn; trace is the worker's Trace.dump() or None
     """
-    results = {}
-    
-    # Primal attack
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    if trace:
+        Trace.enable()
     try:
-        primal_result = primal_usvp(params, red_cost_model=RC.BDGL16)
-        results['primal'] = {
-            'd': int(primal_result.get('d', _sage_const_0 )),
-            'beta': int(primal_result.get('beta', _sage_const_0 )),
-            'm': int(primal_result.get('m', _sage_const_0 )),
-            'rop': float(primal_result.get('rop', _sage_const_1 )),
-            'classical': int(log(primal_result.get('rop', _sage_const_1 ), _sage_const_2 )),
-            'quantum': int(log(primal_result.get('rop', _sage_const_1 ), _sage_const_2 ) * _sage_const_0p5 )
-        }
+        with Trace.span(f"{attack} ({model})", "attack", params=params):
+            result = ATTACKS[attack](params, red_cost_model=cost_model(model))
+        conn.send(("ok", summarize(result), Trace.dump() if trace else None))
     except Exception as e:
-        print(f"Primal attack failed: {e}", file=sys.stderr)
-        results['primal'] = None
+        conn.send(("error", str(e), Trace.dump() if trace else None))
+    finally:
+        conn.close()
+
+def estimate_security(params, attacks=("primal", "dual"), models=("BDGL16",), timeout=None, jobs=None,
+                      trace=False):
+    """
+    Estimate security using various attacks and cost models
     
-    # Dual attack
-    try:
-        dual_result = dual_hybrid(params, red_cost_model=RC.BDGL16)
-        results['dual'] = {
-            'd': int(dual_result.get('d', _sage_const_0 )),
-            'beta': int(dual_result.get('beta', _sage_const_0 )),
-            'm': int(dual_result.get('m', _sage_const_0 )),
-            'rop': float(dual_result.get('rop', _sage_const_1 )),
-            'classical': int(log(dual_result.get('rop', _sage_const_1 ), _sage_const_2 )),
-            'quantum': int(log(dual_result.get('rop', _sage_const_1 ), _sage_const_2 ) * _sage_const_0p5 )
-        }
-    except Exception as e:
-        print(f"Dual attack failed: {e}", file=sys.stderr)
-        results['dual'] = None
+    Returns {model: {attack: record}} where record has a status ("ok",
+    "timeout", "error" or "cancelled"), the seconds it ran (if it
+    started) and, if ok, the estimate (d, beta, m, rop, classical, quantum).
+    With trace, the workers record spans and their traces are merged into
+    Trace (killed workers contribute nothing).
+    """
+    for attack in attacks:
+        if attack not in ATTACKS:
+            raise ValueError(f"unknown attack {attack}, expected one of {', '.join(ATTACKS)}")
+    for model in models:
+        cost_model(model)
     
-    return results
-
-def main():
-    """Main function to process command line arguments and run estimation"""
+    context = multiprocessing.get_context("fork")
+    jobs = jobs or os.cpu_count()
+    pending = [(attack, model) for model in models for attack in attacks]
+    running = {}  # (attack, model) -> (process, connection, start)
+    results = {model: {} for model in models}
     
-    if len(sys.argv) < _sage_const_2 :
-        print("Usage: sage kyber_estimator.sage '<json_params>'", file=sys.stderr)
-        sys.exit(_sage_const_1 )
+    def finish(key, record):
+        process, conn, start = running.pop(key)
+        record["seconds"] = round(time.monotonic() - start, _sage_const_3 )
+        conn.close()
+        process.join()
+        results[key[_sage_const_1 ]][key[_sage_const_0 ]] = record
     
-    # Parse input parameters
-    input_params = json.loads(sys.argv[_sage_const_1 ])
+    try:
+        while pending or running:
+            while pending and len(running) < jobs:
+                key = pending.pop(_sage_const_0 )
+                receiver, sender = context.Pipe(duplex=False)
+                process = context.Process(target=run_attack, args=(sender, params, *key, trace), daemon=True)
+                process.start()
+                sender.close()
+                running[key] = (process, receiver, time.monotonic())
+            
+            # Sleep until a worker reports or the earliest timeout expires
+            remaining = None
+            if timeout is not None:
+                now = time.monotonic()
+                remaining = max(_sage_const_0 , min(start + timeout - now for _, _, start in running.values()))
+            wait([conn for _, conn, _ in running.values()], timeout=remaining)
+            
+            now = time.monotonic()
+            for key, (process, conn, start) in list(running.items()):
+                if conn.poll():
+                    try:
+                        status, payload, worker_trace = conn.recv()
+                    except EOFError:
+                        process.join()
+                        status, payload, worker_trace = "error", f"worker exited with code {process.exitcode}", None
+                    if worker_trace:
+                        Trace.load(worker_trace)
+                    if status == "ok":
+                        finish(key, {"status": "ok", **payload})
+                    else:
+                        print(f"{key[_sage_const_0 ].capitalize()} attack ({key[_sage_const_1 ]}) failed: {payload}", file=sys.stderr)
+                        finish(key, {"status": "error", "error": payload})
+                elif timeout is not None and now - start >= timeout:
+                    process.terminate()
+                    print(f"{key[_sage_const_0 ].capitalize()} attack ({key[_sage_const_1 ]}) timed out after {timeout} s", file=sys.stderr)
+                    finish(key, {"status": "timeout"})
+    except KeyboardInterrupt:
+        print("Interrupted: cancelling the remaining attacks", file=sys.stderr)
     
+    # Cancel what is still running or queued; the finished results are kept
+    for key in list(running):
+        running[key][_sage_const_0 ].terminate()
+        finish(key, {"status": "cancelled"})
+    for attack, model in pending:
+        results[model][attack] = {"status": "cancelled"}
+    
+    return results
+
+def estimate_fields(record):
+    """The estimate of a record without its status fields, or None"""
+    if record.get("status") != "ok":
+        return None
+    return {key: value for key, value in record.items() if key not in ("status", "seconds", "error")}
+
+def estimate_kyber(input_params):
+    """
+    The JSON result for the input parameters of the module docstring (also
+    what estimator_daemon.py serves for "kyber" requests)
+    """
     n = input_params.get('n', _sage_const_256 )
     k = input_params.get('k')
     eta1 = input_params.get('eta1')
@@ -111,11 +206,28 @@ def main():
     du = input_params.get('du')
     dv = input_params.get('dv')
     
-    # Create Kyber parameters
+    attacks = input_params.get('attacks', ["primal", "dual"])
+    models = [name.split(".")[-_sage_const_1 ] for name in input_params.get('cost_models', ["BDGL16"])]
+    timeout = input_params.get('timeout')
+    jobs = input_params.get('jobs')
+    trace = input_params.get('trace')
+    
+    # Create Kyber parameters (once, shared by every worker)
     params = create_kyber_parameters(n, k, eta1, eta2, q, du, dv)
     
-    # Estimate security
-    results = estimate_security(params)
+    # Estimate security; the trace covers this run only, also in a daemon worker that served others before
+    if trace:
+        Trace.reset()
+    estimates = estimate_security(params, attacks, models, timeout, jobs, trace=bool(trace))
+    if trace:
+        Trace.write(trace)
+        print(Trace.summary(), file=sys.stderr)
+    
+    # primal/dual of the first cost model at the top level, as before
+    first = estimates[models[_sage_const_0 ]]
+    results = {attack: estimate_fields(first[attack]) for attack in attacks}
+    results['status'] = {attack: first[attack]["status"] for attack in attacks}
+    results['cost_models'] = estimates
     
     # Add input parameters to results (ensure they are JSON serializable)
     results['params'] = {
@@ -127,10 +239,23 @@ def main():
         'du': int(du),
         'dv': int(dv)
     }
+    return results
+
+def main():
+    """Main function to process command line arguments and run estimation"""
+    
+    if len(sys.argv) < _sage_const_2 :
+        print("Usage: sage kyber_estimator.sage '<json_params>'", file=sys.stderr)
+        sys.exit(_sage_const_1 )
+    
+    # Parse input parameters
+    input_params = json.loads(sys.argv[_sage_const_1 ])
+    
+    # SIGTERM from the caller cancels the workers like Ctrl-C
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
     
     # Output results as JSON
-    print(json.dumps(results))
+    print(json.dumps(estimate_kyber(input_params)))
 
 if __name__ == "__main__":
     main()
-
@@ -4,18 +4,33 @@ Dynamic Kyber Security Analyzer
 Interfaces with SageMath to compute actual security estimates
 """
 
+import argparse
 import json
-import subprocess
 import os
 import sys
 from tabulate import tabulate
 from pathlib import Path
 
+from estimator_client import EstimatorClient, EstimatorError
+
+# Seconds per attack and cost model before the estimator bridge gives up on it
+ATTACK_TIMEOUT = 3600
+
 class DynamicKyberAnalyzer:
-    def __init__(self):
-        self.sage_script = Path("../sage-scripts/kyber_estimator.sage")
+    def __init__(self, attack_timeout=ATTACK_TIMEOUT, cost_models=None, trace_dir=None, client=None):
+        # Estimates are served by the local estimator daemon (started on demand)
+        self.client = client or EstimatorClient()
         self.results_dir = Path("../results")
         
+        # Passed to kyber_estimator.sage (in the daemon) with every parameter
+        # set; the attacks run concurrently there, each under its own timeout
+        self.estimator_options = {"timeout": attack_timeout}
+        if cost_models:
+            self.estimator_options["cost_models"] = cost_models
+        
+        # Chrome traces (Perfetto) of the estimator runs, one per LWE instance
+        self.trace_dir = Path(trace_dir).resolve() if trace_dir else None
+        
         # Kyber parameter configurations
         self.kyber_params = {
             512: {"n": 256, "k": 2, "eta1": 3, "eta2": 2, "q": 3329},
@@ -38,32 +53,24 @@ class DynamicKyberAnalyzer:
         }
     
     def run_sage_estimator(self, params):
-        """Run the SageMath estimator script"""
+        """Estimate the parameter set with kyber_estimator.sage through the estimator daemon"""
+        # Explicit params override the options
+        options = dict(self.estimator_options)
+        if self.trace_dir:
+            self.trace_dir.mkdir(parents=True, exist_ok=True)
+            trace_file = self.trace_dir / f"trace_k{params['k']}_eta{params['eta1']}_{params['eta2']}.json"
+            options["trace"] = str(trace_file)
+        
         try:
-            # Convert params to JSON string
-            params_json = json.dumps(params)
-            
-            # Run sage script
-            cmd = ["sage", str(self.sage_script), params_json]
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-            
-            # Parse output
-            if result.stdout:
-                return json.loads(result.stdout)
-            else:
-                print(f"Error: No output from sage script")
-                print(f"Stderr: {result.stderr}")
-                return None
-                
-        except subprocess.CalledProcessError as e:
-            print(f"Error running sage: {e}")
-            print(f"Stdout: {e.stdout}")
-            print(f"Stderr: {e.stderr}")
-            return None
-        except json.JSONDecodeError as e:
-            print(f"Error parsing JSON output: {e}")
-            print(f"Raw output: {result.stdout}")
+            result, stderr = self.client.kyber({**options, **params})
+        except EstimatorError as e:
+            print(f"Error running the estimator: {e}")
             return None
+        
+        if self.trace_dir:
+            # The span summary table goes to stderr
+            trace_file.with_suffix(".txt").write_text(stderr)
+        return result
     
     def analyze_parameter_set(self, variant, du, dv, custom_eta=None):
         """Analyze a specific parameter set"""
@@ -108,6 +115,8 @@ class DynamicKyberAnalyzer:
             else:
                 config_str = f"Kyber{params['k']*256}\n(η1 = {params['eta1']}, η2 = {params['eta2']})"
             
+            status = result.get('status', {})
+            
             # Primal attack
             if result['primal']:
                 primal = result['primal']
@@ -122,6 +131,8 @@ class DynamicKyberAnalyzer:
                     "",  # δ
                     ""   # C
                 ])
+            elif status.get('primal'):
+                table_data.append([config_str, "Primal Attack", f"({status['primal']})"] + [""] * 6)
             
             # Dual attack
             if result['dual']:
@@ -137,6 +148,8 @@ class DynamicKyberAnalyzer:
                     "",  # δ
                     ""   # C
                 ])
+            elif status.get('dual'):
+                table_data.append(["", "Dual Attack", f"({status['dual']})"] + [""] * 6)
             
             table_data.append([""] * 9)  # Empty row
         
@@ -223,7 +236,18 @@ class DynamicKyberAnalyzer:
         print(f"\n\nResults saved to {self.results_dir}")
 
 def main():
-    analyzer = DynamicKyberAnalyzer()
+    parser = argparse.ArgumentParser(description="Dynamic Kyber security analysis through SageMath")
+    parser.add_argument("--timeout", type=float, default=ATTACK_TIMEOUT,
+                        help=f"Seconds per attack and cost model (default: {ATTACK_TIMEOUT})")
+    parser.add_argument("--cost-models", nargs="+", metavar="MODEL",
+                        help="Reduction cost models, e.g. BDGL16 MATZOV ADPS16 (default: BDGL16); "
+                             "the tables show the first")
+    parser.add_argument("--trace", metavar="DIR",
+                        help="Write a Chrome trace (open in https://ui.perfetto.dev) and a span summary "
+                             "of every estimator run to DIR")
+    args = parser.parse_args()
+    
+    analyzer = DynamicKyberAnalyzer(args.timeout, args.cost_models, args.trace)
     analyzer.generate_report()
 
 if __name__ == "__main__":
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Client of the local estimator daemon (sage-scripts/estimator_daemon.py)
+
+Estimates go to the daemon, which keeps Sage warm and caches results,
+instead of a `sage kyber_estimator.sage` process each. If no daemon answers
+on the socket, the client starts one with `sage -python` (its log goes to
+results/estimator_daemon.log) and waits until it is ready. Clients start
+the daemon under an flock on <socket>.start.lock, so concurrent misses
+start one daemon; the others find it running once they get the lock.
+
+    client = EstimatorClient()
+    result, stderr = client.kyber({"k": 2, "eta1": 3, "eta2": 2, "du": 10, "dv": 4})
+    client.estimate("lwe", {"n": 512, "q": 3329, "Xs": ["CenteredBinomial", 3],
+                            "Xe": ["CenteredBinomial", 3], "m": 512}, rough=True)
+    client.batch([...])      # responses of several estimate requests
+
+Usage (from scripts/, like dynamic_analyzer.py):
+    python3 estimator_client.py kyber '{"k": 2, "eta1": 3, "eta2": 2, "du": 10, "dv": 4}'
+    python3 estimator_client.py metrics
+    python3 estimator_client.py shutdown
+"""
+
+import argparse
+import contextlib
+import fcntl
+import json
+import os
+import shutil
+import socket
+import subprocess
+import time
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+DAEMON = SCRIPT_DIR.parent / "sage-scripts" / "estimator_daemon.py"
+DEFAULT_SOCKET = Path(os.environ.get("ESTIMATOR_SOCKET", SCRIPT_DIR.parent / "results" / "estimator.sock"))
+DAEMON_LOG = SCRIPT_DIR.parent / "results" / "estimator_daemon.log"
+
+# Seconds to wait for a started daemon to load Sage and fork its workers
+START_TIMEOUT = 300
+
+
+class EstimatorError(RuntimeError):
+    """The daemon cannot be reached or rejected a request"""
+
+
+class EstimatorClient:
+    def __init__(self, socket_path=DEFAULT_SOCKET, autostart=True, jobs=None):
+        """
+        socket_path: the daemon's Unix socket
+        autostart:   start a daemon (with jobs workers) if none is running
+        """
+        self.socket_path = Path(socket_path)
+        self.autostart = autostart
+        self.jobs = jobs
+
+    def running(self):
+        """True if a daemon answers on the socket"""
+        try:
+            with self._connect():
+                return True
+        except OSError:
+            return False
+
+    def available(self):
+        """True if estimates can be served: a daemon runs or Sage is there to start one"""
+        return self.running() or (self.autostart and shutil.which("sage") is not None)
+
+    def _connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(str(self.socket_path))
+        except OSError:
+            sock.close()
+            raise
+        return sock
+
+    def _start(self):
+        if not shutil.which("sage"):
+            raise EstimatorError(f"No estimator daemon on {self.socket_path} and SageMath is not installed")
+        DAEMON_LOG.parent.mkdir(parents=True, exist_ok=True)
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.socket_path.with_name(self.socket_path.name + ".start.lock"), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            # Another client may have started it while this one waited for the lock
+            with contextlib.suppress(OSError):
+                return self._connect()
+            cmd = ["sage", "-python", str(DAEMON), "--socket", str(self.socket_path)]
+            if self.jobs:
+                cmd += ["--jobs", str(self.jobs)]
+            with open(DAEMON_LOG, "a") as log:
+                process = subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=log, stderr=log,
+                                           start_new_session=True)
+            deadline = time.monotonic() + START_TIMEOUT
+            while time.monotonic() < deadline:
+                if process.poll() is not None and not self.running():
+                    raise EstimatorError(f"The estimator daemon exited with code {process.returncode}, "
+                                         f"see {DAEMON_LOG}")
+                try:
+                    return self._connect()
+                except OSError:
+                    time.sleep(0.5)
+        raise EstimatorError(f"The estimator daemon did not start within {START_TIMEOUT} s, see {DAEMON_LOG}")
+
+    def start(self):
+        """Start the daemon unless it runs (before fanning out requests from several threads)"""
+        self.request({"op": "ping"})
+
+    def request(self, message):
+        """The daemon's response to one message (a dict, see estimator_daemon.py)"""
+        try:
+            sock = self._connect()
+        except OSError:
+            if not self.autostart:
+                raise EstimatorError(f"No estimator daemon on {self.socket_path}") from None
+            sock = self._start()
+        with sock, sock.makefile("rb") as reader:
+            sock.sendall(json.dumps(message).encode() + b"\n")
+            line = reader.readline()
+        if not line:
+            raise EstimatorError("The estimator daemon closed the connection")
+        return json.loads(line)
+
+    def _result(self, response):
+        if not response.get("ok"):
+            raise EstimatorError(response.get("error", "unknown error"))
+        return response["result"]
+
+    def estimate(self, problem, params, **options):
+        """
+        Result of an estimate: problem "lwe", "ntru" or "sis" with JSON
+        parameters and options rough, cost_model, deny_list; or "kyber"
+        """
+        return self._result(self.request({"op": "estimate", "problem": problem, "params": params, **options}))
+
+    def kyber(self, params):
+        """(output of kyber_estimator.sage for the JSON input params, its stderr)"""
+        response = self.request({"op": "estimate", "problem": "kyber", "params": params})
+        return self._result(response), response.get("stderr", "")
+
+    def batch(self, requests):
+        """
+        Responses ({"ok", "result" or "error", ...}) of several estimate
+        requests ({"problem", "params", ...}), run concurrently by the daemon
+        """
+        requests = [{"op": "estimate", **r} for r in requests]
+        return self._result(self.request({"op": "batch", "requests": requests}))
+
+    def metrics(self):
+        return self._result(self.request({"op": "metrics"}))
+
+    def shutdown(self):
+        """Stop the daemon if it runs"""
+        if self.running():
+            self._result(EstimatorClient(self.socket_path, autostart=False).request({"op": "shutdown"}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Talk to the local estimator daemon")
+    parser.add_argument("--socket", default=str(DEFAULT_SOCKET), help=f"Unix socket (default: {DEFAULT_SOCKET})")
+    sub = parser.add_subparsers(dest="command", required=True)
+    kyber = sub.add_parser("kyber", help="Estimate a Kyber parameter set (JSON input of kyber_estimator.sage)")
+    kyber.add_argument("params")
+    sub.add_parser("start", help="Start the daemon if it is not running")
+    sub.add_parser("metrics", help="Queue depth, cache hits and latencies")
+    sub.add_parser("shutdown", help="Stop the daemon")
+    args = parser.parse_args()
+
+    client = EstimatorClient(args.socket, autostart=args.command in ("kyber", "start"))
+    try:
+        if args.command == "kyber":
+            print(json.dumps(client.kyber(json.loads(args.params))[0]))
+        elif args.command == "start":
+            client.start()
+            print(f"Estimator daemon running on {client.socket_path}")
+        elif args.command == "metrics":
+            print(json.dumps(client.metrics(), indent=2))
+        else:
+            client.shutdown()
+    except EstimatorError as e:
+        parser.exit(1, f"Error: {e}\n")
+
+
+if __name__ == "__main__":
+    main()
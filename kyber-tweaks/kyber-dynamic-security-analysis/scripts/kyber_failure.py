@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Analytic decryption failure probability δ of Kyber parameter sets
+
+Same method as the failure script of the Kyber submission: the exact
+distribution of one coefficient of the decryption noise
+
+    w = eᵀr + e2 + c_v - sᵀ(e1 + c_u)
+
+is built by convolutions of the centered binomial laws (s, e, r ~ η1;
+e1, e2 ~ η2, as in indcpa.c) and the rounding errors of the ciphertext
+compression (c_u for du, c_v for dv, rounding as in poly.c), and δ is
+n · P(|w| > q/4).
+
+Distributions are (offset, probabilities) pairs over consecutive
+integers. Convolutions are direct (np.convolve) rather than FFT-based so
+the tails around 2^-200 keep their precision. The expensive part, the sum
+over k·n products, depends only on (k, η1, η2, du) and is memoized.
+
+Usage:
+    python3 kyber_failure.py --k 2 --eta1 3 --eta2 2 --du 10 --dv 4
+"""
+
+import argparse
+import math
+from functools import lru_cache
+
+import numpy as np
+
+N = 256
+Q = 3329
+CLEAN_THRESHOLD = 2.0 ** -300
+
+
+def centered_binomial(eta):
+    probs = np.array([math.comb(2 * eta, eta + x) for x in range(-eta, eta + 1)], dtype=float)
+    return -eta, probs / 4 ** eta
+
+
+def compression_error(q, d):
+    """Law of x - decompress(compress(x)) for uniform x mod q (round half up, as poly.c)"""
+    errors = {}
+    for x in range(q):
+        y = math.floor((x << d) / q + 0.5) % (1 << d)
+        z = math.floor(y * q / (1 << d) + 0.5) % q
+        e = (x - z) % q
+        if e > q // 2:
+            e -= q
+        errors[e] = errors.get(e, 0) + 1
+    lo, hi = min(errors), max(errors)
+    probs = np.zeros(hi - lo + 1)
+    for e, count in errors.items():
+        probs[e - lo] = count / q
+    return lo, probs
+
+
+def convolution(a, b):
+    return a[0] + b[0], np.convolve(a[1], b[1])
+
+
+def product(a, b):
+    """Law of X·Y for independent X ~ a, Y ~ b"""
+    (lo_a, pa), (lo_b, pb) = a, b
+    values = np.add.outer(np.arange(len(pa)) + lo_a, np.zeros(len(pb), dtype=int)) * \
+        (np.arange(len(pb)) + lo_b)
+    weights = np.outer(pa, pb)
+    lo = int(values.min())
+    probs = np.bincount((values - lo).ravel(), weights=weights.ravel())
+    return lo, probs
+
+
+def clean(law):
+    """Drop the negligible ends of the support"""
+    lo, probs = law
+    keep = np.nonzero(probs > CLEAN_THRESHOLD)[0]
+    if len(keep) == 0:
+        return 0, np.array([1.0])
+    return lo + int(keep[0]), probs[keep[0]:keep[-1] + 1]
+
+
+def iterated_convolution(law, count):
+    """Law of the sum of `count` independent copies, by binary exponentiation"""
+    result = (0, np.array([1.0]))
+    for bit in bin(count)[2:]:
+        result = clean(convolution(result, result))
+        if bit == "1":
+            result = clean(convolution(result, law))
+    return result
+
+
+@lru_cache(maxsize=None)
+def inner_product_error(k, eta1, eta2, du, n=N, q=Q):
+    """Law of eᵀr - sᵀ(e1 + c_u): k·n products of each kind"""
+    chi1 = centered_binomial(eta1)
+    chi2 = centered_binomial(eta2)
+    er = product(chi1, chi1)
+    se = product(chi1, convolution(chi2, compression_error(q, du)))
+    return clean(convolution(iterated_convolution(er, k * n), iterated_convolution(se, k * n)))
+
+
+@lru_cache(maxsize=None)
+def message_error(eta2, dv, q=Q):
+    """Law of e2 + c_v"""
+    return convolution(centered_binomial(eta2), compression_error(q, dv))
+
+
+def final_error(k, eta1, eta2, du, dv, n=N, q=Q):
+    return convolution(inner_product_error(k, eta1, eta2, du, n, q), message_error(eta2, dv, q))
+
+
+def failure_probability(k, eta1, eta2, du, dv, n=N, q=Q):
+    """δ = n · P(|w| > q/4)"""
+    lo, probs = final_error(k, eta1, eta2, du, dv, n, q)
+    values = np.arange(len(probs)) + lo
+    tail = float(np.sum(probs[np.abs(values) > q / 4]))
+    return n * tail
+
+
+def log2_failure_probability(k, eta1, eta2, du, dv, n=N, q=Q):
+    delta = failure_probability(k, eta1, eta2, du, dv, n, q)
+    return math.log2(delta) if delta > 0 else -math.inf
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analytic Kyber decryption failure probability")
+    parser.add_argument("--k", type=int, required=True)
+    parser.add_argument("--eta1", type=int, required=True)
+    parser.add_argument("--eta2", type=int, required=True)
+    parser.add_argument("--du", type=int, required=True)
+    parser.add_argument("--dv", type=int, required=True)
+    args = parser.parse_args()
+
+    log_delta = log2_failure_probability(args.k, args.eta1, args.eta2, args.du, args.dv)
+    print(f"Kyber{args.k * 256} (η1={args.eta1}, η2={args.eta2}, du={args.du}, dv={args.dv}): "
+          f"δ = 2^{log_delta:.1f}")
+
+
+if __name__ == "__main__":
+    main()
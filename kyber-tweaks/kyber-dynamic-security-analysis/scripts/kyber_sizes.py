@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Analytic Kyber key and ciphertext sizes
+
+The byte sizes of params.h as functions of (k, du, dv, n, q):
+
+    polynomial      n · ⌈log2 q⌉ / 8                    (KYBER_POLYBYTES)
+    public key      k · polynomial + 32                 (KYBER_PUBLICKEYBYTES)
+    secret key      k · polynomial + public key + 2·32  (KYBER_SECRETKEYBYTES)
+    ciphertext      k · n · du / 8 + n · dv / 8          (KYBER_CIPHERTEXTBYTES)
+
+sizes() broadcasts over numpy arrays, so a whole (k, du, dv) grid is one
+call. check_headers() evaluates the same macros of the C headers with the
+preprocessor and compares them with the formulas; du and dv come from
+KYBER_DU/KYBER_DV where the header defines them (the declared intent),
+else from the compressed byte sizes.
+
+Usage:
+    python3 kyber_sizes.py --k 2 3 4 --du 10 11 --dv 3 4
+    python3 kyber_sizes.py --check                      # all ../../kyber/ref/configs/params_*.h
+    python3 kyber_sizes.py --header params_test2_du11_dv3.h [--k 2]
+"""
+
+import argparse
+import math
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+
+CONFIGS_DIR = Path(__file__).resolve().parents[2] / "kyber" / "ref" / "configs"
+
+N = 256
+Q = 3329
+SYMBYTES = 32
+
+
+def poly_bytes(n=N, q=Q):
+    return n * math.ceil(math.log2(q)) // 8
+
+
+def sizes(k, du, dv, n=N, q=Q):
+    """{"pk", "sk", "ct"} in bytes, broadcast over array arguments"""
+    k, du, dv = np.broadcast_arrays(np.asarray(k), np.asarray(du), np.asarray(dv))
+    pk = k * poly_bytes(n, q) + SYMBYTES
+    return {
+        "pk": pk,
+        "sk": k * poly_bytes(n, q) + pk + 2 * SYMBYTES,
+        "ct": (k * n * du + n * dv) // 8,
+    }
+
+
+def dims(k, du, dv, n=N, q=Q):
+    """"(pk, ct)" as printed in the security tables"""
+    s = sizes(k, du, dv, n, q)
+    return f"({int(s['pk'])}, {int(s['ct'])})"
+
+
+def header_sizes(config_file, k=None):
+    """
+    Parameters and CRYPTO_* sizes of a params_*.h, evaluated by the C
+    preprocessor for KYBER_K=k (the header's default if k is None)
+    """
+    probe = (f'#include "{config_file}"\n'
+             "k = KYBER_K\n"
+             "n = KYBER_N\n"
+             "q = KYBER_Q\n"
+             "du = KYBER_POLYVECCOMPRESSEDBYTES*8/(KYBER_K*KYBER_N)\n"
+             "dv = KYBER_POLYCOMPRESSEDBYTES*8/KYBER_N\n"
+             "#ifdef KYBER_DU\n"
+             "declared_du = KYBER_DU\n"
+             "declared_dv = KYBER_DV\n"
+             "#endif\n"
+             "pk = KYBER_PUBLICKEYBYTES\n"
+             "sk = KYBER_SECRETKEYBYTES\n"
+             "ct = KYBER_CIPHERTEXTBYTES\n")
+    command = ["gcc", "-E", "-P", "-x", "c", "-"]
+    if k is not None:
+        command.insert(3, f"-DKYBER_K={k}")
+    output = subprocess.run(command, input=probe, capture_output=True, text=True, check=True).stdout
+    values = {}
+    for line in output.splitlines():
+        name, sep, expr = line.partition("=")
+        if not sep:
+            continue
+        if not re.fullmatch(r"[\d\s()*/+-]+", expr):
+            raise ValueError(f"{config_file}: cannot evaluate {name.strip()} = {expr}")
+        values[name.strip()] = eval(expr.replace("/", "//"))
+    values["implied_du"], values["implied_dv"] = values["du"], values["dv"]
+    values["du"] = values.pop("declared_du", values["du"])
+    values["dv"] = values.pop("declared_dv", values["dv"])
+    return values
+
+
+def check_headers(config_files, ks=(2, 3, 4)):
+    """One row per header and k: the header's sizes next to the formulas'"""
+    rows = []
+    for config_file in config_files:
+        for k in ks:
+            header = header_sizes(config_file, k)
+            expected = sizes(k, header["du"], header["dv"], header["n"], header["q"])
+            rows.append({
+                "config": Path(config_file).name,
+                "k": k,
+                "du": header["du"],
+                "dv": header["dv"],
+                "implied": (header["implied_du"], header["implied_dv"]),
+                "header": {key: header[key] for key in ("pk", "sk", "ct")},
+                "expected": {key: int(value) for key, value in expected.items()},
+            })
+    return rows
+
+
+def print_check(rows):
+    print(f"{'Config':<34} {'k':>2} {'du':>3} {'dv':>3} {'pk':>11} {'sk':>11} {'ct':>11}")
+    print("-" * 80)
+    mismatches = 0
+    for row in rows:
+        cells = []
+        for key in ("pk", "sk", "ct"):
+            got, want = row["header"][key], row["expected"][key]
+            cells.append(f"{got:>11}" if got == want else f"{got:>5}!={want:<5}")
+        ok = row["header"] == row["expected"]
+        mismatches += not ok
+        note = "" if ok else "  MISMATCH"
+        if row["implied"] != (row["du"], row["dv"]):
+            note += f" (compressed bytes imply du={row['implied'][0]}, dv={row['implied'][1]})"
+        print(f"{row['config']:<34} {row['k']:>2} {row['du']:>3} {row['dv']:>3} {' '.join(cells)}{note}")
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analytic Kyber key and ciphertext sizes")
+    parser.add_argument("--k", type=int, nargs="+", default=[2, 3, 4])
+    parser.add_argument("--du", type=int, nargs="+", default=[10])
+    parser.add_argument("--dv", type=int, nargs="+", default=[4])
+    parser.add_argument("--check", nargs="*", metavar="CONFIG",
+                        help="Cross-check params_*.h headers against the formulas (default: all configs)")
+    parser.add_argument("--header", metavar="CONFIG",
+                        help="Print 'du dv pk sk ct' expected for one header, for shell scripts")
+
+    args = parser.parse_args()
+
+    if args.header:
+        header = header_sizes(args.header, args.k[0] if len(args.k) == 1 else None)
+        expected = sizes(header["k"], header["du"], header["dv"], header["n"], header["q"])
+        print(header["du"], header["dv"], *(int(expected[key]) for key in ("pk", "sk", "ct")))
+        return
+
+    if args.check is not None:
+        config_files = args.check or sorted(CONFIGS_DIR.glob("params_*.h"))
+        mismatches = print_check(check_headers(config_files, args.k))
+        if mismatches:
+            print(f"\n{mismatches} header(s) disagree with the size formulas")
+            sys.exit(1)
+        print("\nAll headers match the size formulas")
+        return
+
+    k, du, dv = np.meshgrid(args.k, args.du, args.dv, indexing="ij")
+    grid = sizes(k, du, dv)
+    print(f"{'k':>2} {'du':>3} {'dv':>3} {'pk':>6} {'sk':>6} {'ct':>6}")
+    for index in np.ndindex(k.shape):
+        print(f"{k[index]:>2} {du[index]:>3} {dv[index]:>3} "
+              f"{grid['pk'][index]:>6} {grid['sk'][index]:>6} {grid['ct'][index]:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Multi-objective Kyber parameter search with Pareto frontier output
+
+Enumerates the discrete space of (k, η1, η2, du, dv) and evaluates every
+candidate on four objectives:
+
+    security    min(primal, dual) classical bits from the lattice estimator
+                (kyber_estimator.sage through DynamicKyberAnalyzer)
+    δ           analytic decryption failure probability (kyber_failure.py)
+    bytes       public key + ciphertext, from the params.h size formulas
+                (kyber_sizes.py)
+    cycles      keypair + encaps + decaps: the measured median where the
+                configuration was benchmarked, else the prediction of
+                benchmarks/cycle_model.py; left out of the dominance test
+                when some candidate has neither (no fitted model)
+
+Objectives are evaluated cheapest first and candidates that violate a
+constraint (--max-bytes, --min-security, --max-cycles, --max-log-delta)
+are dropped as soon as the objective is known, so the expensive steps only
+see survivors. With --prune, candidates dominated in the objectives known
+before δ (security, bytes and cycles) are dropped before δ is computed;
+this is faster but can lose frontier points that only win on δ (e.g. a
+larger dv), so it is off by default. The estimator's LWE instance depends on (k, η1, η2) only,
+so security is computed once per such group (in parallel sage processes);
+δ shares its k·n-fold convolution per (k, η1, η2, du) across worker
+processes. Both are kept in the security service's table
+(security_service.py, results/security.sqlite). The default space is what the C reference code
+implements (cbd.c, poly.c, polyvec.c); wider ranges can be given on the
+command line.
+
+Usage (from scripts/, like dynamic_analyzer.py):
+    python3 parameter_optimizer.py
+    python3 parameter_optimizer.py --k 2 --min-security 118 --max-log-delta -128
+    python3 parameter_optimizer.py --eta1 1 2 3 4 5 6 --du 8 9 10 11 12 --dv 2 3 4 5 6 7
+"""
+
+import argparse
+import itertools
+import json
+import os
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+import kyber_sizes
+from security_service import SecurityService
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+RESULTS_DIR = SCRIPT_DIR.parent / "results"
+BENCHMARKS_DIR = SCRIPT_DIR.parents[1] / "benchmarks"
+
+N = 256
+Q = 3329
+
+# The parameters the C reference implementation supports
+DEFAULT_SPACE = {
+    "k": [2, 3, 4],
+    "eta1": [2, 3, 4, 5],
+    "eta2": [2, 3, 4],
+    "du": [9, 10, 11, 12],
+    "dv": [3, 4, 5, 6],
+}
+
+CYCLE_OPS = ["kyber_keypair", "kyber_encaps", "kyber_decaps"]
+
+# (name, sign): objectives are minimized after multiplying by sign
+OBJECTIVES = [("security", -1), ("log2_delta", 1), ("bytes", 1), ("cycles", 1)]
+
+
+def enumerate_candidates(space):
+    keys = list(DEFAULT_SPACE)
+    return [dict(zip(keys, values)) for values in itertools.product(*(space[key] for key in keys))]
+
+
+def security_bits(result):
+    bits = [result[a]["classical"] for a in ("primal", "dual") if result and result.get(a)]
+    return min(bits) if bits else None
+
+
+def evaluate_security(candidates, service, jobs):
+    """Fill in "security" per candidate; estimator runs only for uncached (k, η1, η2) groups"""
+    groups = sorted({(c["k"], c["eta1"], c["eta2"]) for c in candidates})
+    service.ensure_security({(N, *g, Q) for g in groups}, jobs=jobs)
+    for c in candidates:
+        c["security"] = security_bits(service.security(c["k"], c["eta1"], c["eta2"], N, Q))
+
+
+def load_cycle_model(path):
+    sys.path.insert(0, str(BENCHMARKS_DIR))
+    import cycle_model
+
+    if path is None:
+        models = sorted((BENCHMARKS_DIR / "results").glob("model_*/cycle_model.json"))
+        if not models:
+            return cycle_model, None
+        path = models[-1]
+    print(f"  Cycle model: {path}")
+    return cycle_model, cycle_model.load_model(path)
+
+
+def evaluate_cycles(candidates, cycle_model, data):
+    """Fill in "cycles", "cycles_std" and "cycles_source" (vectorized per variant)"""
+    for k in sorted({c["k"] for c in candidates}):
+        variant = f"kyber{k * 256}"
+        group = [c for c in candidates if c["k"] == k]
+        models = data["models"].get(variant, {}) if data else {}
+        if not all(op in models for op in CYCLE_OPS):
+            for c in group:
+                c["cycles"], c["cycles_std"], c["cycles_source"] = None, None, None
+            continue
+        features = {f: np.array([c[f] for c in group]) for f in cycle_model.FEATURES}
+        total, var = np.zeros(len(group)), np.zeros(len(group))
+        measured_total = {}
+        for op in CYCLE_OPS:
+            mean, std = cycle_model.predict_many(data["models"], variant, op,
+                                                 *(features[f] for f in cycle_model.FEATURES))
+            total += mean
+            var += std ** 2
+            for *config, cycles in models[op]["measured"]:
+                measured_total.setdefault(tuple(config), []).append(cycles)
+        for c, mean, v in zip(group, total, var):
+            config = tuple(c[f] for f in cycle_model.FEATURES)
+            if len(measured_total.get(config, [])) == len(CYCLE_OPS):
+                c["cycles"], c["cycles_std"], c["cycles_source"] = sum(measured_total[config]), 0.0, "measured"
+            else:
+                c["cycles"], c["cycles_std"], c["cycles_source"] = float(mean), float(v ** 0.5), "predicted"
+
+
+def evaluate_delta(candidates, service, jobs):
+    """Fill in "log2_delta"; groups sharing (k, η1, η2, du) are computed in one worker"""
+    service.ensure_delta([(N, c["k"], c["eta1"], c["eta2"], c["du"], c["dv"], Q) for c in candidates], jobs=jobs)
+    for c in candidates:
+        c["log2_delta"] = service.log2_delta(c["k"], c["eta1"], c["eta2"], c["du"], c["dv"], N, Q)[0]
+
+
+def active_objectives(candidates, names=None):
+    """OBJECTIVES (restricted to names) known for every candidate; cycles is optional"""
+    objectives = [(name, sign) for name, sign in OBJECTIVES if names is None or name in names]
+    if any(c.get("cycles") is None for c in candidates):
+        objectives = [(name, sign) for name, sign in objectives if name != "cycles"]
+    return objectives
+
+
+def pareto_front(candidates, objectives=None):
+    """Candidates not dominated in objectives (default: all active OBJECTIVES)"""
+    if not candidates:
+        return []
+    objectives = active_objectives(candidates) if objectives is None else objectives
+    points = np.array([[sign * c[name] for name, sign in objectives] for c in candidates], dtype=float)
+    front = np.ones(len(points), dtype=bool)
+    for start in range(0, len(points), 512):
+        block = points[start:start + 512]
+        no_worse = np.all(points[None, :, :] <= block[:, None, :], axis=2)
+        better = np.any(points[None, :, :] < block[:, None, :], axis=2)
+        front[start:start + 512] = ~np.any(no_worse & better, axis=1)
+    return [c for c, keep in zip(candidates, front) if keep]
+
+
+def apply_constraint(candidates, name, predicate, label):
+    kept = [c for c in candidates if c[name] is not None and predicate(c[name])]
+    if len(kept) != len(candidates):
+        print(f"  {label}: dropped {len(candidates) - len(kept)}, {len(kept)} left")
+    return kept
+
+
+def print_frontier(front):
+    print("\n" + "=" * 120)
+    print(f"PARETO FRONTIER ({len(front)} configurations)")
+    print("=" * 120)
+    print(f"{'Variant':<10} {'η1':>3} {'η2':>3} {'du':>3} {'dv':>3} {'Security':>9} {'log2 δ':>8} "
+          f"{'pk':>6} {'ct':>6} {'Bytes':>7} {'Cycles':>12} {'±2σ':>9} {'Source':>10}")
+    print("-" * 120)
+    for c in sorted(front, key=lambda c: (c["k"], -c["security"], c["bytes"])):
+        print(f"{'Kyber' + str(c['k'] * 256):<10} {c['eta1']:>3} {c['eta2']:>3} {c['du']:>3} {c['dv']:>3} "
+              f"{c['security']:>9} {c['log2_delta']:>8.1f} {c['pk']:>6} {c['ct']:>6} {c['bytes']:>7} "
+              + (f"{c['cycles']:>12.0f} {2 * c['cycles_std']:>9.0f} {c['cycles_source']:>10}"
+                 if c["cycles"] is not None else f"{'--':>12} {'--':>9} {'--':>10}"))
+
+
+def plot_frontier(candidates, front, output_file):
+    import matplotlib.pyplot as plt
+
+    fig, axes = plt.subplots(1, 3, figsize=(18, 5))
+    pairs = [("bytes", "security"), ("cycles", "security"), ("bytes", "log2_delta")]
+    for ax, (x, y) in zip(axes, pairs):
+        evaluated = [c for c in candidates if c[x] is not None]
+        ax.scatter([c[x] for c in evaluated], [c[y] for c in evaluated], s=8, color="lightgray",
+                   label="evaluated")
+        for k in sorted({c["k"] for c in front}):
+            points = [c for c in front if c["k"] == k and c[x] is not None]
+            ax.scatter([c[x] for c in points], [c[y] for c in points], s=24, label=f"frontier Kyber{k * 256}")
+        ax.set_xlabel(x)
+        ax.set_ylabel(y)
+        ax.grid(True, alpha=0.3)
+    axes[0].legend(fontsize=8)
+    plt.tight_layout()
+    plt.savefig(output_file, dpi=150, bbox_inches="tight")
+    plt.close()
+    print(f"Saved chart to: {output_file}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-objective Kyber parameter search (Pareto frontier)")
+    for name, values in DEFAULT_SPACE.items():
+        parser.add_argument(f"--{name}", nargs="+", type=int, default=values,
+                            help=f"Values to search (default: {' '.join(map(str, values))})")
+    parser.add_argument("--min-security", type=float, help="Minimum classical bits")
+    parser.add_argument("--max-log-delta", type=float, help="Maximum log2 of the failure probability")
+    parser.add_argument("--max-bytes", type=int, help="Maximum public key + ciphertext bytes")
+    parser.add_argument("--max-cycles", type=float, help="Maximum keypair + encaps + decaps cycles")
+    parser.add_argument("--cycle-model", help="cycle_model.json (default: latest benchmarks/results/model_*)")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(), help="Parallel workers")
+    parser.add_argument("--prune", action="store_true",
+                        help="Drop candidates dominated in security, bytes and cycles before computing δ")
+    parser.add_argument("--plot", action="store_true", help="Save objective-space scatter plots")
+
+    args = parser.parse_args()
+
+    space = {name: getattr(args, name) for name in DEFAULT_SPACE}
+    candidates = enumerate_candidates(space)
+    print(f"Search space: {len(candidates)} candidates")
+
+    # Cheapest objective first: sizes
+    grid = kyber_sizes.sizes(*(np.array([c[key] for c in candidates]) for key in ("k", "du", "dv")), N, Q)
+    for c, pk, ct in zip(candidates, grid["pk"].tolist(), grid["ct"].tolist()):
+        c["pk"], c["ct"], c["bytes"] = pk, ct, pk + ct
+    if args.max_bytes is not None:
+        candidates = apply_constraint(candidates, "bytes", lambda v: v <= args.max_bytes, "max bytes")
+
+    print("Security (lattice estimator):")
+    service = SecurityService()
+    evaluate_security(candidates, service, args.jobs)
+    candidates = apply_constraint(candidates, "security",
+                                  lambda v: args.min_security is None or v >= args.min_security,
+                                  "security")
+
+    print("Cycles:")
+    cycle_model, model_data = load_cycle_model(args.cycle_model)
+    evaluate_cycles(candidates, cycle_model, model_data)
+    if args.max_cycles is not None:
+        candidates = apply_constraint(candidates, "cycles", lambda v: v <= args.max_cycles,
+                                      "max cycles (no model for the variant, or too slow)")
+    elif any(c["cycles"] is None for c in candidates):
+        print("  No cycle model for some variants: cycles left out of the frontier")
+
+    if args.prune:
+        objectives = active_objectives(candidates, ("security", "bytes", "cycles"))
+        kept = pareto_front(candidates, objectives)
+        print(f"  Pruned {len(candidates) - len(kept)} dominated in "
+              f"{', '.join(name for name, _ in objectives)}, {len(kept)} left")
+        candidates = kept
+
+    print("Failure probability:")
+    evaluate_delta(candidates, service, args.jobs)
+    service.close()
+    if args.max_log_delta is not None:
+        candidates = apply_constraint(candidates, "log2_delta", lambda v: v <= args.max_log_delta, "max δ")
+
+    front = pareto_front(candidates)
+    print_frontier(front)
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    out_dir = RESULTS_DIR / f"optimizer_{timestamp}"
+    out_dir.mkdir(parents=True, exist_ok=True)
+    with open(out_dir / "pareto_frontier.json", "w") as f:
+        json.dump({"timestamp": timestamp, "space": space,
+                   "constraints": {"min_security": args.min_security, "max_log_delta": args.max_log_delta,
+                                   "max_bytes": args.max_bytes, "max_cycles": args.max_cycles},
+                   "objectives": [name for name, _ in active_objectives(candidates)],
+                   "frontier": front, "evaluated": candidates}, f, indent=2)
+    if args.plot:
+        plot_frontier(candidates, front, out_dir / "pareto_frontier.png")
+    print(f"\nJSON data saved to: {out_dir / 'pareto_frontier.json'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Cached security lookups for Kyber parameter sets
+
+Answers "how secure is (k, η1, η2, du, dv)" from an on-disk SQLite table
+(results/security.sqlite) and computes what is missing:
+
+    attacks     primal/dual estimates per LWE instance (n, k, η1, η2, q),
+                from the lattice estimator (kyber_estimator.sage through
+                DynamicKyberAnalyzer); du and dv do not enter the instance
+    failure     log2 δ per (n, k, η1, η2, du, dv, q), from kyber_failure.py
+
+Both tables are keyed (WITHOUT ROWID, so the primary key is the index) by
+the parameters and a source: "estimator" and "analytic" for computed rows,
+other names for imported ones (Kyber.py seeds its thesis values as
+"thesis"). Readers pass the sources they accept in order of preference.
+
+Batch lookups group the misses: one estimator run per LWE instance
+(concurrent requests to the estimator daemon, see estimator_client.py) and
+one worker process per (k, η1, η2, du), which shares the expensive
+inner-product law across dv.
+
+Usage (from scripts/, like dynamic_analyzer.py):
+    python3 security_service.py query --k 2 --eta1 3 --eta2 2 --du 10 --dv 4
+    python3 security_service.py import ../results/complete_results.json
+    python3 security_service.py stats
+"""
+
+import argparse
+import json
+import sqlite3
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+
+import kyber_failure
+from estimator_client import EstimatorClient, EstimatorError
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+DEFAULT_DB = SCRIPT_DIR.parent / "results" / "security.sqlite"
+
+N = 256
+Q = 3329
+
+ATTACKS = ["primal", "dual"]
+ATTACK_FIELDS = ["d", "beta", "m", "rop", "classical", "quantum"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS attacks (
+    n INTEGER, k INTEGER, eta1 INTEGER, eta2 INTEGER, q INTEGER, source TEXT, attack TEXT,
+    d INTEGER, beta INTEGER, m INTEGER, rop REAL, classical INTEGER, quantum INTEGER,
+    PRIMARY KEY (n, k, eta1, eta2, q, source, attack)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS failure (
+    n INTEGER, k INTEGER, eta1 INTEGER, eta2 INTEGER, du INTEGER, dv INTEGER, q INTEGER, source TEXT,
+    log2_delta REAL,
+    PRIMARY KEY (n, k, eta1, eta2, du, dv, q, source)
+) WITHOUT ROWID;
+"""
+
+
+def run_estimator(n, k, eta1, eta2, q):
+    """One estimator run for the LWE instance; du/dv are required by the bridge but unused"""
+    from dynamic_analyzer import DynamicKyberAnalyzer
+
+    params = {"n": n, "k": k, "eta1": eta1, "eta2": eta2, "q": q, "du": 10, "dv": 4}
+    return DynamicKyberAnalyzer().run_sage_estimator(params)
+
+
+def delta_group(args):
+    """log2 δ for every dv of one (n, k, η1, η2, du, q) group, sharing the inner-product law"""
+    n, k, eta1, eta2, du, q, dvs = args
+    return {dv: kyber_failure.log2_failure_probability(k, eta1, eta2, du, dv, n, q) for dv in dvs}
+
+
+class SecurityService:
+    def __init__(self, path=DEFAULT_DB):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(self.path)
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # Storage
+
+    def store_security(self, instance, result, source="estimator"):
+        """result: {"primal": {d, beta, m, rop, classical, quantum} or None, "dual": ...}"""
+        with self.db:
+            for attack in ATTACKS:
+                if result.get(attack):
+                    values = [result[attack].get(f) for f in ATTACK_FIELDS]
+                    self.db.execute(f"INSERT OR REPLACE INTO attacks VALUES ({', '.join('?' * 13)})",
+                                    (*instance, source, attack, *values))
+
+    def store_delta(self, config, log2_delta, source="analytic"):
+        with self.db:
+            self.db.execute("INSERT OR REPLACE INTO failure VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                            (*config, source, log2_delta))
+
+    # Lookups (no computation)
+
+    def security(self, k, eta1, eta2, n=N, q=Q, sources=("estimator",)):
+        """
+        {"primal", "dual", "source"} from the first source that has every
+        attack of the instance (a timed-out attack leaves it incomplete), else None
+        """
+        for source in sources:
+            rows = self.db.execute(
+                f"SELECT attack, {', '.join(ATTACK_FIELDS)} FROM attacks "
+                "WHERE n = ? AND k = ? AND eta1 = ? AND eta2 = ? AND q = ? AND source = ?",
+                (n, k, eta1, eta2, q, source)).fetchall()
+            if len(rows) == len(ATTACKS):
+                result = {attack: None for attack in ATTACKS}
+                for attack, *values in rows:
+                    result[attack] = dict(zip(ATTACK_FIELDS, values))
+                result["source"] = source
+                return result
+        return None
+
+    def log2_delta(self, k, eta1, eta2, du, dv, n=N, q=Q, sources=("analytic",)):
+        """(log2 δ, source) from the first source that has the configuration, else (None, None)"""
+        for source in sources:
+            row = self.db.execute(
+                "SELECT log2_delta FROM failure WHERE n = ? AND k = ? AND eta1 = ? AND eta2 = ? "
+                "AND du = ? AND dv = ? AND q = ? AND source = ?",
+                (n, k, eta1, eta2, du, dv, q, source)).fetchone()
+            if row:
+                return row[0], source
+        return None, None
+
+    # Computation of misses
+
+    def ensure_security(self, instances, sources=("estimator",), jobs=None):
+        """Run the estimator for the (n, k, η1, η2, q) instances no accepted source covers"""
+        missing = sorted({i for i in instances if self.security(*i[1:4], i[0], i[4], sources) is None})
+        if not missing:
+            return 0
+        client = EstimatorClient()
+        if not client.available():
+            print(f"  No estimator daemon and SageMath not found: {len(missing)} uncached LWE instances are skipped",
+                  file=sys.stderr)
+            return 0
+        # Started once here, not by each of the concurrent requests below
+        try:
+            client.start()
+        except EstimatorError as e:
+            print(f"  {e}: {len(missing)} uncached LWE instances are skipped", file=sys.stderr)
+            return 0
+        print(f"  Running the estimator for {len(missing)} LWE instances...")
+        computed = 0
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            for instance, result in zip(missing, pool.map(lambda i: run_estimator(*i), missing)):
+                if result:
+                    # Partial results (an attack timed out or failed) are kept but
+                    # do not count as cached, the instance is estimated again next time
+                    self.store_security(instance, result)
+                    failed = {a: status for a, status in result.get("status", {}).items() if status != "ok"}
+                    if failed:
+                        n, k, eta1, eta2, q = instance
+                        print(f"  Incomplete estimate for k={k}, η1={eta1}, η2={eta2}: "
+                              + ", ".join(f"{a} {status}" for a, status in failed.items()), file=sys.stderr)
+                    else:
+                        computed += 1
+                else:
+                    n, k, eta1, eta2, q = instance
+                    print(f"  Estimator failed for k={k}, η1={eta1}, η2={eta2}", file=sys.stderr)
+        return computed
+
+    def ensure_delta(self, configs, sources=("analytic",), jobs=None):
+        """Compute log2 δ for the (n, k, η1, η2, du, dv, q) configurations no accepted source covers"""
+        groups = {}
+        for n, k, eta1, eta2, du, dv, q in configs:
+            if self.log2_delta(k, eta1, eta2, du, dv, n, q, sources)[0] is None:
+                groups.setdefault((n, k, eta1, eta2, du, q), set()).add(dv)
+        if not groups:
+            return 0
+        print(f"  Computing δ for {sum(len(v) for v in groups.values())} configurations "
+              f"in {len(groups)} groups...")
+        tasks = [(*g, sorted(dvs)) for g, dvs in sorted(groups.items())]
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            for (n, k, eta1, eta2, du, q, _), result in zip(tasks, pool.map(delta_group, tasks)):
+                for dv, log_delta in result.items():
+                    self.store_delta((n, k, eta1, eta2, du, dv, q), log_delta)
+        return sum(len(v) for v in groups.values())
+
+    def lookup_many(self, queries, security_sources=("estimator",), delta_sources=("analytic",), jobs=None):
+        """
+        One result per query dict (k, eta1, eta2, du, dv[, n, q]):
+        {"primal", "dual", "security_source", "log2_delta", "delta_source"};
+        primal/dual are None if no source has them and the estimator cannot run
+        """
+        configs = [(q.get("n", N), q["k"], q["eta1"], q["eta2"], q["du"], q["dv"], q.get("q", Q))
+                   for q in queries]
+        self.ensure_security({(n, k, eta1, eta2, q) for n, k, eta1, eta2, _, _, q in configs},
+                             security_sources, jobs)
+        self.ensure_delta(configs, delta_sources, jobs)
+        results = []
+        for n, k, eta1, eta2, du, dv, q in configs:
+            security = self.security(k, eta1, eta2, n, q, security_sources) or {}
+            log_delta, delta_source = self.log2_delta(k, eta1, eta2, du, dv, n, q, delta_sources)
+            results.append({
+                "primal": security.get("primal"),
+                "dual": security.get("dual"),
+                "security_source": security.get("source"),
+                "log2_delta": log_delta,
+                "delta_source": delta_source,
+            })
+        return results
+
+    def lookup(self, k, eta1, eta2, du, dv, n=N, q=Q, **kwargs):
+        return self.lookup_many([{"n": n, "k": k, "eta1": eta1, "eta2": eta2, "du": du, "dv": dv, "q": q}],
+                                **kwargs)[0]
+
+    # Maintenance
+
+    def import_results(self, path, source="estimator"):
+        """Estimator results saved by dynamic_analyzer.py (complete_results.json)"""
+        with open(path) as f:
+            data = json.load(f)
+        imported = set()
+        for results in data.values():
+            for result in results:
+                p = result["params"]
+                instance = (p["n"], p["k"], p["eta1"], p["eta2"], p["q"])
+                if instance not in imported:
+                    self.store_security(instance, result, source)
+                    imported.add(instance)
+        return len(imported)
+
+    def stats(self):
+        return {
+            "attacks": self.db.execute("SELECT source, COUNT(*) FROM (SELECT DISTINCT n, k, eta1, eta2, q, "
+                                       "source FROM attacks) GROUP BY source").fetchall(),
+            "failure": self.db.execute("SELECT source, COUNT(*) FROM failure GROUP BY source").fetchall(),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cached Kyber security lookups")
+    parser.add_argument("--db", default=str(DEFAULT_DB), help="SQLite table (default: ../results/security.sqlite)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    query = sub.add_parser("query", help="Look up (and compute if missing) one configuration")
+    for name in ["k", "eta1", "eta2", "du", "dv"]:
+        query.add_argument(f"--{name}", type=int, required=True)
+    query.add_argument("--n", type=int, default=N)
+    query.add_argument("--q", type=int, default=Q)
+
+    importer = sub.add_parser("import", help="Import dynamic_analyzer.py results")
+    importer.add_argument("results", help="complete_results.json")
+
+    sub.add_parser("stats", help="Rows per table and source")
+
+    args = parser.parse_args()
+
+    with SecurityService(args.db) as service:
+        if args.command == "query":
+            print(json.dumps(service.lookup(args.k, args.eta1, args.eta2, args.du, args.dv, args.n, args.q),
+                             indent=2))
+        elif args.command == "import":
+            print(f"Imported {service.import_results(args.results)} LWE instances into {service.path}")
+        else:
+            stats = service.stats()
+            print(f"{service.path}")
+            for source, count in stats["attacks"]:
+                print(f"  attacks  {source:<10} {count:>6} LWE instances")
+            for source, count in stats["failure"]:
+                print(f"  failure  {source:<10} {count:>6} configurations")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,81 +4,95 @@ Kyber.py - Individual parameter testing script for Kyber security analysis
 This script outputs security analysis for specific parameter sets
 """
 
+import json
+import os
 import sys
 import argparse
 from tabulate import tabulate
 
-# Security estimates based on thesis tables (hardcoded data)
-security_data = {
-    # (du, dv) variations for Kyber512
-    "512_10_4": {
-        "d": "2^-161 (800, 768)",
-        "primal": {"d": 999, "b": 406, "m": 486, "classical": 118, "quantum": 107},
-        "dual": {"d": 1024, "b": 403, "m": 512, "classical": 117, "quantum": 106}
-    },
-    "512_11_3": {
-        "d": "2^-148 (800, 800)", 
-        "primal": {"d": 999, "b": 406, "m": 486, "classical": 118, "quantum": 107},
-        "dual": {"d": 1024, "b": 403, "m": 512, "classical": 117, "quantum": 106}
-    },
-    "512_9_5": {
-        "d": "2^-98 (800, 736)",
-        "primal": {"d": 999, "b": 406, "m": 486, "classical": 118, "quantum": 107},
-        "dual": {"d": 1024, "b": 403, "m": 512, "classical": 117, "quantum": 106}
-    },
-    
-    # (du, dv) variations for Kyber768
-    "768_10_4": {
-        "d": "2^-165 (1184, 1088)",
-        "primal": {"d": 1419, "b": 626, "m": 650, "classical": 183, "quantum": 166},
-        "dual": {"d": 1418, "b": 620, "m": 650, "classical": 181, "quantum": 164}
-    },
-    "768_11_3": {
-        "d": "2^-151 (1184, 1152)",
-        "primal": {"d": 1419, "b": 626, "m": 650, "classical": 183, "quantum": 166},
-        "dual": {"d": 1418, "b": 620, "m": 650, "classical": 181, "quantum": 164}
-    },
-    "768_9_5": {
-        "d": "2^-99 (1184, 1024)",
-        "primal": {"d": 1419, "b": 626, "m": 650, "classical": 183, "quantum": 166},
-        "dual": {"d": 1418, "b": 620, "m": 650, "classical": 181, "quantum": 164}
-    },
-    
-    # (du, dv) variations for Kyber1024
-    "1024_11_5": {
-        "d": "2^-175 (1568, 1568)",
-        "primal": {"d": 1885, "b": 878, "m": 860, "classical": 256, "quantum": 232},
-        "dual": {"d": 1862, "b": 868, "m": 838, "classical": 253, "quantum": 230}
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                "..", "..", "kyber-dynamic-security-analysis", "scripts"))
+import kyber_sizes
+from security_service import SecurityService
+
+PARAM_SET_K = {512: 2, 768: 3, 1024: 4}
+STANDARD_ETA = {512: (3, 2), 768: (2, 2), 1024: (2, 2)}
+# (du, dv) of the standard parameter sets, used for the eta variations
+STANDARD_COMPRESSION = {512: (10, 4), 768: (10, 4), 1024: (11, 5)}
+
+# Security estimates based on thesis tables, seeded into the security
+# service as source "thesis"; other configurations are computed on demand
+THESIS_SECURITY = {
+    # (k, eta1, eta2): estimates (du, dv do not change the LWE instance)
+    (2, 3, 2): {
+        "primal": {"d": 999, "beta": 406, "m": 486, "classical": 118, "quantum": 107},
+        "dual": {"d": 1024, "beta": 403, "m": 512, "classical": 117, "quantum": 106}
     },
-    "1024_12_4": {
-        "d": "2^-183 (1568, 1664)",
-        "primal": {"d": 1885, "b": 878, "m": 860, "classical": 256, "quantum": 232},
-        "dual": {"d": 1862, "b": 868, "m": 838, "classical": 253, "quantum": 230}
+    (3, 2, 2): {
+        "primal": {"d": 1419, "beta": 626, "m": 650, "classical": 183, "quantum": 166},
+        "dual": {"d": 1418, "beta": 620, "m": 650, "classical": 181, "quantum": 164}
     },
-    "1024_10_6": {
-        "d": "2^-151 (1568, 1472)",
-        "primal": {"d": 1885, "b": 878, "m": 860, "classical": 256, "quantum": 232},
-        "dual": {"d": 1862, "b": 868, "m": 838, "classical": 253, "quantum": 230}
+    (4, 2, 2): {
+        "primal": {"d": 1885, "beta": 878, "m": 860, "classical": 256, "quantum": 232},
+        "dual": {"d": 1862, "beta": 868, "m": 838, "classical": 253, "quantum": 230}
     },
     
     # Eta variations
-    "512_eta_5_3": {
-        "d": "2^-85 (800, 768)",
-        "primal": {"d": 1027, "b": 439, "m": 514, "classical": 128, "quantum": 116},
-        "dual": {"d": 1027, "b": 515, "m": 436, "classical": 127, "quantum": 115}
+    (2, 5, 3): {
+        "primal": {"d": 1027, "beta": 439, "m": 514, "classical": 128, "quantum": 116},
+        "dual": {"d": 1027, "beta": 515, "m": 436, "classical": 127, "quantum": 115}
     },
-    "768_eta_4_4": {
-        "d": "2^-50 (1184, 1088)",
-        "primal": {"d": 1489, "b": 688, "m": 720, "classical": 201, "quantum": 182},
-        "dual": {"d": 1487, "b": 719, "m": 683, "classical": 199, "quantum": 181}
+    (3, 4, 4): {
+        "primal": {"d": 1489, "beta": 688, "m": 720, "classical": 201, "quantum": 182},
+        "dual": {"d": 1487, "beta": 719, "m": 683, "classical": 199, "quantum": 181}
     },
-    "1024_eta_4_4": {
-        "d": "2^-47 (1568, 1568)",
-        "primal": {"d": 1936, "b": 961, "m": 911, "classical": 281, "quantum": 254},
-        "dual": {"d": 1930, "b": 953, "m": 906, "classical": 278, "quantum": 252}
+    (4, 4, 4): {
+        "primal": {"d": 1936, "beta": 961, "m": 911, "classical": 281, "quantum": 254},
+        "dual": {"d": 1930, "beta": 953, "m": 906, "classical": 278, "quantum": 252}
     }
 }
 
+# (k, eta1, eta2, du, dv): log2 of the failure probability
+THESIS_DELTA = {
+    (2, 3, 2, 10, 4): -161, (2, 3, 2, 11, 3): -148, (2, 3, 2, 9, 5): -98,
+    (3, 2, 2, 10, 4): -165, (3, 2, 2, 11, 3): -151, (3, 2, 2, 9, 5): -99,
+    (4, 2, 2, 11, 5): -175, (4, 2, 2, 12, 4): -183, (4, 2, 2, 10, 6): -151,
+    (2, 5, 3, 10, 4): -85, (3, 4, 4, 10, 4): -50, (4, 4, 4, 11, 5): -47
+}
+
+# Thesis values first, then computed ones
+SECURITY_SOURCES = ("thesis", "estimator")
+DELTA_SOURCES = ("thesis", "analytic")
+
+def open_service():
+    """The shared security service, with the thesis values seeded where they are missing"""
+    service = SecurityService()
+    # Only missing rows are written, so queries answered from the table stay read-only
+    for (k, eta1, eta2), result in THESIS_SECURITY.items():
+        if service.security(k, eta1, eta2, sources=("thesis",)) is None:
+            service.store_security((256, k, eta1, eta2, 3329), result, source="thesis")
+    for (k, eta1, eta2, du, dv), log2_delta in THESIS_DELTA.items():
+        if service.log2_delta(k, eta1, eta2, du, dv, sources=("thesis",))[0] is None:
+            service.store_delta((256, k, eta1, eta2, du, dv, 3329), log2_delta, source="thesis")
+    return service
+
+def make_query(param_set, du=None, dv=None, eta1=None, eta2=None):
+    """Full (k, eta1, eta2, du, dv) of a query; unspecified values are the standard ones"""
+    query = {"param_set": param_set, "k": PARAM_SET_K[param_set], "eta_variation": eta1 is not None}
+    query["eta1"], query["eta2"] = (eta1, eta2) if eta1 is not None else STANDARD_ETA[param_set]
+    query["du"], query["dv"] = (du, dv) if du is not None else STANDARD_COMPRESSION[param_set]
+    return query
+
+def lookup(queries, jobs=None):
+    """Security data for many queries in one pass (misses computed together)"""
+    with open_service() as service:
+        results = service.lookup_many(queries, SECURITY_SOURCES, DELTA_SOURCES, jobs)
+    return [
+        {"delta": f"2^{round(r['log2_delta'])}", "primal": r["primal"], "dual": r["dual"]}
+        if r["primal"] and r["dual"] else None
+        for r in results
+    ]
+
 def print_parameter_set(param_set, du=None, dv=None):
     """Print the parameter set configuration"""
     if param_set == 512:
@@ -113,14 +127,14 @@ def print_table_format(param_set, du, dv, data):
     
     headers = ["", "Attack Type", "d", "b", "m", "Core-SVP\n(classical)", "Core-SVP\n(quantum)", "δ", "C"]
     
-    d_val = data['d']
+    d_val = f"{data['delta']} {kyber_sizes.dims(PARAM_SET_K[param_set], du, dv)}"
     primal = data['primal']
     dual = data['dual']
     
     table_data = [
-        [f"(du = {du}, dv = {dv}) {d_val}", "Primal Attack", primal['d'], primal['b'], 
+        [f"(du = {du}, dv = {dv}) {d_val}", "Primal Attack", primal['d'], primal['beta'], 
          primal['m'], primal['classical'], primal['quantum'], "", ""],
-        ["", "Dual Attack", dual['d'], dual['b'], 
+        ["", "Dual Attack", dual['d'], dual['beta'], 
          dual['m'], dual['classical'], dual['quantum'], "", ""]
     ]
     
@@ -133,19 +147,50 @@ def print_eta_format(param_set, eta1, eta2, data):
     
     headers = ["", "Attack Type", "d", "b", "m", "Core-SVP\n(classical)", "Core-SVP\n(quantum)", "δ", "C"]
     
-    d_val = data['d']
+    d_val = f"{data['delta']} {kyber_sizes.dims(PARAM_SET_K[param_set], *STANDARD_COMPRESSION[param_set])}"
     primal = data['primal']
     dual = data['dual']
     
     table_data = [
-        [f"(η1 = {eta1}, η2 = {eta2}) {d_val}", "Primal Attack", primal['d'], primal['b'], 
+        [f"(η1 = {eta1}, η2 = {eta2}) {d_val}", "Primal Attack", primal['d'], primal['beta'], 
          primal['m'], primal['classical'], primal['quantum'], "", ""],
-        ["", "Dual Attack", dual['d'], dual['b'], 
+        ["", "Dual Attack", dual['d'], dual['beta'], 
          dual['m'], dual['classical'], dual['quantum'], "", ""]
     ]
     
     print(tabulate(table_data, headers=headers, tablefmt="grid"))
 
+def report(query, data):
+    """Print parameter set, table and summary of one query"""
+    param_set = query["param_set"]
+    
+    if query["eta_variation"]:
+        print_parameter_set(param_set)
+        print_eta_format(param_set, query["eta1"], query["eta2"], data)
+    else:
+        print_parameter_set(param_set, query["du"], query["dv"])
+        print_table_format(param_set, query["du"], query["dv"], data)
+    
+    # Print summary
+    print(f"\nSummary:")
+    print(f"  Parameter Set: Kyber{param_set}")
+    if query["eta_variation"]:
+        print(f"  Configuration: η1={query['eta1']}, η2={query['eta2']}")
+    else:
+        print(f"  Configuration: du={query['du']}, dv={query['dv']}")
+    print(f"  Classical Security (Primal): {data['primal']['classical']} bits")
+    print(f"  Quantum Security (Primal): {data['primal']['quantum']} bits")
+
+def report_missing(query):
+    print(f"Error: No security data available for the specified parameters")
+    print(f"Kyber{query['param_set']} (η1={query['eta1']}, η2={query['eta2']}, du={query['du']}, "
+          f"dv={query['dv']}) is not cached and the estimator could not compute it (is SageMath installed?)")
+
+def read_batch(path):
+    """Queries from JSON lines like {"param_set": 512, "du": 11, "dv": 3} or {..., "eta1": 5, "eta2": 3}"""
+    with (sys.stdin if path == "-" else open(path)) as f:
+        return [make_query(**json.loads(line)) for line in f if line.strip()]
+
 def main():
     parser = argparse.ArgumentParser(
         description='Kyber Security Analysis - Individual Parameter Testing',
@@ -160,18 +205,38 @@ Examples:
   # Test eta variations:
   python3 Kyber.py --param-set 512 --eta1 5 --eta2 3
   python3 Kyber.py --param-set 768 --eta1 4 --eta2 4
+  
+  # Many configurations in one process (JSON lines):
+  python3 Kyber.py --batch queries.jsonl
         """
     )
     
-    parser.add_argument('--param-set', type=int, choices=[512, 768, 1024], required=True,
+    parser.add_argument('--param-set', type=int, choices=[512, 768, 1024],
                         help='Kyber parameter set (512, 768, or 1024)')
     parser.add_argument('--du', type=int, help='du parameter value')
     parser.add_argument('--dv', type=int, help='dv parameter value')
     parser.add_argument('--eta1', type=int, help='eta1 parameter value')
     parser.add_argument('--eta2', type=int, help='eta2 parameter value')
+    parser.add_argument('--batch', metavar='FILE',
+                        help='JSON lines of queries (- for stdin); misses are computed in one pass')
+    parser.add_argument('-j', '--jobs', type=int, help='Parallel estimator/δ workers for misses')
     
     args = parser.parse_args()
     
+    if args.batch:
+        queries = read_batch(args.batch)
+        missing = 0
+        for query, data in zip(queries, lookup(queries, args.jobs)):
+            if data is None:
+                report_missing(query)
+                missing += 1
+            else:
+                report(query, data)
+        sys.exit(1 if missing else 0)
+    
+    if not args.param_set:
+        parser.error("--param-set is required (or --batch)")
+    
     # Validate arguments
     if (args.du or args.dv) and (args.eta1 or args.eta2):
         parser.error("Cannot specify both (du,dv) and (eta1,eta2) parameters")
@@ -185,49 +250,13 @@ Examples:
     if not any([args.du, args.dv, args.eta1, args.eta2]):
         parser.error("Must specify either (du,dv) or (eta1,eta2) parameters")
     
-    # Determine which data to use
-    if args.eta1 and args.eta2:
-        # Eta variation test
-        if args.param_set == 512 and args.eta1 == 5 and args.eta2 == 3:
-            key = "512_eta_5_3"
-        elif args.param_set == 768 and args.eta1 == 4 and args.eta2 == 4:
-            key = "768_eta_4_4"
-        elif args.param_set == 1024 and args.eta1 == 4 and args.eta2 == 4:
-            key = "1024_eta_4_4"
-        else:
-            print(f"Error: No data available for Kyber{args.param_set} with η1={args.eta1}, η2={args.eta2}")
-            sys.exit(1)
-    else:
-        # du,dv variation test
-        key = f"{args.param_set}_{args.du}_{args.dv}"
-    
-    # Check if data exists
-    if key not in security_data:
-        print(f"Error: No security data available for the specified parameters")
-        print(f"Attempted key: {key}")
+    query = make_query(args.param_set, args.du, args.dv, args.eta1, args.eta2)
+    data = lookup([query], args.jobs)[0]
+    if data is None:
+        report_missing(query)
         sys.exit(1)
     
-    # Get the data
-    data = security_data[key]
-    
-    # Print parameter set configuration
-    print_parameter_set(args.param_set, args.du, args.dv)
-    
-    # Print results
-    if args.eta1:
-        print_eta_format(args.param_set, args.eta1, args.eta2, data)
-    else:
-        print_table_format(args.param_set, args.du, args.dv, data)
-    
-    # Print summary
-    print(f"\nSummary:")
-    print(f"  Parameter Set: Kyber{args.param_set}")
-    if args.du:
-        print(f"  Configuration: du={args.du}, dv={args.dv}")
-    else:
-        print(f"  Configuration: η1={args.eta1}, η2={args.eta2}")
-    print(f"  Classical Security (Primal): {data['primal']['classical']} bits")
-    print(f"  Quantum Security (Primal): {data['primal']['quantum']} bits")
+    report(query, data)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
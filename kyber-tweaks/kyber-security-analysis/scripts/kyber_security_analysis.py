@@ -10,33 +10,46 @@ from tabulate import tabulate
 import subprocess
 import os
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                "..", "..", "kyber-dynamic-security-analysis", "scripts"))
+import kyber_sizes
+
+VARIANT_K = {"Kyber512": 2, "Kyber768": 3, "Kyber1024": 4}
+
 class KyberSecurityAnalyzer:
     def __init__(self):
         # Parameter configurations matching your thesis
         self.du_dv_configs = {
             "Kyber512": [
-                {"du": 10, "dv": 4, "delta": "2^-161", "dims": "(800, 768)"},
-                {"du": 11, "dv": 3, "delta": "2^-148", "dims": "(800, 800)"},
-                {"du": 9, "dv": 5, "delta": "2^-98", "dims": "(800, 736)"}
+                {"du": 10, "dv": 4, "delta": "2^-161"},
+                {"du": 11, "dv": 3, "delta": "2^-148"},
+                {"du": 9, "dv": 5, "delta": "2^-98"}
             ],
             "Kyber768": [
-                {"du": 10, "dv": 4, "delta": "2^-165", "dims": "(1184, 1088)"},
-                {"du": 11, "dv": 3, "delta": "2^-151", "dims": "(1184, 1152)"},
-                {"du": 9, "dv": 5, "delta": "2^-99", "dims": "(1184, 1024)"}
+                {"du": 10, "dv": 4, "delta": "2^-165"},
+                {"du": 11, "dv": 3, "delta": "2^-151"},
+                {"du": 9, "dv": 5, "delta": "2^-99"}
             ],
             "Kyber1024": [
-                {"du": 11, "dv": 5, "delta": "2^-175", "dims": "(1568, 1568)"},
-                {"du": 12, "dv": 4, "delta": "2^-183", "dims": "(1568, 1664)"},
-                {"du": 10, "dv": 6, "delta": "2^-151", "dims": "(1568, 1472)"}
+                {"du": 11, "dv": 5, "delta": "2^-175"},
+                {"du": 12, "dv": 4, "delta": "2^-183"},
+                {"du": 10, "dv": 6, "delta": "2^-151"}
             ]
         }
         
         self.eta_configs = {
-            "Kyber512": {"eta1": 5, "eta2": 3, "delta": "2^-85", "dims": "(800, 768)"},
-            "Kyber768": {"eta1": 4, "eta2": 4, "delta": "2^-50", "dims": "(1184, 1088)"},
-            "Kyber1024": {"eta1": 4, "eta2": 4, "delta": "2^-47", "dims": "(1568, 1568)"}
+            "Kyber512": {"eta1": 5, "eta2": 3, "du": 10, "dv": 4, "delta": "2^-85"},
+            "Kyber768": {"eta1": 4, "eta2": 4, "du": 10, "dv": 4, "delta": "2^-50"},
+            "Kyber1024": {"eta1": 4, "eta2": 4, "du": 11, "dv": 5, "delta": "2^-47"}
         }
         
+        # (pk, ct) sizes from the params.h formulas
+        for variant, configs in self.du_dv_configs.items():
+            for config in configs:
+                config["dims"] = kyber_sizes.dims(VARIANT_K[variant], config["du"], config["dv"])
+        for variant, config in self.eta_configs.items():
+            config["dims"] = kyber_sizes.dims(VARIANT_K[variant], config["du"], config["dv"])
+        
         # Security estimates from your thesis
         self.security_estimates = {
             "Kyber512": {
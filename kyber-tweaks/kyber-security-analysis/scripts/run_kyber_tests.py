@@ -1,14 +1,14 @@
 #!/usr/bin/env python3
 """
 Script to run Kyber security tests for specific parameter sets
+All configurations are looked up in one batch through Kyber.py's security
+service, so misses are computed together instead of one process each
 """
 
-import subprocess
-import os
-import sys
+import Kyber
 
-def run_parameter_test(test_number):
-    """Run a specific parameter test configuration"""
+def parameter_test_queries(test_number):
+    """(heading, query) pairs of a specific parameter test configuration"""
     
     # Parameter configurations for each test
     test_configs = {
@@ -31,54 +31,45 @@ def run_parameter_test(test_number):
     
     if test_number not in test_configs:
         print(f"Invalid test number: {test_number}")
-        return
+        return []
     
-    print(f"\n=== Running Test Result {test_number} ===")
-    config = test_configs[test_number]
-    
-    # Get the script directory
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    kyber_py_path = os.path.join(script_dir, "Kyber.py")
-    
-    # Run for each Kyber variant
-    for variant, params in config.items():
+    queries = []
+    for variant, params in test_configs[test_number].items():
         param_set = int(variant.replace("kyber", ""))
         du = params["du"]
         dv = params["dv"]
-        
-        print(f"\nKyber{param_set} (du={du}, dv={dv}):")
-        cmd = [sys.executable, kyber_py_path, "--param-set", str(param_set), "--du", str(du), "--dv", str(dv)]
-        subprocess.run(cmd)
+        queries.append((f"\nKyber{param_set} (du={du}, dv={dv}):",
+                        Kyber.make_query(param_set, du=du, dv=dv)))
+    return queries
+
+def eta_test_queries():
+    """(heading, query) pairs of the eta variation tests"""
 
-def run_eta_tests():
-    """Run eta variation tests"""
-    print("\n=== Running Eta Variation Tests ===")
-    
     eta_configs = [
         {"param_set": 512, "eta1": 5, "eta2": 3},
         {"param_set": 768, "eta1": 4, "eta2": 4},
         {"param_set": 1024, "eta1": 4, "eta2": 4}
     ]
     
-    # Get the script directory
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    kyber_py_path = os.path.join(script_dir, "Kyber.py")
-    
-    for config in eta_configs:
-        print(f"\nKyber{config['param_set']} (η1={config['eta1']}, η2={config['eta2']}):")
-        cmd = [sys.executable, kyber_py_path, 
-               "--param-set", str(config['param_set']), 
-               "--eta1", str(config['eta1']), 
-               "--eta2", str(config['eta2'])]
-        subprocess.run(cmd)
+    return [(f"\nKyber{config['param_set']} (η1={config['eta1']}, η2={config['eta2']}):",
+             Kyber.make_query(config['param_set'], eta1=config['eta1'], eta2=config['eta2']))
+            for config in eta_configs]
 
 def main():
-    # Run all parameter tests
-    for test_num in [5, 6, 7]:
-        run_parameter_test(test_num)
+    # All parameter tests, then the eta variation tests
+    sections = [(f"\n=== Running Test Result {n} ===", parameter_test_queries(n)) for n in [5, 6, 7]]
+    sections.append(("\n=== Running Eta Variation Tests ===", eta_test_queries()))
     
-    # Run eta variation tests
-    run_eta_tests()
+    results = iter(Kyber.lookup([query for _, queries in sections for _, query in queries]))
+    for title, queries in sections:
+        print(title)
+        for heading, query in queries:
+            print(heading)
+            data = next(results)
+            if data is None:
+                Kyber.report_missing(query)
+            else:
+                Kyber.report(query, data)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,23 @@
+#ifndef BENCH_UTIL_H
+#define BENCH_UTIL_H
+
+#include <stdint.h>
+#include <time.h>
+
+/* Helpers shared by the benchmark harnesses (speed_print.c, test_speed.c,
+ * test_throughput.c, test_scaling.c) */
+
+static inline int cmp_uint64(const void *a, const void *b) {
+  if(*(uint64_t *)a < *(uint64_t *)b) return -1;
+  if(*(uint64_t *)a > *(uint64_t *)b) return 1;
+  return 0;
+}
+
+/* Wall-clock time in seconds, for ops/s */
+static inline double seconds(void) {
+  struct timespec ts;
+  clock_gettime(CLOCK_MONOTONIC, &ts);
+  return (double)ts.tv_sec + 1e-9*(double)ts.tv_nsec;
+}
+
+#endif
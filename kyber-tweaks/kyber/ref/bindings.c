@@ -0,0 +1,47 @@
+#include <stdint.h>
+#include "params.h"
+#include "kem.h"
+
+/*************************************************
+* Parameters of this build, exported as data symbols so that a loader
+* which only sees the shared library (e.g. Python ctypes) can size its
+* buffers without parsing params.h. Names go through KYBER_NAMESPACE
+* like every other symbol of the library.
+**************************************************/
+#define kyber_k KYBER_NAMESPACE(param_k)
+#define kyber_n KYBER_NAMESPACE(param_n)
+#define kyber_q KYBER_NAMESPACE(param_q)
+#define kyber_eta1 KYBER_NAMESPACE(param_eta1)
+#define kyber_eta2 KYBER_NAMESPACE(param_eta2)
+#define kyber_du KYBER_NAMESPACE(param_du)
+#define kyber_dv KYBER_NAMESPACE(param_dv)
+#define kyber_polycompressedbytes KYBER_NAMESPACE(param_polycompressedbytes)
+#define kyber_polyveccompressedbytes KYBER_NAMESPACE(param_polyveccompressedbytes)
+#define kyber_indcpa_publickeybytes KYBER_NAMESPACE(param_indcpa_publickeybytes)
+#define kyber_indcpa_secretkeybytes KYBER_NAMESPACE(param_indcpa_secretkeybytes)
+#define kyber_publickeybytes KYBER_NAMESPACE(param_publickeybytes)
+#define kyber_secretkeybytes KYBER_NAMESPACE(param_secretkeybytes)
+#define kyber_ciphertextbytes KYBER_NAMESPACE(param_ciphertextbytes)
+#define kyber_bytes KYBER_NAMESPACE(param_bytes)
+
+extern const uint32_t kyber_k, kyber_n, kyber_q, kyber_eta1, kyber_eta2,
+  kyber_du, kyber_dv, kyber_polycompressedbytes, kyber_polyveccompressedbytes,
+  kyber_indcpa_publickeybytes, kyber_indcpa_secretkeybytes,
+  kyber_publickeybytes, kyber_secretkeybytes, kyber_ciphertextbytes, kyber_bytes;
+
+const uint32_t kyber_k = KYBER_K;
+const uint32_t kyber_n = KYBER_N;
+const uint32_t kyber_q = KYBER_Q;
+const uint32_t kyber_eta1 = KYBER_ETA1;
+const uint32_t kyber_eta2 = KYBER_ETA2;
+/* Not every config defines KYBER_DU/KYBER_DV, the byte sizes always imply them */
+const uint32_t kyber_du = KYBER_POLYVECCOMPRESSEDBYTES*8/(KYBER_K*KYBER_N);
+const uint32_t kyber_dv = KYBER_POLYCOMPRESSEDBYTES*8/KYBER_N;
+const uint32_t kyber_polycompressedbytes = KYBER_POLYCOMPRESSEDBYTES;
+const uint32_t kyber_polyveccompressedbytes = KYBER_POLYVECCOMPRESSEDBYTES;
+const uint32_t kyber_indcpa_publickeybytes = KYBER_INDCPA_PUBLICKEYBYTES;
+const uint32_t kyber_indcpa_secretkeybytes = KYBER_INDCPA_SECRETKEYBYTES;
+const uint32_t kyber_publickeybytes = CRYPTO_PUBLICKEYBYTES;
+const uint32_t kyber_secretkeybytes = CRYPTO_SECRETKEYBYTES;
+const uint32_t kyber_ciphertextbytes = CRYPTO_CIPHERTEXTBYTES;
+const uint32_t kyber_bytes = CRYPTO_BYTES;
@@ -16,6 +16,15 @@
 #error "KYBER_K must be in {2,3,4}"
 #endif
 
+/* Optional per-configuration prefix, e.g. -DKYBER_CONFIG_NAMESPACE=kyber_test2_du11_dv3,
+ * so that builds of several params_*.h files can be loaded into one process */
+#ifdef KYBER_CONFIG_NAMESPACE
+#undef KYBER_NAMESPACE
+#define KYBER_NAMESPACE_CAT_(p, k, s) p##_k##k##_##s
+#define KYBER_NAMESPACE_CAT(p, k, s) KYBER_NAMESPACE_CAT_(p, k, s)
+#define KYBER_NAMESPACE(s) KYBER_NAMESPACE_CAT(KYBER_CONFIG_NAMESPACE, KYBER_K, s)
+#endif
+
 #define KYBER_N 256
 #define KYBER_Q 3329
 
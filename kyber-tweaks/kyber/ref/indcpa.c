@@ -7,6 +7,7 @@
 #include "ntt.h"
 #include "symmetric.h"
 #include "randombytes.h"
+#include "profile.h"
 
 /*************************************************
 * Name:        pack_pk
@@ -212,87 +213,177 @@ void indcpa_keypair(uint8_t pk[KYBER_INDCPA_PUBLICKEYBYTES],
   uint8_t nonce = 0;
   polyvec a[KYBER_K], e, pkpv, skpv;
 
+  PROFILE_BEGIN(PROFILE_INDCPA_KEYPAIR);
+  PROFILE_BEGIN(PROFILE_RANDOMBYTES);
   randombytes(buf, KYBER_SYMBYTES);
+  PROFILE_END(PROFILE_RANDOMBYTES);
+  PROFILE_BEGIN(PROFILE_HASH);
   hash_g(buf, buf, KYBER_SYMBYTES);
+  PROFILE_END(PROFILE_HASH);
 
+  PROFILE_BEGIN(PROFILE_GEN_MATRIX);
   gen_a(a, publicseed);
+  PROFILE_END(PROFILE_GEN_MATRIX);
 
+  PROFILE_BEGIN(PROFILE_NOISE);
   for(i=0;i<KYBER_K;i++)
     poly_getnoise_eta1(&skpv.vec[i], noiseseed, nonce++);
   for(i=0;i<KYBER_K;i++)
     poly_getnoise_eta1(&e.vec[i], noiseseed, nonce++);
+  PROFILE_END(PROFILE_NOISE);
 
+  PROFILE_BEGIN(PROFILE_NTT);
   polyvec_ntt(&skpv);
   polyvec_ntt(&e);
+  PROFILE_END(PROFILE_NTT);
 
   // matrix-vector multiplication
+  PROFILE_BEGIN(PROFILE_BASEMUL);
   for(i=0;i<KYBER_K;i++) {
     polyvec_basemul_acc_montgomery(&pkpv.vec[i], &a[i], &skpv);
     poly_tomont(&pkpv.vec[i]);
   }
+  PROFILE_END(PROFILE_BASEMUL);
 
+  PROFILE_BEGIN(PROFILE_POLY_ARITH);
   polyvec_add(&pkpv, &pkpv, &e);
   polyvec_reduce(&pkpv);
+  PROFILE_END(PROFILE_POLY_ARITH);
 
+  PROFILE_BEGIN(PROFILE_PACK);
   pack_sk(sk, &skpv);
   pack_pk(pk, &pkpv, publicseed);
+  PROFILE_END(PROFILE_PACK);
+  PROFILE_END(PROFILE_INDCPA_KEYPAIR);
 }
 
 /*************************************************
-* Name:        indcpa_enc
+* Name:        indcpa_expand_pk
 *
-* Description: Encryption function of the CPA-secure
-*              public-key encryption scheme underlying Kyber.
+* Description: Unpacks the public key and expands the transposed matrix A
+*              from its seed, i.e. all work of indcpa_enc that depends on
+*              the public key only. The result can be passed to
+*              indcpa_enc_expanded for any number of encryptions.
+*
+* Arguments:   - polyvec *pkpv: pointer to output public-key polynomial vector
+*              - polyvec *at: pointer to output transposed matrix
+*                             (array of KYBER_K polyvecs)
+*              - const uint8_t *pk: pointer to input public key
+*                                   (of length KYBER_INDCPA_PUBLICKEYBYTES)
+**************************************************/
+void indcpa_expand_pk(polyvec *pkpv,
+                      polyvec at[KYBER_K],
+                      const uint8_t pk[KYBER_INDCPA_PUBLICKEYBYTES])
+{
+  uint8_t seed[KYBER_SYMBYTES];
+
+  PROFILE_BEGIN(PROFILE_INDCPA_EXPAND_PK);
+  PROFILE_BEGIN(PROFILE_PACK);
+  unpack_pk(pkpv, seed, pk);
+  PROFILE_END(PROFILE_PACK);
+  PROFILE_BEGIN(PROFILE_GEN_MATRIX);
+  gen_at(at, seed);
+  PROFILE_END(PROFILE_GEN_MATRIX);
+  PROFILE_END(PROFILE_INDCPA_EXPAND_PK);
+}
+
+/*************************************************
+* Name:        indcpa_enc_expanded
+*
+* Description: Encryption function of the CPA-secure public-key
+*              encryption scheme for a public key already expanded
+*              with indcpa_expand_pk.
 *
 * Arguments:   - uint8_t *c: pointer to output ciphertext
 *                            (of length KYBER_INDCPA_BYTES bytes)
 *              - const uint8_t *m: pointer to input message
 *                                  (of length KYBER_INDCPA_MSGBYTES bytes)
-*              - const uint8_t *pk: pointer to input public key
-*                                   (of length KYBER_INDCPA_PUBLICKEYBYTES)
+*              - const polyvec *pkpv: pointer to input public-key polynomial vector
+*              - const polyvec *at: pointer to input transposed matrix
 *              - const uint8_t *coins: pointer to input random coins used as seed
 *                                      (of length KYBER_SYMBYTES) to deterministically
 *                                      generate all randomness
 **************************************************/
-void indcpa_enc(uint8_t c[KYBER_INDCPA_BYTES],
-                const uint8_t m[KYBER_INDCPA_MSGBYTES],
-                const uint8_t pk[KYBER_INDCPA_PUBLICKEYBYTES],
-                const uint8_t coins[KYBER_SYMBYTES])
+void indcpa_enc_expanded(uint8_t c[KYBER_INDCPA_BYTES],
+                         const uint8_t m[KYBER_INDCPA_MSGBYTES],
+                         const polyvec *pkpv,
+                         const polyvec at[KYBER_K],
+                         const uint8_t coins[KYBER_SYMBYTES])
 {
   unsigned int i;
-  uint8_t seed[KYBER_SYMBYTES];
   uint8_t nonce = 0;
-  polyvec sp, pkpv, ep, at[KYBER_K], b;
+  polyvec sp, ep, b;
   poly v, k, epp;
 
-  unpack_pk(&pkpv, seed, pk);
+  PROFILE_BEGIN(PROFILE_INDCPA_ENC);
+  PROFILE_BEGIN(PROFILE_MSG);
   poly_frommsg(&k, m);
-  gen_at(at, seed);
+  PROFILE_END(PROFILE_MSG);
 
+  PROFILE_BEGIN(PROFILE_NOISE);
   for(i=0;i<KYBER_K;i++)
     poly_getnoise_eta1(sp.vec+i, coins, nonce++);
   for(i=0;i<KYBER_K;i++)
     poly_getnoise_eta2(ep.vec+i, coins, nonce++);
   poly_getnoise_eta2(&epp, coins, nonce++);
+  PROFILE_END(PROFILE_NOISE);
 
+  PROFILE_BEGIN(PROFILE_NTT);
   polyvec_ntt(&sp);
+  PROFILE_END(PROFILE_NTT);
 
   // matrix-vector multiplication
+  PROFILE_BEGIN(PROFILE_BASEMUL);
   for(i=0;i<KYBER_K;i++)
     polyvec_basemul_acc_montgomery(&b.vec[i], &at[i], &sp);
 
-  polyvec_basemul_acc_montgomery(&v, &pkpv, &sp);
+  polyvec_basemul_acc_montgomery(&v, pkpv, &sp);
+  PROFILE_END(PROFILE_BASEMUL);
 
+  PROFILE_BEGIN(PROFILE_INVNTT);
   polyvec_invntt_tomont(&b);
   poly_invntt_tomont(&v);
+  PROFILE_END(PROFILE_INVNTT);
 
+  PROFILE_BEGIN(PROFILE_POLY_ARITH);
   polyvec_add(&b, &b, &ep);
   poly_add(&v, &v, &epp);
   poly_add(&v, &v, &k);
   polyvec_reduce(&b);
   poly_reduce(&v);
+  PROFILE_END(PROFILE_POLY_ARITH);
 
+  PROFILE_BEGIN(PROFILE_COMPRESS);
   pack_ciphertext(c, &b, &v);
+  PROFILE_END(PROFILE_COMPRESS);
+  PROFILE_END(PROFILE_INDCPA_ENC);
+}
+
+/*************************************************
+* Name:        indcpa_enc
+*
+* Description: Encryption function of the CPA-secure
+*              public-key encryption scheme underlying Kyber.
+*
+* Arguments:   - uint8_t *c: pointer to output ciphertext
+*                            (of length KYBER_INDCPA_BYTES bytes)
+*              - const uint8_t *m: pointer to input message
+*                                  (of length KYBER_INDCPA_MSGBYTES bytes)
+*              - const uint8_t *pk: pointer to input public key
+*                                   (of length KYBER_INDCPA_PUBLICKEYBYTES)
+*              - const uint8_t *coins: pointer to input random coins used as seed
+*                                      (of length KYBER_SYMBYTES) to deterministically
+*                                      generate all randomness
+**************************************************/
+void indcpa_enc(uint8_t c[KYBER_INDCPA_BYTES],
+                const uint8_t m[KYBER_INDCPA_MSGBYTES],
+                const uint8_t pk[KYBER_INDCPA_PUBLICKEYBYTES],
+                const uint8_t coins[KYBER_SYMBYTES])
+{
+  polyvec pkpv, at[KYBER_K];
+
+  indcpa_expand_pk(&pkpv, at, pk);
+  indcpa_enc_expanded(c, m, &pkpv, at, coins);
 }
 
 /*************************************************
@@ -315,15 +406,31 @@ void indcpa_dec(uint8_t m[KYBER_INDCPA_MSGBYTES],
   polyvec b, skpv;
   poly v, mp;
 
+  PROFILE_BEGIN(PROFILE_INDCPA_DEC);
+  PROFILE_BEGIN(PROFILE_DECOMPRESS);
   unpack_ciphertext(&b, &v, c);
+  PROFILE_END(PROFILE_DECOMPRESS);
+  PROFILE_BEGIN(PROFILE_PACK);
   unpack_sk(&skpv, sk);
+  PROFILE_END(PROFILE_PACK);
 
+  PROFILE_BEGIN(PROFILE_NTT);
   polyvec_ntt(&b);
+  PROFILE_END(PROFILE_NTT);
+  PROFILE_BEGIN(PROFILE_BASEMUL);
   polyvec_basemul_acc_montgomery(&mp, &skpv, &b);
+  PROFILE_END(PROFILE_BASEMUL);
+  PROFILE_BEGIN(PROFILE_INVNTT);
   poly_invntt_tomont(&mp);
+  PROFILE_END(PROFILE_INVNTT);
 
+  PROFILE_BEGIN(PROFILE_POLY_ARITH);
   poly_sub(&mp, &v, &mp);
   poly_reduce(&mp);
+  PROFILE_END(PROFILE_POLY_ARITH);
 
+  PROFILE_BEGIN(PROFILE_MSG);
   poly_tomsg(m, &mp);
+  PROFILE_END(PROFILE_MSG);
+  PROFILE_END(PROFILE_INDCPA_DEC);
 }
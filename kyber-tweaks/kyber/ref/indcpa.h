@@ -17,6 +17,18 @@ void indcpa_enc(uint8_t c[KYBER_INDCPA_BYTES],
                 const uint8_t pk[KYBER_INDCPA_PUBLICKEYBYTES],
                 const uint8_t coins[KYBER_SYMBYTES]);
 
+#define indcpa_expand_pk KYBER_NAMESPACE(indcpa_expand_pk)
+void indcpa_expand_pk(polyvec *pkpv,
+                      polyvec at[KYBER_K],
+                      const uint8_t pk[KYBER_INDCPA_PUBLICKEYBYTES]);
+
+#define indcpa_enc_expanded KYBER_NAMESPACE(indcpa_enc_expanded)
+void indcpa_enc_expanded(uint8_t c[KYBER_INDCPA_BYTES],
+                         const uint8_t m[KYBER_INDCPA_MSGBYTES],
+                         const polyvec *pkpv,
+                         const polyvec at[KYBER_K],
+                         const uint8_t coins[KYBER_SYMBYTES]);
+
 #define indcpa_dec KYBER_NAMESPACE(indcpa_dec)
 void indcpa_dec(uint8_t m[KYBER_INDCPA_MSGBYTES],
                 const uint8_t c[KYBER_INDCPA_BYTES],
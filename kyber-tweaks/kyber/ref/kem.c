@@ -6,6 +6,7 @@
 #include "verify.h"
 #include "symmetric.h"
 #include "randombytes.h"
+#include "profile.h"
 
 /*************************************************
 * Name:        crypto_kem_keypair
@@ -24,12 +25,18 @@ int crypto_kem_keypair(uint8_t *pk,
                        uint8_t *sk)
 {
   size_t i;
+  PROFILE_BEGIN(PROFILE_KEM_KEYPAIR);
   indcpa_keypair(pk, sk);
   for(i=0;i<KYBER_INDCPA_PUBLICKEYBYTES;i++)
     sk[i+KYBER_INDCPA_SECRETKEYBYTES] = pk[i];
+  PROFILE_BEGIN(PROFILE_HASH);
   hash_h(sk+KYBER_SECRETKEYBYTES-2*KYBER_SYMBYTES, pk, KYBER_PUBLICKEYBYTES);
+  PROFILE_END(PROFILE_HASH);
   /* Value z for pseudo-random output on reject */
+  PROFILE_BEGIN(PROFILE_RANDOMBYTES);
   randombytes(sk+KYBER_SECRETKEYBYTES-KYBER_SYMBYTES, KYBER_SYMBYTES);
+  PROFILE_END(PROFILE_RANDOMBYTES);
+  PROFILE_END(PROFILE_KEM_KEYPAIR);
   return 0;
 }
 
@@ -52,25 +59,70 @@ int crypto_kem_enc(uint8_t *ct,
                    uint8_t *ss,
                    const uint8_t *pk)
 {
+  return crypto_kem_enc_batch(ct, ss, pk, 1);
+}
+
+/*************************************************
+* Name:        crypto_kem_enc_batch
+*
+* Description: Generates n independent cipher texts and shared
+*              secrets for the same public key. The public key is
+*              unpacked, hashed and its matrix A expanded only once.
+*
+* Arguments:   - uint8_t *ct: pointer to output cipher texts
+*                (an already allocated array of n*KYBER_CIPHERTEXTBYTES bytes)
+*              - uint8_t *ss: pointer to output shared secrets
+*                (an already allocated array of n*KYBER_SSBYTES bytes)
+*              - const uint8_t *pk: pointer to input public key
+*                (an already allocated array of KYBER_PUBLICKEYBYTES bytes)
+*              - size_t n: number of encapsulations
+*
+* Returns 0 (success)
+**************************************************/
+int crypto_kem_enc_batch(uint8_t *ct,
+                         uint8_t *ss,
+                         const uint8_t *pk,
+                         size_t n)
+{
+  size_t j;
   uint8_t buf[2*KYBER_SYMBYTES];
   /* Will contain key, coins */
   uint8_t kr[2*KYBER_SYMBYTES];
+  polyvec pkpv, at[KYBER_K];
 
-  randombytes(buf, KYBER_SYMBYTES);
-  /* Don't release system RNG output */
-  hash_h(buf, buf, KYBER_SYMBYTES);
+  PROFILE_BEGIN(PROFILE_KEM_ENC);
+  indcpa_expand_pk(&pkpv, at, pk);
 
   /* Multitarget countermeasure for coins + contributory KEM */
+  PROFILE_BEGIN(PROFILE_HASH);
   hash_h(buf+KYBER_SYMBYTES, pk, KYBER_PUBLICKEYBYTES);
-  hash_g(kr, buf, 2*KYBER_SYMBYTES);
+  PROFILE_END(PROFILE_HASH);
+
+  for(j=0;j<n;j++) {
+    PROFILE_BEGIN(PROFILE_RANDOMBYTES);
+    randombytes(buf, KYBER_SYMBYTES);
+    PROFILE_END(PROFILE_RANDOMBYTES);
+    /* Don't release system RNG output */
+    PROFILE_BEGIN(PROFILE_HASH);
+    hash_h(buf, buf, KYBER_SYMBYTES);
 
-  /* coins are in kr+KYBER_SYMBYTES */
-  indcpa_enc(ct, buf, pk, kr+KYBER_SYMBYTES);
+    hash_g(kr, buf, 2*KYBER_SYMBYTES);
+    PROFILE_END(PROFILE_HASH);
 
-  /* overwrite coins in kr with H(c) */
-  hash_h(kr+KYBER_SYMBYTES, ct, KYBER_CIPHERTEXTBYTES);
-  /* hash concatenation of pre-k and H(c) to k */
-  kdf(ss, kr, 2*KYBER_SYMBYTES);
+    /* coins are in kr+KYBER_SYMBYTES */
+    indcpa_enc_expanded(ct, buf, &pkpv, at, kr+KYBER_SYMBYTES);
+
+    PROFILE_BEGIN(PROFILE_HASH);
+    /* overwrite coins in kr with H(c) */
+    hash_h(kr+KYBER_SYMBYTES, ct, KYBER_CIPHERTEXTBYTES);
+    /* hash concatenation of pre-k and H(c) to k */
+    kdf(ss, kr, 2*KYBER_SYMBYTES);
+    PROFILE_END(PROFILE_HASH);
+
+    ct += KYBER_CIPHERTEXTBYTES;
+    ss += KYBER_SSBYTES;
+  }
+  PROFILE_END(PROFILE_KEM_ENC);
   return 0;
 }
 
@@ -95,33 +147,81 @@ int crypto_kem_dec(uint8_t *ss,
                    const uint8_t *ct,
                    const uint8_t *sk)
 {
-  size_t i;
+  return crypto_kem_dec_batch(ss, ct, sk, 1);
+}
+
+/*************************************************
+* Name:        crypto_kem_dec_batch
+*
+* Description: Generates the shared secrets for n cipher texts
+*              under the same private key. The public key stored in
+*              the private key is expanded only once for all
+*              re-encryptions.
+*
+* Arguments:   - uint8_t *ss: pointer to output shared secrets
+*                (an already allocated array of n*KYBER_SSBYTES bytes)
+*              - const uint8_t *ct: pointer to input cipher texts
+*                (an already allocated array of n*KYBER_CIPHERTEXTBYTES bytes)
+*              - const uint8_t *sk: pointer to input private key
+*                (an already allocated array of KYBER_SECRETKEYBYTES bytes)
+*              - size_t n: number of decapsulations
+*
+* Returns 0.
+*
+* On failure, the affected ss will contain a pseudo-random value.
+**************************************************/
+int crypto_kem_dec_batch(uint8_t *ss,
+                         const uint8_t *ct,
+                         const uint8_t *sk,
+                         size_t n)
+{
+  size_t i, j;
   int fail;
   uint8_t buf[2*KYBER_SYMBYTES];
   /* Will contain key, coins */
   uint8_t kr[2*KYBER_SYMBYTES];
   uint8_t cmp[KYBER_CIPHERTEXTBYTES];
   const uint8_t *pk = sk+KYBER_INDCPA_SECRETKEYBYTES;
+  polyvec pkpv, at[KYBER_K];
 
-  indcpa_dec(buf, ct, sk);
+  PROFILE_BEGIN(PROFILE_KEM_DEC);
+  indcpa_expand_pk(&pkpv, at, pk);
 
-  /* Multitarget countermeasure for coins + contributory KEM */
-  for(i=0;i<KYBER_SYMBYTES;i++)
-    buf[KYBER_SYMBYTES+i] = sk[KYBER_SECRETKEYBYTES-2*KYBER_SYMBYTES+i];
-  hash_g(kr, buf, 2*KYBER_SYMBYTES);
+  for(j=0;j<n;j++) {
+    indcpa_dec(buf, ct, sk);
+
+    /* Multitarget countermeasure for coins + contributory KEM */
+    for(i=0;i<KYBER_SYMBYTES;i++)
+      buf[KYBER_SYMBYTES+i] = sk[KYBER_SECRETKEYBYTES-2*KYBER_SYMBYTES+i];
+    PROFILE_BEGIN(PROFILE_HASH);
+    hash_g(kr, buf, 2*KYBER_SYMBYTES);
+    PROFILE_END(PROFILE_HASH);
+
+    /* coins are in kr+KYBER_SYMBYTES */
+    indcpa_enc_expanded(cmp, buf, &pkpv, at, kr+KYBER_SYMBYTES);
 
-  /* coins are in kr+KYBER_SYMBYTES */
-  indcpa_enc(cmp, buf, pk, kr+KYBER_SYMBYTES);
+    PROFILE_BEGIN(PROFILE_VERIFY);
+    fail = verify(ct, cmp, KYBER_CIPHERTEXTBYTES);
+    PROFILE_END(PROFILE_VERIFY);
 
-  fail = verify(ct, cmp, KYBER_CIPHERTEXTBYTES);
+    /* overwrite coins in kr with H(c) */
+    PROFILE_BEGIN(PROFILE_HASH);
+    hash_h(kr+KYBER_SYMBYTES, ct, KYBER_CIPHERTEXTBYTES);
+    PROFILE_END(PROFILE_HASH);
 
-  /* overwrite coins in kr with H(c) */
-  hash_h(kr+KYBER_SYMBYTES, ct, KYBER_CIPHERTEXTBYTES);
+    /* Overwrite pre-k with z on re-encryption failure */
+    PROFILE_BEGIN(PROFILE_VERIFY);
+    cmov(kr, sk+KYBER_SECRETKEYBYTES-KYBER_SYMBYTES, KYBER_SYMBYTES, fail);
+    PROFILE_END(PROFILE_VERIFY);
 
-  /* Overwrite pre-k with z on re-encryption failure */
-  cmov(kr, sk+KYBER_SECRETKEYBYTES-KYBER_SYMBYTES, KYBER_SYMBYTES, fail);
+    /* hash concatenation of pre-k and H(c) to k */
+    PROFILE_BEGIN(PROFILE_HASH);
+    kdf(ss, kr, 2*KYBER_SYMBYTES);
+    PROFILE_END(PROFILE_HASH);
 
-  /* hash concatenation of pre-k and H(c) to k */
-  kdf(ss, kr, 2*KYBER_SYMBYTES);
+    ct += KYBER_CIPHERTEXTBYTES;
+    ss += KYBER_SSBYTES;
+  }
+  PROFILE_END(PROFILE_KEM_DEC);
   return 0;
 }
@@ -1,6 +1,7 @@
 #ifndef KEM_H
 #define KEM_H
 
+#include <stddef.h>
 #include <stdint.h>
 #include "params.h"
 
@@ -38,4 +39,10 @@ int crypto_kem_enc(uint8_t *ct, uint8_t *ss, const uint8_t *pk);
 #define crypto_kem_dec KYBER_NAMESPACE(dec)
 int crypto_kem_dec(uint8_t *ss, const uint8_t *ct, const uint8_t *sk);
 
+#define crypto_kem_enc_batch KYBER_NAMESPACE(enc_batch)
+int crypto_kem_enc_batch(uint8_t *ct, uint8_t *ss, const uint8_t *pk, size_t n);
+
+#define crypto_kem_dec_batch KYBER_NAMESPACE(dec_batch)
+int crypto_kem_dec_batch(uint8_t *ss, const uint8_t *ct, const uint8_t *sk, size_t n);
+
 #endif
@@ -0,0 +1,112 @@
+#include <stdint.h>
+#include <stdlib.h>
+#include <string.h>
+#include "perfcounters.h"
+
+#ifdef __linux__
+
+#include <linux/perf_event.h>
+#include <sys/ioctl.h>
+#include <sys/syscall.h>
+#include <unistd.h>
+
+#define L1D_READ_MISS (PERF_COUNT_HW_CACHE_L1D | (PERF_COUNT_HW_CACHE_OP_READ << 8) \
+                       | (PERF_COUNT_HW_CACHE_RESULT_MISS << 16))
+
+static const struct {
+  const char *name;
+  uint32_t type;
+  uint64_t config;
+} events[PERF_NCOUNTERS] = {
+  {"cycles", PERF_TYPE_HARDWARE, PERF_COUNT_HW_CPU_CYCLES},
+  {"instructions", PERF_TYPE_HARDWARE, PERF_COUNT_HW_INSTRUCTIONS},
+  {"cache_references", PERF_TYPE_HARDWARE, PERF_COUNT_HW_CACHE_REFERENCES},
+  {"cache_misses", PERF_TYPE_HARDWARE, PERF_COUNT_HW_CACHE_MISSES},
+  {"branches", PERF_TYPE_HARDWARE, PERF_COUNT_HW_BRANCH_INSTRUCTIONS},
+  {"branch_misses", PERF_TYPE_HARDWARE, PERF_COUNT_HW_BRANCH_MISSES},
+  {"l1d_read_misses", PERF_TYPE_HW_CACHE, L1D_READ_MISS},
+};
+
+static int fds[PERF_NCOUNTERS] = {-1, -1, -1, -1, -1, -1, -1};
+
+int perfcounters_init(void) {
+  unsigned int i;
+  int n = 0;
+  const char *env = getenv("KYBER_PERF");
+  struct perf_event_attr attr;
+
+  if(env && strcmp(env, "0") == 0)
+    return 0;
+
+  for(i=0;i<PERF_NCOUNTERS;i++) {
+    memset(&attr, 0, sizeof(attr));
+    attr.size = sizeof(attr);
+    attr.type = events[i].type;
+    attr.config = events[i].config;
+    attr.disabled = 1;
+    attr.exclude_kernel = 1;
+    attr.exclude_hv = 1;
+
+    fds[i] = syscall(SYS_perf_event_open, &attr, 0, -1, -1, 0);
+    if(fds[i] < 0)
+      continue;
+    ioctl(fds[i], PERF_EVENT_IOC_RESET, 0);
+    ioctl(fds[i], PERF_EVENT_IOC_ENABLE, 0);
+    n++;
+  }
+
+  return n;
+}
+
+void perfcounters_reset(void) {
+  unsigned int i;
+
+  for(i=0;i<PERF_NCOUNTERS;i++)
+    if(fds[i] >= 0)
+      ioctl(fds[i], PERF_EVENT_IOC_RESET, 0);
+}
+
+/* Counts since the last reset; unavailable counters are set to UINT64_MAX.
+ * Returns the number of counters read. */
+int perfcounters_read(uint64_t counts[PERF_NCOUNTERS]) {
+  unsigned int i;
+  int n = 0;
+
+  for(i=0;i<PERF_NCOUNTERS;i++) {
+    counts[i] = UINT64_MAX;
+    if(fds[i] >= 0 && read(fds[i], &counts[i], sizeof(uint64_t)) == sizeof(uint64_t))
+      n++;
+    else
+      counts[i] = UINT64_MAX;
+  }
+
+  return n;
+}
+
+const char *perfcounters_name(unsigned int i) {
+  return i < PERF_NCOUNTERS ? events[i].name : NULL;
+}
+
+#else
+
+int perfcounters_init(void) {
+  return 0;
+}
+
+void perfcounters_reset(void) {
+}
+
+int perfcounters_read(uint64_t counts[PERF_NCOUNTERS]) {
+  unsigned int i;
+
+  for(i=0;i<PERF_NCOUNTERS;i++)
+    counts[i] = UINT64_MAX;
+  return 0;
+}
+
+const char *perfcounters_name(unsigned int i) {
+  (void)i;
+  return NULL;
+}
+
+#endif
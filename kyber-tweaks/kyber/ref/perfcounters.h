@@ -0,0 +1,19 @@
+#ifndef PERFCOUNTERS_H
+#define PERFCOUNTERS_H
+
+#include <stdint.h>
+
+/* Hardware performance counters (Linux perf_event_open) for the speed
+ * benchmarks. Every counter is opened on its own, so a machine or container
+ * that only offers some of them still reports those; where none are
+ * available (other OS, perf_event_paranoid, VMs without a PMU) the functions
+ * do nothing. Set KYBER_PERF=0 to disable them. */
+
+#define PERF_NCOUNTERS 7
+
+int perfcounters_init(void);
+void perfcounters_reset(void);
+int perfcounters_read(uint64_t counts[PERF_NCOUNTERS]);
+const char *perfcounters_name(unsigned int i);
+
+#endif
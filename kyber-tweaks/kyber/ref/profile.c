@@ -0,0 +1,155 @@
+#include "profile.h"
+
+#ifdef KYBER_PROFILE
+
+#include <stdatomic.h>
+#include <stdint.h>
+#include <stdio.h>
+#include <stdlib.h>
+#include "cpucycles.h"
+
+#define PROFILE_MAXNODES 256
+#define PROFILE_MAXDEPTH 16
+
+static const char *const region_names[PROFILE_NREGIONS] = {
+  "kem_keypair", "kem_enc", "kem_dec",
+  "indcpa_keypair", "indcpa_expand_pk", "indcpa_enc", "indcpa_dec",
+  "gen_matrix", "noise", "ntt", "invntt", "basemul", "poly_arith",
+  "compress", "decompress", "pack", "msg", "hash", "randombytes", "verify"
+};
+
+/* One node per distinct call path; node 0 is the root */
+typedef struct {
+  uint16_t parent;
+  uint16_t region;
+  uint64_t calls;
+  uint64_t cycles;
+} profile_node;
+
+typedef struct profile_table {
+  struct profile_table *next;
+  unsigned int thread;
+  unsigned int nnodes;
+  unsigned int depth;
+  unsigned int skipped;  /* regions not recorded because a limit was hit */
+  uint16_t stack[PROFILE_MAXDEPTH];
+  uint64_t start[PROFILE_MAXDEPTH];
+  profile_node nodes[PROFILE_MAXNODES];
+} profile_table;
+
+/* Tables are heap allocated so they outlive their threads until the dump */
+static _Thread_local profile_table *table;
+static _Atomic(profile_table *) tables;
+static atomic_uint nthreads;
+static atomic_flag registered = ATOMIC_FLAG_INIT;
+
+static profile_table *get_table(void) {
+  profile_table *t = table;
+
+  if(t)
+    return t;
+
+  t = calloc(1, sizeof(profile_table));
+  if(!t)
+    return NULL;
+  t->thread = atomic_fetch_add(&nthreads, 1);
+  t->nnodes = 1;
+  t->next = atomic_load(&tables);
+  while(!atomic_compare_exchange_weak(&tables, &t->next, t))
+    ;
+  if(!atomic_flag_test_and_set(&registered))
+    atexit(profile_dump);
+
+  table = t;
+  return t;
+}
+
+void profile_begin(enum profile_region region) {
+  unsigned int i, parent;
+  profile_table *t = get_table();
+
+  if(!t)
+    return;
+  if(t->skipped || t->depth + 1 >= PROFILE_MAXDEPTH) {
+    t->skipped++;
+    return;
+  }
+
+  parent = t->stack[t->depth];
+  for(i=1;i<t->nnodes;i++)
+    if(t->nodes[i].parent == parent && t->nodes[i].region == region)
+      break;
+  if(i == t->nnodes) {
+    if(t->nnodes == PROFILE_MAXNODES) {
+      t->skipped++;
+      return;
+    }
+    t->nodes[i].parent = parent;
+    t->nodes[i].region = region;
+    t->nnodes++;
+  }
+
+  t->depth++;
+  t->stack[t->depth] = i;
+  t->start[t->depth] = cpucycles();
+}
+
+void profile_end(enum profile_region region) {
+  uint64_t t1 = cpucycles();
+  profile_table *t = table;
+  profile_node *node;
+
+  if(!t)
+    return;
+  if(t->skipped) {
+    t->skipped--;
+    return;
+  }
+  if(t->depth == 0)
+    return;
+
+  node = &t->nodes[t->stack[t->depth]];
+  if(node->region != region)
+    return;
+  node->cycles += t1 - t->start[t->depth];
+  node->calls++;
+  t->depth--;
+}
+
+static void print_path(FILE *f, const profile_table *t, unsigned int i) {
+  if(t->nodes[i].parent != 0) {
+    print_path(f, t, t->nodes[i].parent);
+    fputc(';', f);
+  }
+  fputs(region_names[t->nodes[i].region], f);
+}
+
+/* Output format, one line per call path with inclusive cycles:
+ *   params: k=.. eta1=.. eta2=.. du=.. dv=..
+ *   thread <id> <path> calls: <n> cycles: <c>  */
+void profile_dump(void) {
+  unsigned int i;
+  const profile_table *t;
+  const char *path = getenv("KYBER_PROFILE_OUT");
+  FILE *f = path ? fopen(path, "a") : NULL;
+
+  if(!f)
+    f = stderr;
+
+  fprintf(f, "params: k=%d eta1=%d eta2=%d du=%d dv=%d\n",
+          KYBER_K, KYBER_ETA1, KYBER_ETA2,
+          KYBER_POLYVECCOMPRESSEDBYTES*8/(KYBER_K*KYBER_N), KYBER_POLYCOMPRESSEDBYTES*8/KYBER_N);
+  for(t=atomic_load(&tables);t;t=t->next) {
+    for(i=1;i<t->nnodes;i++) {
+      fprintf(f, "thread %u ", t->thread);
+      print_path(f, t, i);
+      fprintf(f, " calls: %llu cycles: %llu\n",
+              (unsigned long long)t->nodes[i].calls, (unsigned long long)t->nodes[i].cycles);
+    }
+  }
+
+  if(f != stderr)
+    fclose(f);
+}
+
+#endif
@@ -0,0 +1,61 @@
+#ifndef PROFILE_H
+#define PROFILE_H
+
+#include "params.h"
+
+/* Optional cycle attribution, enabled with -DKYBER_PROFILE.
+ *
+ * PROFILE_BEGIN/PROFILE_END bracket a region of kem.c and indcpa.c. Cycles
+ * are accumulated per call path (e.g. kem_enc;indcpa_enc;ntt) in a
+ * per-thread table and all tables are written out at exit, to the file
+ * named by $KYBER_PROFILE_OUT (appended) or to stderr.
+ * benchmarks/profile_breakdown.py reads that output.
+ *
+ * Without KYBER_PROFILE the macros expand to nothing. */
+
+enum profile_region {
+  PROFILE_KEM_KEYPAIR,
+  PROFILE_KEM_ENC,
+  PROFILE_KEM_DEC,
+  PROFILE_INDCPA_KEYPAIR,
+  PROFILE_INDCPA_EXPAND_PK,
+  PROFILE_INDCPA_ENC,
+  PROFILE_INDCPA_DEC,
+  PROFILE_GEN_MATRIX,
+  PROFILE_NOISE,
+  PROFILE_NTT,
+  PROFILE_INVNTT,
+  PROFILE_BASEMUL,
+  PROFILE_POLY_ARITH,
+  PROFILE_COMPRESS,
+  PROFILE_DECOMPRESS,
+  PROFILE_PACK,
+  PROFILE_MSG,
+  PROFILE_HASH,
+  PROFILE_RANDOMBYTES,
+  PROFILE_VERIFY,
+  PROFILE_NREGIONS
+};
+
+#ifdef KYBER_PROFILE
+
+#define profile_begin KYBER_NAMESPACE(profile_begin)
+void profile_begin(enum profile_region region);
+
+#define profile_end KYBER_NAMESPACE(profile_end)
+void profile_end(enum profile_region region);
+
+#define profile_dump KYBER_NAMESPACE(profile_dump)
+void profile_dump(void);
+
+#define PROFILE_BEGIN(region) profile_begin(region)
+#define PROFILE_END(region) profile_end(region)
+
+#else
+
+#define PROFILE_BEGIN(region) do {} while(0)
+#define PROFILE_END(region) do {} while(0)
+
+#endif
+
+#endif
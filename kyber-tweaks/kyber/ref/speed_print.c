@@ -4,12 +4,8 @@
 #include <stdio.h>
 #include "cpucycles.h"
 #include "speed_print.h"
-
-static int cmp_uint64(const void *a, const void *b) {
-  if(*(uint64_t *)a < *(uint64_t *)b) return -1;
-  if(*(uint64_t *)a > *(uint64_t *)b) return 1;
-  return 0;
-}
+#include "perfcounters.h"
+#include "bench_util.h"
 
 static uint64_t median(uint64_t *l, size_t llen) {
   qsort(l,llen,sizeof(uint64_t),cmp_uint64);
@@ -18,6 +14,52 @@ static uint64_t median(uint64_t *l, size_t llen) {
   else return (l[llen/2-1]+l[llen/2])/2;
 }
 
+/* Log-bucketed (HDR-style) histogram in fixed memory: values below
+ * 2^HIST_SUBBITS get their own bucket, larger ones are bucketed by
+ * exponent and the HIST_SUBBITS bits after the leading one, so every
+ * bucket is at most 1/2^HIST_SUBBITS (1.6%) of its value wide */
+#define HIST_SUBBITS 6
+#define HIST_SUB (1 << HIST_SUBBITS)
+#define HIST_BUCKETS (HIST_SUB + (64 - HIST_SUBBITS)*HIST_SUB)
+
+static uint32_t hist[HIST_BUCKETS];
+
+static unsigned int hist_index(uint64_t v) {
+  unsigned int e;
+
+  if(v < HIST_SUB)
+    return v;
+  e = 63 - __builtin_clzll(v);
+  return HIST_SUB + (e - HIST_SUBBITS)*HIST_SUB + ((v >> (e - HIST_SUBBITS)) & (HIST_SUB - 1));
+}
+
+/* Sparse serialization, one line: "hist: s=<subbits> <index>:<count> ..." */
+static void print_histogram(const uint64_t *t, size_t tlen) {
+  size_t i;
+
+  for(i=0;i<HIST_BUCKETS;i++)
+    hist[i] = 0;
+  for(i=0;i<tlen;i++)
+    hist[hist_index(t[i])]++;
+
+  printf("hist: s=%d", HIST_SUBBITS);
+  for(i=0;i<HIST_BUCKETS;i++)
+    if(hist[i])
+      printf(" %zu:%u", i, hist[i]);
+  printf("\n");
+}
+
+/* Raw samples in measurement order, for warm-up detection and outlier
+ * filtering in benchmarks/sample_cleaning.py */
+static void print_samples(const uint64_t *t, size_t tlen) {
+  size_t i;
+
+  printf("samples:");
+  for(i=0;i<tlen;i++)
+    printf(" %llu", (unsigned long long)t[i]);
+  printf("\n");
+}
+
 static uint64_t average(uint64_t *t, size_t tlen) {
   size_t i;
   uint64_t acc=0;
@@ -28,9 +70,28 @@ static uint64_t average(uint64_t *t, size_t tlen) {
   return acc/tlen;
 }
 
+/* Counters run from program start and are reset after every print_results,
+ * so each reading covers exactly the loop measured since the previous one */
+__attribute__((constructor)) static void start_counters(void) {
+  perfcounters_init();
+}
+
+static void print_counters(uint64_t *counts, size_t ops) {
+  unsigned int i;
+
+  printf("perf:");
+  for(i=0;i<PERF_NCOUNTERS;i++)
+    if(counts[i] != UINT64_MAX)
+      printf(" %s=%.2f", perfcounters_name(i), (double)counts[i]/ops);
+  printf("\n");
+}
+
 void print_results(const char *s, uint64_t *t, size_t tlen) {
   size_t i;
   static uint64_t overhead = -1;
+  uint64_t counts[PERF_NCOUNTERS];
+  uint64_t *raw;
+  int ncounts = perfcounters_read(counts);
 
   if(tlen < 2) {
     fprintf(stderr, "ERROR: Need a least two cycle counts!\n");
@@ -44,8 +105,23 @@ void print_results(const char *s, uint64_t *t, size_t tlen) {
   for(i=0;i<tlen;++i)
     t[i] = t[i+1] - t[i] - overhead;
 
+  /* median() sorts t in place */
+  raw = malloc(tlen*sizeof(uint64_t));
+  if(raw)
+    for(i=0;i<tlen;++i)
+      raw[i] = t[i];
+
   printf("%s\n", s);
   printf("median: %llu cycles/ticks\n", (unsigned long long)median(t, tlen));
   printf("average: %llu cycles/ticks\n", (unsigned long long)average(t, tlen));
+  if(ncounts)
+    print_counters(counts, tlen + 1);
+  print_histogram(t, tlen);
+  if(raw) {
+    print_samples(raw, tlen);
+    free(raw);
+  }
   printf("\n");
+
+  perfcounters_reset();
 }
@@ -0,0 +1,149 @@
+/* Deterministic instruction counting of the operations timed by test_speed.
+ * Every operation runs NTESTS times inside its own non-inlined icount_*
+ * function, so a deterministic counter (valgrind --tool=callgrind, read
+ * by benchmarks/icount_bench.py) can attribute exact instruction and
+ * memory-access counts to it. Where perf_event_open counters are available
+ * (i.e. not under valgrind) their per-operation averages are printed too.
+ *
+ * randombytes is the deterministic generator of test_vectors.c, so two runs
+ * of the same binary execute exactly the same instructions. */
+
+#include <stddef.h>
+#include <stdint.h>
+#include <stdio.h>
+#include "kem.h"
+#include "params.h"
+#include "indcpa.h"
+#include "polyvec.h"
+#include "poly.h"
+#include "randombytes.h"
+#include "perfcounters.h"
+
+#define NTESTS 16
+
+/* Deterministic randombytes by Daniel J. Bernstein */
+/* taken from SUPERCOP (https://bench.cr.yp.to)     */
+static uint32_t rseed[32] = {
+  3,1,4,1,5,9,2,6,5,3,5,8,9,7,9,3,2,3,8,4,6,2,6,4,3,3,8,3,2,7,9,5
+};
+static uint32_t in[12];
+static uint32_t out[8];
+static int outleft = 0;
+
+#define ROTATE(x,b) (((x) << (b)) | ((x) >> (32 - (b))))
+#define MUSH(i,b) x = t[i] += (((x ^ rseed[i]) + sum) ^ ROTATE(x,b));
+
+static void surf(void)
+{
+  uint32_t t[12]; uint32_t x; uint32_t sum = 0;
+  int r; int i; int loop;
+
+  for (i = 0;i < 12;++i) t[i] = in[i] ^ rseed[12 + i];
+  for (i = 0;i < 8;++i) out[i] = rseed[24 + i];
+  x = t[11];
+  for (loop = 0;loop < 2;++loop) {
+    for (r = 0;r < 16;++r) {
+      sum += 0x9e3779b9;
+      MUSH(0,5) MUSH(1,7) MUSH(2,9) MUSH(3,13)
+      MUSH(4,5) MUSH(5,7) MUSH(6,9) MUSH(7,13)
+      MUSH(8,5) MUSH(9,7) MUSH(10,9) MUSH(11,13)
+    }
+    for (i = 0;i < 8;++i) out[i] ^= t[i + 4];
+  }
+}
+
+void randombytes(uint8_t *x,size_t xlen)
+{
+  while (xlen > 0) {
+    if (!outleft) {
+      if (!++in[0]) if (!++in[1]) if (!++in[2]) ++in[3];
+      surf();
+      outleft = 8;
+    }
+    *x = out[--outleft];
+    ++x;
+    --xlen;
+  }
+}
+
+static uint8_t seed[KYBER_SYMBYTES] = {0};
+static uint8_t pk[CRYPTO_PUBLICKEYBYTES];
+static uint8_t sk[CRYPTO_SECRETKEYBYTES];
+static uint8_t ct[CRYPTO_CIPHERTEXTBYTES];
+static uint8_t key[CRYPTO_BYTES];
+static polyvec matrix[KYBER_K];
+static poly ap;
+
+/* Names match the test_speed output so both result sets line up */
+#define ICOUNT(name, stmt) \
+  static void __attribute__((noinline)) icount_##name(void) { \
+    unsigned int i; \
+    for(i=0;i<NTESTS;i++) { stmt; } \
+  }
+
+ICOUNT(gen_a, gen_matrix(matrix, seed, 0))
+ICOUNT(poly_getnoise_eta1, poly_getnoise_eta1(&ap, seed, 0))
+ICOUNT(poly_getnoise_eta2, poly_getnoise_eta2(&ap, seed, 0))
+ICOUNT(NTT, poly_ntt(&ap))
+ICOUNT(INVNTT, poly_invntt_tomont(&ap))
+ICOUNT(polyvec_basemul_acc_montgomery, polyvec_basemul_acc_montgomery(&ap, &matrix[0], &matrix[1]))
+ICOUNT(poly_tomsg, poly_tomsg(ct, &ap))
+ICOUNT(poly_frommsg, poly_frommsg(&ap, ct))
+ICOUNT(poly_compress, poly_compress(ct, &ap))
+ICOUNT(poly_decompress, poly_decompress(&ap, ct))
+ICOUNT(polyvec_compress, polyvec_compress(ct, &matrix[0]))
+ICOUNT(polyvec_decompress, polyvec_decompress(&matrix[0], ct))
+ICOUNT(indcpa_keypair, indcpa_keypair(pk, sk))
+ICOUNT(indcpa_enc, indcpa_enc(ct, key, pk, seed))
+ICOUNT(indcpa_dec, indcpa_dec(key, ct, sk))
+ICOUNT(kyber_keypair, crypto_kem_keypair(pk, sk))
+ICOUNT(kyber_encaps, crypto_kem_enc(ct, key, pk))
+ICOUNT(kyber_decaps, crypto_kem_dec(key, ct, sk))
+
+static void run(const char *s, void (*f)(void)) {
+  unsigned int i;
+  int counted;
+  uint64_t counts[PERF_NCOUNTERS];
+
+  /* Read the counters before printing, so stdio is not counted */
+  perfcounters_reset();
+  f();
+  counted = perfcounters_read(counts);
+
+  printf("%s\n", s);
+  printf("calls: %d\n", NTESTS);
+  if(counted) {
+    printf("perf:");
+    for(i=0;i<PERF_NCOUNTERS;i++)
+      if(counts[i] != UINT64_MAX)
+        printf(" %s=%.2f", perfcounters_name(i), (double)counts[i]/NTESTS);
+    printf("\n");
+  }
+  printf("\n");
+}
+
+int main(void)
+{
+  perfcounters_init();
+
+  run("gen_a: ", icount_gen_a);
+  run("poly_getnoise_eta1: ", icount_poly_getnoise_eta1);
+  run("poly_getnoise_eta2: ", icount_poly_getnoise_eta2);
+  run("NTT: ", icount_NTT);
+  run("INVNTT: ", icount_INVNTT);
+  run("polyvec_basemul_acc_montgomery: ", icount_polyvec_basemul_acc_montgomery);
+  run("poly_tomsg: ", icount_poly_tomsg);
+  run("poly_frommsg: ", icount_poly_frommsg);
+  run("poly_compress: ", icount_poly_compress);
+  run("poly_decompress: ", icount_poly_decompress);
+  run("polyvec_compress: ", icount_polyvec_compress);
+  run("polyvec_decompress: ", icount_polyvec_decompress);
+  run("indcpa_keypair: ", icount_indcpa_keypair);
+  run("indcpa_enc: ", icount_indcpa_enc);
+  run("indcpa_dec: ", icount_indcpa_dec);
+  run("kyber_keypair: ", icount_kyber_keypair);
+  run("kyber_encaps: ", icount_kyber_encaps);
+  run("kyber_decaps: ", icount_kyber_decaps);
+
+  return 0;
+}
@@ -0,0 +1,33 @@
+#include <stddef.h>
+#include <stdint.h>
+#include <stdlib.h>
+#include <stdio.h>
+#include "kem.h"
+#include "params.h"
+
+#define NTESTS 1000
+
+/* Runs NTESTS keypair/encaps/decaps calls of a KYBER_PROFILE build; the
+ * per-region cycle table is written out at exit (see profile.h) */
+int main(int argc, char **argv)
+{
+  size_t i, ntests = NTESTS;
+  uint8_t pk[CRYPTO_PUBLICKEYBYTES];
+  uint8_t sk[CRYPTO_SECRETKEYBYTES];
+  uint8_t ct[CRYPTO_CIPHERTEXTBYTES];
+  uint8_t key_a[CRYPTO_BYTES];
+  uint8_t key_b[CRYPTO_BYTES];
+
+  if(argc > 1)
+    ntests = strtoul(argv[1], NULL, 10);
+  if(ntests == 0)
+    ntests = NTESTS;
+
+  for(i=0;i<ntests;i++) {
+    crypto_kem_keypair(pk, sk);
+    crypto_kem_enc(ct, key_a, pk);
+    crypto_kem_dec(key_b, ct, sk);
+  }
+
+  return 0;
+}
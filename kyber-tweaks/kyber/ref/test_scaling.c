@@ -0,0 +1,100 @@
+#include <stddef.h>
+#include <stdint.h>
+#include <stdlib.h>
+#include <stdio.h>
+#include "kem.h"
+#include "params.h"
+#include "cpucycles.h"
+#include "bench_util.h"
+
+#define NTESTS 1000
+
+/* One worker of the multi-core scaling benchmark (benchmarks/scaling_bench.py).
+ * The driver starts several copies pinned to different cores; each copy
+ * reports its raw per-operation cycle samples and its own ops/s, so the
+ * driver can aggregate throughput and compare per-worker latency. */
+
+static void print_op(const char *s, uint64_t *t, size_t ntests, double elapsed) {
+  size_t i;
+  uint64_t acc = 0;
+  uint64_t *sorted = malloc(ntests*sizeof(uint64_t));
+
+  for(i=0;i<ntests;i++)
+    acc += t[i];
+
+  printf("%s samples:", s);
+  for(i=0;i<ntests;i++)
+    printf(" %llu", (unsigned long long)t[i]);
+  printf("\n");
+
+  if(sorted) {
+    for(i=0;i<ntests;i++)
+      sorted[i] = t[i];
+    qsort(sorted, ntests, sizeof(uint64_t), cmp_uint64);
+    printf("%s median: %llu cycles average: %llu cycles throughput: %.0f ops/s\n", s,
+           (unsigned long long)sorted[ntests/2], (unsigned long long)(acc/ntests),
+           (double)ntests/elapsed);
+    free(sorted);
+  }
+}
+
+int main(int argc, char **argv)
+{
+  size_t i, ntests = NTESTS;
+  uint64_t t0, c0, *t;
+  double start, w0;
+  uint8_t pk[CRYPTO_PUBLICKEYBYTES];
+  uint8_t sk[CRYPTO_SECRETKEYBYTES];
+  uint8_t ct[CRYPTO_CIPHERTEXTBYTES];
+  uint8_t key[CRYPTO_BYTES];
+
+  if(argc > 1)
+    ntests = strtoul(argv[1], NULL, 10);
+  if(ntests == 0)
+    ntests = NTESTS;
+
+  t = malloc(ntests*sizeof(uint64_t));
+  if(!t) {
+    fprintf(stderr, "ERROR: out of memory\n");
+    return 1;
+  }
+
+  printf("params: k=%d eta1=%d eta2=%d du=%d dv=%d pk=%d ct=%d\n",
+         KYBER_K, KYBER_ETA1, KYBER_ETA2,
+         KYBER_POLYVECCOMPRESSEDBYTES*8/(KYBER_K*KYBER_N), KYBER_POLYCOMPRESSEDBYTES*8/KYBER_N,
+         CRYPTO_PUBLICKEYBYTES, CRYPTO_CIPHERTEXTBYTES);
+
+  w0 = seconds();
+  c0 = cpucycles();
+
+  start = seconds();
+  for(i=0;i<ntests;i++) {
+    t0 = cpucycles();
+    crypto_kem_keypair(pk, sk);
+    t[i] = cpucycles() - t0;
+  }
+  print_op("kyber_keypair", t, ntests, seconds() - start);
+
+  start = seconds();
+  for(i=0;i<ntests;i++) {
+    t0 = cpucycles();
+    crypto_kem_enc(ct, key, pk);
+    t[i] = cpucycles() - t0;
+  }
+  print_op("kyber_encaps", t, ntests, seconds() - start);
+
+  start = seconds();
+  for(i=0;i<ntests;i++) {
+    t0 = cpucycles();
+    crypto_kem_dec(key, ct, sk);
+    t[i] = cpucycles() - t0;
+  }
+  print_op("kyber_decaps", t, ntests, seconds() - start);
+
+  /* Cycle counter rate over the whole run, lets the driver convert
+   * cycle counts of other binaries into wall-clock throughput */
+  printf("tsc_hz: %.0f\n", (double)(cpucycles() - c0)/(seconds() - w0));
+
+  free(t);
+  return 0;
+}
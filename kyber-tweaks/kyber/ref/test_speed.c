@@ -10,6 +10,7 @@
 #include "poly.h"
 #include "cpucycles.h"
 #include "speed_print.h"
+#include "bench_util.h"
 
 #define NTESTS 1000
 
@@ -19,6 +20,8 @@ uint8_t seed[KYBER_SYMBYTES] = {0};
 int main(void)
 {
   unsigned int i;
+  uint64_t c0;
+  double w0;
   uint8_t pk[CRYPTO_PUBLICKEYBYTES];
   uint8_t sk[CRYPTO_SECRETKEYBYTES];
   uint8_t ct[CRYPTO_CIPHERTEXTBYTES];
@@ -29,6 +32,9 @@ int main(void)
   polyvec matrix[KYBER_K];
   poly ap;
 
+  w0 = seconds();
+  c0 = cpucycles();
+
   for(i=0;i<NTESTS;i++) {
     t[i] = cpucycles();
     gen_matrix(matrix, seed, 0);
@@ -173,5 +179,13 @@ int main(void)
   }
   print_results("kex_ake_sharedA: ", t, NTESTS);
 
+  /* Trailer for benchmarks/cycle_model.py: the configuration that was
+   * measured and the cycle counter rate, to convert cycles into time */
+  printf("params: k=%d eta1=%d eta2=%d du=%d dv=%d pk=%d ct=%d\n",
+         KYBER_K, KYBER_ETA1, KYBER_ETA2,
+         KYBER_POLYVECCOMPRESSEDBYTES*8/(KYBER_K*KYBER_N), KYBER_POLYCOMPRESSEDBYTES*8/KYBER_N,
+         CRYPTO_PUBLICKEYBYTES, CRYPTO_CIPHERTEXTBYTES);
+  printf("tsc_hz: %.0f\n", (double)(cpucycles() - c0)/(seconds() - w0));
+
   return 0;
 }
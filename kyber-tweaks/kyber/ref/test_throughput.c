@@ -0,0 +1,104 @@
+#include <stddef.h>
+#include <stdint.h>
+#include <stdlib.h>
+#include <stdio.h>
+#include <string.h>
+#include "kem.h"
+#include "params.h"
+#include "cpucycles.h"
+#include "bench_util.h"
+
+#define MAXBATCH 1024
+#define OPSPERPOINT 4096  /* operations measured per batch size */
+#define MINREPS 8
+
+static uint64_t t[OPSPERPOINT + MINREPS];
+
+/* One line per (operation, batch size): per-operation cycles over all
+ * repetitions, and sustained operations per second of wall-clock time */
+static void print_point(const char *s, size_t batch, uint64_t *cycles, size_t reps, double elapsed) {
+  size_t i;
+  uint64_t acc = 0;
+
+  for(i=0;i<reps;i++)
+    acc += cycles[i];
+  qsort(cycles, reps, sizeof(uint64_t), cmp_uint64);
+
+  printf("%s batch=%zu median: %llu cycles/op average: %llu cycles/op throughput: %.0f ops/s\n",
+         s, batch,
+         (unsigned long long)(cycles[reps/2]/batch),
+         (unsigned long long)(acc/(reps*batch)),
+         (double)(reps*batch)/elapsed);
+}
+
+int main(void)
+{
+  size_t i, batch, reps;
+  uint64_t t0;
+  double start;
+  uint8_t pk[CRYPTO_PUBLICKEYBYTES];
+  uint8_t sk[CRYPTO_SECRETKEYBYTES];
+  uint8_t *ct = malloc((size_t)MAXBATCH*CRYPTO_CIPHERTEXTBYTES);
+  uint8_t *ss = malloc((size_t)MAXBATCH*CRYPTO_BYTES);
+
+  if(!ct || !ss) {
+    fprintf(stderr, "ERROR: out of memory\n");
+    return 1;
+  }
+
+  printf("params: k=%d eta1=%d eta2=%d du=%d dv=%d pk=%d ct=%d\n\n",
+         KYBER_K, KYBER_ETA1, KYBER_ETA2,
+         KYBER_POLYVECCOMPRESSEDBYTES*8/(KYBER_K*KYBER_N), KYBER_POLYCOMPRESSEDBYTES*8/KYBER_N,
+         CRYPTO_PUBLICKEYBYTES, CRYPTO_CIPHERTEXTBYTES);
+
+  crypto_kem_keypair(pk, sk);
+
+  for(batch=1;batch<=MAXBATCH;batch*=2) {
+    reps = OPSPERPOINT/batch;
+    if(reps < MINREPS)
+      reps = MINREPS;
+
+    /* Back-to-back single operations, the latency-oriented baseline */
+    start = seconds();
+    for(i=0;i<reps;i++) {
+      size_t j;
+      t0 = cpucycles();
+      for(j=0;j<batch;j++)
+        crypto_kem_enc(ct + j*CRYPTO_CIPHERTEXTBYTES, ss + j*CRYPTO_BYTES, pk);
+      t[i] = cpucycles() - t0;
+    }
+    print_point("kyber_encaps", batch, t, reps, seconds() - start);
+
+    start = seconds();
+    for(i=0;i<reps;i++) {
+      t0 = cpucycles();
+      crypto_kem_enc_batch(ct, ss, pk, batch);
+      t[i] = cpucycles() - t0;
+    }
+    print_point("kyber_encaps_batch", batch, t, reps, seconds() - start);
+
+    start = seconds();
+    for(i=0;i<reps;i++) {
+      size_t j;
+      t0 = cpucycles();
+      for(j=0;j<batch;j++)
+        crypto_kem_dec(ss + j*CRYPTO_BYTES, ct + j*CRYPTO_CIPHERTEXTBYTES, sk);
+      t[i] = cpucycles() - t0;
+    }
+    print_point("kyber_decaps", batch, t, reps, seconds() - start);
+
+    start = seconds();
+    for(i=0;i<reps;i++) {
+      t0 = cpucycles();
+      crypto_kem_dec_batch(ss, ct, sk, batch);
+      t[i] = cpucycles() - t0;
+    }
+    print_point("kyber_decaps_batch", batch, t, reps, seconds() - start);
+
+    printf("\n");
+  }
+
+  free(ct);
+  free(ss);
+  return 0;
+}